@@ -0,0 +1,52 @@
+"""job_coalescing_unique_leader
+
+Revision ID: e7a41b9c3f52
+Revises: c52f0e8a9d14
+Create Date: 2026-10-18 16:42:11.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a41b9c3f52'
+down_revision: Union[str, None] = 'c52f0e8a9d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IN_FLIGHT_LEADER = "coalesced_with_id IS NULL AND status NOT IN ('DONE', 'FAILED', 'CANCELLED')"
+
+
+def upgrade() -> None:
+    # Jobs that raced to lead the same key attach to the oldest of them
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        f"SELECT id, coalesce_key FROM analysis_jobs "
+        f"WHERE coalesce_key IS NOT NULL AND {IN_FLIGHT_LEADER} ORDER BY created_at"
+    )).all()
+    leaders = {}
+    for job_id, key in rows:
+        if key in leaders:
+            bind.execute(
+                sa.text("UPDATE analysis_jobs SET coalesced_with_id = :leader_id WHERE id = :job_id"),
+                {"leader_id": leaders[key], "job_id": job_id},
+            )
+        else:
+            leaders[key] = job_id
+
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_analysis_jobs_coalesce_key_in_flight',
+            ['coalesce_key'],
+            unique=True,
+            postgresql_where=sa.text(IN_FLIGHT_LEADER),
+            sqlite_where=sa.text(IN_FLIGHT_LEADER),
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_analysis_jobs_coalesce_key_in_flight')
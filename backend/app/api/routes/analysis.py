@@ -1,34 +1,169 @@
 """
 Analysis job routes.
 """
-from datetime import datetime
-from uuid import UUID
-from typing import List
+import asyncio
+import hashlib
+import mimetypes
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID, uuid4
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
-from app.db import get_async_db
+from app.db import get_async_db, AsyncSessionLocal
 from app.models import User, MediaItem, AnalysisJob, Segment, ModelRun
-from app.core import TaskState
+from app.core import TaskState, STATE_TRANSITIONS
+from app.core.config import settings
 from app.schemas import (
     AnalysisStartRequest,
     AnalysisStartResponse,
     AnalysisStatusResponse,
+    LiveAnalysisRequest,
     AnalysisResultResponse,
+    BatchScanRequest,
+    BatchScanResponse,
+    BatchStatusRequest,
+    QueueStatusResponse,
     SegmentResponse,
     ModelRunResponse,
+    SchedulerMetricsResponse,
+    TierWaitMetrics,
 )
 from app.api.deps import get_current_user
-from fastapi import BackgroundTasks
-from app.services.simulation import simulate_analysis_pipeline
+from app.services.admission import admit, backlog_s, probe_duration_ms
+from app.services.cancellation import revoke_task
+from app.services.coalescing import coalesce_key
+from app.services.scheduling import FINISHED_STATES, HELD_TIERS, TIERS, wait_summary
+from app.services.executor import submit_live, submit_pipeline, submit_pipelines
 
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
 
 
+async def reuse_near_duplicate_result(
+    db: AsyncSession, media_item: MediaItem, options: dict
+) -> Optional[AnalysisJob]:
+    """
+    Answer an analysis with the verdict of an analysed near-duplicate.
+    
+    Uploads whose fingerprint matched earlier media (re-encodes, re-muxes)
+    get a completed job carrying a copy of the latest finished analysis of
+    that media, with its segments. Returns None when there is nothing to
+    reuse, and the job runs normally.
+    """
+    near_duplicate = (media_item.meta_info or {}).get("near_duplicate")
+    if not near_duplicate or not settings.REUSE_NEAR_DUPLICATE_RESULTS:
+        return None
+    if not options.get("reuse_near_duplicate", True):
+        return None
+    
+    result = await db.execute(
+        select(AnalysisJob)
+        .options(selectinload(AnalysisJob.segments))
+        .where(
+            AnalysisJob.media_id == UUID(near_duplicate["media_id"]),
+            AnalysisJob.status == TaskState.DONE,
+        )
+        .order_by(AnalysisJob.completed_at.desc())
+        .limit(1)
+    )
+    source_job = result.scalar_one_or_none()
+    if not source_job:
+        return None
+    
+    now = datetime.utcnow()
+    job = AnalysisJob(
+        media_id=media_item.id,
+        status=TaskState.DONE,
+        stage=TaskState.DONE,
+        progress=1.0,
+        options=options,
+        overall_score=source_job.overall_score,
+        label=source_job.label,
+        results={
+            **(source_job.results or {}),
+            "reused_from": {
+                "job_id": str(source_job.id),
+                "similarity": near_duplicate["similarity"],
+            },
+        },
+        started_at=now,
+        completed_at=now,
+    )
+    job.segments = [
+        Segment(
+            start_ms=segment.start_ms,
+            end_ms=segment.end_ms,
+            segment_type=segment.segment_type,
+            score=segment.score,
+            reason=segment.reason,
+        )
+        for segment in source_job.segments
+    ]
+    return job
+
+
+async def in_flight_leaders(db: AsyncSession, keys: List[str]) -> dict:
+    """Oldest unfinished job running the pipeline for each coalescing key."""
+    result = await db.execute(
+        select(AnalysisJob)
+        .where(
+            AnalysisJob.coalesce_key.in_(keys),
+            AnalysisJob.coalesced_with_id.is_(None),
+            AnalysisJob.status.notin_(FINISHED_STATES),
+        )
+        # Newest first, so the oldest job of a key is the one kept
+        .order_by(AnalysisJob.created_at.desc())
+    )
+    return {job.coalesce_key: job for job in result.scalars().all()}
+
+
+def follower_row(media_id, leader: AnalysisJob, priority: str, key: str, now: datetime) -> dict:
+    """Column values of a job attached to `leader`'s analysis."""
+    return {
+        "id": uuid4(),
+        "media_id": media_id,
+        "status": TaskState.PENDING,
+        "stage": TaskState.PENDING,
+        "options": leader.options,
+        "priority": priority,
+        "estimated_cost_s": 0.0,
+        "coalesce_key": key,
+        "coalesced_with_id": leader.id,
+        "started_at": now,
+    }
+
+
+async def attach_to_leader(db: AsyncSession, media_id, leader: AnalysisJob, priority: str, key: str) -> AnalysisStartResponse:
+    """Start a job that waits for `leader`'s analysis and gets a copy of its results."""
+    job = AnalysisJob(**follower_row(media_id, leader, priority, key, datetime.utcnow()))
+    db.add(job)
+    await db.commit()
+    return AnalysisStartResponse(
+        job_id=job.id,
+        status=leader.status,
+        stage=leader.stage,
+        quality=(leader.options or {}).get("quality", "full")
+    )
+
+
+async def current_backlog_s(db: AsyncSession) -> float:
+    """Worker-seconds of dispatched work not yet done (see `app.services.admission`)."""
+    result = await db.execute(
+        select(AnalysisJob.status, func.sum(AnalysisJob.estimated_cost_s))
+        .where(AnalysisJob.dispatched_at.isnot(None), AnalysisJob.status.notin_(FINISHED_STATES))
+        .group_by(AnalysisJob.status)
+    )
+    return backlog_s(result.all())
+
+
 @router.post("/start", response_model=AnalysisStartResponse, status_code=status.HTTP_201_CREATED)
 async def start_analysis(
     request: AnalysisStartRequest,
@@ -36,7 +171,17 @@ async def start_analysis(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Start a new analysis job for a media item."""
+    """
+    Start a new analysis job for a media item.
+    
+    Interactive jobs pass admission control: under load they run at a
+    cheaper quality tier (reported as `quality`), and once the backlog is
+    too long they are rejected with 429 and a Retry-After header.
+    
+    While identical media (by content hash) is being analysed with the
+    same options for anyone, the new job attaches to that analysis and
+    gets a copy of its results (`app.services.coalescing`).
+    """
     # Find the media item and verify ownership
     result = await db.execute(
         select(MediaItem).where(
@@ -69,29 +214,292 @@ async def start_analysis(
         return AnalysisStartResponse(
             job_id=existing_job.id,
             status=existing_job.status,
-            stage=existing_job.stage
+            stage=existing_job.stage,
+            quality=(existing_job.options or {}).get("quality", "full")
         )
     
     # Create new analysis job
     options = request.options.model_dump() if request.options else {}
     
+    # Re-encodes of already analysed media reuse the earlier verdict
+    reused_job = await reuse_near_duplicate_result(db, media_item, options)
+    if reused_job:
+        db.add(reused_job)
+        await db.commit()
+        await db.refresh(reused_job)
+        return AnalysisStartResponse(
+            job_id=reused_job.id,
+            status=reused_job.status,
+            stage=reused_job.stage
+        )
+    
+    priority = options.get("priority", "interactive")
+    key = coalesce_key(media_item.sha256, options)
+    leader = (await in_flight_leaders(db, [key])).get(key)
+    if leader:
+        return await attach_to_leader(db, request.media_id, leader, priority, key)
+    
+    # Admission control: full quality, a cheaper tier under load, or not now
+    if media_item.duration_ms is None:
+        media_item.duration_ms = await run_in_threadpool(
+            probe_duration_ms, media_item.storage_path, media_item.media_type
+        )
+    admission = admit(options, media_item.duration_ms, media_item.media_type, await current_backlog_s(db), priority)
+    if admission.quality is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Analysis capacity is exhausted; retry later",
+            headers={"Retry-After": str(admission.retry_after_s)}
+        )
+    
     job = AnalysisJob(
         media_id=request.media_id,
         status=TaskState.PENDING,
         stage=TaskState.PENDING,
-        options=options,
+        options=admission.options,
+        priority=priority,
+        estimated_cost_s=admission.estimated_cost_s,
+        coalesce_key=key,
         started_at=datetime.utcnow()
     )
     
+    # Batch and backfill jobs wait for the scheduler to give them a slot
+    if priority not in HELD_TIERS:
+        job.dispatched_at = job.started_at
+    
     db.add(job)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request started the same analysis since the lookup above
+        await db.rollback()
+        leader = (await in_flight_leaders(db, [key])).get(key)
+        if not leader:
+            raise
+        return await attach_to_leader(db, request.media_id, leader, priority, key)
     await db.refresh(job)
     
-    # Trigger Simulation Task (Temporary until Celery is fully configured)
-    background_tasks.add_task(simulate_analysis_pipeline, job.id)
+    # Submitted from the thread pool once the response is out
+    if priority not in HELD_TIERS:
+        background_tasks.add_task(submit_pipeline, job.id)
+    
+    return AnalysisStartResponse(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        quality=admission.quality
+    )
+
+
+def check_batch_size(count: int) -> None:
+    if count > settings.ANALYSIS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.ANALYSIS_BATCH_MAX_ITEMS} items per request"
+        )
+
+
+@router.post("/batch", response_model=BatchScanResponse, status_code=status.HTTP_201_CREATED)
+async def start_batch_analysis(
+    request: BatchScanRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start analysis jobs for many media items in one request.
+    
+    The media are loaded in one query and the jobs created with one
+    multi-row insert. Media that already have an unfinished job keep it,
+    and its id is returned in their place, and media identical to media
+    being analysed with the same options attach to that analysis. Jobs
+    run in the batch tier unless the options name another; interactive
+    batches pass admission control as a whole and are rejected with 429
+    if any job would be.
+    """
+    media_ids = list(dict.fromkeys(request.media_ids))
+    check_batch_size(len(media_ids))
+    
+    result = await db.execute(
+        select(MediaItem).where(
+            MediaItem.id.in_(media_ids),
+            MediaItem.user_id == current_user.id
+        )
+    )
+    media_items = {item.id: item for item in result.scalars().all()}
+    missing = [str(media_id) for media_id in media_ids if media_id not in media_items]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Media items not found: {', '.join(missing)}"
+        )
+    
+    # Media already being analysed keep their job
+    result = await db.execute(
+        select(AnalysisJob.media_id, AnalysisJob.id).where(
+            AnalysisJob.media_id.in_(media_ids),
+            AnalysisJob.status.notin_(FINISHED_STATES)
+        )
+    )
+    job_ids = dict(result.all())
+    
+    options = request.options.model_dump() if request.options else {}
+    # Bulk submissions share the leftover capacity unless told otherwise
+    if not request.options or "priority" not in request.options.model_fields_set:
+        options["priority"] = "batch"
+    priority = options["priority"]
+    
+    # Re-encodes of already analysed media reuse the earlier verdict
+    reused_jobs = []
+    for media_id in media_ids:
+        if media_id in job_ids:
+            continue
+        reused_job = await reuse_near_duplicate_result(db, media_items[media_id], options)
+        if reused_job:
+            reused_job.id = uuid4()
+            db.add(reused_job)
+            reused_jobs.append(reused_job)
+            job_ids[media_id] = reused_job.id
+    
+    new_media = [media_items[media_id] for media_id in media_ids if media_id not in job_ids]
+    keys = {item.id: coalesce_key(item.sha256, options) for item in new_media}
+    leaders = await in_flight_leaders(db, list(keys.values()))
+    now = datetime.utcnow()
+    rows = []
+    for item in new_media:
+        leader = leaders.get(keys[item.id])
+        if leader:
+            rows.append(follower_row(item.id, leader, priority, keys[item.id], now))
+            job_ids[item.id] = rows[-1]["id"]
+    attached = len(rows)
+    new_media = [item for item in new_media if item.id not in job_ids]
+    
+    unprobed = [item for item in new_media if item.duration_ms is None]
+    if unprobed:
+        durations = await run_in_threadpool(
+            lambda: [probe_duration_ms(item.storage_path, item.media_type) for item in unprobed]
+        )
+        for item, duration_ms in zip(unprobed, durations):
+            item.duration_ms = duration_ms
+    
+    # Admission control over the whole batch: each job adds to the backlog the next one sees
+    backlog = await current_backlog_s(db)
+    for item in new_media:
+        admission = admit(options, item.duration_ms, item.media_type, backlog, priority)
+        if admission.quality is None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Analysis capacity is exhausted; retry later",
+                headers={"Retry-After": str(admission.retry_after_s)}
+            )
+        if priority not in HELD_TIERS:
+            backlog += admission.estimated_cost_s
+        rows.append({
+            "id": uuid4(),
+            "media_id": item.id,
+            "status": TaskState.PENDING,
+            "stage": TaskState.PENDING,
+            "options": admission.options,
+            "priority": priority,
+            "estimated_cost_s": admission.estimated_cost_s,
+            "coalesce_key": keys[item.id],
+            "started_at": now,
+            # Batch and backfill jobs wait for the scheduler to give them a slot
+            "dispatched_at": None if priority in HELD_TIERS else now,
+        })
+        job_ids[item.id] = rows[-1]["id"]
+    
+    try:
+        if rows:
+            await db.execute(insert(AnalysisJob), rows)
+        await db.commit()
+    except IntegrityError:
+        # Other requests started some of these analyses since the lookup above
+        await db.rollback()
+        leaders = await in_flight_leaders(db, [row["coalesce_key"] for row in rows[attached:]])
+        raced = [row for row in rows[attached:] if row["coalesce_key"] in leaders]
+        if not raced:
+            raise
+        followers = [
+            {**follower_row(row["media_id"], leaders[row["coalesce_key"]], priority, row["coalesce_key"], now), "id": row["id"]}
+            for row in raced
+        ]
+        raced_ids = {row["id"] for row in raced}
+        rows = rows[:attached] + followers + [row for row in rows[attached:] if row["id"] not in raced_ids]
+        attached += len(followers)
+        for reused_job in reused_jobs:
+            db.add(reused_job)
+        await db.execute(insert(AnalysisJob), rows)
+        await db.commit()
+    
+    if priority not in HELD_TIERS and rows[attached:]:
+        background_tasks.add_task(submit_pipelines, [row["id"] for row in rows[attached:]])
+    
+    return BatchScanResponse(
+        job_ids=[job_ids[media_id] for media_id in media_ids],
+        total=len(media_ids)
+    )
+
+
+def live_mime_type(source: Path) -> str:
+    """MIME type recorded for a live source."""
+    if source.is_dir():
+        return "application/dash+xml" if any(source.glob("*.mpd")) else "application/vnd.apple.mpegurl"
+    return mimetypes.guess_type(source.name)[0] or "video/mp2t"
+
+
+@router.post("/live", response_model=AnalysisStartResponse, status_code=status.HTTP_201_CREATED)
+async def start_live_analysis(
+    request: LiveAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start analysing a live source under LIVE_INGEST_ROOT: a growing file,
+    an HLS playlist or a directory of HLS/DASH segments.
+    
+    The job scores new media as it lands, publishes a rolling verdict on
+    its status and finishes once the source ends.
+    """
+    ingest_root = Path(settings.LIVE_INGEST_ROOT).resolve()
+    source = (ingest_root / request.source_path).resolve()
+    if not source.is_relative_to(ingest_root) or not source.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Live source not found"
+        )
+    
+    now = datetime.utcnow()
+    # A live source has no final content to hash; each session is its own item
+    media_item = MediaItem(
+        user_id=current_user.id,
+        filename=source.name,
+        original_filename=source.name,
+        sha256=hashlib.sha256(f"live:{source}:{now.isoformat()}".encode()).hexdigest(),
+        file_size=0,
+        media_type="video",
+        mime_type=live_mime_type(source),
+        storage_path=str(source),
+        meta_info={"live": True},
+    )
+    db.add(media_item)
+    await db.flush()
+    
+    job = AnalysisJob(
+        media_id=media_item.id,
+        status=TaskState.PENDING,
+        stage=TaskState.PENDING,
+        options=request.options.model_dump() if request.options else {},
+        started_at=now,
+        dispatched_at=now
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
     
-    # from app.workers.preprocess import run_analysis_pipeline
-    # run_analysis_pipeline.delay(str(job.id))
+    # Submitted from the thread pool once the response is out
+    background_tasks.add_task(submit_live, job.id, str(source))
     
     return AnalysisStartResponse(
         job_id=job.id,
@@ -100,6 +508,116 @@ async def start_analysis(
     )
 
 
+@router.get("/scheduler", response_model=SchedulerMetricsResponse)
+async def get_scheduler_metrics(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Per-tier scheduling metrics: jobs held, queued and running, and the
+    wait from submission to pickup of jobs picked up within
+    SCHEDULER_METRICS_WINDOW_S.
+    """
+    tiers = {tier: {"held": 0, "queued": 0, "running": 0} for tier in TIERS}
+    
+    result = await db.execute(
+        select(
+            AnalysisJob.priority,
+            AnalysisJob.status,
+            AnalysisJob.dispatched_at.isnot(None),
+            func.count(AnalysisJob.id),
+        )
+        .where(AnalysisJob.status.notin_(FINISHED_STATES))
+        .group_by(AnalysisJob.priority, AnalysisJob.status, AnalysisJob.dispatched_at.isnot(None))
+    )
+    for priority, job_status, dispatched, count in result.all():
+        counts = tiers.setdefault(priority, {"held": 0, "queued": 0, "running": 0})
+        if not dispatched:
+            counts["held"] += count
+        elif job_status == TaskState.PENDING:
+            counts["queued"] += count
+        else:
+            counts["running"] += count
+    
+    since = datetime.utcnow() - timedelta(seconds=settings.SCHEDULER_METRICS_WINDOW_S)
+    result = await db.execute(
+        select(AnalysisJob.priority, AnalysisJob.queue_wait_ms)
+        .where(AnalysisJob.queue_wait_ms.isnot(None), AnalysisJob.created_at >= since)
+    )
+    waits = {}
+    for priority, wait_ms in result.all():
+        waits.setdefault(priority, []).append(wait_ms)
+    
+    return SchedulerMetricsResponse(
+        window_s=settings.SCHEDULER_METRICS_WINDOW_S,
+        tiers={
+            tier: TierWaitMetrics(**counts, **wait_summary(waits.get(tier, [])))
+            for tier, counts in tiers.items()
+        },
+    )
+
+
+@router.get("/queue", response_model=QueueStatusResponse)
+async def get_queue_status(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Counts of the current user's analysis jobs by state, from one aggregate query."""
+    result = await db.execute(
+        select(AnalysisJob.status, func.count(AnalysisJob.id))
+        .join(MediaItem)
+        .where(MediaItem.user_id == current_user.id)
+        .group_by(AnalysisJob.status)
+    )
+    counts = dict(result.all())
+    return QueueStatusResponse(
+        pending=counts.pop(TaskState.PENDING, 0),
+        completed=counts.pop(TaskState.DONE, 0),
+        failed=counts.pop(TaskState.FAILED, 0),
+        processing=sum(
+            count for job_status, count in counts.items() if job_status != TaskState.CANCELLED
+        ),
+    )
+
+
+@router.post("/status", response_model=List[AnalysisStatusResponse])
+async def get_batch_status(
+    request: BatchStatusRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Status of many analysis jobs in one round trip, in request order.
+    Jobs that do not exist or belong to another user are left out.
+    """
+    job_ids = list(dict.fromkeys(request.job_ids))
+    check_batch_size(len(job_ids))
+    
+    result = await db.execute(
+        select(AnalysisJob)
+        .join(MediaItem)
+        .where(
+            AnalysisJob.id.in_(job_ids),
+            MediaItem.user_id == current_user.id
+        )
+    )
+    jobs = {job.id: job for job in result.scalars().all()}
+    
+    # Attached jobs report the progress of the analysis they wait for
+    leader_ids = {
+        job.coalesced_with_id for job in jobs.values()
+        if job.coalesced_with_id and job.status not in FINISHED_STATES
+    }
+    leaders = {}
+    if leader_ids:
+        result = await db.execute(select(AnalysisJob).where(AnalysisJob.id.in_(leader_ids)))
+        leaders = {job.id: job for job in result.scalars().all()}
+    return [
+        status_response(jobs[job_id], leaders.get(jobs[job_id].coalesced_with_id))
+        for job_id in job_ids if job_id in jobs
+    ]
+
+
 @router.get("/{job_id}/status", response_model=AnalysisStatusResponse)
 async def get_analysis_status(
     job_id: UUID,
@@ -127,13 +645,152 @@ async def get_analysis_status(
     
     print(f"DEBUG: Found job id={job_id}, stage={job.stage}, status={job.status}")
     
+    return status_response(job, await leader_of(db, job))
+
+
+@router.post("/{job_id}/cancel", response_model=AnalysisStatusResponse)
+async def cancel_analysis(
+    job_id: UUID,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cancel an analysis job.
+    
+    A queued job's task is revoked; a running one stops at its next
+    cancellation check and releases its working files. Finished jobs
+    cannot be cancelled. Jobs of other users attached to this one are
+    handed to the oldest of them, which is started in its place.
+    """
+    result = await db.execute(
+        select(AnalysisJob)
+        .join(MediaItem)
+        .where(
+            AnalysisJob.id == job_id,
+            MediaItem.user_id == current_user.id
+        )
+    )
+    job = result.scalar_one_or_none()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    
+    if TaskState.CANCELLED not in STATE_TRANSITIONS.get(job.status, []):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Analysis job is already {job.status}"
+        )
+    
+    job.status = TaskState.CANCELLED
+    job.stage = TaskState.CANCELLED
+    job.completed_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(job)
+    
+    if job.celery_task_id:
+        await run_in_threadpool(revoke_task, job.celery_task_id)
+    
+    # Other users' jobs attached to this one still want their verdict
+    result = await db.execute(
+        select(AnalysisJob)
+        .where(AnalysisJob.coalesced_with_id == job.id, AnalysisJob.status.notin_(FINISHED_STATES))
+        .order_by(AnalysisJob.created_at)
+    )
+    followers = result.scalars().all()
+    if followers:
+        successor, *rest = followers
+        successor.coalesced_with_id = None
+        successor.estimated_cost_s = job.estimated_cost_s
+        for follower in rest:
+            follower.coalesced_with_id = successor.id
+        # Held successors are left to the scheduler
+        if successor.priority not in HELD_TIERS:
+            successor.dispatched_at = datetime.utcnow()
+            background_tasks.add_task(submit_pipeline, successor.id)
+        await db.commit()
+    
+    return status_response(job)
+
+
+async def leader_of(db: AsyncSession, job: AnalysisJob) -> Optional[AnalysisJob]:
+    """The job running the analysis an unfinished attached job waits for."""
+    if not job.coalesced_with_id or job.status in FINISHED_STATES:
+        return None
+    return await db.get(AnalysisJob, job.coalesced_with_id)
+
+
+def status_response(job: AnalysisJob, leader: Optional[AnalysisJob] = None) -> AnalysisStatusResponse:
+    """
+    Status of a job, with its provisional verdict while inference runs (or
+    the stream is live). A job attached to another reports that job's progress.
+    """
+    # Until the leader's outcome is copied over, a finished leader is not this job's outcome
+    tracked = leader if leader is not None and leader.status not in FINISHED_STATES else job
     return AnalysisStatusResponse(
         job_id=job.id,
-        status=job.status,
-        stage=job.stage,
-        progress=job.progress,
+        status=tracked.status,
+        stage=tracked.stage,
+        progress=tracked.progress,
         error_message=job.error_message,
-        started_at=job.started_at
+        started_at=job.started_at,
+        provisional=(tracked.results or {}).get("provisional"),
+        live=(tracked.results or {}).get("live"),
+    )
+
+
+@router.get("/{job_id}/events")
+async def stream_analysis_events(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream an analysis job's status as server-sent events.
+    
+    An event is sent whenever the stage, progress or provisional verdict
+    changes, and the stream ends once the job is done, has failed or was
+    cancelled.
+    """
+    result = await db.execute(
+        select(AnalysisJob.id)
+        .join(MediaItem)
+        .where(
+            AnalysisJob.id == job_id,
+            MediaItem.user_id == current_user.id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    
+    async def events():
+        last_payload = None
+        while True:
+            # A fresh session per poll, so each read sees the workers' latest commit
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                leader = await leader_of(session, job) if job else None
+            if job is None:
+                return
+            
+            payload = status_response(job, leader).model_dump_json()
+            if payload != last_payload:
+                yield f"event: status\ndata: {payload}\n\n"
+                last_payload = payload
+            if job.status in (TaskState.DONE, TaskState.FAILED, TaskState.CANCELLED):
+                return
+            await asyncio.sleep(settings.PROGRESS_STREAM_INTERVAL_S)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
     )
 
 
@@ -5,7 +5,8 @@ from uuid import UUID
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
@@ -19,10 +20,30 @@ from app.schemas import (
     TranscriptResponse,
 )
 from app.api.deps import get_current_user
+from app.services.artifacts import resolve
+from app.services.ml_runtime import ensure_ml_path
 
 
 router = APIRouter(prefix="/analysis", tags=["Evidence"])
 
+# As inference.frame_store.FRAME_STORE_SUFFIX
+FRAME_STORE_SUFFIX = ".frames"
+
+
+def render_store_frame(store_path: str, index: int = None, timestamp_ms: int = None) -> bytes:
+    """PNG of one frame of a job's frame store, by index or nearest timestamp."""
+    ensure_ml_path()
+    import cv2
+    from inference.frame_store import FrameStore
+    
+    store = FrameStore(store_path)
+    if index is None:
+        index = store.index_at(timestamp_ms)
+    ok, encoded = cv2.imencode(".png", cv2.cvtColor(store[index], cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise ValueError(f"Cannot encode frame {index} of {store_path}")
+    return encoded.tobytes()
+
 
 @router.get("/{job_id}/evidence/timeline", response_model=TimelineResponse)
 async def get_evidence_timeline(
@@ -102,12 +123,64 @@ async def get_evidence_frame(
             detail="Frame file not found"
         )
     
+    if file_path.suffix == FRAME_STORE_SUFFIX:
+        # Frames in the job's frame store are addressed by index
+        try:
+            png = await run_in_threadpool(render_store_frame, str(file_path), int(artifact.frame_number))
+        except (IndexError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Frame not found"
+            )
+        return Response(content=png, media_type="image/png")
+    
     return FileResponse(
         path=str(file_path),
         media_type="image/png"
     )
 
 
+@router.get("/{job_id}/evidence/frame-at/{timestamp_ms}")
+async def get_evidence_frame_at(
+    job_id: UUID,
+    timestamp_ms: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the extracted frame nearest a timestamp, e.g. a timeline marker."""
+    result = await db.execute(
+        select(AnalysisJob)
+        .join(MediaItem)
+        .where(
+            AnalysisJob.id == job_id,
+            MediaItem.user_id == current_user.id
+        )
+    )
+    job = result.scalar_one_or_none()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    
+    store_path = ((job.results or {}).get("frames") or {}).get("frame_store")
+    if not store_path or not Path(store_path).exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No extracted frames for this job"
+        )
+    
+    try:
+        png = await run_in_threadpool(render_store_frame, store_path, timestamp_ms=timestamp_ms)
+    except IndexError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No extracted frames for this job"
+        )
+    return Response(content=png, media_type="image/png")
+
+
 @router.get("/{job_id}/evidence/spectrogram/{segment_id}")
 async def get_evidence_spectrogram(
     job_id: UUID,
@@ -171,8 +244,9 @@ async def get_transcript(
             detail="Analysis job not found"
         )
     
-    # Get transcript from job results
+    # Get transcript from job results; pipeline jobs store it in the artifact store
     transcript_data = job.results.get("transcript", {}) if job.results else {}
+    transcript_data = await run_in_threadpool(resolve, transcript_data)
     
     return TranscriptResponse(
         job_id=job.id,
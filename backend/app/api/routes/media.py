@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -18,6 +19,7 @@ from app.models import User, MediaItem
 from app.core.config import settings
 from app.schemas import MediaUploadResponse, MediaItemResponse
 from app.api.deps import get_current_user
+from app.services.fingerprints import compute_media_fingerprint, find_near_duplicate, index_media
 
 
 router = APIRouter(prefix="/media", tags=["Media"])
@@ -118,6 +120,22 @@ async def upload_media(
     # Determine media type
     media_type = get_media_type(file.content_type)
     
+    # Perceptual fingerprint: catches re-encodes of media seen before,
+    # which the SHA-256 check misses. Decoding runs off the event loop.
+    meta_info = {}
+    fingerprint = await run_in_threadpool(compute_media_fingerprint, str(file_path), media_type)
+    near_duplicate = None
+    if fingerprint:
+        near_duplicate = await run_in_threadpool(find_near_duplicate, fingerprint)
+        meta_info["fingerprint"] = {kind: len(codes) for kind, codes in fingerprint.items()}
+    if near_duplicate:
+        meta_info["near_duplicate"] = {
+            "media_id": near_duplicate["item_id"],
+            "similarity": near_duplicate["similarity"],
+            "video_similarity": near_duplicate["video_similarity"],
+            "audio_similarity": near_duplicate["audio_similarity"],
+        }
+    
     # Create media item
     media_item = MediaItem(
         user_id=current_user.id,
@@ -128,6 +146,7 @@ async def upload_media(
         media_type=media_type,
         mime_type=file.content_type,
         storage_path=str(file_path),
+        meta_info=meta_info,
         expires_at=datetime.utcnow() + timedelta(days=30)  # 30-day retention
     )
     
@@ -135,6 +154,9 @@ async def upload_media(
     await db.commit()
     await db.refresh(media_item)
     
+    if fingerprint:
+        await run_in_threadpool(index_media, str(media_item.id), fingerprint)
+    
     return MediaUploadResponse(
         id=media_item.id,
         filename=media_item.filename,
@@ -142,7 +164,8 @@ async def upload_media(
         media_type=media_item.media_type,
         duration_ms=media_item.duration_ms,
         file_size=media_item.file_size,
-        created_at=media_item.created_at
+        created_at=media_item.created_at,
+        near_duplicate_similarity=near_duplicate["similarity"] if near_duplicate else None,
     )
 
 
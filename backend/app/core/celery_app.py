@@ -7,12 +7,15 @@ from .config import settings
 
 celery_app = Celery(
     "deepfakeshield",
-    broker=settings.CELERY_BROKER_URL,
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
         "app.workers.preprocess",
         "app.workers.inference",
         "app.workers.report",
+        "app.workers.live",
+        "app.workers.maintenance",
+        "app.workers.scheduler",
     ]
 )
 
@@ -29,6 +32,28 @@ celery_app.conf.update(
         "app.workers.preprocess.*": {"queue": "preprocess"},
         "app.workers.inference.*": {"queue": "inference"},
         "app.workers.report.*": {"queue": "default"},
+        "app.workers.live.*": {"queue": "live"},
+        "app.workers.maintenance.*": {"queue": "default"},
+        "app.workers.scheduler.*": {"queue": "default"},
+    },
+    
+    # Message priorities (0 is consumed first), used for the job priority tiers
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    
+    # Periodic tasks (run a default worker with -B, or celery beat)
+    beat_schedule={
+        "purge-expired-media": {
+            "task": "app.workers.maintenance.purge_expired_media",
+            "schedule": settings.MEDIA_SWEEP_INTERVAL_S,
+        },
+        "dispatch-held-jobs": {
+            "task": "app.workers.scheduler.dispatch_held_jobs",
+            "schedule": settings.SCHEDULER_INTERVAL_S,
+        },
     },
     
     # Retry policy
@@ -54,21 +79,26 @@ class TaskState:
     LIPSYNC = "LIPSYNC"
     FUSION = "FUSION"
     REPORT = "REPORT"
+    LIVE = "LIVE"
     DONE = "DONE"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
 
 
 # State machine transitions
 STATE_TRANSITIONS = {
-    TaskState.PENDING: [TaskState.VALIDATING, TaskState.FAILED],
-    TaskState.VALIDATING: [TaskState.EXTRACTING, TaskState.FAILED],
-    TaskState.EXTRACTING: [TaskState.TRANSCRIBING, TaskState.FAILED],
-    TaskState.TRANSCRIBING: [TaskState.INFER_VIDEO, TaskState.FAILED],
-    TaskState.INFER_VIDEO: [TaskState.INFER_AUDIO, TaskState.FAILED],
-    TaskState.INFER_AUDIO: [TaskState.LIPSYNC, TaskState.FAILED],
-    TaskState.LIPSYNC: [TaskState.FUSION, TaskState.FAILED],
-    TaskState.FUSION: [TaskState.REPORT, TaskState.FAILED],
-    TaskState.REPORT: [TaskState.DONE, TaskState.FAILED],
+    TaskState.PENDING: [TaskState.VALIDATING, TaskState.LIVE, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.VALIDATING: [TaskState.EXTRACTING, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.EXTRACTING: [TaskState.TRANSCRIBING, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.TRANSCRIBING: [TaskState.INFER_VIDEO, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.INFER_VIDEO: [TaskState.INFER_AUDIO, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.INFER_AUDIO: [TaskState.LIPSYNC, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.LIPSYNC: [TaskState.FUSION, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.FUSION: [TaskState.REPORT, TaskState.FAILED, TaskState.CANCELLED],
+    TaskState.REPORT: [TaskState.DONE, TaskState.FAILED, TaskState.CANCELLED],
+    # Live sources are scored chunk by chunk, then fused and reported once they end
+    TaskState.LIVE: [TaskState.FUSION, TaskState.FAILED, TaskState.CANCELLED],
     TaskState.DONE: [],
     TaskState.FAILED: [],
+    TaskState.CANCELLED: [],
 }
@@ -32,16 +32,96 @@ class Settings(BaseSettings):
     # Storage
     STORAGE_PATH: str = "./storage"
     UPLOAD_MAX_SIZE_MB: int = 500
+    # Per-job manifests of large intermediates (frame lists, transcripts) passed
+    # between tasks by reference; must be shared storage visible to all workers
+    ARTIFACT_STORAGE_PATH: str = "./storage/artifacts"
+    # Per-job working files (frame store, audio buffer, features); may be a tmpfs
+    # shared by the node's workers, e.g. /dev/shm/deepfakeshield
+    SCRATCH_PATH: str = "./storage/scratch"
+    # Node scratch quota; unset uses 80% of the scratch filesystem
+    SCRATCH_QUOTA_MB: Optional[int] = None
+    # How long a write waits for scratch space before its task fails
+    SCRATCH_WAIT_TIMEOUT_S: float = 600.0
+    # Scratch directories unused this long are left over from dead tasks
+    SCRATCH_ORPHAN_AGE_S: float = 6 * 3600.0
+    # Expired media (MediaItem.expires_at) is purged this often, in batches
+    MEDIA_SWEEP_INTERVAL_S: float = 3600.0
+    MEDIA_SWEEP_BATCH_SIZE: int = 100
+    # Sampled frames go into one per-job frame store: "jpeg" (default), "zlib"
+    # (lossless) or "raw" (uncompressed, read zero-copy), at this height
+    FRAME_STORE_CODEC: str = "jpeg"
+    FRAME_STORE_HEIGHT: int = 360
+    # Perceptual fingerprints of uploads, for finding re-encodes of analysed media
+    FINGERPRINT_INDEX_PATH: str = "./storage/fingerprints.npz"
+    # Answer analyses of near-duplicate uploads with the earlier verdict
+    REUSE_NEAR_DUPLICATE_RESULTS: bool = True
     
     # Celery
-    CELERY_BROKER_URL: str = Field(default="redis://localhost:6379/0")
+    # Empty means no broker is configured; Celery workers then use REDIS_URL
+    CELERY_BROKER_URL: str = Field(default="")
     CELERY_RESULT_BACKEND: str = Field(default="redis://localhost:6379/0")
+    # Where pipelines run: celery, local (a process pool beside the API), or
+    # auto (local when no CELERY_BROKER_URL is configured)
+    PIPELINE_EXECUTOR: str = "auto"
+    LOCAL_EXECUTOR_WORKERS: int = 2
+    # Pipelines the default workers run at once (their total concurrency)
+    PIPELINE_WORKER_SLOTS: int = 4
+    # Slots batch and backfill jobs never take, kept free for interactive jobs
+    INTERACTIVE_RESERVED_SLOTS: int = 1
+    # How often held batch/backfill jobs are considered for dispatch
+    SCHEDULER_INTERVAL_S: float = 2.0
+    # Span of finished jobs the per-tier queue wait metrics cover
+    SCHEDULER_METRICS_WINDOW_S: float = 3600.0
+    # Video model batch size of bulk jobs dispatched while no interactive job runs
+    IDLE_INFERENCE_BATCH_SIZE: int = 64
+    # Admission control at /analysis/start: past this much queued work (worker-
+    # seconds per slot) new jobs run at cheaper quality tiers, past the second
+    # they are rejected with 429 and Retry-After
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_DEGRADE_AFTER_S: float = 120.0
+    ADMISSION_REJECT_AFTER_S: float = 900.0
+    # Scales the job cost model to the workers' hardware
+    ADMISSION_COST_SCALE: float = 1.0
+    # Most media (or jobs) one bulk submission or status poll may name
+    ANALYSIS_BATCH_MAX_ITEMS: int = 1000
     
     # ML Models
     ML_MODELS_PATH: str = "../ml/models"
+    ML_PACKAGE_PATH: str = "../ml"
     VIDEO_MODEL_VERSION: str = "v1.0.0"
     AUDIO_MODEL_VERSION: str = "v1.0.0"
+    LIPSYNC_MODEL_VERSION: str = "v1.0.0"
     FUSION_MODEL_VERSION: str = "v1.0.0"
+    # Models each inference worker child loads at startup, e.g. ["video", "audio"]
+    PRELOAD_MODELS: list[str] = []
+    # Run video/audio models with torch.compile, warmed up at worker start
+    COMPILE_MODELS: bool = False
+    # Numeric precision ("fp32" or "bf16") and memory layout of video/audio models
+    INFERENCE_PRECISION: str = "fp32"
+    CHANNELS_LAST: bool = False
+    # Unix socket of the node's model server; when set, workers run as thin clients
+    MODEL_SERVER_SOCKET: Optional[str] = None
+    # Index of confirmed-fake frame embeddings (built with inference.known_fakes);
+    # video jobs are matched against it when set
+    KNOWN_FAKES_INDEX_PATH: Optional[str] = None
+    KNOWN_FAKE_MATCH_THRESHOLD: float = 0.92
+    # Frames scored between provisional-verdict checkpoints
+    PROVISIONAL_CHECKPOINT_FRAMES: int = 32
+    # How often the progress stream re-reads a job
+    PROGRESS_STREAM_INTERVAL_S: float = 1.0
+    # How often long-running loops check whether their job was cancelled
+    CANCEL_CHECK_INTERVAL_S: float = 2.0
+    # Live analysis follows growing files and HLS/DASH segment directories under this root
+    LIVE_INGEST_ROOT: str = "./storage/live"
+    LIVE_POLL_INTERVAL_S: float = 0.5
+    # Frames sampled per second of live media; halved while scoring lags real time
+    LIVE_FPS: float = 5.0
+    # Queued live media beyond this is skipped, bounding end-to-end lag
+    LIVE_MAX_LAG_S: float = 10.0
+    # Span of media the rolling live verdict covers
+    LIVE_WINDOW_S: float = 30.0
+    # A live source with no new media for this long has ended
+    LIVE_IDLE_TIMEOUT_S: float = 60.0
     
     # LLM
     OPENAI_API_KEY: Optional[str] = None
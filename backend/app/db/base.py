@@ -5,10 +5,26 @@ from datetime import datetime
 from typing import Any
 from sqlalchemy import Column, DateTime, MetaData
 from sqlalchemy.orm import DeclarativeBase, declared_attr
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
 import uuid
 
 
+class UUID(TypeDecorator):
+    """
+    PostgreSQL UUID that also takes ids as strings (as Celery passes them)
+    on databases without a native UUID type, such as SQLite.
+    """
+    
+    impl = postgresql.UUID
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return uuid.UUID(value)
+        return value
+
+
 # Naming convention for constraints
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -15,6 +15,8 @@ print(f"DEBUG: settings.DATABASE_URL={settings.DATABASE_URL}")
 db_url = settings.DATABASE_URL
 if db_url.startswith("postgresql://"):
     db_url = db_url.replace("postgresql://", "postgresql+psycopg2://")
+elif db_url.startswith("sqlite+aiosqlite://"):
+    db_url = db_url.replace("sqlite+aiosqlite://", "sqlite://")
 
 sync_engine = create_engine(
     db_url,
@@ -1,6 +1,7 @@
 """
 DeepFakeShield AI - FastAPI Application Entry Point
 """
+import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -11,6 +12,7 @@ from fastapi.responses import FileResponse
 import structlog
 
 from app.core.config import settings
+from app.services.executor import get_executor, run_local_scheduler, shutdown_executor
 from app.api.routes import (
     auth_router,
     media_router,
@@ -52,10 +54,18 @@ async def lifespan(app: FastAPI):
     storage_path = Path(settings.STORAGE_PATH)
     storage_path.mkdir(parents=True, exist_ok=True)
     
+    # Without Celery beat, held jobs are released from here
+    scheduler = None
+    if get_executor().name == "local":
+        scheduler = asyncio.create_task(run_local_scheduler())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down DeepFakeShield AI")
+    if scheduler:
+        scheduler.cancel()
+    shutdown_executor()
 
 
 # Create FastAPI application
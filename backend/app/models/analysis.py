@@ -1,11 +1,15 @@
 """
 Analysis job and related models.
 """
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Text
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Text, Index, text
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 
-from app.db.base import Base
+from app.db.base import Base, UUID
+
+
+# Rows covered by the coalescing key's unique index
+IN_FLIGHT_LEADER = "coalesced_with_id IS NULL AND status NOT IN ('DONE', 'FAILED', 'CANCELLED')"
 
 
 class AnalysisJob(Base):
@@ -24,6 +28,16 @@ class AnalysisJob(Base):
     # Options
     options = Column(JSON, default={})
     
+    # Scheduling
+    priority = Column(String(20), default="interactive", nullable=False, index=True)  # interactive, batch, backfill
+    dispatched_at = Column(DateTime, nullable=True)
+    queue_wait_ms = Column(Integer, nullable=True)  # submission to first pickup by a worker
+    estimated_cost_s = Column(Float, nullable=True)  # worker-seconds, from admission control
+    
+    # Single-flight: jobs for the same content hash and options share one pipeline
+    coalesce_key = Column(String(64), nullable=True, index=True)
+    coalesced_with_id = Column(UUID(as_uuid=True), ForeignKey("analysis_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    
     # Results
     results = Column(JSON, nullable=True)
     overall_score = Column(Float, nullable=True)
@@ -36,6 +50,17 @@ class AnalysisJob(Base):
     # Celery task ID
     celery_task_id = Column(String(255), nullable=True)
     
+    __table_args__ = (
+        # One unfinished job runs the pipeline per coalescing key; the rest attach to it
+        Index(
+            "uq_analysis_jobs_coalesce_key_in_flight",
+            "coalesce_key",
+            unique=True,
+            postgresql_where=text(IN_FLIGHT_LEADER),
+            sqlite_where=text(IN_FLIGHT_LEADER),
+        ),
+    )
+    
     # Relationships
     media_item = relationship("MediaItem", back_populates="analysis_jobs")
     segments = relationship("Segment", back_populates="analysis_job", cascade="all, delete-orphan")
@@ -2,10 +2,10 @@
 Evidence and Report models.
 """
 from sqlalchemy import Column, String, ForeignKey, DateTime, Text
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 
-from app.db.base import Base
+from app.db.base import Base, UUID
 
 
 class EvidenceArtifact(Base):
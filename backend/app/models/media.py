@@ -2,10 +2,10 @@
 Media item model for uploaded files.
 """
 from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 
-from app.db.base import Base
+from app.db.base import Base, UUID
 
 
 class MediaItem(Base):
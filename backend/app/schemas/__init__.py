@@ -2,7 +2,7 @@
 Pydantic schemas for API request/response models.
 """
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field
 
@@ -52,6 +52,8 @@ class MediaUploadResponse(BaseModel):
     duration_ms: Optional[int]
     file_size: int
     created_at: datetime
+    # Set when the upload is a near-duplicate (e.g. a re-encode) of earlier media
+    near_duplicate_similarity: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -85,6 +87,13 @@ class AnalysisOptions(BaseModel):
     run_lipsync: bool = True
     run_identity: bool = False
     privacy_mode: bool = False
+    # Reuse the verdict of an analysed near-duplicate instead of re-running
+    reuse_near_duplicate: bool = True
+    # Scheduling tier: interactive jobs start at once; batch and backfill jobs
+    # share the remaining capacity fairly between users
+    priority: Literal["interactive", "batch", "backfill"] = "interactive"
+    # Under load, run at a cheaper quality tier rather than be rejected
+    allow_degraded: bool = True
 
 
 class AnalysisStartRequest(BaseModel):
@@ -93,11 +102,29 @@ class AnalysisStartRequest(BaseModel):
     options: Optional[AnalysisOptions] = None
 
 
+class LiveAnalysisRequest(BaseModel):
+    """Start a live analysis of a source that is still being written."""
+    # A growing file, an HLS playlist or a segment directory, relative to LIVE_INGEST_ROOT
+    source_path: str
+    options: Optional[AnalysisOptions] = None
+
+
 class AnalysisStartResponse(BaseModel):
     """Start analysis response."""
     job_id: UUID
     status: str
     stage: str
+    quality: str = "full"  # full, or the cheaper tier a job runs at under load
+
+
+class ProvisionalVerdict(BaseModel):
+    """Verdict estimated from the frames and audio scored so far."""
+    score: float
+    label: str
+    ci_low: float
+    ci_high: float
+    label_stable: bool
+    coverage: dict  # modality -> share of its frames/windows scored (None for live sources)
 
 
 class AnalysisStatusResponse(BaseModel):
@@ -108,6 +135,8 @@ class AnalysisStatusResponse(BaseModel):
     progress: float
     error_message: Optional[str]
     started_at: Optional[datetime]
+    provisional: Optional[ProvisionalVerdict] = None
+    live: Optional[dict] = None  # lag, skipped media and cumulative verdict of live jobs
 
 
 class SegmentResponse(BaseModel):
@@ -226,6 +255,28 @@ class BatchScanResponse(BaseModel):
     total: int
 
 
+class BatchStatusRequest(BaseModel):
+    """Status poll of many analysis jobs."""
+    job_ids: List[UUID]
+
+
+class TierWaitMetrics(BaseModel):
+    """Queue wait of one scheduling tier."""
+    held: int  # batch/backfill jobs not yet released to the workers
+    queued: int  # dispatched, waiting for a worker
+    running: int
+    samples: int  # jobs picked up within the metrics window
+    p50_ms: Optional[int]
+    p95_ms: Optional[int]
+    max_ms: Optional[int]
+
+
+class SchedulerMetricsResponse(BaseModel):
+    """Per-tier queue wait metrics."""
+    window_s: float
+    tiers: dict[str, TierWaitMetrics]
+
+
 class QueueStatusResponse(BaseModel):
     """Queue status response."""
     pending: int
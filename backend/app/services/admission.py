@@ -0,0 +1,164 @@
+"""
+Load-aware admission control for analysis jobs.
+
+A job's cost is estimated in worker-seconds from its media's probed
+duration and the parts of the pipeline its options run. The backlog is
+the estimated cost still ahead of the workers for every dispatched,
+unfinished job, spread over PIPELINE_WORKER_SLOTS. Under
+ADMISSION_DEGRADE_AFTER_S of backlog per slot a job runs at full
+quality; beyond it, progressively cheaper quality tiers are used, and
+beyond ADMISSION_REJECT_AFTER_S new jobs are turned away until the
+backlog drains, instead of letting queue latency grow without bound.
+
+Batch and backfill jobs are always accepted at full quality: they are
+held back by the scheduler and never add to the backlog interactive
+jobs queue behind.
+"""
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import cv2
+
+from app.core.celery_app import TaskState
+from app.core.config import settings
+
+
+DEFAULT_FPS = 5.0
+# Quality tiers, cheapest last, as the options they override
+QUALITY_TIERS = {
+    "full": {},
+    "reduced": {"fps": 2.0},
+    # Sparse frames carry no usable mouth motion for lip-sync
+    "keyframe": {"fps": 0.5, "run_lipsync": False},
+    # Screening pass: the video model on keyframes only
+    "cascade": {"fps": 0.5, "run_audio": False, "run_lipsync": False},
+}
+DEGRADED_TIERS = ("reduced", "keyframe", "cascade")
+
+# Worker-seconds per second of media for each pipeline part (video parts at DEFAULT_FPS)
+COST_PER_MEDIA_S = {
+    "frames": 0.1,
+    "video": 0.5,
+    "audio": 0.15,
+    "transcript": 0.3,
+    "lipsync": 0.25,
+}
+# Fixed cost of validation, fusion and the report
+JOB_OVERHEAD_S = 2.0
+# Share of a job's cost still ahead of it in each state
+REMAINING_SHARE = {
+    TaskState.PENDING: 1.0,
+    TaskState.VALIDATING: 1.0,
+    TaskState.EXTRACTING: 0.9,
+    TaskState.TRANSCRIBING: 0.6,
+    TaskState.INFER_VIDEO: 0.5,
+    TaskState.INFER_AUDIO: 0.25,
+    TaskState.LIPSYNC: 0.15,
+    TaskState.FUSION: 0.05,
+    TaskState.REPORT: 0.05,
+    TaskState.LIVE: 0.0,
+}
+
+
+@dataclass
+class Admission:
+    """Outcome of admission control for one job."""
+    quality: Optional[str]  # None when rejected
+    options: Dict[str, Any]
+    estimated_cost_s: float
+    retry_after_s: Optional[int] = None
+
+
+def probe_duration_ms(path: str, media_type: str) -> Optional[int]:
+    """Duration of a media file; audio without a readable container is estimated from its size."""
+    if media_type == "image":
+        return 0
+    cap = cv2.VideoCapture(str(path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) if cap.isOpened() else 0
+    finally:
+        cap.release()
+    if fps > 0 and frames > 0:
+        return int(frames / fps * 1000)
+    if not Path(path).exists():
+        return None
+    # ~32 kB/s of compressed audio, as for the audio buffer estimate
+    return int(Path(path).stat().st_size / 32000 * 1000)
+
+
+def estimate_cost_s(duration_ms: Optional[int], media_type: str, options: Dict[str, Any]) -> float:
+    """Worker-seconds a job is expected to take."""
+    media_s = (duration_ms or 0) / 1000
+    per_s = 0.0
+    if media_type == "video" and (options.get("run_video", True) or options.get("run_lipsync", True)):
+        fps_share = options.get("fps", DEFAULT_FPS) / DEFAULT_FPS
+        per_s += COST_PER_MEDIA_S["frames"] * fps_share
+        if options.get("run_video", True):
+            per_s += COST_PER_MEDIA_S["video"] * fps_share
+    if media_type in ("video", "audio"):
+        if options.get("run_audio", True):
+            per_s += COST_PER_MEDIA_S["audio"]
+        if options.get("run_lipsync", True):
+            per_s += COST_PER_MEDIA_S["transcript"] + COST_PER_MEDIA_S["lipsync"]
+    return round((JOB_OVERHEAD_S + media_s * per_s) * settings.ADMISSION_COST_SCALE, 2)
+
+
+def backlog_s(costs_by_state: Iterable[Tuple[str, Optional[float]]]) -> float:
+    """Worker-seconds still ahead of the workers, from (state, summed cost) rows."""
+    return sum(REMAINING_SHARE.get(state, 1.0) * (cost or 0.0) for state, cost in costs_by_state)
+
+
+def with_tier(options: Dict[str, Any], quality: str) -> Dict[str, Any]:
+    """Options of a job run at a quality tier; tiers only ever switch parts off."""
+    tier = QUALITY_TIERS[quality]
+    degraded = {
+        key: (value and options.get(key, True)) if isinstance(value, bool) else value
+        for key, value in tier.items()
+    }
+    return {**options, **degraded, "quality": quality}
+
+
+def admit(
+    options: Dict[str, Any],
+    duration_ms: Optional[int],
+    media_type: str,
+    backlog: float,
+    priority: str = "interactive",
+) -> Admission:
+    """
+    Decide how, and whether, to run a job given the current backlog.
+
+    Args:
+        options: The job's requested options
+        duration_ms: Probed media duration
+        media_type: video, audio or image
+        backlog: Worker-seconds ahead of dispatched jobs (`backlog_s`)
+        priority: The job's scheduling tier
+    """
+    full = with_tier(options, "full")
+    full_cost = estimate_cost_s(duration_ms, media_type, full)
+    if not settings.ADMISSION_CONTROL or priority != "interactive":
+        return Admission("full", full, full_cost)
+
+    slots = max(1, settings.PIPELINE_WORKER_SLOTS)
+    load = backlog / slots
+    degrade_after = settings.ADMISSION_DEGRADE_AFTER_S
+    reject_after = settings.ADMISSION_REJECT_AFTER_S
+
+    if load <= degrade_after:
+        return Admission("full", full, full_cost)
+
+    if load <= reject_after and options.get("allow_degraded", True):
+        # Cheaper tiers the further the backlog is towards the rejection point
+        share = (load - degrade_after) / max(reject_after - degrade_after, 1e-9)
+        quality = DEGRADED_TIERS[min(int(share * len(DEGRADED_TIERS)), len(DEGRADED_TIERS) - 1)]
+        degraded = with_tier(options, quality)
+        return Admission(quality, degraded, estimate_cost_s(duration_ms, media_type, degraded))
+
+    # Until the backlog per slot is back under the threshold this job would pass
+    threshold = reject_after if options.get("allow_degraded", True) else degrade_after
+    retry_after = max(1, math.ceil(load - threshold))
+    return Admission(None, full, full_cost, retry_after_s=retry_after)
@@ -0,0 +1,127 @@
+"""
+Claim-check store for large pipeline intermediates.
+
+Bulky task outputs (the extracted frame list, the transcript) are written
+once to the job's directory on shared storage and recorded in a per-job
+manifest. Tasks pass, and jobs store, a small reference naming the
+artifact and its version in place of the payload, so nothing large goes
+through the Celery result backend or into AnalysisJob.results.
+
+Each write creates a new version file and never touches older ones, so a
+reference always reads the payload it was issued for, even while a retry
+is writing a newer version.
+"""
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def job_artifact_dir(job_id: str) -> Path:
+    """Directory holding a job's artifacts and manifest."""
+    return Path(settings.ARTIFACT_STORAGE_PATH) / str(job_id)
+
+
+def _artifact_path(job_id: str, name: str, version: int) -> Path:
+    return job_artifact_dir(job_id) / f"{name}.v{version}.json"
+
+
+def _write_json(path: Path, payload: Any) -> int:
+    """Write JSON atomically; returns the size in bytes."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+@contextmanager
+def _manifest_lock(job_id: str) -> Iterator[None]:
+    """Serialise manifest updates for a job across workers on shared storage."""
+    directory = job_artifact_dir(job_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{MANIFEST_NAME}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_manifest(job_id: str) -> Dict[str, Any]:
+    """A job's manifest: latest version, file and size per artifact name."""
+    path = job_artifact_dir(job_id) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def put_artifact(job_id: str, name: str, payload: Any) -> Dict[str, Any]:
+    """
+    Store a payload as the next version of a job's artifact.
+
+    Returns:
+        The reference to pass between tasks: {'artifact', 'job_id', 'version'}
+    """
+    job_id = str(job_id)
+    with _manifest_lock(job_id):
+        manifest = read_manifest(job_id)
+        version = manifest.get(name, {}).get("version", 0) + 1
+        path = _artifact_path(job_id, name, version)
+        size = _write_json(path, payload)
+        manifest[name] = {
+            "version": version,
+            "file": path.name,
+            "bytes": size,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        _write_json(job_artifact_dir(job_id) / MANIFEST_NAME, manifest)
+    return {"artifact": name, "job_id": job_id, "version": version}
+
+
+def is_artifact_ref(value: Any) -> bool:
+    """Whether a value is an artifact reference rather than an inline payload."""
+    return isinstance(value, dict) and "artifact" in value and "version" in value
+
+
+def artifact_exists(ref: Dict[str, Any]) -> bool:
+    return _artifact_path(ref["job_id"], ref["artifact"], ref["version"]).exists()
+
+
+def get_artifact(ref: Dict[str, Any]) -> Any:
+    """Load the payload a reference was issued for."""
+    path = _artifact_path(ref["job_id"], ref["artifact"], ref["version"])
+    if not path.exists():
+        raise ValueError(
+            f"Artifact {ref['artifact']} v{ref['version']} of job {ref['job_id']} is gone"
+        )
+    with open(path) as f:
+        return json.load(f)
+
+
+def resolve(value: Any) -> Any:
+    """The payload behind a reference; inline values (older jobs) pass through."""
+    return get_artifact(value) if is_artifact_ref(value) else value
+
+
+def latest_ref(job_id: str, name: str) -> Optional[Dict[str, Any]]:
+    """Reference to the newest version of a job's artifact, or None."""
+    entry = read_manifest(job_id).get(name)
+    if entry is None:
+        return None
+    return {"artifact": name, "job_id": str(job_id), "version": entry["version"]}
+
+
+def delete_job_artifacts(job_id: str) -> None:
+    """Remove a job's artifacts and manifest."""
+    shutil.rmtree(job_artifact_dir(job_id), ignore_errors=True)
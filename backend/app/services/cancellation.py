@@ -0,0 +1,82 @@
+"""
+Cooperative cancellation of analysis jobs.
+
+Cancelling a job marks it CANCELLED and revokes its queued task. A task
+that is already running finds out at its next check: the pipelines
+check between stages, and the long loops (frame extraction, video
+inference batches, transcription windows) poll a `CancellationCheck`.
+Either way `JobCancelled` is raised, and unwinding the pipeline drops
+its scratch reservations and references, so the working files go too.
+"""
+import logging
+import time
+from typing import Optional
+
+from app.core.celery_app import celery_app, TaskState
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AnalysisJob
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """The job a task works on was cancelled."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Analysis job {job_id} was cancelled")
+        self.job_id = job_id
+
+
+def revoke_task(task_id: str) -> None:
+    """
+    Drop a task from the queue before a worker picks it up. A task
+    already running is not terminated; it stops at its next check.
+    """
+    try:
+        celery_app.control.revoke(task_id)
+    except Exception as e:
+        # The job is marked cancelled already; the task stops when it starts
+        logger.warning("Could not revoke task %s: %s", task_id, e)
+
+
+def is_cancelled(job_id: str) -> bool:
+    db = SessionLocal()
+    try:
+        status = db.query(AnalysisJob.status).filter(AnalysisJob.id == job_id).scalar()
+        return status == TaskState.CANCELLED
+    finally:
+        db.close()
+
+
+def raise_if_cancelled(job_id: str) -> None:
+    if is_cancelled(job_id):
+        raise JobCancelled(job_id)
+
+
+class CancellationCheck:
+    """
+    Cheap cancellation poll for tight loops.
+
+    Calling the check returns whether the job was cancelled; the database
+    is read at most once every `interval_s` (CANCEL_CHECK_INTERVAL_S), so
+    it can be called per frame.
+    """
+
+    def __init__(self, job_id: str, interval_s: Optional[float] = None):
+        self.job_id = job_id
+        self.interval_s = settings.CANCEL_CHECK_INTERVAL_S if interval_s is None else interval_s
+        self._checked_at = 0.0
+        self._cancelled = False
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if not self._cancelled and now - self._checked_at >= self.interval_s:
+            self._checked_at = now
+            self._cancelled = is_cancelled(self.job_id)
+        return self._cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self():
+            raise JobCancelled(self.job_id)
@@ -0,0 +1,112 @@
+"""
+Stage checkpoints for resuming redelivered pipelines.
+
+Celery redelivers a job's pipeline when the worker running it dies
+(acks_late with reject_on_worker_lost). Each pipeline stage's output is
+stored in the job's artifact store as it completes; the manifest entry is
+the completion marker and the artifact reference the output reference. A
+redelivered pipeline reuses completed stages instead of running them
+again, as long as the files their outputs point at are still there, and
+records the time that saved on the job.
+"""
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from app.db.session import SessionLocal
+from app.models import AnalysisJob
+from app.services.artifacts import artifact_exists, get_artifact, is_artifact_ref, latest_ref, put_artifact
+
+
+CHECKPOINT_PREFIX = "stage."
+# Output keys naming files a later stage reads
+FILE_KEYS = ("file_path", "frame_store", "frames_dir", "audio_path", "feature_path")
+
+
+def outputs_present(output: Any) -> bool:
+    """Whether every file and artifact a stage output refers to still exists."""
+    if is_artifact_ref(output):
+        return artifact_exists(output)
+    if isinstance(output, dict):
+        for key, value in output.items():
+            if key in FILE_KEYS and isinstance(value, str) and not Path(value).exists():
+                return False
+            if not outputs_present(value):
+                return False
+    elif isinstance(output, list):
+        return all(outputs_present(value) for value in output)
+    return True
+
+
+def record_recovery(job_id: str, stage: str, recovered_ms: int) -> None:
+    """Add a reused stage to the job's recovery record."""
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if job:
+            results = dict(job.results or {})
+            recovery = dict(results.get("recovery") or {})
+            recovery["resumed_at"] = recovery.get("resumed_at") or datetime.utcnow().isoformat()
+            recovery["reused_stages"] = recovery.get("reused_stages", []) + [stage]
+            recovery["recovered_ms"] = recovery.get("recovered_ms", 0) + int(recovered_ms)
+            job.results = {**results, "recovery": recovery}
+            db.commit()
+    finally:
+        db.close()
+
+
+class StageCheckpoints:
+    """A job's stage checkpoints."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def _read(self, stage: str) -> Optional[Dict[str, Any]]:
+        ref = latest_ref(self.job_id, CHECKPOINT_PREFIX + stage)
+        if ref is None or not artifact_exists(ref):
+            return None
+        return get_artifact(ref)
+
+    def load(self, stage: str) -> Optional[Dict[str, Any]]:
+        """A stage's checkpoint ({'output', 'duration_ms', ...}) if it is still usable."""
+        checkpoint = self._read(stage)
+        if checkpoint is None or not outputs_present(checkpoint["output"]):
+            return None
+        return checkpoint
+
+    def save(self, stage: str, output: Any, duration_ms: int) -> None:
+        put_artifact(self.job_id, CHECKPOINT_PREFIX + stage, {
+            "output": output,
+            "duration_ms": int(duration_ms),
+            "completed_at": datetime.utcnow().isoformat(),
+        })
+
+    def run(self, stage: str, fn: Callable[[], Any]) -> Any:
+        """Run a stage, or reuse its output from an earlier attempt."""
+        checkpoint = self.load(stage)
+        if checkpoint is not None:
+            record_recovery(self.job_id, stage, checkpoint["duration_ms"])
+            return checkpoint["output"]
+
+        started = time.time()
+        output = fn()
+        self.save(stage, output, (time.time() - started) * 1000)
+        return output
+
+    def resume_point(self, stages: Sequence[str]) -> Tuple[int, Any]:
+        """
+        Index of the last stage of a sequence with a usable checkpoint, and
+        its output; (-1, None) when there is none. Stages before it are not
+        needed again: only its output feeds the rest of the sequence.
+        """
+        for index in range(len(stages) - 1, -1, -1):
+            checkpoint = self.load(stages[index])
+            if checkpoint is not None:
+                # The reused stage's time covers every stage it consumed
+                recovered = sum(
+                    (self._read(stage) or {}).get("duration_ms", 0) for stage in stages[:index]
+                ) + checkpoint["duration_ms"]
+                record_recovery(self.job_id, stages[index], recovered)
+                return index, checkpoint["output"]
+        return -1, None
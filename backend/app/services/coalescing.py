@@ -0,0 +1,100 @@
+"""
+Single-flight analysis of identical media.
+
+Identical bytes analysed with the same options get the same verdict, so
+while a job for a (content hash, options) pair is in flight, further
+requests for that pair, from any user, attach to it instead of running
+a pipeline of their own. Attached jobs report the leading job's
+progress and receive a copy of its verdict, segments, model runs and
+report once it is done; they fail with it. A leader cancelled by its
+owner hands over to the oldest attached job, which is dispatched in its
+place.
+
+The scheduling tier is part of the key, so an interactive request never
+waits behind a held batch job.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from app.core.celery_app import TaskState
+from app.db.session import SessionLocal
+from app.models import AnalysisJob, ModelRun, Report, Segment
+from app.services.scheduling import FINISHED_STATES
+
+
+def coalesce_key(sha256: str, options: Dict[str, Any]) -> str:
+    """Key of the analyses that are interchangeable with this one."""
+    canonical = json.dumps(options or {}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{sha256}:{canonical}".encode()).hexdigest()
+
+
+def copy_results(leader: AnalysisJob, follower: AnalysisJob, now: datetime) -> None:
+    """Complete an attached job with a copy of its leader's results."""
+    follower.status = TaskState.DONE
+    follower.stage = TaskState.DONE
+    follower.progress = 1.0
+    follower.overall_score = leader.overall_score
+    follower.label = leader.label
+    follower.results = {**(leader.results or {}), "coalesced_from": str(leader.id)}
+    follower.completed_at = now
+    follower.segments = [
+        Segment(
+            start_ms=segment.start_ms,
+            end_ms=segment.end_ms,
+            segment_type=segment.segment_type,
+            score=segment.score,
+            reason=segment.reason,
+            meta_info=segment.meta_info,
+        )
+        for segment in leader.segments
+    ]
+    follower.model_runs = [
+        ModelRun(
+            model_name=run.model_name,
+            model_version=run.model_version,
+            predictions=run.predictions,
+            score=run.score,
+            inference_time_ms=run.inference_time_ms,
+        )
+        for run in leader.model_runs
+    ]
+    if leader.report:
+        follower.report = Report(
+            summary=leader.report.summary,
+            full_report=leader.report.full_report,
+            llm_model_used=leader.report.llm_model_used,
+            generated_at=leader.report.generated_at,
+        )
+
+
+def settle_followers(job_id: str) -> None:
+    """
+    Pass a finished leader's outcome on to the jobs attached to it. A
+    cancelled leader's jobs are handed over when it is cancelled.
+    """
+    db = SessionLocal()
+    try:
+        leader = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if not leader or leader.status not in (TaskState.DONE, TaskState.FAILED):
+            return
+        followers = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.coalesced_with_id == leader.id, AnalysisJob.status.notin_(FINISHED_STATES))
+            .order_by(AnalysisJob.created_at)
+            .all()
+        )
+
+        now = datetime.utcnow()
+        for follower in followers:
+            if leader.status == TaskState.DONE:
+                copy_results(leader, follower, now)
+            else:
+                follower.status = TaskState.FAILED
+                follower.stage = TaskState.FAILED
+                follower.error_message = leader.error_message
+                follower.completed_at = now
+        db.commit()
+    finally:
+        db.close()
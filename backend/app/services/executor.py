@@ -0,0 +1,195 @@
+"""
+Where analysis pipelines run.
+
+With a broker, pipelines are sent to the Celery workers. Without one
+(PIPELINE_EXECUTOR=local, or auto with no CELERY_BROKER_URL set) they
+run in a pool of LOCAL_EXECUTOR_WORKERS processes beside the API. Each
+process runs the same run_full_pipeline (or run_live_analysis) task
+eagerly, so small deployments and test environments run the worker
+pipeline without Redis, scored by whichever models are deployed there.
+Checkpoints, cancellation and scratch space behave as on a worker. In
+local mode the API also runs the held-job scheduler, since there is no
+Celery beat.
+
+Submitting can block on a broker round trip, so the API submits from
+its thread pool and never does pipeline work on its event loop.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AnalysisJob
+from app.services.scheduling import TIER_PRIORITY, dispatch_held
+
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineExecutor:
+    """Runs analysis pipelines."""
+
+    name = "base"
+
+    def submit(self, job_ids: Sequence, priority: int) -> List[Optional[str]]:
+        """Start the jobs' pipelines; returns each one's Celery task id, if it has one."""
+        raise NotImplementedError
+
+    def submit_live(self, job_id, source_path: str) -> Optional[str]:
+        """Start analysing a live source; returns its Celery task id, if it has one."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class CeleryExecutor(PipelineExecutor):
+    """Sends pipelines to the Celery workers at a broker priority."""
+
+    name = "celery"
+
+    def submit(self, job_ids: Sequence, priority: int) -> List[Optional[str]]:
+        from app.workers.report import run_full_pipeline
+
+        return [run_full_pipeline.apply_async(args=[str(job_id)], priority=priority).id for job_id in job_ids]
+
+    def submit_live(self, job_id, source_path: str) -> Optional[str]:
+        from app.workers.live import run_live_analysis
+
+        return run_live_analysis.apply_async(args=[str(job_id), source_path]).id
+
+
+def init_local_worker() -> None:
+    """Load configured models once per local worker process."""
+    if settings.PRELOAD_MODELS:
+        from app.services.ml_runtime import preload_models
+
+        preload_models(settings.PRELOAD_MODELS)
+
+
+def run_pipeline_locally(job_id: str) -> str:
+    """Run one job's pipeline in this process; returns the task's final state."""
+    from app.workers.report import run_full_pipeline
+
+    return run_full_pipeline.apply(args=[job_id]).state
+
+
+def run_live_locally(job_id: str, source_path: str) -> str:
+    """Analyse a live source in this process until it ends; returns the task's final state."""
+    from app.workers.live import run_live_analysis
+
+    return run_live_analysis.apply(args=[job_id, source_path]).state
+
+
+class LocalExecutor(PipelineExecutor):
+    """
+    Runs pipelines in a local process pool, oldest submission first. The
+    processes are spawned, not forked, so they share no state (database
+    connections, threads) with the API process.
+    """
+
+    name = "local"
+
+    def __init__(self, workers: int):
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_local_worker,
+        )
+
+    def submit(self, job_ids: Sequence, priority: int) -> List[Optional[str]]:
+        for job_id in job_ids:
+            future = self._pool.submit(run_pipeline_locally, str(job_id))
+            future.add_done_callback(lambda f, job_id=job_id: self._log_outcome(job_id, f))
+        return [None] * len(job_ids)
+
+    def submit_live(self, job_id, source_path: str) -> Optional[str]:
+        # A live job holds its process until the source ends
+        future = self._pool.submit(run_live_locally, str(job_id), source_path)
+        future.add_done_callback(lambda f: self._log_outcome(job_id, f))
+        return None
+
+    @staticmethod
+    def _log_outcome(job_id, future: Future) -> None:
+        # The pipeline records its own failures on the job; this covers a lost process
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Local pipeline for job %s did not complete: %s", job_id, error)
+
+    def shutdown(self) -> None:
+        # Running pipelines finish; queued ones stay PENDING
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[PipelineExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> PipelineExecutor:
+    """The configured executor, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            kind = settings.PIPELINE_EXECUTOR
+            if kind == "auto":
+                kind = "celery" if settings.CELERY_BROKER_URL else "local"
+            _executor = LocalExecutor(settings.LOCAL_EXECUTOR_WORKERS) if kind == "local" else CeleryExecutor()
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def submit_pipelines(job_ids: Sequence) -> None:
+    """Start interactive jobs' pipelines in one submission and record their task ids."""
+    record_task_ids(job_ids, get_executor().submit(job_ids, TIER_PRIORITY["interactive"]))
+
+
+def submit_pipeline(job_id) -> None:
+    """Start an interactive job's pipeline."""
+    submit_pipelines([job_id])
+
+
+def submit_live(job_id, source_path: str) -> None:
+    """Start a live job's analysis of its source and record its task id."""
+    record_task_ids([job_id], [get_executor().submit_live(job_id, source_path)])
+
+
+def record_task_ids(job_ids: Sequence, task_ids: Sequence[Optional[str]]) -> None:
+    """Store the jobs' Celery task ids (used to revoke a queued task on cancel)."""
+    if not any(task_ids):
+        return
+    db = SessionLocal()
+    try:
+        for job_id, task_id in zip(job_ids, task_ids):
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+                {"celery_task_id": task_id}, synchronize_session=False
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_local_scheduler() -> None:
+    """Release held batch and backfill jobs every SCHEDULER_INTERVAL_S (local mode's beat)."""
+    while True:
+        try:
+            released = await run_in_threadpool(dispatch_held)
+            if any(released.values()):
+                logger.info("Released held jobs: %s", released)
+        except Exception as e:
+            logger.error("Dispatching held jobs failed: %s", e)
+        await asyncio.sleep(settings.SCHEDULER_INTERVAL_S)
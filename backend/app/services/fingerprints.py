@@ -0,0 +1,112 @@
+"""
+Perceptual fingerprints of uploaded media.
+
+Uploads are fingerprinted at ingest and looked up in a local index of
+previously uploaded media, so re-encodes of an already analysed clip
+(which the SHA-256 check cannot see) are linked to the earlier item and
+can reuse its verdict.
+"""
+import fcntl
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ml_runtime import ensure_ml_path
+
+
+logger = logging.getLogger(__name__)
+
+# Index with the mtime it was loaded at, per process
+_index: Optional[Tuple[float, Any]] = None
+
+
+@contextmanager
+def _index_lock() -> Iterator[None]:
+    """Serialise index updates across API processes on this node."""
+    lock_path = Path(settings.FINGERPRINT_INDEX_PATH + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_fingerprint_index():
+    """The fingerprint index, reloaded when another process has updated it."""
+    global _index
+    ensure_ml_path()
+    from inference.fingerprint import FingerprintIndex
+
+    path = Path(settings.FINGERPRINT_INDEX_PATH)
+    if not path.exists():
+        return FingerprintIndex()
+
+    mtime = path.stat().st_mtime
+    if _index is None or _index[0] != mtime:
+        _index = (mtime, FingerprintIndex.load(path))
+    return _index[1]
+
+
+def compute_media_fingerprint(file_path: str, media_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Fingerprint an uploaded file: keyframe hashes for video and images, an
+    audio fingerprint for anything with an audio track.
+
+    Blocking; call from a worker thread. Returns None when nothing could
+    be fingerprinted.
+    """
+    ensure_ml_path()
+    from inference.audio_buffer import BUFFER_SUFFIX, decode_to_buffer, open_audio_buffer
+    from inference.fingerprint import audio_fingerprint, compute_fingerprint
+
+    try:
+        fingerprint = compute_fingerprint(file_path) if media_type in ("video", "image") else None
+    except Exception as e:
+        logger.warning("Keyframe hashing failed for %s: %s", file_path, e)
+        fingerprint = None
+
+    if media_type in ("video", "audio"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                buffer_info = decode_to_buffer(file_path, Path(tmp_dir) / f"fingerprint{BUFFER_SUFFIX}")
+                audio = audio_fingerprint(open_audio_buffer(buffer_info["path"]))
+                fingerprint = {**(fingerprint or {}), "audio": audio}
+            except Exception as e:
+                logger.warning("Audio fingerprinting failed for %s: %s", file_path, e)
+
+    if not fingerprint or not any(len(codes) for codes in fingerprint.values()):
+        return None
+    return fingerprint
+
+
+def find_near_duplicate(fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Best indexed near-duplicate of a fingerprint, or None."""
+    matches = get_fingerprint_index().query(fingerprint)
+    return matches[0] if matches else None
+
+
+def index_media(media_id: str, fingerprint: Dict[str, Any]) -> None:
+    """Add an uploaded item's fingerprint to the index."""
+    global _index
+    with _index_lock():
+        _index = None
+        index = get_fingerprint_index()
+        index.add(str(media_id), fingerprint)
+        index.save(settings.FINGERPRINT_INDEX_PATH)
+
+
+def remove_media(media_ids: List[str]) -> int:
+    """Drop deleted or expired items from the index."""
+    global _index
+    with _index_lock():
+        _index = None
+        index = get_fingerprint_index()
+        removed = index.remove([str(m) for m in media_ids])
+        if removed:
+            index.save(settings.FINGERPRINT_INDEX_PATH)
+    return removed
@@ -0,0 +1,162 @@
+"""
+Access to the ML inference package from the backend.
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+# Service class per model name; weights are looked up as
+# ML_MODELS_PATH/<file stem>.safetensors, falling back to .pt
+INFERENCE_SERVICES = {
+    "video": ("inference.video_forensics", "VideoForensicsService", "video_forensics"),
+    "audio": ("inference.audio_spoof", "AudioSpoofService", "audio_spoof"),
+    "lipsync": ("inference.lipsync", "LipSyncService", "lipsync"),
+    "fusion": ("inference.fusion", "MultimodalFusionService", "fusion"),
+}
+
+# Loaded services, one set per worker process
+_services: Dict[str, Any] = {}
+_server_client = None
+# Known-fake index with the mtime it was loaded at
+_known_fake_index: Optional[Tuple[float, Any]] = None
+
+
+def ensure_ml_path() -> None:
+    """Make the ML package importable (it lives outside the backend tree)."""
+    ml_path = str(Path(settings.ML_PACKAGE_PATH).resolve())
+    if ml_path not in sys.path:
+        sys.path.insert(0, ml_path)
+
+
+def get_device() -> str:
+    """Inference device for this process."""
+    return "cuda" if settings.ENABLE_GPU else "cpu"
+
+
+def get_fusion_service(
+    model_path: Optional[str] = None,
+    weights: Optional[Dict[str, float]] = None,
+    calibration: Optional[Dict[str, Any]] = None,
+):
+    """Create a loaded multimodal fusion service."""
+    ensure_ml_path()
+    from inference.fusion import MultimodalFusionService
+    
+    service = MultimodalFusionService(
+        model_path=model_path,
+        device=get_device(),
+        weights=weights,
+        calibration=calibration,
+    )
+    service.load_model()
+    return service
+
+
+def get_model_path(stem: str) -> Optional[str]:
+    """Weights file for a model, preferring the memory-mappable format."""
+    models_dir = Path(settings.ML_MODELS_PATH)
+    for suffix in (".safetensors", ".pt"):
+        path = models_dir / f"{stem}{suffix}"
+        if path.exists():
+            return str(path)
+    return None
+
+
+def get_inference_service(name: str):
+    """Loaded inference service for this process, created on first use."""
+    if name not in _services:
+        ensure_ml_path()
+        import importlib
+        
+        module_name, class_name, stem = INFERENCE_SERVICES[name]
+        service_cls = getattr(importlib.import_module(module_name), class_name)
+        if settings.MODEL_SERVER_SOCKET and service_cls.SERVER_MODEL_NAME:
+            # Thin client: the model server owns the weights
+            service = service_cls(device=get_device(), server_socket=settings.MODEL_SERVER_SOCKET)
+        elif service_cls.SERVER_MODEL_NAME:
+            # Services with a batched forward pass can run compiled and in bf16
+            service = service_cls(
+                model_path=get_model_path(stem),
+                device=get_device(),
+                compile_model=settings.COMPILE_MODELS,
+                precision=settings.INFERENCE_PRECISION,
+                channels_last=settings.CHANNELS_LAST,
+            )
+        else:
+            service = service_cls(model_path=get_model_path(stem), device=get_device())
+        service.load_model()
+        _services[name] = service
+    return _services[name]
+
+
+def has_model(name: str) -> bool:
+    """Whether real weights are available for a model, locally or via the model server."""
+    ensure_ml_path()
+    import importlib
+    
+    module_name, class_name, stem = INFERENCE_SERVICES[name]
+    if settings.MODEL_SERVER_SOCKET:
+        service_cls = getattr(importlib.import_module(module_name), class_name)
+        if service_cls.SERVER_MODEL_NAME:
+            return True
+    return get_model_path(stem) is not None
+
+
+def get_known_fake_index():
+    """
+    The known-fake embedding index, or None when none is configured.
+    
+    The index is reloaded when its file changes, so rebuilding it takes
+    effect without restarting workers.
+    """
+    global _known_fake_index
+    path = settings.KNOWN_FAKES_INDEX_PATH
+    if not path or not Path(path).exists():
+        return None
+    
+    mtime = Path(path).stat().st_mtime
+    if _known_fake_index is None or _known_fake_index[0] != mtime:
+        ensure_ml_path()
+        from inference.known_fakes import KnownFakeIndex
+        _known_fake_index = (mtime, KnownFakeIndex.load(path))
+    return _known_fake_index[1]
+
+
+def get_model_server_client():
+    """Client for the node's model server, or None when none is configured."""
+    global _server_client
+    if settings.MODEL_SERVER_SOCKET and _server_client is None:
+        ensure_ml_path()
+        from inference.model_server import ModelServerClient
+        _server_client = ModelServerClient(settings.MODEL_SERVER_SOCKET)
+    return _server_client
+
+
+def preload_models(names: List[str]) -> Dict[str, Any]:
+    """
+    Load and warm up the given models in this process and report the startup cost.
+    
+    Returns:
+        Dict with total 'startup_ms', per-model 'models' load stats and the
+        process 'memory' after loading
+    """
+    ensure_ml_path()
+    from inference.weights import process_memory
+    
+    start = time.perf_counter()
+    models = {}
+    for name in names:
+        service = get_inference_service(name)
+        models[name] = dict(service.load_stats or {"weights_format": None})
+        # Run representative shapes now so the first job doesn't pay for them
+        models[name]["warmup"] = service.warmup()
+    
+    return {
+        "startup_ms": round((time.perf_counter() - start) * 1000, 1),
+        "models": models,
+        "memory": process_memory(),
+    }
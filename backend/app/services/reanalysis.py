@@ -0,0 +1,103 @@
+"""
+Incremental re-analysis of completed jobs after a model version bump.
+
+Each finished job stores its per-modality results with the model version
+that produced them. Jobs with a stale modality are queued for
+`run_reanalysis`, which recomputes only that modality from the job's
+cached frames, audio and transcript and re-runs fusion.
+
+Usage:
+    python -m app.services.reanalysis --dry-run
+    python -m app.services.reanalysis --modality video --limit 1000
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.services.rescoring import DEFAULT_BATCH_SIZE, iter_job_batches
+from app.workers.inference import MODALITIES, stale_modalities
+from app.workers.report import missing_intermediates, run_reanalysis
+
+
+def queue_stale_jobs(
+    modalities: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Queue re-analysis of completed jobs with stale modality results.
+
+    Args:
+        modalities: Only consider these modalities (default: all)
+        batch_size: Jobs per fetch
+        dry_run: Count stale jobs without queueing them
+        limit: Stop after queueing this many jobs
+
+    Returns:
+        Counts of scanned, queued and unrecoverable jobs, and of stale
+        results per modality
+    """
+    start = time.time()
+    scanned = 0
+    queued = 0
+    unrecoverable = 0
+    stale_counts: Counter = Counter()
+
+    for batch in iter_job_batches(batch_size):
+        for job_id, results in batch:
+            scanned += 1
+            stale = stale_modalities(results or {})
+            if modalities is not None:
+                stale = [m for m in stale if m in modalities]
+            if not stale:
+                continue
+
+            stale_counts.update(stale)
+            if missing_intermediates(results or {}, [m for m in stale if m in MODALITIES]):
+                # Frames or audio were cleaned up; only a full run can refresh it
+                unrecoverable += 1
+                continue
+
+            if not dry_run:
+                run_reanalysis.delay(str(job_id), stale)
+            queued += 1
+            if limit is not None and queued >= limit:
+                break
+
+        print(f"Scanned {scanned} jobs, {queued} stale ({time.time() - start:.1f}s)")
+        if limit is not None and queued >= limit:
+            break
+
+    return {
+        "scanned": scanned,
+        "queued": queued,
+        "unrecoverable": unrecoverable,
+        "stale_by_modality": dict(stale_counts),
+        "dry_run": dry_run,
+        "elapsed_s": round(time.time() - start, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-analyse jobs whose model versions are stale")
+    parser.add_argument("--modality", action="append", choices=list(MODALITIES) + ["fusion"],
+                        help="Only refresh these modalities (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    summary = queue_stale_jobs(
+        modalities=args.modality,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Bulk re-scoring of historical analysis jobs with new fusion weights or a
+new learned fusion model.
+
+Verdicts are banded with the pipeline's labels (`app.workers.inference`),
+and without a weights file the pipeline's fusion weights are used, so a
+re-scored job reads like a freshly analysed one.
+
+Usage:
+    python -m app.services.rescoring --weights fusion_weights.json
+    python -m app.services.rescoring --model fusion_head.pt --batch-size 20000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+
+from app.core.celery_app import TaskState
+from app.db.session import SessionLocal, sync_engine
+from app.models import AnalysisJob
+from app.services.ml_runtime import get_fusion_service
+from app.workers.inference import FUSION_WEIGHTS, LABEL_BINS, LABELS, MODALITIES
+
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def iter_job_batches(batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple[Any, Dict]]]:
+    """
+    Yield (job_id, results) batches of completed jobs.
+    
+    Uses a server-side cursor where the driver supports one (PostgreSQL),
+    so memory stays bounded by the batch size. Other backends fall back to
+    keyset pagination on the primary key.
+    """
+    query = (
+        select(AnalysisJob.id, AnalysisJob.results)
+        .where(
+            AnalysisJob.status == TaskState.DONE,
+            AnalysisJob.results.isnot(None),
+        )
+        .order_by(AnalysisJob.id)
+    )
+    
+    if sync_engine.dialect.supports_server_side_cursors:
+        with sync_engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(query)
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+        return
+    
+    last_id = None
+    while True:
+        page = query if last_id is None else query.where(AnalysisJob.id > last_id)
+        with sync_engine.connect() as conn:
+            rows = [tuple(row) for row in conn.execute(page.limit(batch_size))]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def rescore_jobs(
+    fusion,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Re-score completed jobs in batches and write the new verdicts in bulk.
+    
+    Args:
+        fusion: Loaded MultimodalFusionService with the new weights or model
+        batch_size: Jobs per fetch, fusion call and bulk update
+        dry_run: Compute new scores without writing them
+        limit: Stop after this many jobs
+    
+    Returns:
+        Counts of processed and changed jobs and elapsed time
+    """
+    start = time.time()
+    processed = 0
+    label_changes = 0
+    
+    for batch in iter_job_batches(batch_size):
+        if limit is not None:
+            batch = batch[:max(0, limit - processed)]
+            if not batch:
+                break
+        
+        features = np.array(
+            [fusion.features_from_results(results or {}) for _, results in batch],
+            dtype=np.float32,
+        )
+        fused = fusion.predict_batch(features, batch_size=batch_size, label_bins=LABEL_BINS, labels=LABELS)
+        weights = fusion_weights(fusion, features)
+        rescored_at = datetime.utcnow().isoformat()
+        
+        rows = []
+        for (job_id, results), score, label, job_weights in zip(
+            batch, fused["fused_scores"], fused["labels"], weights
+        ):
+            rows.append({
+                "id": job_id,
+                "overall_score": float(score),
+                "label": str(label),
+                "results": {
+                    **(results or {}),
+                    "fusion": {
+                        **((results or {}).get("fusion") or {}),
+                        "overall_score": float(score),
+                        "label": str(label),
+                        "weights": job_weights,
+                        "rescored_at": rescored_at,
+                    },
+                },
+            })
+        
+        if not dry_run:
+            db = SessionLocal()
+            try:
+                previous = dict(db.execute(
+                    select(AnalysisJob.id, AnalysisJob.label)
+                    .where(AnalysisJob.id.in_([row["id"] for row in rows]))
+                ).all())
+                label_changes += sum(1 for row in rows if previous.get(row["id"]) != row["label"])
+                
+                # ORM bulk UPDATE by primary key: one executemany per batch
+                db.execute(update(AnalysisJob), rows)
+                db.commit()
+            finally:
+                db.close()
+        
+        processed += len(rows)
+        print(f"Rescored {processed} jobs ({time.time() - start:.1f}s)")
+    
+    return {
+        "processed": processed,
+        "label_changes": label_changes,
+        "dry_run": dry_run,
+        "elapsed_s": round(time.time() - start, 2),
+    }
+
+
+def fusion_weights(fusion, features: np.ndarray) -> List[Optional[Dict[str, float]]]:
+    """
+    Per-job modality weights the fusion applied: the configured weights
+    scaled by confidence and renormalised over the modalities that ran.
+    None for a learned fusion model, which has no weights to report.
+    """
+    if fusion.model is not None:
+        return [None] * len(features)
+    base = np.array([fusion.weights[m] for m in MODALITIES], dtype=np.float64)
+    adjusted = base * features[:, 3:]
+    total = adjusted.sum(axis=1, keepdims=True)
+    adjusted = np.divide(adjusted, total, out=np.zeros_like(adjusted), where=total > 0)
+    return [{m: round(float(w), 4) for m, w in zip(MODALITIES, row)} for row in adjusted]
+
+
+def load_weights_file(path: str) -> Tuple[Optional[Dict[str, float]], Optional[Dict[str, Any]]]:
+    """
+    Read fusion weights from JSON.
+    
+    Accepts a flat {"video": .., "audio": .., "lipsync": ..} mapping or the
+    {"weights": {...}, "calibration": {...}} layout written after calibration.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    
+    if "weights" in data:
+        return data["weights"], data.get("calibration")
+    return data, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score historical analysis jobs")
+    parser.add_argument("--model", type=str, default=None, help="Learned fusion model path")
+    parser.add_argument("--weights", type=str, default=None, help="Fusion weights JSON file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    
+    if not args.model and not args.weights:
+        parser.error("one of --model or --weights is required")
+    if args.model and not Path(args.model).exists():
+        parser.error(f"model not found: {args.model}")
+    
+    weights, calibration = load_weights_file(args.weights) if args.weights else (None, None)
+    fusion = get_fusion_service(
+        model_path=args.model,
+        weights=weights or FUSION_WEIGHTS,
+        calibration=calibration,
+    )
+    
+    summary = rescore_jobs(
+        fusion,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
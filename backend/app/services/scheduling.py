@@ -0,0 +1,234 @@
+"""
+Priority tiers and per-user fair share for analysis pipelines.
+
+Every job runs in one of three tiers. Interactive jobs are dispatched as
+soon as they are submitted, at the broker's highest message priority.
+Batch and backfill jobs are held in the database and released by the
+scheduler only while the pipeline workers have room for them beyond
+INTERACTIVE_RESERVED_SLOTS, so bulk work never queues up in the broker
+in front of interactive jobs and interactive latency does not depend on
+how much bulk work is waiting.
+
+Held jobs are released to the user with the fewest pipelines in flight
+first (oldest job first between equals), so a user who bulk-submits
+thousands of files gets the same share of the workers as everyone else.
+Backfill jobs only take slots no batch job is waiting for. Bulk jobs
+released while no interactive job is running score frames in larger
+model batches (IDLE_INFERENCE_BATCH_SIZE), using the idle capacity for
+throughput.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+
+from app.core.celery_app import TaskState
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AnalysisJob, MediaItem
+
+
+TIERS = ("interactive", "batch", "backfill")
+# Held in the database until the scheduler releases them, in this order
+HELD_TIERS = ("batch", "backfill")
+# Broker message priority per tier (0 is consumed first)
+TIER_PRIORITY = {"interactive": 0, "batch": 5, "backfill": 9}
+FINISHED_STATES = (TaskState.DONE, TaskState.FAILED, TaskState.CANCELLED)
+
+
+def claim(db, job: AnalysisJob, batch_size: Optional[int] = None) -> bool:
+    """
+    Mark a held job dispatched and commit, unless another scheduler
+    already has. The conditional UPDATE lets only one of several
+    concurrent schedulers release each job.
+    """
+    values = {"dispatched_at": datetime.utcnow()}
+    if batch_size:
+        values["options"] = {**(job.options or {}), "inference_batch_size": batch_size}
+    claimed = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.id == job.id, AnalysisJob.dispatched_at.is_(None))
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    return claimed == 1
+
+
+def dispatch(db, job: AnalysisJob) -> None:
+    """
+    Send a claimed job's pipeline to the executor at its tier's priority
+    and record its task id. If the submission fails the claim is given
+    back, so the job is released again later.
+    """
+    from app.services.executor import get_executor
+
+    job_filter = AnalysisJob.id == job.id
+    try:
+        task_id = get_executor().submit([job.id], TIER_PRIORITY[job.priority])[0]
+    except Exception:
+        db.rollback()
+        db.query(AnalysisJob).filter(job_filter).update({"dispatched_at": None}, synchronize_session=False)
+        db.commit()
+        raise
+    if task_id:
+        db.query(AnalysisJob).filter(job_filter).update({"celery_task_id": task_id}, synchronize_session=False)
+        db.commit()
+
+
+def fair_share_order(
+    held: Iterable[Tuple[Any, Any]], in_flight: Dict[Any, int], limit: int
+) -> List[Any]:
+    """
+    Pick up to `limit` held jobs, least-served user first.
+
+    Args:
+        held: (job id, user_id) pairs, oldest job first
+        in_flight: Pipelines each user has running or queued at the workers
+        limit: Free slots
+    """
+    queues = defaultdict(list)
+    for job, user_id in held:
+        queues[user_id].append(job)
+
+    # (jobs in flight, position of the user's oldest waiting job, user)
+    heap = []
+    for position, (user_id, jobs) in enumerate(queues.items()):
+        heapq.heappush(heap, (in_flight.get(user_id, 0), position, user_id))
+
+    picked = []
+    while heap and len(picked) < limit:
+        count, position, user_id = heapq.heappop(heap)
+        picked.append(queues[user_id].pop(0))
+        if queues[user_id]:
+            heapq.heappush(heap, (count + 1, position, user_id))
+    return picked
+
+
+def oldest_held(db, tier: str, per_user: int) -> List[Tuple[Any, Any]]:
+    """
+    (job id, user id) of each user's `per_user` oldest held jobs in a
+    tier, oldest first. No user can be given more jobs than there are free
+    slots, so the rest of a large backlog is never read.
+    """
+    rank = (
+        func.row_number()
+        .over(partition_by=MediaItem.user_id, order_by=(AnalysisJob.created_at, AnalysisJob.id))
+        .label("rank")
+    )
+    waiting = (
+        db.query(AnalysisJob.id, MediaItem.user_id, AnalysisJob.created_at, rank)
+        .join(AnalysisJob.media_item)
+        .filter(
+            AnalysisJob.priority == tier,
+            AnalysisJob.status == TaskState.PENDING,
+            AnalysisJob.dispatched_at.is_(None),
+            # Jobs attached to an in-flight job have nothing to run
+            AnalysisJob.coalesced_with_id.is_(None),
+        )
+        .subquery()
+    )
+    return [
+        (job_id, user_id)
+        for job_id, user_id in db.query(waiting.c.id, waiting.c.user_id)
+        .filter(waiting.c.rank <= per_user)
+        .order_by(waiting.c.created_at, waiting.c.id)
+    ]
+
+
+def dispatch_held() -> Dict[str, int]:
+    """
+    Release held batch and backfill jobs into the free pipeline slots.
+
+    Returns the number of jobs released per tier.
+    """
+    db = SessionLocal()
+    try:
+        in_flight = dict(
+            db.query(AnalysisJob.priority, func.count(AnalysisJob.id))
+            .filter(AnalysisJob.dispatched_at.isnot(None), AnalysisJob.status.notin_(FINISHED_STATES))
+            .group_by(AnalysisJob.priority)
+            .all()
+        )
+        interactive = in_flight.get("interactive", 0)
+        bulk = sum(in_flight.get(tier, 0) for tier in HELD_TIERS)
+        free = settings.PIPELINE_WORKER_SLOTS - max(settings.INTERACTIVE_RESERVED_SLOTS, interactive) - bulk
+        released = {tier: 0 for tier in HELD_TIERS}
+        if free <= 0:
+            return released
+
+        user_in_flight = dict(
+            db.query(MediaItem.user_id, func.count(AnalysisJob.id))
+            .join(AnalysisJob.media_item)
+            .filter(
+                AnalysisJob.priority.in_(HELD_TIERS),
+                AnalysisJob.dispatched_at.isnot(None),
+                AnalysisJob.status.notin_(FINISHED_STATES),
+            )
+            .group_by(MediaItem.user_id)
+            .all()
+        )
+        # Idle workers take bulk work in larger model batches
+        batch_size = settings.IDLE_INFERENCE_BATCH_SIZE if interactive == 0 else None
+
+        for tier in HELD_TIERS:
+            if free <= 0:
+                break
+            held = oldest_held(db, tier, free)
+            picked = fair_share_order(held, user_in_flight, free)
+            owners = dict(held)
+            jobs = {job.id: job for job in db.query(AnalysisJob).filter(AnalysisJob.id.in_(picked))}
+            # Each job is claimed and committed before its pipeline is submitted
+            for job_id in picked:
+                if not claim(db, jobs[job_id], batch_size):
+                    continue
+                dispatch(db, jobs[job_id])
+                released[tier] += 1
+                free -= 1
+                # Counts toward its user's share when the next tier is ordered
+                user_in_flight[owners[job_id]] = user_in_flight.get(owners[job_id], 0) + 1
+        return released
+    finally:
+        db.close()
+
+
+def record_pickup(job_id: str) -> None:
+    """Record how long a job waited for a worker, on its first pickup."""
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if job and job.queue_wait_ms is None and job.created_at:
+            job.queue_wait_ms = int((datetime.utcnow() - job.created_at).total_seconds() * 1000)
+            db.commit()
+    finally:
+        db.close()
+
+
+def scheduled_batch_size(job_id: str) -> Optional[int]:
+    """Video model batch size the scheduler gave a job, if any."""
+    db = SessionLocal()
+    try:
+        options = db.query(AnalysisJob.options).filter(AnalysisJob.id == job_id).scalar()
+        return (options or {}).get("inference_batch_size")
+    finally:
+        db.close()
+
+
+def _percentile(ordered: Sequence[int], q: float) -> int:
+    """Nearest-rank percentile of sorted values."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def wait_summary(waits_ms: Iterable[int]) -> Dict[str, Optional[int]]:
+    """Sample count, p50, p95 and max of queue waits."""
+    ordered = sorted(waits_ms)
+    if not ordered:
+        return {"samples": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    return {
+        "samples": len(ordered),
+        "p50_ms": _percentile(ordered, 0.5),
+        "p95_ms": _percentile(ordered, 0.95),
+        "max_ms": ordered[-1],
+    }
@@ -0,0 +1,255 @@
+"""
+Per-job scratch space for pipeline working files.
+
+Preprocessing writes a job's frame store, audio buffer, feature bank and
+frame embeddings into the job's own directory under SCRATCH_PATH, which
+may be a tmpfs mount shared by the node's workers (e.g. /dev/shm).
+
+Writers reserve an estimate of what they are about to write against the
+node's quota and wait while the scratch space is full, so a burst of
+large uploads queues up instead of filling the volume. Tasks working on
+a job hold a reference to its directory; when the last one lets go the
+directory is removed. Files worth keeping past the run (the evidence
+inputs) are first moved to the job's artifact directory with
+`retain()`.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.services.artifacts import job_artifact_dir
+
+
+logger = logging.getLogger(__name__)
+
+REFS_NAME = ".refs"
+RESERVATIONS_NAME = ".reservations.json"
+LOCK_NAME = ".lock"
+# Share of the scratch filesystem used when no quota is configured
+DEFAULT_QUOTA_FRACTION = 0.8
+WAIT_POLL_S = 1.0
+
+
+class ScratchQuotaExceeded(Exception):
+    """Scratch space stayed full for longer than SCRATCH_WAIT_TIMEOUT_S."""
+
+
+def scratch_root() -> Path:
+    root = Path(settings.SCRATCH_PATH)
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def job_scratch_dir(job_id: str) -> Path:
+    """A job's working directory, created on first use."""
+    directory = scratch_root() / str(job_id)
+    directory.mkdir(exist_ok=True)
+    return directory
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Exclusive lock shared by all workers on the node."""
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_json(path: Path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def _write_json(path: Path, payload) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def quota_bytes() -> int:
+    """Node scratch quota: SCRATCH_QUOTA_MB, or most of the filesystem."""
+    if settings.SCRATCH_QUOTA_MB is not None:
+        return settings.SCRATCH_QUOTA_MB * 1024 * 1024
+    return int(shutil.disk_usage(scratch_root()).total * DEFAULT_QUOTA_FRACTION)
+
+
+def _tree_bytes(path: Path) -> int:
+    total = 0
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                total += _tree_bytes(Path(entry.path))
+            else:
+                total += entry.stat(follow_symlinks=False).st_blocks * 512
+        except FileNotFoundError:
+            continue
+    return total
+
+
+def usage_bytes() -> int:
+    """Bytes on disk under the scratch root."""
+    return _tree_bytes(scratch_root())
+
+
+def _reserved_bytes(reservations: Dict[str, Dict]) -> int:
+    return sum(r["bytes"] for r in reservations.values())
+
+
+@contextmanager
+def reserve(job_id: str, nbytes: int, timeout_s: Optional[float] = None) -> Iterator[Path]:
+    """
+    Reserve space for a write into a job's scratch directory.
+
+    Blocks while the node's usage plus outstanding reservations would
+    exceed the quota, and raises ScratchQuotaExceeded after `timeout_s`
+    (SCRATCH_WAIT_TIMEOUT_S). A write larger than the whole quota is let
+    through once nothing else holds a reservation, rather than waiting
+    forever. The reservation is dropped on exit, when the written files
+    count towards usage themselves.
+
+    Yields:
+        The job's scratch directory
+    """
+    root = scratch_root()
+    reservations_path = root / RESERVATIONS_NAME
+    timeout_s = settings.SCRATCH_WAIT_TIMEOUT_S if timeout_s is None else timeout_s
+    token = uuid.uuid4().hex
+    deadline = time.time() + timeout_s
+    quota = quota_bytes()
+    waited = False
+
+    while True:
+        with _locked(root / LOCK_NAME):
+            reservations = _read_json(reservations_path, {})
+            in_use = usage_bytes() + _reserved_bytes(reservations)
+            if in_use + nbytes <= quota or (nbytes > quota and not reservations):
+                reservations[token] = {"job_id": str(job_id), "bytes": int(nbytes), "at": time.time()}
+                _write_json(reservations_path, reservations)
+                break
+        if time.time() >= deadline:
+            raise ScratchQuotaExceeded(
+                f"Scratch space full ({in_use} of {quota} bytes in use); "
+                f"job {job_id} could not reserve {nbytes} bytes"
+            )
+        if not waited:
+            logger.info("Scratch space full; job %s waiting for %d bytes", job_id, nbytes)
+            waited = True
+            sweep_orphans()
+        time.sleep(WAIT_POLL_S)
+
+    try:
+        directory = job_scratch_dir(job_id)
+        (directory / REFS_NAME).touch()
+        yield directory
+    finally:
+        with _locked(root / LOCK_NAME):
+            reservations = _read_json(reservations_path, {})
+            reservations.pop(token, None)
+            _write_json(reservations_path, reservations)
+
+
+def hold(job_id: str, holder: str) -> int:
+    """
+    Take a reference to a job's scratch directory; returns the number held.
+    
+    References are keyed by holder (the task id), so a task redelivered
+    after its worker died takes over its own reference instead of
+    leaking it.
+    """
+    directory = job_scratch_dir(job_id)
+    with _locked(directory / LOCK_NAME):
+        # A concurrent release may have removed the directory meanwhile
+        directory.mkdir(exist_ok=True)
+        holders = set(_read_json(directory / REFS_NAME, []))
+        holders.add(str(holder))
+        _write_json(directory / REFS_NAME, sorted(holders))
+    return len(holders)
+
+
+def release(job_id: str, holder: str) -> int:
+    """Drop a reference; the directory is removed with the last one."""
+    directory = scratch_root() / str(job_id)
+    if not directory.exists():
+        return 0
+    with _locked(directory / LOCK_NAME):
+        holders = set(_read_json(directory / REFS_NAME, []))
+        holders.discard(str(holder))
+        if holders:
+            _write_json(directory / REFS_NAME, sorted(holders))
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+    return len(holders)
+
+
+@contextmanager
+def job_scratch(job_id: str) -> Iterator[Path]:
+    """Hold a job's scratch directory for the duration of a block."""
+    holder = uuid.uuid4().hex
+    hold(job_id, holder)
+    try:
+        yield job_scratch_dir(job_id)
+    finally:
+        release(job_id, holder)
+
+
+def in_scratch(path: str) -> bool:
+    try:
+        Path(path).resolve().relative_to(Path(settings.SCRATCH_PATH).resolve())
+        return True
+    except ValueError:
+        return False
+
+
+def retain(job_id: str, path: str) -> str:
+    """
+    Move a working file out of scratch into the job's artifact directory.
+
+    Retained files live as long as the job's media and are removed by the
+    expired-media sweep. Paths outside scratch are returned unchanged.
+    """
+    if not path or not in_scratch(path) or not Path(path).exists():
+        return path
+    destination = job_artifact_dir(job_id)
+    destination.mkdir(parents=True, exist_ok=True)
+    # shutil.move copies when scratch is a tmpfs on another filesystem
+    return str(shutil.move(path, destination / Path(path).name))
+
+
+def sweep_orphans(max_age_s: Optional[float] = None) -> int:
+    """
+    Remove scratch directories left behind by tasks that died.
+
+    A directory is orphaned when nothing has reserved space in or taken
+    a reference to it for `max_age_s` (SCRATCH_ORPHAN_AGE_S).
+    """
+    max_age_s = settings.SCRATCH_ORPHAN_AGE_S if max_age_s is None else max_age_s
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for directory in scratch_root().iterdir():
+        if not directory.is_dir():
+            continue
+        refs = directory / REFS_NAME
+        last_used = refs.stat().st_mtime if refs.exists() else directory.stat().st_mtime
+        if last_used < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
@@ -3,6 +3,7 @@ from .preprocess import (
     validate_media,
     extract_frames,
     extract_audio,
+    extract_audio_features,
     transcribe_audio,
     run_preprocessing_pipeline,
 )
@@ -10,6 +11,7 @@ from .inference import (
     run_video_inference,
     run_audio_inference,
     run_lipsync_inference,
+    match_known_fakes,
     run_fusion,
     run_inference_pipeline,
 )
@@ -17,20 +19,26 @@ from .report import (
     generate_report,
     finalize_job,
     run_full_pipeline,
+    run_reanalysis,
 )
+from .live import run_live_analysis
 
 __all__ = [
     "validate_media",
     "extract_frames",
     "extract_audio",
+    "extract_audio_features",
     "transcribe_audio",
     "run_preprocessing_pipeline",
     "run_video_inference",
     "run_audio_inference",
     "run_lipsync_inference",
+    "match_known_fakes",
     "run_fusion",
     "run_inference_pipeline",
     "generate_report",
     "finalize_job",
     "run_full_pipeline",
+    "run_reanalysis",
+    "run_live_analysis",
 ]
@@ -1,17 +1,77 @@
 """
 Inference Celery worker tasks for ML model execution.
 """
+import logging
+import os
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 
 from celery import shared_task
+from celery.signals import worker_process_init
 import numpy as np
 
 from app.core.celery_app import celery_app, TaskState
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models import AnalysisJob, ModelRun, Segment
+from app.services.artifacts import resolve
+from app.services.cancellation import CancellationCheck, JobCancelled, raise_if_cancelled
+from app.services.checkpoints import StageCheckpoints
+from app.services.scheduling import scheduled_batch_size
+from app.services.scratch import job_scratch_dir
+from app.services.ml_runtime import (
+    ensure_ml_path,
+    get_inference_service,
+    get_known_fake_index,
+    has_model,
+    preload_models,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Per-modality models fused into the verdict, in pipeline order
+MODALITIES = ("video", "audio", "lipsync")
+
+# Simple weighted fusion (replace with actual fusion model)
+FUSION_WEIGHTS = {"video": 0.5, "audio": 0.3, "lipsync": 0.2}
+# Verdict bands: score < LABEL_BINS[i] maps to LABELS[i]
+LABEL_BINS = (0.3, 0.6)
+LABELS = ("AUTHENTIC", "LIKELY_FAKE", "FAKE")
+# Two-sided 95% normal quantile for provisional confidence intervals
+PROVISIONAL_Z = 1.96
+
+
+@worker_process_init.connect
+def preload_worker_models(**kwargs):
+    """
+    Load configured models in each prefork child as it starts.
+    
+    Weights are memory-mapped, so children share one copy through the page
+    cache; the startup time and resident memory of each child are logged.
+    """
+    if not settings.PRELOAD_MODELS:
+        return
+    
+    stats = preload_models(settings.PRELOAD_MODELS)
+    memory = stats["memory"]
+    for name, model_stats in stats["models"].items():
+        warmup = model_stats.get("warmup") or {}
+        if warmup:
+            logger.info(
+                "Worker child %d warmed up %s in %.1f ms (compiled=%s, speedup %s)",
+                os.getpid(), name, warmup["warmup_ms"], warmup["compiled"], warmup.get("speedup", "n/a"),
+            )
+    logger.info(
+        "Worker child %d loaded %s in %.1f ms (rss %.1f MB, private %s MB, shared %s MB)",
+        os.getpid(),
+        ", ".join(settings.PRELOAD_MODELS),
+        stats["startup_ms"],
+        memory["rss_mb"],
+        memory.get("private_mb", "n/a"),
+        memory.get("shared_mb", "n/a"),
+    )
 
 
 def update_job_status(job_id: str, stage: str, progress: float, error: str = None):
@@ -19,7 +79,8 @@ def update_job_status(job_id: str, stage: str, progress: float, error: str = Non
     db = SessionLocal()
     try:
         job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
-        if job:
+        # A cancelled job keeps its state while its tasks wind down
+        if job and job.status != TaskState.CANCELLED:
             job.stage = stage
             job.status = stage
             job.progress = progress
@@ -69,43 +130,217 @@ def add_segment(job_id: str, start_ms: int, end_ms: int,
         db.close()
 
 
+def clear_segments(job_id: str, segment_type: str) -> None:
+    """Remove a job's flagged segments of one type."""
+    db = SessionLocal()
+    try:
+        db.query(Segment).filter(
+            Segment.job_id == job_id, Segment.segment_type == segment_type
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def frame_list(frames_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Index entries of a job's extracted frames.
+    
+    Read from the job's frame store; jobs extracted before it kept a frame
+    list, inline or in the artifact store.
+    """
+    frames_data = frames_data or {}
+    if frames_data.get("frame_store"):
+        ensure_ml_path()
+        from inference.frame_store import FrameStore
+        return FrameStore(frames_data["frame_store"]).frame_info()
+    return resolve(frames_data.get("frames", []))
+
+
+def fusion_label(score: float) -> str:
+    """Verdict label of a fused score."""
+    for upper, label in zip(LABEL_BINS, LABELS):
+        if score < upper:
+            return label
+    return LABELS[-1]
+
+
+def score_aggregate(scores: List[float], total: int) -> Dict[str, Any]:
+    """Running aggregate of the first len(scores) of `total` per-unit scores."""
+    scores = np.asarray(scores, dtype=np.float64)
+    return {
+        "n": int(len(scores)),
+        "total": int(max(total, len(scores))),
+        "sum": float(scores.sum()),
+        "sum_sq": float((scores ** 2).sum()),
+        "max": float(scores.max()) if len(scores) else 0.0,
+    }
+
+
+def provisional_verdict(partials: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Provisional fused score, label and 95% interval from partial aggregates.
+    
+    Each modality's final score is the mean over all of its units (frames,
+    audio windows), so the mean of the units seen so far estimates it with
+    a standard error shrunk by the finite population correction: the
+    interval closes as a stage completes. Modalities with nothing scored
+    yet are left out and the weights renormalised; 'coverage' reports how
+    much of each modality the verdict is based on. Aggregates with no
+    'total' (live streams) are treated as samples of an unbounded stream:
+    no correction, and no coverage.
+    
+    Returns:
+        Dict with 'score', 'label', 'ci_low', 'ci_high', 'label_stable'
+        (the whole interval falls in one label band) and 'coverage', or
+        None before any scores are in
+    """
+    observed = {m: p for m, p in (partials or {}).items() if p.get("n") and m in FUSION_WEIGHTS}
+    if not observed:
+        return None
+    
+    weight_total = sum(FUSION_WEIGHTS[m] for m in observed)
+    score = 0.0
+    variance = 0.0
+    coverage = {}
+    for modality, aggregate in observed.items():
+        n, total = aggregate["n"], aggregate.get("total")
+        mean = aggregate["sum"] / n
+        if n > 1:
+            unit_variance = max(aggregate["sum_sq"] / n - mean ** 2, 0.0) * n / (n - 1)
+        else:
+            # One unit says nothing about the spread; assume the widest a score in [0, 1] can have
+            unit_variance = 0.25
+        if total is None:
+            fpc = 1.0
+            coverage[modality] = None
+        else:
+            total = max(total, n)
+            fpc = (total - n) / (total - 1) if total > 1 else 0.0
+            coverage[modality] = round(n / total, 4)
+        weight = FUSION_WEIGHTS[modality] / weight_total
+        score += weight * mean
+        variance += weight ** 2 * unit_variance / n * fpc
+    
+    half_width = PROVISIONAL_Z * variance ** 0.5
+    ci_low = max(0.0, score - half_width)
+    ci_high = min(1.0, score + half_width)
+    label = fusion_label(score)
+    return {
+        "score": round(score, 4),
+        "label": label,
+        "ci_low": round(ci_low, 4),
+        "ci_high": round(ci_high, 4),
+        "label_stable": fusion_label(ci_low) == label == fusion_label(ci_high),
+        "coverage": coverage,
+    }
+
+
+def publish_partial(job_id: str, modality: str, aggregate: Dict[str, Any]) -> None:
+    """Store a stage checkpoint and the provisional verdict it implies."""
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if job:
+            results = dict(job.results or {})
+            partials = {**results.get("partial", {}), modality: aggregate}
+            job.results = {
+                **results,
+                "partial": partials,
+                "provisional": provisional_verdict(partials),
+            }
+            db.commit()
+    finally:
+        db.close()
+
+
 @celery_app.task(bind=True, queue="inference", max_retries=3)
 def run_video_inference(self, job_id: str, frames_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Run video forensics inference on extracted frames."""
+    """
+    Run video forensics inference on extracted frames.
+    
+    Workers without a deployed video model skip the modality.
+    """
     try:
         update_job_status(job_id, TaskState.INFER_VIDEO, 0.0)
         
-        frames = frames_data.get("frames", [])
+        if not has_model("video"):
+            update_job_status(job_id, TaskState.INFER_VIDEO, 1.0)
+            return {
+                "job_id": job_id,
+                "skipped": True,
+                "reason": "no video model deployed",
+                "model_version": settings.VIDEO_MODEL_VERSION,
+            }
+        
+        frames = frame_list(frames_data)
         if not frames:
             update_job_status(job_id, TaskState.INFER_VIDEO, 1.0)
-            return {"job_id": job_id, "video_score": 0.0, "predictions": []}
+            return {
+                "job_id": job_id,
+                "video_score": 0.0,
+                "predictions": [],
+                "model_version": settings.VIDEO_MODEL_VERSION,
+            }
         
-        # TODO: Load actual ViT/Swin model
-        # For now, simulate inference
         import time
-        import random
         
         start_time = time.time()
         
         predictions = []
         flagged_frames = []
-        
-        for i, frame_info in enumerate(frames):
-            # Simulate frame-level prediction
-            fake_prob = random.uniform(0.0, 0.5)  # Simulate mostly authentic
-            
-            predictions.append({
-                "frame_number": frame_info["frame_number"],
-                "timestamp_ms": frame_info["timestamp_ms"],
-                "fake_probability": fake_prob,
-            })
-            
-            if fake_prob > 0.7:
-                flagged_frames.append(frame_info)
+        embeddings_path = None
+        
+        checkpoint = settings.PROVISIONAL_CHECKPOINT_FRAMES
+        
+        service = get_inference_service("video")
+        from inference.base import InferenceCancelled
+        
+        cancelled = CancellationCheck(job_id)
+        # Bulk jobs dispatched onto idle workers run larger model batches
+        batch_size = scheduled_batch_size(job_id)
+        if batch_size:
+            checkpoint = max(checkpoint, batch_size)
+        embeddings = []
+        # Frames are scored a checkpoint at a time, each publishing a partial aggregate
+        for start in range(0, len(frames), checkpoint):
+            chunk = frames[start:start + checkpoint]
+            # The service also polls between its batches
+            source = {"frames": chunk, "should_stop": cancelled, "batch_size": batch_size}
+            if frames_data.get("frame_store"):
+                source = {
+                    "frame_store": frames_data["frame_store"],
+                    "start": start,
+                    "stop": start + len(chunk),
+                    "should_stop": cancelled,
+                    "batch_size": batch_size,
+                }
+            try:
+                result = service(source)
+            except InferenceCancelled:
+                raise JobCancelled(job_id)
+            for frame_info, prediction in zip(chunk, result["predictions"]):
+                predictions.append({
+                    "frame_number": frame_info["frame_number"],
+                    "timestamp_ms": frame_info["timestamp_ms"],
+                    "fake_probability": float(prediction["fake_probability"]),
+                })
+                if prediction["fake_probability"] > 0.7:
+                    flagged_frames.append(frame_info)
+            if result.get("embeddings") is not None:
+                embeddings.append(result["embeddings"])
             
-            if i % 10 == 0:
-                progress = i / len(frames)
-                update_job_status(job_id, TaskState.INFER_VIDEO, progress)
+            publish_partial(job_id, "video", score_aggregate(
+                [p["fake_probability"] for p in predictions], len(frames)
+            ))
+            update_job_status(job_id, TaskState.INFER_VIDEO, min(1.0, (start + len(chunk)) / len(frames)))
+        
+        if embeddings:
+            from inference.known_fakes import save_embeddings
+            embeddings_path = save_embeddings(
+                job_scratch_dir(job_id) / f"embeddings_{job_id}.npy",
+                np.concatenate(embeddings),
+            )
         
         # Calculate aggregate score
         avg_score = np.mean([p["fake_probability"] for p in predictions])
@@ -142,6 +377,8 @@ def run_video_inference(self, job_id: str, frames_data: Dict[str, Any]) -> Dict[
             "max_score": float(max_score),
             "frame_count": len(frames),
             "flagged_count": len(flagged_frames),
+            "embeddings_path": embeddings_path,
+            "model_version": settings.VIDEO_MODEL_VERSION,
         }
         
     except Exception as e:
@@ -151,25 +388,37 @@ def run_video_inference(self, job_id: str, frames_data: Dict[str, Any]) -> Dict[
 
 @celery_app.task(bind=True, queue="inference", max_retries=3)
 def run_audio_inference(self, job_id: str, audio_path: str) -> Dict[str, Any]:
-    """Run audio spoof detection on extracted audio."""
+    """
+    Run audio spoof detection on extracted audio.
+    
+    The spoof model scores the job's decoded audio buffer, reading its mel
+    spectrogram from the shared feature bank. Jobs without audio, or
+    workers without a deployed audio model, skip the modality.
+    """
     try:
         update_job_status(job_id, TaskState.INFER_AUDIO, 0.0)
         
         if not audio_path or not Path(audio_path).exists():
+            skipped = "no audio"
+        elif not has_model("audio"):
+            skipped = "no audio model deployed"
+        else:
+            skipped = None
+        if skipped:
             update_job_status(job_id, TaskState.INFER_AUDIO, 1.0)
-            return {"job_id": job_id, "audio_score": 0.0}
+            return {
+                "job_id": job_id,
+                "skipped": True,
+                "reason": skipped,
+                "model_version": settings.AUDIO_MODEL_VERSION,
+            }
         
-        # TODO: Load actual AASIST model
-        # For now, simulate inference
         import time
-        import random
         
         start_time = time.time()
         
-        # Simulate audio analysis
-        time.sleep(0.5)  # Simulate processing time
-        
-        spoof_probability = random.uniform(0.0, 0.4)  # Simulate mostly authentic
+        result = get_inference_service("audio")({"audio_path": audio_path})
+        spoof_probability = float(result["score"])
         
         inference_time_ms = int((time.time() - start_time) * 1000)
         
@@ -178,17 +427,19 @@ def run_audio_inference(self, job_id: str, audio_path: str) -> Dict[str, Any]:
             job_id=job_id,
             model_name="audio_spoof_aasist",
             model_version=settings.AUDIO_MODEL_VERSION,
-            score=float(spoof_probability),
-            predictions={"spoof_probability": spoof_probability},
+            score=spoof_probability,
+            predictions={"spoof_probability": spoof_probability, "analysis": result.get("analysis")},
             inference_time_ms=inference_time_ms
         )
         
+        publish_partial(job_id, "audio", score_aggregate([spoof_probability], 1))
+        
         # Add flagged segment if suspicious
         if spoof_probability > 0.6:
             add_segment(
                 job_id=job_id,
                 start_ms=0,
-                end_ms=5000,  # First 5 seconds
+                end_ms=int(result.get("duration_sec", 0) * 1000),
                 segment_type="audio",
                 score=spoof_probability,
                 reason="Audio spectral anomaly detected"
@@ -198,7 +449,11 @@ def run_audio_inference(self, job_id: str, audio_path: str) -> Dict[str, Any]:
         
         return {
             "job_id": job_id,
-            "audio_score": float(spoof_probability),
+            "audio_score": spoof_probability,
+            "label": result.get("label"),
+            "duration_sec": result.get("duration_sec"),
+            "spectral_analysis": result.get("spectral_analysis"),
+            "model_version": settings.AUDIO_MODEL_VERSION,
         }
         
     except Exception as e:
@@ -207,48 +462,134 @@ def run_audio_inference(self, job_id: str, audio_path: str) -> Dict[str, Any]:
 
 
 @celery_app.task(bind=True, queue="inference", max_retries=3)
-def run_lipsync_inference(self, job_id: str, frames_data: Dict, 
-                          transcript: Dict) -> Dict[str, Any]:
-    """Run lip-sync verification."""
+def run_lipsync_inference(self, job_id: str, frames_data: Dict,
+                          transcript: Dict, audio_path: str = "") -> Dict[str, Any]:
+    """
+    Run lip-sync verification.
+    
+    Mouth openness from the job's frame store (`frame_list` for older
+    jobs) is cross-correlated with the audio buffer's energy envelope
+    over the transcript's words, which arrive as an artifact reference
+    (`resolve`). Without frames or spoken words there is nothing to
+    verify and the modality is skipped.
+    """
     try:
         update_job_status(job_id, TaskState.LIPSYNC, 0.0)
         
-        # TODO: Implement actual lip-sync verification
-        # For now, simulate
+        frames_data = frames_data or {}
+        transcript = resolve(transcript) or {}
+        if frames_data.get("frame_store"):
+            frames = {"frame_store": frames_data["frame_store"]}
+        else:
+            frames = {"frames": frame_list(frames_data)}
+        if not (frames.get("frame_store") or frames.get("frames")) or not transcript.get("words"):
+            update_job_status(job_id, TaskState.LIPSYNC, 1.0)
+            return {"job_id": job_id, "skipped": True, "model_version": settings.LIPSYNC_MODEL_VERSION}
+        
         import time
-        import random
         
         start_time = time.time()
-        time.sleep(0.3)
         
-        mismatch_score = random.uniform(0.0, 0.3)
+        result = get_inference_service("lipsync")({
+            "frames": frames,
+            "transcript": transcript,
+            "audio_path": audio_path if audio_path and Path(audio_path).exists() else None,
+        })
+        mismatch_score = float(result["score"])
         
         inference_time_ms = int((time.time() - start_time) * 1000)
         
         add_model_run(
             job_id=job_id,
             model_name="lipsync_verifier",
-            model_version="v1.0.0",
-            score=float(mismatch_score),
-            predictions={"mismatch_score": mismatch_score},
+            model_version=settings.LIPSYNC_MODEL_VERSION,
+            score=mismatch_score,
+            predictions={
+                "mismatch_score": mismatch_score,
+                "sync_offset_ms": result.get("sync_offset_ms"),
+                "correlation_score": result.get("correlation_score"),
+                "flagged_segments": result.get("flagged_segments", []),
+            },
             inference_time_ms=inference_time_ms
         )
         
-        if mismatch_score > 0.5:
+        publish_partial(job_id, "lipsync", score_aggregate([mismatch_score], 1))
+        
+        for segment in result.get("flagged_segments", []):
+            if segment["mismatch_score"] > 0.5:
+                add_segment(
+                    job_id=job_id,
+                    start_ms=segment["start_ms"],
+                    end_ms=segment["end_ms"],
+                    segment_type="lipsync",
+                    score=segment["mismatch_score"],
+                    reason="Lip-audio synchronization mismatch"
+                )
+        
+        update_job_status(job_id, TaskState.LIPSYNC, 1.0)
+        
+        return {
+            "job_id": job_id,
+            "lipsync_score": mismatch_score,
+            "label": result.get("label"),
+            "sync_offset_ms": result.get("sync_offset_ms"),
+            "correlation_score": result.get("correlation_score"),
+            "analyzed_words": result.get("analyzed_words", 0),
+            "model_version": settings.LIPSYNC_MODEL_VERSION,
+        }
+        
+    except Exception as e:
+        update_job_status(job_id, TaskState.FAILED, 0.0, str(e))
+        raise
+
+
+@celery_app.task(bind=True, queue="inference", max_retries=3)
+def match_known_fakes(self, job_id: str, embeddings_path: str,
+                      frames_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Look up a job's frame embeddings in the index of confirmed fakes."""
+    try:
+        index = get_known_fake_index()
+        if index is None or not embeddings_path:
+            return {"job_id": job_id, "matched": False}
+        
+        import time
+        from inference.known_fakes import load_embeddings
+        
+        start_time = time.time()
+        match = index.match(
+            load_embeddings(embeddings_path),
+            threshold=settings.KNOWN_FAKE_MATCH_THRESHOLD,
+        )
+        inference_time_ms = int((time.time() - start_time) * 1000)
+        timestamps_ms = [f["timestamp_ms"] for f in frame_list(frames_data)]
+        
+        add_model_run(
+            job_id=job_id,
+            model_name="known_fake_lookup",
+            model_version=settings.VIDEO_MODEL_VERSION,
+            score=float(match["match_ratio"]),
+            predictions={**match, "frame_matches": match["frame_matches"][:100]},
+            inference_time_ms=inference_time_ms
+        )
+        
+        for frame_match in match["frame_matches"]:
+            timestamp_ms = timestamps_ms[frame_match["frame_index"]]
             add_segment(
                 job_id=job_id,
-                start_ms=2000,
-                end_ms=4000,
-                segment_type="lipsync",
-                score=mismatch_score,
-                reason="Lip-audio synchronization mismatch"
+                start_ms=timestamp_ms,
+                end_ms=timestamp_ms + 200,
+                segment_type="video",
+                score=frame_match["similarity"],
+                reason=f"Frame matches known fake {frame_match['source']}"
             )
         
-        update_job_status(job_id, TaskState.LIPSYNC, 1.0)
-        
         return {
             "job_id": job_id,
-            "lipsync_score": float(mismatch_score),
+            "matched": match["matched"],
+            "matched_frames": match["matched_frames"],
+            "match_ratio": match["match_ratio"],
+            "best_similarity": match["best_similarity"],
+            "source": match["source"],
         }
         
     except Exception as e:
@@ -267,8 +608,13 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
         audio_score = audio_result.get("audio_score", 0.0)
         lipsync_score = lipsync_result.get("lipsync_score", 0.0)
         
-        # Simple weighted fusion (replace with actual fusion model)
-        weights = {"video": 0.5, "audio": 0.3, "lipsync": 0.2}
+        # Modalities a degraded job skipped carry no evidence; the rest share their weight
+        ran = {
+            modality: not result.get("skipped")
+            for modality, result in zip(MODALITIES, (video_result, audio_result, lipsync_result))
+        }
+        weight_total = sum(FUSION_WEIGHTS[m] for m in MODALITIES if ran[m]) or 1.0
+        weights = {m: (FUSION_WEIGHTS[m] / weight_total if ran[m] else 0.0) for m in MODALITIES}
         
         overall_score = (
             weights["video"] * video_score +
@@ -276,13 +622,10 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
             weights["lipsync"] * lipsync_score
         )
         
-        # Determine label
-        if overall_score < 0.3:
-            label = "AUTHENTIC"
-        elif overall_score < 0.6:
-            label = "LIKELY_FAKE"
-        else:
-            label = "FAKE"
+        # Determine label; with no modality scored there is no verdict
+        label = fusion_label(overall_score)
+        if not any(ran.values()):
+            overall_score, label = None, None
         
         # Update job with final results
         from datetime import datetime
@@ -292,8 +635,12 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
             if job:
                 job.overall_score = overall_score
                 job.label = label
+                # The final verdict supersedes the provisional one
+                results = {
+                    k: v for k, v in (job.results or {}).items() if k not in ("partial", "provisional")
+                }
                 job.results = {
-                    **(job.results or {}),
+                    **results,
                     "video": video_result,
                     "audio": audio_result,
                     "lipsync": lipsync_result,
@@ -301,6 +648,7 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
                         "overall_score": overall_score,
                         "label": label,
                         "weights": weights,
+                        "model_version": settings.FUSION_MODEL_VERSION,
                     }
                 }
                 db.commit()
@@ -316,6 +664,7 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
             "video_score": video_score,
             "audio_score": audio_score,
             "lipsync_score": lipsync_score,
+            "skipped": [m for m in MODALITIES if not ran[m]],
         }
         
     except Exception as e:
@@ -323,29 +672,84 @@ def run_fusion(self, job_id: str, video_result: Dict, audio_result: Dict,
         raise
 
 
+def model_versions() -> Dict[str, str]:
+    """Currently deployed model version per modality."""
+    return {
+        "video": settings.VIDEO_MODEL_VERSION,
+        "audio": settings.AUDIO_MODEL_VERSION,
+        "lipsync": settings.LIPSYNC_MODEL_VERSION,
+        "fusion": settings.FUSION_MODEL_VERSION,
+    }
+
+
+def stale_modalities(results: Dict[str, Any]) -> List[str]:
+    """
+    Modalities of a job whose stored result came from an older model version.
+    
+    Fusion is listed when its own version changed; it is re-run anyway
+    whenever any input modality is recomputed. Modalities the job skipped
+    are never stale.
+    """
+    results = results or {}
+    current = model_versions()
+    return [
+        modality for modality in MODALITIES + ("fusion",)
+        if not (results.get(modality) or {}).get("skipped")
+        and (results.get(modality) or {}).get("model_version") != current[modality]
+    ]
+
+
+def run_modality(job_id: str, modality: str, preprocess_results: Dict) -> Dict[str, Any]:
+    """Run one modality's inference from the job's preprocessing outputs."""
+    options = preprocess_results.get("options") or {}
+    if not options.get(f"run_{modality}", True):
+        return {"job_id": job_id, "skipped": True, "model_version": model_versions()[modality]}
+    
+    frames_data = preprocess_results.get("frames", {})
+    
+    if modality == "video":
+        result = run_video_inference.apply(args=[job_id, frames_data]).get()
+        # Near-duplicates of confirmed fakes are reported with the video result
+        if result.get("embeddings_path"):
+            result["known_fake"] = match_known_fakes.apply(
+                args=[job_id, result["embeddings_path"], frames_data]
+            ).get()
+        return result
+    
+    if modality == "audio":
+        audio_path = preprocess_results.get("audio", {}).get("audio_path", "")
+        return run_audio_inference.apply(args=[job_id, audio_path]).get()
+    
+    if modality == "lipsync":
+        audio_path = preprocess_results.get("audio", {}).get("audio_path", "")
+        return run_lipsync_inference.apply(
+            args=[job_id, frames_data, preprocess_results.get("transcript", {}), audio_path]
+        ).get()
+    
+    raise ValueError(f"Unknown modality: {modality}")
+
+
 @celery_app.task(bind=True, queue="inference")
 def run_inference_pipeline(self, job_id: str, preprocess_results: Dict):
-    """Run the full inference pipeline."""
+    """
+    Run the full inference pipeline.
+    
+    Each modality is checkpointed; a redelivered pipeline reuses the
+    modalities an earlier attempt completed and replaces the segments of
+    any it had started.
+    """
     try:
-        frames_data = preprocess_results.get("frames", {})
-        audio_data = preprocess_results.get("audio", {})
-        transcript = preprocess_results.get("transcript", {})
+        checkpoints = StageCheckpoints(job_id)
         
-        # Run video inference
-        video_result = run_video_inference.apply(
-            args=[job_id, frames_data]
-        ).get()
+        def run_fresh(modality: str) -> Dict[str, Any]:
+            raise_if_cancelled(job_id)
+            clear_segments(job_id, modality)
+            return run_modality(job_id, modality, preprocess_results)
         
-        # Run audio inference
-        audio_path = audio_data.get("audio_path", "")
-        audio_result = run_audio_inference.apply(
-            args=[job_id, audio_path]
-        ).get()
-        
-        # Run lip-sync inference
-        lipsync_result = run_lipsync_inference.apply(
-            args=[job_id, frames_data, transcript]
-        ).get()
+        # Run video, audio and lip-sync inference
+        video_result, audio_result, lipsync_result = [
+            checkpoints.run(f"infer_{modality}", lambda: run_fresh(modality)) for modality in MODALITIES
+        ]
         
         # Run fusion
         fusion_result = run_fusion.apply(
@@ -0,0 +1,284 @@
+"""
+Live analysis Celery worker task.
+
+Follows a growing file or a directory of HLS/DASH segments written by an
+ingest process, scores each chunk of new media as it lands and publishes
+a rolling verdict, so live broadcasts are screened without waiting for
+the recording to finish.
+"""
+import logging
+import random
+import tempfile
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.celery_app import celery_app, TaskState
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AnalysisJob
+from app.services.cancellation import CancellationCheck, JobCancelled
+from app.services.ml_runtime import ensure_ml_path, get_inference_service, has_model
+from app.services.scheduling import record_pickup
+from app.workers.inference import (
+    add_model_run,
+    add_segment,
+    provisional_verdict,
+    run_fusion,
+    update_job_status,
+)
+from app.workers.report import finalize_job, generate_report
+
+
+logger = logging.getLogger(__name__)
+
+# Frame rate floor when scoring falls behind real time
+MIN_LIVE_FPS = 1.0
+# Flag thresholds, as in the batch pipeline
+VIDEO_FLAG_SCORE = 0.7
+AUDIO_FLAG_SCORE = 0.6
+LIPSYNC_FLAG_SCORE = 0.5
+
+
+def publish_live(job_id: str, live: Dict[str, Any], window: Dict[str, Dict[str, Any]]) -> None:
+    """Store the live session state; the rolling window verdict is the job's provisional one."""
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if job:
+            job.results = {
+                **(job.results or {}),
+                "live": live,
+                "provisional": provisional_verdict(window),
+            }
+            db.commit()
+    finally:
+        db.close()
+
+
+def score_video_frames(frames: List[Tuple[int, np.ndarray]]) -> List[float]:
+    """Per-frame fake probabilities of decoded frames."""
+    if not frames:
+        return []
+    if has_model("video"):
+        result = get_inference_service("video")({"frames": [image for _, image in frames]})
+        return [float(p["fake_probability"]) for p in result["predictions"]]
+    # No video model deployed: simulate, as the batch pipeline does
+    return [random.uniform(0.0, 0.5) for _ in frames]
+
+
+def score_audio(samples: Optional[np.ndarray]) -> Optional[float]:
+    """Spoof probability of a chunk's audio, None without audio or an audio model."""
+    if samples is None or not len(samples) or not has_model("audio"):
+        return None
+    return float(get_inference_service("audio")({"waveform": samples})["score"])
+
+
+def score_lipsync(frames: List[Tuple[int, np.ndarray]], samples: Optional[np.ndarray],
+                  start_ms: int, duration_ms: int) -> Optional[float]:
+    """Lip-sync mismatch of a chunk, None unless it has both frames and audio."""
+    if not frames or samples is None or not len(samples):
+        return None
+    from inference.audio_buffer import BUFFER_SAMPLE_RATE
+    result = get_inference_service("lipsync")({
+        "frames": {"frames": [
+            {"image": image, "timestamp_ms": timestamp_ms - start_ms}
+            for timestamp_ms, image in frames
+        ]},
+        # There is no live transcript: the chunk is checked as one utterance
+        "transcript": {"words": [{"word": "", "start_ms": 0, "end_ms": duration_ms}]},
+        "waveform": samples,
+        "sample_rate": BUFFER_SAMPLE_RATE,
+    })
+    return float(result["score"])
+
+
+def flag_frame_runs(job_id: str, frames: List[Tuple[int, np.ndarray]], scores: List[float],
+                    frame_ms: int) -> int:
+    """Record runs of consecutive flagged frames as one segment each."""
+    runs = []
+    for (timestamp_ms, _), score in zip(frames, scores):
+        if score <= VIDEO_FLAG_SCORE:
+            continue
+        if runs and timestamp_ms - runs[-1][1] <= 2 * frame_ms:
+            runs[-1] = (runs[-1][0], timestamp_ms + frame_ms, max(runs[-1][2], score))
+        else:
+            runs.append((timestamp_ms, timestamp_ms + frame_ms, score))
+    for start_ms, end_ms, score in runs:
+        add_segment(job_id, start_ms, end_ms, "video", score, "Potential manipulation detected in frame")
+    return len(runs)
+
+
+@celery_app.task(bind=True, queue="live")
+def run_live_analysis(self, job_id: str, source_path: str) -> Dict[str, Any]:
+    """
+    Analyse a live source until it ends.
+
+    New media is scored chunk by chunk (a segment, or a few seconds of a
+    growing file). End-to-end lag is bounded two ways: media queued beyond
+    LIVE_MAX_LAG_S is skipped, oldest first, and the frame sampling rate
+    is halved while scoring runs slower than real time and restored once
+    it catches up. The source ends at EXT-X-ENDLIST / a static MPD, or
+    after LIVE_IDLE_TIMEOUT_S without new media; the cumulative scores are
+    then fused and reported like a batch job. Cancelling the job stops
+    the analysis without a verdict.
+    """
+    ensure_ml_path()
+    from inference.live import RollingWindow, decode_chunk_audio, decode_chunk_frames, open_source
+
+    try:
+        record_pickup(job_id)
+        update_job_status(job_id, TaskState.LIVE, 0.0)
+
+        source = open_source(source_path)
+        window = RollingWindow(int(settings.LIVE_WINDOW_S * 1000))
+        max_lag_ms = int(settings.LIVE_MAX_LAG_S * 1000)
+        fps = settings.LIVE_FPS
+        pending = deque()
+        inference_ms = Counter()
+        flagged = Counter()
+        decode_audio = True
+        live = {
+            "source": source_path,
+            "chunks": 0,
+            "media_ms": 0,
+            "skipped_ms": 0,
+            "lag_ms": None,
+            "max_lag_ms": 0,
+        }
+        last_data = time.time()
+        cancelled = CancellationCheck(job_id)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            while True:
+                if cancelled():
+                    raise JobCancelled(job_id)
+                new_chunks = source.poll()
+                if new_chunks:
+                    pending.extend(new_chunks)
+                    last_data = time.time()
+                if not pending:
+                    if source.ended or time.time() - last_data > settings.LIVE_IDLE_TIMEOUT_S:
+                        break
+                    time.sleep(settings.LIVE_POLL_INTERVAL_S)
+                    continue
+
+                # Shed the oldest queued media rather than fall ever further behind
+                backlog_ms = sum(chunk.duration_ms for chunk in pending)
+                while len(pending) > 1 and backlog_ms > max_lag_ms:
+                    skipped = pending.popleft()
+                    backlog_ms -= skipped.duration_ms
+                    live["skipped_ms"] += skipped.duration_ms
+
+                chunk = pending.popleft()
+                started = time.time()
+
+                frames = decode_chunk_frames(chunk, fps)
+                samples = None
+                if decode_audio:
+                    try:
+                        samples = decode_chunk_audio(chunk, work_dir)
+                    except FileNotFoundError:
+                        logger.warning("ffmpeg not found; live job %s is scored on video only", job_id)
+                        decode_audio = False
+                    except Exception as e:
+                        logger.warning("No audio decoded from %s: %s", chunk.path, e)
+
+                step = time.time()
+                video_scores = score_video_frames(frames)
+                for (timestamp_ms, _), score in zip(frames, video_scores):
+                    window.add("video", timestamp_ms, score)
+                flagged["video"] += flag_frame_runs(job_id, frames, video_scores, int(1000 / fps))
+                inference_ms["video"] += int((time.time() - step) * 1000)
+
+                step = time.time()
+                audio_score = score_audio(samples)
+                if audio_score is not None:
+                    window.add("audio", chunk.end_ms, audio_score)
+                    if audio_score > AUDIO_FLAG_SCORE:
+                        add_segment(job_id, chunk.start_ms, chunk.end_ms, "audio", audio_score,
+                                    "Audio spectral anomaly detected")
+                        flagged["audio"] += 1
+                inference_ms["audio"] += int((time.time() - step) * 1000)
+
+                step = time.time()
+                lipsync_score = score_lipsync(frames, samples, chunk.start_ms, chunk.duration_ms)
+                if lipsync_score is not None:
+                    window.add("lipsync", chunk.end_ms, lipsync_score)
+                    if lipsync_score > LIPSYNC_FLAG_SCORE:
+                        add_segment(job_id, chunk.start_ms, chunk.end_ms, "lipsync", lipsync_score,
+                                    "Lip-audio synchronization mismatch")
+                        flagged["lipsync"] += 1
+                inference_ms["lipsync"] += int((time.time() - step) * 1000)
+
+                # Sample fewer frames while scoring is slower than real time
+                elapsed_s = time.time() - started
+                if chunk.duration_ms:
+                    real_time_factor = elapsed_s * 1000 / chunk.duration_ms
+                    if real_time_factor > 1.0:
+                        fps = max(MIN_LIVE_FPS, fps / 2)
+                    elif real_time_factor < 0.5:
+                        fps = min(settings.LIVE_FPS, fps * 2)
+
+                lag_ms = int((time.time() - chunk.arrived_at) * 1000)
+                live.update({
+                    "mode": source.mode,
+                    "chunks": live["chunks"] + 1,
+                    "media_ms": max(live["media_ms"], chunk.end_ms),
+                    "lag_ms": lag_ms,
+                    "max_lag_ms": max(live["max_lag_ms"], lag_ms),
+                    "sample_fps": fps,
+                    "cumulative": provisional_verdict(window.cumulative()),
+                    "updated_at": datetime.utcnow().isoformat(),
+                })
+                publish_live(job_id, live, window.window(chunk.end_ms))
+
+        cumulative = window.cumulative()
+        if not cumulative:
+            raise ValueError(f"No media arrived from live source {source_path}")
+
+        modality_results = {
+            "video": {
+                "video_score": window.mean("video"),
+                "max_score": cumulative.get("video", {}).get("max", 0.0),
+                "frame_count": cumulative.get("video", {}).get("n", 0),
+                "flagged_count": flagged["video"],
+                "model_version": settings.VIDEO_MODEL_VERSION,
+            },
+            "audio": {"audio_score": window.mean("audio"), "model_version": settings.AUDIO_MODEL_VERSION},
+            "lipsync": {"lipsync_score": window.mean("lipsync"), "model_version": settings.LIPSYNC_MODEL_VERSION},
+        }
+        # Modalities never scored (no audio, no audio model) are left out of the verdict
+        for modality, result in modality_results.items():
+            if modality not in cumulative:
+                result["skipped"] = True
+
+        for modality, model_name, model_version in (
+            ("video", "video_forensics_vit", settings.VIDEO_MODEL_VERSION),
+            ("audio", "audio_spoof_aasist", settings.AUDIO_MODEL_VERSION),
+            ("lipsync", "lipsync_verifier", settings.LIPSYNC_MODEL_VERSION),
+        ):
+            if modality in cumulative:
+                add_model_run(
+                    job_id=job_id,
+                    model_name=model_name,
+                    model_version=model_version,
+                    score=window.mean(modality),
+                    predictions={"live": cumulative[modality]},
+                    inference_time_ms=inference_ms[modality],
+                )
+
+        fusion_result = run_fusion.apply(
+            args=[job_id, modality_results["video"], modality_results["audio"], modality_results["lipsync"]]
+        ).get()
+        report_result = generate_report.apply(args=[job_id, fusion_result]).get()
+        return finalize_job.apply(args=[job_id, report_result]).get()
+
+    except JobCancelled:
+        return {"job_id": job_id, "status": TaskState.CANCELLED}
+    except Exception as e:
+        update_job_status(job_id, TaskState.FAILED, 0.0, str(e))
+        raise
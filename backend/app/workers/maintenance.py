@@ -0,0 +1,127 @@
+"""
+Storage maintenance Celery tasks, run periodically by Celery beat.
+"""
+import logging
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import AnalysisJob, MediaItem
+from app.services.artifacts import delete_job_artifacts, job_artifact_dir
+from app.services.fingerprints import remove_media
+from app.services.scratch import scratch_root, sweep_orphans
+
+
+logger = logging.getLogger(__name__)
+
+
+def _within(path: str, root: Path) -> bool:
+    try:
+        Path(path).resolve().relative_to(root.resolve())
+        return True
+    except ValueError:
+        return False
+
+
+def job_files(job: AnalysisJob) -> List[str]:
+    """
+    Working and evidence files a job wrote, wherever they were written.
+    Results copied from another job (a reused near-duplicate or a
+    coalesced leader) point at that job's files, which are left alone.
+    """
+    results = job.results or {}
+    if results.get("reused_from") or results.get("coalesced_from"):
+        return []
+    frames = results.get("frames") or {}
+    audio = results.get("audio") or {}
+    own = (scratch_root() / str(job.id), job_artifact_dir(str(job.id)))
+    shared = (scratch_root(), Path(settings.ARTIFACT_STORAGE_PATH))
+    return [
+        path for path in (
+            frames.get("frame_store"),
+            frames.get("frames_dir"),
+            audio.get("audio_path"),
+            audio.get("feature_path"),
+            (results.get("video") or {}).get("embeddings_path"),
+        )
+        if path and (
+            any(_within(path, root) for root in own)
+            or not any(_within(path, root) for root in shared)
+        )
+    ]
+
+
+def _remove(path: str) -> None:
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def purge_media_batch(now: datetime, batch_size: int) -> List[str]:
+    """
+    Delete one batch of expired media: files on disk first, then the rows
+    (jobs, segments, evidence and reports cascade). Returns the deleted ids.
+    """
+    db = SessionLocal()
+    try:
+        items = (
+            db.query(MediaItem)
+            .filter(MediaItem.expires_at.isnot(None), MediaItem.expires_at < now)
+            .order_by(MediaItem.expires_at)
+            .limit(batch_size)
+            .all()
+        )
+        for media in items:
+            for job in media.analysis_jobs:
+                for path in job_files(job):
+                    _remove(path)
+                shutil.rmtree(scratch_root() / str(job.id), ignore_errors=True)
+                delete_job_artifacts(str(job.id))
+            # A live item's storage path is the ingest source, not ours to delete
+            if not (media.meta_info or {}).get("live"):
+                _remove(media.storage_path)
+            if media.thumbnail_path:
+                _remove(media.thumbnail_path)
+            db.delete(media)
+        db.commit()
+        return [str(media.id) for media in items]
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, queue="default")
+def purge_expired_media(self, batch_size: int = None) -> Dict[str, Any]:
+    """
+    Enforce MediaItem.expires_at.
+
+    Expired items are deleted in batches of MEDIA_SWEEP_BATCH_SIZE, each
+    committed on its own, so a large backlog never holds one long
+    transaction; their fingerprints leave the near-duplicate index with
+    each batch. Scratch directories orphaned by dead tasks on this node
+    are swept too (other nodes sweep theirs when their scratch fills up).
+    """
+    batch_size = batch_size or settings.MEDIA_SWEEP_BATCH_SIZE
+    now = datetime.utcnow()
+    purged = 0
+    batches = 0
+    while True:
+        media_ids = purge_media_batch(now, batch_size)
+        if not media_ids:
+            break
+        remove_media(media_ids)
+        purged += len(media_ids)
+        batches += 1
+        if len(media_ids) < batch_size:
+            break
+
+    orphans = sweep_orphans()
+    if purged or orphans:
+        logger.info("Purged %d expired media items in %d batches, %d orphaned scratch dirs",
+                    purged, batches, orphans)
+    return {"purged": purged, "batches": batches, "orphaned_scratch_dirs": orphans}
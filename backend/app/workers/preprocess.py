@@ -2,7 +2,6 @@
 Preprocessing Celery worker tasks.
 """
 import os
-import subprocess
 import hashlib
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -16,6 +15,16 @@ from app.core.celery_app import celery_app, TaskState
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models import AnalysisJob, MediaItem
+from app.services.artifacts import put_artifact
+from app.services.cancellation import CancellationCheck, JobCancelled, raise_if_cancelled
+from app.services.checkpoints import StageCheckpoints
+from app.services.ml_runtime import ensure_ml_path, get_model_server_client
+from app.services.scratch import reserve
+
+
+# Buffered audio is transcribed this many seconds at a time (a multiple of
+# Whisper's 30 s window), checking for cancellation in between
+TRANSCRIBE_WINDOW_S = 120
 
 
 def update_job_status(job_id: str, stage: str, progress: float, error: str = None):
@@ -23,7 +32,8 @@ def update_job_status(job_id: str, stage: str, progress: float, error: str = Non
     db = SessionLocal()
     try:
         job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
-        if job:
+        # A cancelled job keeps its state while its tasks wind down
+        if job and job.status != TaskState.CANCELLED:
             job.stage = stage
             job.status = stage
             job.progress = progress
@@ -35,6 +45,24 @@ def update_job_status(job_id: str, stage: str, progress: float, error: str = Non
         db.close()
 
 
+def estimate_buffer_bytes(file_path: Path) -> int:
+    """
+    Upper-end size of a file's decoded audio buffer (mono 16 kHz float32).
+    
+    Uses the container duration when OpenCV can read it (video) and
+    otherwise assumes compressed audio at ~32 kB/s.
+    """
+    cap = cv2.VideoCapture(str(file_path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) if cap.isOpened() else 0
+    finally:
+        cap.release()
+    if fps > 0 and frames > 0:
+        return int(frames / fps * 16000 * 4)
+    return int(file_path.stat().st_size / 32000 * 16000 * 4)
+
+
 @celery_app.task(bind=True, queue="preprocess", max_retries=3)
 def validate_media(self, job_id: str) -> Dict[str, Any]:
     """Validate the uploaded media file."""
@@ -71,6 +99,7 @@ def validate_media(self, job_id: str) -> Dict[str, Any]:
                 "media_id": str(media.id),
                 "file_path": str(file_path),
                 "media_type": media.media_type,
+                "options": job.options or {},
             }
         finally:
             db.close()
@@ -81,14 +110,23 @@ def validate_media(self, job_id: str) -> Dict[str, Any]:
 
 
 @celery_app.task(bind=True, queue="preprocess", max_retries=3)
-def extract_frames(self, job_id: str, file_path: str, fps: int = 5) -> Dict[str, Any]:
-    """Extract frames from video at specified FPS."""
+def extract_frames(self, job_id: str, file_path: str, fps: float = 5) -> Dict[str, Any]:
+    """
+    Extract frames from video at specified FPS.
+    
+    Sampled frames are written to one per-job frame store (analysis-size
+    RGB frames plus a timestamp index) in the job's scratch directory,
+    once the node has room for it; the result carries the store's path
+    under 'frame_store'. A cancelled job stops mid-video and the partial
+    store is discarded.
+    """
+    ensure_ml_path()
+    from inference.frame_store import FRAME_STORE_SUFFIX, FrameStoreWriter, estimated_size
+    
     try:
         update_job_status(job_id, TaskState.EXTRACTING, 0.0)
         
         file_path = Path(file_path)
-        output_dir = file_path.parent / f"frames_{job_id}"
-        output_dir.mkdir(exist_ok=True)
         
         # Use OpenCV to extract frames
         cap = cv2.VideoCapture(str(file_path))
@@ -99,42 +137,52 @@ def extract_frames(self, job_id: str, file_path: str, fps: int = 5) -> Dict[str,
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         duration_ms = int((total_frames / video_fps) * 1000) if video_fps > 0 else 0
         
-        # Calculate frame interval
-        frame_interval = max(1, int(video_fps / fps))
+        # Calculate frame interval (low-quality tiers sample below 1 fps)
+        frame_interval = max(1, int(round(video_fps / fps)))
         
-        frames = []
         frame_count = 0
-        extracted_count = 0
+        cancelled = CancellationCheck(job_id)
+        store_bytes = estimated_size(
+            total_frames // frame_interval + 1,
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            settings.FRAME_STORE_CODEC,
+            settings.FRAME_STORE_HEIGHT,
+        )
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_count % frame_interval == 0:
-                frame_path = output_dir / f"frame_{extracted_count:06d}.jpg"
-                cv2.imwrite(str(frame_path), frame)
-                frames.append({
-                    "path": str(frame_path),
-                    "timestamp_ms": int((frame_count / video_fps) * 1000),
-                    "frame_number": frame_count
-                })
-                extracted_count += 1
-            
-            frame_count += 1
-            progress = frame_count / total_frames if total_frames > 0 else 0
-            if frame_count % 100 == 0:
-                update_job_status(job_id, TaskState.EXTRACTING, progress * 0.5)
+        try:
+            with reserve(job_id, store_bytes) as scratch_dir, FrameStoreWriter(
+                scratch_dir / f"frames_{job_id}{FRAME_STORE_SUFFIX}",
+                codec=settings.FRAME_STORE_CODEC,
+                max_height=settings.FRAME_STORE_HEIGHT,
+            ) as writer:
+                while True:
+                    if cancelled():
+                        raise JobCancelled(job_id)
+                    # Frames between samples are demuxed but never converted to images
+                    if not cap.grab():
+                        break
+                    
+                    if frame_count % frame_interval == 0:
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        writer.append(frame, int((frame_count / video_fps) * 1000), frame_count)
+                    
+                    frame_count += 1
+                    progress = frame_count / total_frames if total_frames > 0 else 0
+                    if frame_count % 100 == 0:
+                        update_job_status(job_id, TaskState.EXTRACTING, progress * 0.5)
+        finally:
+            cap.release()
         
-        cap.release()
         update_job_status(job_id, TaskState.EXTRACTING, 0.5)
         
         return {
             "job_id": job_id,
-            "frames_dir": str(output_dir),
-            "frame_count": extracted_count,
+            "frame_store": str(writer.path),
+            "frame_count": len(writer),
             "duration_ms": duration_ms,
-            "frames": frames,
         }
         
     except Exception as e:
@@ -144,33 +192,63 @@ def extract_frames(self, job_id: str, file_path: str, fps: int = 5) -> Dict[str,
 
 @celery_app.task(bind=True, queue="preprocess", max_retries=3)
 def extract_audio(self, job_id: str, file_path: str) -> Dict[str, Any]:
-    """Extract audio track from video/audio file."""
+    """
+    Decode the audio track once into the job's shared float32 buffer,
+    in its scratch directory.
+    
+    Transcription, spoof detection, lip-sync and evidence rendering all
+    memory-map this buffer instead of decoding the source again.
+    """
     try:
         update_job_status(job_id, TaskState.EXTRACTING, 0.5)
         
+        ensure_ml_path()
+        from inference.audio_buffer import decode_to_buffer, BUFFER_SUFFIX
+        
         file_path = Path(file_path)
-        audio_path = file_path.parent / f"audio_{job_id}.wav"
-        
-        # Use ffmpeg to extract audio
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", str(file_path),
-            "-vn",  # No video
-            "-acodec", "pcm_s16le",
-            "-ar", "16000",  # 16kHz
-            "-ac", "1",  # Mono
-            str(audio_path)
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise ValueError(f"ffmpeg error: {result.stderr}")
         
+        with reserve(job_id, estimate_buffer_bytes(file_path)) as scratch_dir:
+            # Mono 16kHz float32, decoded and resampled by ffmpeg in one pass
+            buffer_info = decode_to_buffer(file_path, scratch_dir / f"audio_{job_id}{BUFFER_SUFFIX}")
+        
+        update_job_status(job_id, TaskState.EXTRACTING, 1.0)
+        
+        return {
+            "job_id": job_id,
+            "audio_path": buffer_info["path"],
+            "sample_rate": buffer_info["sample_rate"],
+            "duration_ms": buffer_info["duration_ms"],
+        }
+        
+    except Exception as e:
+        update_job_status(job_id, TaskState.FAILED, 0.0, str(e))
+        raise
+
+
+@celery_app.task(bind=True, queue="preprocess", max_retries=3)
+def extract_audio_features(self, job_id: str, audio_path: str) -> Dict[str, Any]:
+    """
+    Compute the job's audio feature bank in a single STFT pass.
+    
+    The bank is cached next to the audio buffer; spoof detection, lip-sync
+    and the evidence spectrogram memory-map it instead of recomputing.
+    """
+    try:
         update_job_status(job_id, TaskState.EXTRACTING, 1.0)
         
+        ensure_ml_path()
+        from inference.feature_bank import AudioFeatureBank, feature_bank_path
+        
+        # The bank is about the size of the buffer it is computed from
+        buffer_bytes = Path(audio_path).stat().st_size if Path(audio_path).exists() else 0
+        with reserve(job_id, buffer_bytes):
+            bank = AudioFeatureBank.for_buffer(audio_path)
+        
         return {
             "job_id": job_id,
-            "audio_path": str(audio_path),
+            "feature_path": str(feature_bank_path(audio_path)),
+            "frame_count": bank.n_frames,
+            "spectral_analysis": bank.summary(),
         }
         
     except Exception as e:
@@ -180,33 +258,84 @@ def extract_audio(self, job_id: str, file_path: str) -> Dict[str, Any]:
 
 @celery_app.task(bind=True, queue="preprocess", max_retries=3)
 def transcribe_audio(self, job_id: str, audio_path: str) -> Dict[str, Any]:
-    """Transcribe audio using Whisper."""
+    """
+    Transcribe audio using Whisper.
+    
+    The shared audio buffer is transcribed TRANSCRIBE_WINDOW_S at a time,
+    each window prompted with the text before it, so a cancelled job
+    stops at the next window instead of after the whole file.
+    Word-level transcripts are stored in the job's artifact store and
+    returned by reference.
+    """
     try:
         update_job_status(job_id, TaskState.TRANSCRIBING, 0.0)
         
-        # Import whisper (optional dependency)
-        try:
-            import whisper
-        except ImportError:
-            # Return empty transcript if Whisper not available
-            update_job_status(job_id, TaskState.TRANSCRIBING, 1.0)
-            return {
-                "job_id": job_id,
-                "transcript": {
-                    "full_text": "",
-                    "words": [],
+        server_client = get_model_server_client()
+        if server_client is not None:
+            # The node's model server holds the Whisper model
+            result = server_client.transcribe(
+                audio_path,
+                word_timestamps=True,
+                language="en"
+            )
+        else:
+            # Import whisper (optional dependency)
+            try:
+                import whisper
+            except ImportError:
+                # Return empty transcript if Whisper not available
+                update_job_status(job_id, TaskState.TRANSCRIBING, 1.0)
+                return {
+                    "job_id": job_id,
+                    "transcript": {
+                        "full_text": "",
+                        "words": [],
+                    }
                 }
-            }
-        
-        # Load model
-        model = whisper.load_model("base")
-        
-        # Transcribe
-        result = model.transcribe(
-            audio_path,
-            word_timestamps=True,
-            language="en"
-        )
+            
+            ensure_ml_path()
+            from inference.audio_buffer import (
+                BUFFER_SAMPLE_RATE,
+                buffer_to_tensor,
+                is_audio_buffer,
+                open_audio_buffer,
+            )
+            
+            # Load model
+            model = whisper.load_model("base")
+            
+            if is_audio_buffer(audio_path):
+                # Whisper takes 16kHz float32 samples directly, so windows of
+                # the shared buffer are passed zero-copy instead of decoding again
+                samples = open_audio_buffer(audio_path)
+                window = TRANSCRIBE_WINDOW_S * BUFFER_SAMPLE_RATE
+                cancelled = CancellationCheck(job_id)
+                texts = []
+                segments = []
+                for offset in range(0, len(samples), window):
+                    if cancelled():
+                        raise JobCancelled(job_id)
+                    part = model.transcribe(
+                        buffer_to_tensor(samples[offset:offset + window]),
+                        word_timestamps=True,
+                        language="en",
+                        initial_prompt=texts[-1] if texts else None,
+                    )
+                    shift_s = offset / BUFFER_SAMPLE_RATE
+                    for segment in part.get("segments", []):
+                        for word_info in segment.get("words", []):
+                            word_info["start"] += shift_s
+                            word_info["end"] += shift_s
+                        segments.append(segment)
+                    texts.append(part.get("text", "").strip())
+                    update_job_status(job_id, TaskState.TRANSCRIBING, min(1.0, (offset + window) / len(samples)))
+                result = {"text": " ".join(t for t in texts if t), "segments": segments}
+            else:
+                result = model.transcribe(
+                    audio_path,
+                    word_timestamps=True,
+                    language="en"
+                )
         
         # Extract word-level timestamps
         words = []
@@ -223,10 +352,10 @@ def transcribe_audio(self, job_id: str, audio_path: str) -> Dict[str, Any]:
         
         return {
             "job_id": job_id,
-            "transcript": {
+            "transcript": put_artifact(job_id, "transcript", {
                 "full_text": result.get("text", ""),
                 "words": words,
-            }
+            }),
         }
         
     except Exception as e:
@@ -236,42 +365,62 @@ def transcribe_audio(self, job_id: str, audio_path: str) -> Dict[str, Any]:
 
 @celery_app.task(bind=True, queue="preprocess")
 def run_preprocessing_pipeline(self, job_id: str):
-    """Run the full preprocessing pipeline."""
+    """
+    Run the full preprocessing pipeline.
+    
+    Each step is checkpointed; a redelivered pipeline reuses the steps an
+    earlier attempt completed.
+    """
     try:
+        checkpoints = StageCheckpoints(job_id)
+        
         # Validate
-        validation = validate_media.apply(args=[job_id]).get()
+        validation = checkpoints.run("validate", lambda: validate_media.apply(args=[job_id]).get())
         
         file_path = validation["file_path"]
         media_type = validation["media_type"]
+        # Options as admitted: a degraded job samples fewer frames and skips models
+        options = validation.get("options") or {}
+        run_audio = options.get("run_audio", True)
+        run_lipsync = options.get("run_lipsync", True)
         
-        results = {"job_id": job_id}
+        results = {"job_id": job_id, "options": options}
         
-        if media_type == "video":
+        if media_type == "video" and (options.get("run_video", True) or run_lipsync):
             # Extract frames
-            frames_result = extract_frames.apply(args=[job_id, file_path]).get()
+            fps = options.get("fps", 5)
+            frames_result = checkpoints.run(
+                "frames", lambda: extract_frames.apply(args=[job_id, file_path, fps]).get()
+            )
             results["frames"] = frames_result
-            
-            # Extract audio
-            audio_result = extract_audio.apply(args=[job_id, file_path]).get()
-            results["audio"] = audio_result
-            
-            # Transcribe
-            transcript_result = transcribe_audio.apply(
+        
+        if media_type in ("video", "audio") and (run_audio or run_lipsync):
+            raise_if_cancelled(job_id)
+            # Decode once so inference shares the buffer with transcription
+            audio_result = checkpoints.run(
+                "audio", lambda: extract_audio.apply(args=[job_id, file_path]).get()
+            )
+            features_result = checkpoints.run("audio_features", lambda: extract_audio_features.apply(
                 args=[job_id, audio_result["audio_path"]]
-            ).get()
-            results["transcript"] = transcript_result["transcript"]
+            ).get())
+            audio_result["feature_path"] = features_result["feature_path"]
+            results["audio"] = audio_result
             
-        elif media_type == "audio":
-            # Transcribe directly
-            transcript_result = transcribe_audio.apply(args=[job_id, file_path]).get()
-            results["transcript"] = transcript_result["transcript"]
+            # Transcribe (only lip-sync uses the transcript)
+            if run_lipsync:
+                transcript_result = checkpoints.run("transcript", lambda: transcribe_audio.apply(
+                    args=[job_id, audio_result["audio_path"]]
+                ).get())
+                results["transcript"] = transcript_result["transcript"]
         
         # Update job with results
         db = SessionLocal()
         try:
             job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
             if job:
-                job.results = results
+                # A resumed run keeps the record of what it reused
+                recovery = (job.results or {}).get("recovery")
+                job.results = {**results, "recovery": recovery} if recovery else results
                 db.commit()
         finally:
             db.close()
@@ -2,7 +2,7 @@
 Report generation Celery worker tasks.
 """
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import json
 
@@ -11,7 +11,13 @@ from celery import shared_task
 from app.core.celery_app import celery_app, TaskState
 from app.core.config import settings
 from app.db.session import SessionLocal
-from app.models import AnalysisJob, Report
+from app.models import AnalysisJob, ModelRun, Report, Segment
+from app.services.artifacts import artifact_exists, is_artifact_ref
+from app.services.cancellation import JobCancelled, raise_if_cancelled
+from app.services.coalescing import settle_followers
+from app.services.checkpoints import StageCheckpoints
+from app.services.scheduling import record_pickup
+from app.services.scratch import hold, release, retain
 
 
 def update_job_status(job_id: str, stage: str, progress: float, error: str = None):
@@ -19,7 +25,8 @@ def update_job_status(job_id: str, stage: str, progress: float, error: str = Non
     db = SessionLocal()
     try:
         job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
-        if job:
+        # A cancelled job keeps its state while its tasks wind down
+        if job and job.status != TaskState.CANCELLED:
             job.stage = stage
             job.status = stage
             job.progress = progress
@@ -86,12 +93,22 @@ def _generate_fallback_report(results: Dict[str, Any]) -> str:
     """Generate a fallback report without LLM."""
     overall_score = results.get("overall_score", 0)
     label = results.get("label", "UNKNOWN")
+    score_text = "n/a" if overall_score is None else f"{overall_score:.1%}"
     video_score = results.get("video_score", 0)
     audio_score = results.get("audio_score", 0)
     lipsync_score = results.get("lipsync_score", 0)
+    skipped = results.get("skipped") or []
+    
+    def finding(modality: str, score: float, checked: str, clean: str, suspicious: str) -> str:
+        if modality in skipped:
+            return "- **Score:** n/a\n- Not analysed for this media"
+        return f"- **Score:** {score:.1%}\n- {checked}\n- {clean if score < 0.5 else suspicious}"
     
     # Determine verdict text
-    if label == "AUTHENTIC":
+    if label is None:
+        verdict = "No modality could be analysed for this media, so no verdict was reached."
+        confidence = "n/a"
+    elif label == "AUTHENTIC":
         verdict = "This media appears to be authentic."
         confidence = "high"
     elif label == "LIKELY_FAKE":
@@ -107,26 +124,20 @@ def _generate_fallback_report(results: Dict[str, Any]) -> str:
 
 {verdict}
 
-**Overall Suspicion Score:** {overall_score:.1%}
-**Classification:** {label}
+**Overall Suspicion Score:** {score_text}
+**Classification:** {label or "none"}
 **Confidence:** {confidence}
 
 ## Modality Analysis
 
 ### Video Analysis
-- **Score:** {video_score:.1%}
-- Analyzed video frames for manipulation artifacts
-- {"No significant anomalies detected" if video_score < 0.5 else "Potential manipulation indicators found"}
+{finding("video", video_score, "Analyzed video frames for manipulation artifacts", "No significant anomalies detected", "Potential manipulation indicators found")}
 
 ### Audio Analysis  
-- **Score:** {audio_score:.1%}
-- Analyzed audio for synthetic speech markers
-- {"Audio appears authentic" if audio_score < 0.5 else "Audio shows potential synthesis patterns"}
+{finding("audio", audio_score, "Analyzed audio for synthetic speech markers", "Audio appears authentic", "Audio shows potential synthesis patterns")}
 
 ### Lip-Sync Analysis
-- **Score:** {lipsync_score:.1%}
-- Verified audio-visual synchronization
-- {"Lip movements align with audio" if lipsync_score < 0.5 else "Potential lip-sync mismatch detected"}
+{finding("lipsync", lipsync_score, "Verified audio-visual synchronization", "Lip movements align with audio", "Potential lip-sync mismatch detected")}
 
 ## Limitations
 
@@ -209,6 +220,31 @@ def generate_report(self, job_id: str, fusion_results: Dict[str, Any]) -> Dict[s
         raise
 
 
+def retain_evidence_inputs(job_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move the files evidence is rendered from (frame store, audio buffer and
+    its feature bank) and the frame embeddings the known-fake index is
+    built from out of the job's scratch directory; the rest of the
+    scratch directory goes when the pipeline releases it.
+    """
+    frames = dict(results.get("frames") or {})
+    audio = dict(results.get("audio") or {})
+    video = dict(results.get("video") or {})
+    if frames.get("frame_store"):
+        frames["frame_store"] = retain(job_id, frames["frame_store"])
+    for key in ("audio_path", "feature_path"):
+        if audio.get(key):
+            audio[key] = retain(job_id, audio[key])
+    if video.get("embeddings_path"):
+        video["embeddings_path"] = retain(job_id, video["embeddings_path"])
+    return {
+        **results,
+        **({"frames": frames} if frames else {}),
+        **({"audio": audio} if audio else {}),
+        **({"video": video} if video else {}),
+    }
+
+
 @celery_app.task(bind=True, queue="default")
 def finalize_job(self, job_id: str, report_result: Dict[str, Any]) -> Dict[str, Any]:
     """Finalize the analysis job."""
@@ -218,7 +254,10 @@ def finalize_job(self, job_id: str, report_result: Dict[str, Any]) -> Dict[str,
         db = SessionLocal()
         try:
             job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if job and job.status == TaskState.CANCELLED:
+                raise JobCancelled(job_id)
             if job:
+                job.results = retain_evidence_inputs(job_id, job.results or {})
                 job.status = TaskState.DONE
                 job.stage = TaskState.DONE
                 job.progress = 1.0
@@ -227,6 +266,9 @@ def finalize_job(self, job_id: str, report_result: Dict[str, Any]) -> Dict[str,
         finally:
             db.close()
         
+        # Jobs attached to this one get a copy of its results
+        settle_followers(job_id)
+        
         return {
             "job_id": job_id,
             "status": TaskState.DONE,
@@ -239,27 +281,212 @@ def finalize_job(self, job_id: str, report_result: Dict[str, Any]) -> Dict[str,
 
 @celery_app.task(bind=True, queue="default")
 def run_full_pipeline(self, job_id: str):
-    """Run the complete analysis pipeline."""
+    """
+    Run the complete analysis pipeline.
+    
+    Every stage checkpoints its output, so when a worker dies and the
+    pipeline is redelivered it resumes after the last completed stage
+    (and within preprocessing and inference, after their last completed
+    step) instead of starting over.
+    
+    A cancelled job stops at the next stage boundary, or sooner where a
+    stage polls for cancellation; its working files are released either way.
+    """
     from app.workers.preprocess import run_preprocessing_pipeline
     from app.workers.inference import run_inference_pipeline
     
-    try:
-        # Run preprocessing
-        preprocess_results = run_preprocessing_pipeline.apply(args=[job_id]).get()
-        
-        # Run inference
-        inference_results = run_inference_pipeline.apply(
+    stages = [
+        ("preprocess", lambda _: run_preprocessing_pipeline.apply(args=[job_id]).get()),
+        ("inference", lambda preprocess_results: run_inference_pipeline.apply(
             args=[job_id, preprocess_results]
-        ).get()
-        
-        # Generate report
-        report_result = generate_report.apply(args=[job_id, inference_results]).get()
+        ).get()),
+        ("report", lambda inference_results: generate_report.apply(args=[job_id, inference_results]).get()),
+        ("finalize", lambda report_result: finalize_job.apply(args=[job_id, report_result]).get()),
+    ]
+    
+    record_pickup(job_id)
+    # Working files live until the last task using them is done
+    hold(job_id, self.request.id)
+    try:
+        checkpoints = StageCheckpoints(job_id)
+        resumed_at, result = checkpoints.resume_point([name for name, _ in stages])
         
-        # Finalize
-        final_result = finalize_job.apply(args=[job_id, report_result]).get()
+        for name, run_stage in stages[resumed_at + 1:]:
+            raise_if_cancelled(job_id)
+            result = checkpoints.run(name, lambda: run_stage(result))
         
-        return final_result
+        return result
         
+    except JobCancelled:
+        return {"job_id": job_id, "status": TaskState.CANCELLED}
     except Exception as e:
         update_job_status(job_id, TaskState.FAILED, 0.0, str(e))
+        settle_followers(job_id)
         raise
+    finally:
+        release(job_id, self.request.id)
+
+
+def missing_intermediates(results: Dict[str, Any], modalities: List[str]) -> List[str]:
+    """Modalities whose cached preprocessing outputs are no longer on disk."""
+    frames_dir = (results.get("frames") or {}).get("frames_dir")
+    frame_store = (results.get("frames") or {}).get("frame_store")
+    frames_ref = (results.get("frames") or {}).get("frames")
+    audio_path = (results.get("audio") or {}).get("audio_path")
+    frames_ok = frames_dir is None or Path(frames_dir).exists()
+    if frames_ok and frame_store is not None:
+        frames_ok = Path(frame_store).exists()
+    if frames_ok and is_artifact_ref(frames_ref):
+        frames_ok = artifact_exists(frames_ref)
+    audio_ok = audio_path is None or Path(audio_path).exists()
+    
+    needs = {"video": frames_ok, "audio": audio_ok, "lipsync": frames_ok}
+    return [m for m in modalities if not needs.get(m, True)]
+
+
+# Job columns a failed re-analysis puts back
+REANALYSIS_RESTORED = (
+    "status", "stage", "progress", "error_message", "results",
+    "overall_score", "label", "completed_at", "coalesce_key",
+)
+SEGMENT_FIELDS = ("start_ms", "end_ms", "segment_type", "score", "reason", "meta_info")
+REPORT_FIELDS = ("summary", "full_report", "llm_model_used", "generated_at")
+
+
+def set_aside_for_reanalysis(job_id: str, recompute: List[str]) -> Dict[str, Any]:
+    """
+    Save what a re-analysis replaces (the job's verdict and state, the
+    recomputed modalities' segments, its model runs and report), then
+    clear the replaced segments. The job's coalescing key is cleared
+    while it runs, so the job neither counts as an in-flight leader nor
+    collides with one.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        segments = db.query(Segment).filter(Segment.job_id == job_id, Segment.segment_type.in_(recompute))
+        saved = {
+            "recompute": recompute,
+            "job": {column: getattr(job, column) for column in REANALYSIS_RESTORED},
+            "segments": [{field: getattr(segment, field) for field in SEGMENT_FIELDS} for segment in segments],
+            "model_run_ids": [run_id for (run_id,) in db.query(ModelRun.id).filter(ModelRun.job_id == job_id)],
+            "report": {field: getattr(job.report, field) for field in REPORT_FIELDS} if job.report else None,
+        }
+        segments.delete(synchronize_session=False)
+        job.coalesce_key = None
+        db.commit()
+        return saved
+    finally:
+        db.close()
+
+
+def restore_after_reanalysis(job_id: str, saved: Dict[str, Any], error: str) -> None:
+    """Put back a job a re-analysis failed on, recording the failure in its results."""
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if not job:
+            return
+        for column, value in saved["job"].items():
+            setattr(job, column, value)
+        job.results = {
+            **(job.results or {}),
+            "reanalysis_error": {"error": error, "at": datetime.utcnow().isoformat()},
+        }
+        
+        db.query(Segment).filter(
+            Segment.job_id == job_id, Segment.segment_type.in_(saved["recompute"])
+        ).delete(synchronize_session=False)
+        db.add_all(Segment(job_id=job.id, **segment) for segment in saved["segments"])
+        db.query(ModelRun).filter(
+            ModelRun.job_id == job_id, ModelRun.id.notin_(saved["model_run_ids"])
+        ).delete(synchronize_session=False)
+        if saved["report"] and job.report:
+            for field, value in saved["report"].items():
+                setattr(job.report, field, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, queue="default")
+def run_reanalysis(self, job_id: str, modalities: Optional[List[str]] = None):
+    """
+    Refresh a finished job after a model upgrade.
+    
+    Only the modalities whose stored result came from an older model
+    version (or the ones given) are recomputed, from the frames, audio
+    buffer and transcript cached by the original run; fusion and the
+    report are then re-run over the fresh and the reused results.
+    
+    A job whose cached inputs are gone is left untouched. If the
+    re-analysis fails, the job is put back as it was, with its earlier
+    verdict, segments and report.
+    """
+    from app.workers.inference import MODALITIES, run_fusion, run_modality, stale_modalities
+    
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        results = dict(job.results or {}) if job else {}
+    finally:
+        db.close()
+    
+    stale = list(modalities) if modalities is not None else stale_modalities(results)
+    recompute = [m for m in MODALITIES if m in stale]
+    if not stale:
+        return {"job_id": job_id, "recomputed": [], "status": TaskState.DONE}
+    
+    missing = missing_intermediates(results, recompute)
+    if missing:
+        raise ValueError(
+            f"Cached intermediates for {', '.join(missing)} are gone; run a full analysis"
+        )
+    
+    hold(job_id, self.request.id)
+    try:
+        saved = set_aside_for_reanalysis(job_id, recompute)
+        try:
+            modality_results = {
+                m: run_modality(job_id, m, results) if m in recompute else results.get(m, {})
+                for m in MODALITIES
+            }
+            fusion_result = run_fusion.apply(
+                args=[job_id, modality_results["video"], modality_results["audio"], modality_results["lipsync"]]
+            ).get()
+            
+            db = SessionLocal()
+            try:
+                job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+                if job:
+                    job.results = {
+                        **{k: v for k, v in (job.results or {}).items() if k != "reanalysis_error"},
+                        "reanalysis": {
+                            "recomputed": recompute,
+                            "reused": [m for m in MODALITIES if m not in recompute],
+                            "at": datetime.utcnow().isoformat(),
+                        },
+                    }
+                    db.commit()
+            finally:
+                db.close()
+            
+            report_result = generate_report.apply(args=[job_id, fusion_result]).get()
+            final_result = finalize_job.apply(args=[job_id, report_result]).get()
+        except Exception as e:
+            restore_after_reanalysis(job_id, saved, str(e))
+            raise
+        
+        # Finished again, the job takes its coalescing key back
+        db = SessionLocal()
+        try:
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+                {"coalesce_key": saved["job"]["coalesce_key"]}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        
+        return {**final_result, "recomputed": recompute}
+    finally:
+        release(job_id, self.request.id)
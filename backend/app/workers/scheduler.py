@@ -0,0 +1,20 @@
+"""
+Job scheduling Celery tasks, run periodically by Celery beat.
+"""
+import logging
+from typing import Dict
+
+from app.core.celery_app import celery_app
+from app.services.scheduling import dispatch_held
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, queue="default")
+def dispatch_held_jobs(self) -> Dict[str, int]:
+    """Release held batch and backfill jobs into free pipeline slots, fairly across users."""
+    released = dispatch_held()
+    if any(released.values()):
+        logger.info("Released held jobs: %s", released)
+    return released
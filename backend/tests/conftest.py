@@ -13,7 +13,7 @@ os.environ["SECRET_KEY"] = "test-secret-key"
 os.environ["STORAGE_PATH"] = str(Path(tempfile.gettempdir()) / "deepfakeshield_test_storage")
 
 from fastapi.testclient import TestClient
-from app.db.session import async_engine, AsyncSessionLocal
+from app.db.session import async_engine, AsyncSessionLocal, SessionLocal
 from app.db.base import Base
 # Import all models to ensure they are registered with Base.metadata
 from app.models import User, MediaItem, AnalysisJob, Segment, ModelRun, EvidenceArtifact, Report, AuditLog
@@ -104,6 +104,48 @@ async def db_session():
         yield session
 
 
+@pytest.fixture
+def sync_session():
+    """Session factory the workers use (synchronous), on the test database."""
+    return SessionLocal
+
+
+@pytest.fixture
+def idle_pipeline(sync_session):
+    """
+    An idle system for scheduling and admission tests.
+    
+    Jobs earlier tests left unfinished are set aside (marked DONE) for the
+    test and restored afterwards; jobs the test leaves unfinished are
+    cancelled, so they do not load the pipeline for later tests.
+    """
+    from app.core.celery_app import TaskState
+    from app.services.scheduling import FINISHED_STATES
+    
+    with sync_session() as session:
+        set_aside = dict(
+            session.query(AnalysisJob.id, AnalysisJob.status)
+            .filter(AnalysisJob.status.notin_(FINISHED_STATES))
+            .all()
+        )
+        session.query(AnalysisJob).filter(AnalysisJob.id.in_(set_aside)).update(
+            {"status": TaskState.DONE}, synchronize_session=False
+        )
+        session.commit()
+    
+    yield
+    
+    with sync_session() as session:
+        session.query(AnalysisJob).filter(
+            AnalysisJob.status.notin_(FINISHED_STATES), AnalysisJob.id.notin_(set_aside)
+        ).update({"status": TaskState.CANCELLED}, synchronize_session=False)
+        for job_id, status in set_aside.items():
+            session.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+                {"status": status}, synchronize_session=False
+            )
+        session.commit()
+
+
 @pytest.fixture
 def client(db_session):
     """Create test client with database dependency override."""
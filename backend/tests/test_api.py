@@ -5,6 +5,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 import json
+from pathlib import Path
 
 
 
@@ -134,6 +135,54 @@ class TestMediaUpload:
         )
         # May fail due to validation - just check it doesn't crash
         assert response.status_code in [201, 400]
+    
+    def test_reencoded_upload_reuses_verdict(self, client, auth_headers, tmp_path, monkeypatch):
+        cv2 = pytest.importorskip("cv2")
+        import numpy as np
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "FINGERPRINT_INDEX_PATH", str(tmp_path / "fingerprints.npz"))
+        
+        async def complete_job(job_id):
+            from datetime import datetime
+            from app.db.session import AsyncSessionLocal
+            from app.models import AnalysisJob
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                job.status = job.stage = "DONE"
+                job.overall_score, job.label = 0.9, "FAKE"
+                job.results = {"fusion": {"overall_score": 0.9}}
+                job.completed_at = datetime.utcnow()
+                await session.commit()
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", complete_job)
+        
+        # The same clip encoded at two sizes
+        rng = np.random.default_rng(0)
+        scenes = [cv2.resize(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8), (320, 240)) for _ in range(4)]
+        for name, size in [("original.mp4", (320, 240)), ("reencode.mp4", (160, 120))]:
+            writer = cv2.VideoWriter(str(tmp_path / name), cv2.VideoWriter_fourcc(*"mp4v"), 10, size)
+            for i in range(80):
+                writer.write(cv2.resize(np.roll(scenes[i // 20], i, axis=1), size))
+            writer.release()
+        
+        def upload(name):
+            files = {"file": (name, (tmp_path / name).read_bytes(), "video/mp4")}
+            response = client.post("/api/v1/media/upload", files=files, headers=auth_headers)
+            assert response.status_code == 201
+            return response.json()
+        
+        original = upload("original.mp4")
+        assert original["near_duplicate_similarity"] is None
+        response = client.post("/api/v1/analysis/start", json={"media_id": original["id"]}, headers=auth_headers)
+        original_job = response.json()["job_id"]
+        
+        reencode = upload("reencode.mp4")
+        assert reencode["near_duplicate_similarity"] > 0.6
+        response = client.post("/api/v1/analysis/start", json={"media_id": reencode["id"]}, headers=auth_headers)
+        assert response.json()["status"] == "DONE"
+        
+        result = client.get(f"/api/v1/analysis/{response.json()['job_id']}/result", headers=auth_headers).json()
+        assert result["label"] == "FAKE"
+        assert result["results"]["reused_from"]["job_id"] == original_job
 
 
 class TestAnalysis:
@@ -153,6 +202,1004 @@ class TestAnalysis:
         assert response.status_code == 404
 
 
+    def test_provisional_verdict_on_status_and_stream(self, client, auth_headers, monkeypatch):
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob
+        from app.workers.inference import provisional_verdict, score_aggregate
+        
+        async def update_job(job_id, **fields):
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                for name, value in fields.items():
+                    setattr(job, name, value)
+                await session.commit()
+        
+        # A third of the frames scored, all clearly fake
+        partial = {"video": score_aggregate([0.9, 0.92, 0.88, 0.91] * 10, 120)}
+        
+        async def score_some_frames(job_id):
+            await update_job(job_id, status="INFER_VIDEO", stage="INFER_VIDEO", progress=0.33,
+                             results={"partial": partial, "provisional": provisional_verdict(partial)})
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", score_some_frames)
+        
+        files = {"file": ("clip.mp4", b"\x00\x00\x00\x1cftypmp42" + b"\x00" * 100, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        provisional = client.get(f"/api/v1/analysis/{job_id}/status", headers=auth_headers).json()["provisional"]
+        assert provisional["label"] == "FAKE"
+        assert provisional["ci_low"] < provisional["score"] < provisional["ci_high"]
+        assert provisional["label_stable"]
+        assert provisional["coverage"] == {"video": 0.3333}
+        
+        from uuid import UUID
+        client.portal.call(lambda: update_job(UUID(job_id), status="DONE", stage="DONE", progress=1.0))
+        response = client.get(f"/api/v1/analysis/{job_id}/events", headers=auth_headers)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line for line in response.text.splitlines() if line.startswith("data: ")]
+        assert len(events) == 1
+        assert json.loads(events[0][len("data: "):])["status"] == "DONE"
+
+    
+    def test_transcript_read_from_artifact_store(self, client, auth_headers, tmp_path, monkeypatch):
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob
+        from app.services.artifacts import get_artifact, latest_ref, put_artifact
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path))
+        
+        async def transcribe(job_id):
+            # A retry writes a second version; the job keeps the reference it was given
+            put_artifact(job_id, "transcript", {"full_text": "draft", "words": []})
+            ref = latest_ref(job_id, "transcript")
+            put_artifact(job_id, "transcript", {"full_text": "retried", "words": []})
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                job.results = {"transcript": ref}
+                await session.commit()
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", transcribe)
+        
+        files = {"file": ("speech.mp4", b"\x00\x00\x00\x1cftypmp42" + b"\x01" * 100, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        transcript = client.get(f"/api/v1/analysis/{job_id}/transcript", headers=auth_headers).json()
+        assert transcript["full_text"] == "draft"
+        assert get_artifact(latest_ref(job_id, "transcript"))["full_text"] == "retried"
+
+    def test_frame_at_timestamp_from_frame_store(self, client, auth_headers, tmp_path, monkeypatch):
+        import sys
+        import numpy as np
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent / "ml"))
+        from inference.frame_store import FrameStoreWriter
+        
+        store_path = tmp_path / "frames_job.frames"
+        with FrameStoreWriter(store_path, codec="raw") as writer:
+            for i in range(5):
+                writer.append(np.full((48, 64, 3), i * 40, dtype=np.uint8), i * 200, i * 5)
+        
+        async def extract(job_id):
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                job.results = {"frames": {"frame_store": str(store_path), "frame_count": 5}}
+                await session.commit()
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", extract)
+        
+        files = {"file": ("clip.mp4", b"\x00\x00\x00\x1cftypmp42" + b"\x02" * 100, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        response = client.get(f"/api/v1/analysis/{job_id}/evidence/frame-at/610", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        cv2 = pytest.importorskip("cv2")
+        frame = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR)
+        assert frame.shape == (48, 64, 3) and frame[0, 0, 0] == 120
+    
+    def test_lipsync_inference_reads_frame_store(self, client, auth_headers, tmp_path, monkeypatch):
+        import sys
+        import numpy as np
+        pytest.importorskip("cv2")
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent / "ml"))
+        from inference.frame_store import FrameStoreWriter
+        from app.workers.inference import run_lipsync_inference
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        
+        store_path = tmp_path / "frames_lips.frames"
+        with FrameStoreWriter(store_path, codec="raw") as writer:
+            for i in range(10):
+                writer.append(np.full((48, 64, 3), i * 20, dtype=np.uint8), i * 200, i * 5)
+        
+        files = {"file": ("lips.mp4", b"\x00\x00\x00\x1cftypmp42" + b"\x04" * 100, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        frames_data = {"frame_store": str(store_path)}
+        words = [{"word": "hello", "start_ms": 200, "end_ms": 800}, {"word": "there", "start_ms": 1000, "end_ms": 1600}]
+        result = run_lipsync_inference.apply(args=[job_id, frames_data, {"words": words}]).get()
+        assert not result.get("skipped")
+        assert result["analyzed_words"] == 2
+        assert "sync_offset_ms" in result and 0.0 <= result["lipsync_score"] <= 1.0
+        
+        # No speech, nothing to verify
+        result = run_lipsync_inference.apply(args=[job_id, frames_data, {"words": []}]).get()
+        assert result["skipped"]
+    
+    def test_audio_inference_skipped_without_model(self, tmp_path, monkeypatch):
+        from uuid import uuid4
+        from app.workers.inference import run_audio_inference
+        monkeypatch.setattr("app.workers.inference.has_model", lambda name: False)
+        audio_path = tmp_path / "audio.f32"
+        audio_path.write_bytes(b"\x00" * 64)
+        
+        result = run_audio_inference.apply(args=[str(uuid4()), str(audio_path)]).get()
+        assert result["skipped"] and result["reason"] == "no audio model deployed"
+        assert "audio_score" not in result
+        
+        result = run_audio_inference.apply(args=[str(uuid4()), ""]).get()
+        assert result["skipped"] and result["reason"] == "no audio"
+    
+    def test_start_live_analysis(self, client, auth_headers, tmp_path, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "LIVE_INGEST_ROOT", str(tmp_path))
+        (tmp_path / "channel1").mkdir()
+        (tmp_path / "channel1" / "live.m3u8").write_text("#EXTM3U\n")
+        
+        dispatched = []
+        monkeypatch.setattr(
+            "app.api.routes.analysis.submit_live",
+            lambda job_id, source: dispatched.append((str(job_id), source)),
+        )
+        
+        response = client.post("/api/v1/analysis/live", json={"source_path": "channel1"}, headers=auth_headers)
+        assert response.status_code == 201
+        job_id = response.json()["job_id"]
+        assert dispatched == [(job_id, str((tmp_path / "channel1").resolve()))]
+        
+        status_response = client.get(f"/api/v1/analysis/{job_id}/status", headers=auth_headers)
+        assert status_response.json()["status"] == "PENDING"
+        
+        # Sources outside the ingest root are refused
+        response = client.post("/api/v1/analysis/live", json={"source_path": "../"}, headers=auth_headers)
+        assert response.status_code == 404
+        assert len(dispatched) == 1
+
+    def test_live_verdict_leaves_out_unscored_modalities(self, client, auth_headers, tmp_path, monkeypatch):
+        import sys
+        from uuid import UUID
+        import numpy as np
+        cv2 = pytest.importorskip("cv2")
+        from app.core.config import settings
+        from app.db.session import SessionLocal
+        from app.models import AnalysisJob
+        from app.workers.live import run_live_analysis
+        sys.path.insert(0, str(Path(__file__).parent.parent.parent / "ml"))
+        import inference.live
+        monkeypatch.setattr(settings, "LIVE_INGEST_ROOT", str(tmp_path))
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        monkeypatch.setattr("app.api.routes.analysis.submit_live", lambda job_id, source: None)
+        
+        def no_ffmpeg(chunk, work_dir):
+            raise FileNotFoundError("ffmpeg")
+        monkeypatch.setattr(inference.live, "decode_chunk_audio", no_ffmpeg)
+        
+        channel = tmp_path / "channel2"
+        channel.mkdir()
+        writer = cv2.VideoWriter(str(channel / "seg0.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+        for _ in range(20):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writer.release()
+        (channel / "live.m3u8").write_text("#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXTINF:2.0,\nseg0.avi\n#EXT-X-ENDLIST\n")
+        
+        job_id = client.post("/api/v1/analysis/live", json={"source_path": "channel2"}, headers=auth_headers).json()["job_id"]
+        run_live_analysis.apply(args=[job_id, str(channel.resolve())]).get()
+        
+        with SessionLocal() as session:
+            job = session.get(AnalysisJob, UUID(job_id))
+            assert job.status == "DONE"
+            # Video only: the audio and lip-sync steps had no audio to score
+            assert job.results["audio"]["skipped"] and job.results["lipsync"]["skipped"]
+            assert job.results["fusion"]["weights"] == {"video": 1.0, "audio": 0.0, "lipsync": 0.0}
+            assert job.overall_score == pytest.approx(job.results["video"]["video_score"])
+    
+    def test_cancel_running_job(self, client, auth_headers, tmp_path, monkeypatch):
+        from uuid import UUID
+        import numpy as np
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob
+        from app.services.cancellation import JobCancelled
+        from app.workers.preprocess import extract_frames
+        cv2 = pytest.importorskip("cv2")
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        
+        async def extracting(job_id):
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                job.status = job.stage = "EXTRACTING"
+                job.celery_task_id = "task-9"
+                await session.commit()
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", extracting)
+        revoked = []
+        monkeypatch.setattr("app.api.routes.analysis.revoke_task", revoked.append)
+        
+        files = {"file": ("long.mp4", b"\x00\x00\x00\x1cftypmp42" + b"\x03" * 100, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        response = client.post(f"/api/v1/analysis/{job_id}/cancel", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "CANCELLED"
+        assert revoked == ["task-9"]
+        
+        # The running extraction stops at its next check and leaves no frame store behind
+        video_path = tmp_path / "long.avi"
+        writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+        for _ in range(50):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writer.release()
+        with pytest.raises(JobCancelled):
+            extract_frames.apply(args=[UUID(job_id), str(video_path)]).get()
+        assert not list((tmp_path / "scratch").rglob("*.frames*"))
+        assert client.get(f"/api/v1/analysis/{job_id}/status", headers=auth_headers).json()["status"] == "CANCELLED"
+        
+        # Finished jobs cannot be cancelled
+        response = client.post(f"/api/v1/analysis/{job_id}/cancel", headers=auth_headers)
+        assert response.status_code == 409
+
+
+class TestStorageMaintenance:
+    """Scratch space and expired-media cleanup tests."""
+    
+    def test_scratch_refcount_and_quota(self, tmp_path, monkeypatch):
+        from app.core.config import settings
+        from app.services import scratch
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        monkeypatch.setattr(settings, "SCRATCH_QUOTA_MB", 1)
+        
+        scratch.hold("job-1", "task-a")
+        # A redelivered task takes over its own reference
+        assert scratch.hold("job-1", "task-a") == 1
+        assert scratch.hold("job-1", "task-b") == 2
+        with scratch.reserve("job-1", 600 * 1024) as directory:
+            (directory / "frames_job-1.frames").write_bytes(b"\1" * 600 * 1024)
+            (directory / "embeddings_job-1.npy").write_bytes(b"\2" * 1024)
+        
+        # The node is over half full: a second large write waits, then gives up
+        with pytest.raises(scratch.ScratchQuotaExceeded):
+            with scratch.reserve("job-2", 600 * 1024, timeout_s=0):
+                pass
+        
+        kept = scratch.retain("job-1", str(directory / "frames_job-1.frames"))
+        assert scratch.release("job-1", "task-a") == 1 and directory.exists()
+        assert scratch.release("job-1", "task-b") == 0 and not directory.exists()
+        assert Path(kept).read_bytes()[:1] == b"\1"
+        
+        with scratch.reserve("job-2", 600 * 1024, timeout_s=0) as directory:
+            assert directory.name == "job-2"
+    
+    def test_evidence_inputs_outlive_scratch(self, tmp_path, monkeypatch):
+        from app.core.config import settings
+        from app.services import scratch
+        from app.services.artifacts import job_artifact_dir
+        from app.workers.report import retain_evidence_inputs
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        
+        scratch.hold("job-3", "task-a")
+        directory = scratch.job_scratch_dir("job-3")
+        for name in ("frames_job-3.frames", "audio_job-3.f32", "embeddings_job-3.npy", "faces_job-3.tmp"):
+            (directory / name).write_bytes(b"\1")
+        results = retain_evidence_inputs("job-3", {
+            "frames": {"frame_store": str(directory / "frames_job-3.frames")},
+            "audio": {"audio_path": str(directory / "audio_job-3.f32")},
+            "video": {"video_score": 0.4, "embeddings_path": str(directory / "embeddings_job-3.npy")},
+        })
+        assert scratch.release("job-3", "task-a") == 0 and not directory.exists()
+        
+        # Known-fake indexing reads the embeddings after the pipeline is done
+        kept = job_artifact_dir("job-3")
+        assert results["video"] == {"video_score": 0.4, "embeddings_path": str(kept / "embeddings_job-3.npy")}
+        assert results["frames"]["frame_store"] == str(kept / "frames_job-3.frames")
+        assert sorted(path.name for path in kept.iterdir()) == [
+            "audio_job-3.f32", "embeddings_job-3.npy", "frames_job-3.frames"
+        ]
+    
+    def test_purge_expired_media(self, client, auth_headers, tmp_path, monkeypatch):
+        from datetime import datetime, timedelta
+        from uuid import UUID
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob, MediaItem
+        from app.services.artifacts import job_artifact_dir, put_artifact
+        from app.workers.maintenance import purge_expired_media
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(settings, "FINGERPRINT_INDEX_PATH", str(tmp_path / "fingerprints.npz"))
+        
+        frame_store = tmp_path / "frames_old.frames"
+        frame_store.write_bytes(b"frames")
+        embeddings = tmp_path / "embeddings_old.npy"
+        embeddings.write_bytes(b"embeddings")
+        
+        async def complete(job_id):
+            put_artifact(job_id, "transcript", {"full_text": "", "words": []})
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, job_id)
+                job.results = {
+                    "frames": {"frame_store": str(frame_store)},
+                    "video": {"embeddings_path": str(embeddings)},
+                }
+                await session.commit()
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", complete)
+        
+        media_ids = []
+        for i in range(3):
+            files = {"file": (f"old{i}.mp4", b"\x00\x00\x00\x1cftypmp42" + bytes([i + 10]) * 100, "video/mp4")}
+            media_ids.append(client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()["id"])
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media_ids[0]}, headers=auth_headers).json()["job_id"]
+        
+        async def expire(ids):
+            async with AsyncSessionLocal() as session:
+                for media_id in ids:
+                    media = await session.get(MediaItem, UUID(media_id))
+                    media.expires_at = datetime.utcnow() - timedelta(days=1)
+                await session.commit()
+        client.portal.call(expire, media_ids[:2])
+        
+        result = purge_expired_media.apply(kwargs={"batch_size": 1}).get()
+        assert result["purged"] == 2 and result["batches"] == 2
+        assert not frame_store.exists() and not embeddings.exists()
+        assert not job_artifact_dir(job_id).exists()
+        
+        assert client.get(f"/api/v1/analysis/{job_id}/status", headers=auth_headers).status_code == 404
+        
+        async def remaining():
+            async with AsyncSessionLocal() as session:
+                return [await session.get(MediaItem, UUID(media_id)) is not None for media_id in media_ids]
+        assert client.portal.call(remaining) == [False, False, True]
+    
+    def test_purge_keeps_files_of_reused_source(self, client, auth_headers, tmp_path, monkeypatch):
+        from datetime import datetime, timedelta
+        from uuid import UUID
+        from app.core.celery_app import TaskState
+        from app.core.config import settings
+        from app.db.session import AsyncSessionLocal
+        from app.models import AnalysisJob, MediaItem
+        from app.services.artifacts import job_artifact_dir
+        from app.workers.maintenance import purge_expired_media
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(settings, "FINGERPRINT_INDEX_PATH", str(tmp_path / "fingerprints.npz"))
+        
+        media_ids = []
+        for i in range(2):
+            files = {"file": (f"reused{i}.mp4", b"\x00\x00\x00\x1cftypmp42" + bytes([i + 40]) * 100, "video/mp4")}
+            media_ids.append(client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()["id"])
+        
+        async def seed():
+            async with AsyncSessionLocal() as session:
+                source = AnalysisJob(media_id=UUID(media_ids[0]), status=TaskState.DONE, stage=TaskState.DONE)
+                session.add(source)
+                await session.flush()
+                frame_store = job_artifact_dir(str(source.id)) / "frames.frames"
+                frame_store.parent.mkdir(parents=True)
+                frame_store.write_bytes(b"frames")
+                source.results = {"frames": {"frame_store": str(frame_store)}}
+                session.add(AnalysisJob(
+                    media_id=UUID(media_ids[1]),
+                    status=TaskState.DONE,
+                    stage=TaskState.DONE,
+                    results={**source.results, "reused_from": {"job_id": str(source.id), "similarity": 0.99}},
+                ))
+                media = await session.get(MediaItem, UUID(media_ids[1]))
+                media.expires_at = datetime.utcnow() - timedelta(days=1)
+                await session.commit()
+                return frame_store
+        frame_store = client.portal.call(seed)
+        
+        assert purge_expired_media.apply().get()["purged"] == 1
+        assert frame_store.exists()
+
+
+class TestScheduling:
+    """Priority tiers and fair-share dispatch."""
+    
+    def test_fair_share_order(self):
+        from app.services.scheduling import fair_share_order
+        held = [("a1", "alice"), ("a2", "alice"), ("a3", "alice"), ("b1", "bob"), ("c1", "carol")]
+        # Alice already has two pipelines running
+        assert fair_share_order(held, {"alice": 2}, 3) == ["b1", "c1", "a1"]
+        assert fair_share_order(held, {}, 5) == ["a1", "b1", "c1", "a2", "a3"]
+    
+    def test_held_jobs_released_fairly(self, client, auth_headers, sync_session, idle_pipeline, monkeypatch):
+        from uuid import UUID
+        from app.core.config import settings
+        from app.models import AnalysisJob
+        from app.services import executor, scheduling
+        monkeypatch.setattr(settings, "PIPELINE_EXECUTOR", "celery")
+        monkeypatch.setattr(executor, "_executor", None)
+        monkeypatch.setattr(settings, "PIPELINE_WORKER_SLOTS", 3)
+        monkeypatch.setattr(settings, "INTERACTIVE_RESERVED_SLOTS", 1)
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        dispatched = []
+        monkeypatch.setattr(
+            "app.workers.report.run_full_pipeline.apply_async",
+            lambda args, priority: dispatched.append((args[0], priority)) or MagicMock(id=f"task-{len(dispatched)}"),
+        )
+        
+        client.post("/api/v1/auth/register", json={"email": "bulk2@example.com", "password": "password123"})
+        token = client.post("/api/v1/auth/login", json={
+            "email": "bulk2@example.com", "password": "password123"
+        }).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        
+        def submit(headers, name, priority):
+            files = {"file": (name, b"\x00\x00\x00\x1cftypmp42" + name.encode() * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=headers).json()
+            response = client.post("/api/v1/analysis/start", json={
+                "media_id": media["id"], "options": {"priority": priority}
+            }, headers=headers)
+            return response.json()["job_id"]
+        
+        # One user bulk-submits three files, then another submits one
+        bulk = [submit(auth_headers, f"bulk{i}.mp4", "batch") for i in range(3)]
+        other = submit(other_headers, "other.mp4", "batch")
+        assert dispatched == []
+        
+        # Two free slots: one each, in larger batches while no interactive job runs
+        assert scheduling.dispatch_held() == {"batch": 2, "backfill": 0}
+        assert dispatched == [(bulk[0], 5), (other, 5)]
+        assert scheduling.scheduled_batch_size(UUID(bulk[0])) == settings.IDLE_INFERENCE_BATCH_SIZE
+        
+        # An interactive job takes the reserved slot; bulk jobs wait for theirs
+        submit(auth_headers, "upload.mp4", "interactive")
+        assert scheduling.dispatch_held() == {"batch": 0, "backfill": 0}
+        with sync_session() as session:
+            session.get(AnalysisJob, UUID(other)).status = "DONE"
+            session.commit()
+        assert scheduling.dispatch_held() == {"batch": 1, "backfill": 0}
+        assert dispatched[-1] == (bulk[1], 5)
+        assert scheduling.scheduled_batch_size(UUID(bulk[1])) is None
+        
+        scheduling.record_pickup(UUID(bulk[0]))
+        metrics = client.get("/api/v1/analysis/scheduler", headers=auth_headers).json()
+        assert metrics["tiers"]["batch"]["held"] == 1
+        assert metrics["tiers"]["batch"]["queued"] == 2
+        assert metrics["tiers"]["batch"]["samples"] == 1
+        assert metrics["tiers"]["interactive"]["queued"] == 1
+
+    def test_fair_share_spans_tiers(self, client, auth_headers, sync_session, idle_pipeline, monkeypatch):
+        from uuid import UUID
+        from app.core.config import settings
+        from app.services import scheduling
+        monkeypatch.setattr(settings, "PIPELINE_WORKER_SLOTS", 3)
+        monkeypatch.setattr(settings, "INTERACTIVE_RESERVED_SLOTS", 1)
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        dispatched = []
+        monkeypatch.setattr(scheduling, "claim", lambda db, job, batch_size=None: True)
+        monkeypatch.setattr(scheduling, "dispatch", lambda db, job: dispatched.append(str(job.id)))
+        
+        client.post("/api/v1/auth/register", json={"email": "tiers@example.com", "password": "password123"})
+        token = client.post("/api/v1/auth/login", json={
+            "email": "tiers@example.com", "password": "password123"
+        }).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        
+        def submit(headers, name, priority):
+            files = {"file": (name, b"\x00\x00\x00\x1cftypmp42" + name.encode() * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=headers).json()
+            return client.post("/api/v1/analysis/start", json={
+                "media_id": media["id"], "options": {"priority": priority}
+            }, headers=headers).json()["job_id"]
+        
+        batch = submit(auth_headers, "tier-batch.mp4", "batch")
+        own_backfill = submit(auth_headers, "tier-backfill.mp4", "backfill")
+        other_backfill = submit(other_headers, "tier-other.mp4", "backfill")
+        submit(auth_headers, "tier-backfill2.mp4", "backfill")
+        
+        # Only each user's oldest jobs, up to the free slots, are read
+        with sync_session() as session:
+            assert [job_id for job_id, _ in scheduling.oldest_held(session, "backfill", 1)] == [
+                UUID(own_backfill), UUID(other_backfill)
+            ]
+        
+        # The batch job released this tick counts toward its user's share
+        assert scheduling.dispatch_held() == {"batch": 1, "backfill": 1}
+        assert dispatched == [batch, other_backfill]
+    
+    def test_held_job_claimed_once(self, client, auth_headers, sync_session, idle_pipeline, monkeypatch):
+        from uuid import UUID
+        from app.models import AnalysisJob
+        from app.services import scheduling
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+
+        files = {"file": ("claimed.mp4", b"\x00\x00\x00\x1cftypmp42" + b"claimed" * 20, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={
+            "media_id": media["id"], "options": {"priority": "batch"}
+        }, headers=auth_headers).json()["job_id"]
+
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(job_id))
+            # A second scheduler that read the same held job loses the claim
+            assert scheduling.claim(session, job) is True
+            assert scheduling.claim(session, job) is False
+
+            # A failed submission gives the claim back
+            executor = MagicMock()
+            executor.submit.side_effect = ConnectionError("broker down")
+            monkeypatch.setattr("app.services.executor.get_executor", lambda: executor)
+            with pytest.raises(ConnectionError):
+                scheduling.dispatch(session, job)
+            session.refresh(job)
+            assert job.dispatched_at is None
+            assert scheduling.claim(session, job) is True
+
+
+class TestAdmission:
+    """Load-aware admission control and quality tiers."""
+    
+    def test_quality_tiers_only_switch_parts_off(self):
+        from app.services.admission import estimate_cost_s, with_tier
+        options = {"run_video": True, "run_audio": False, "run_lipsync": True}
+        cascade = with_tier(options, "cascade")
+        assert cascade["quality"] == "cascade"
+        assert cascade["fps"] == 0.5
+        assert not cascade["run_audio"] and not cascade["run_lipsync"]
+        assert with_tier({"run_lipsync": False}, "reduced")["run_lipsync"] is False
+        full = with_tier(options, "full")
+        assert estimate_cost_s(60_000, "video", cascade) < estimate_cost_s(60_000, "video", full)
+    
+    def test_degrade_then_reject_under_load(self, client, auth_headers, sync_session, idle_pipeline, monkeypatch):
+        from uuid import UUID
+        from app.core.config import settings
+        from app.models import AnalysisJob
+        monkeypatch.setattr(settings, "PIPELINE_WORKER_SLOTS", 2)
+        monkeypatch.setattr(settings, "ADMISSION_DEGRADE_AFTER_S", 100)
+        monkeypatch.setattr(settings, "ADMISSION_REJECT_AFTER_S", 900)
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        
+        def submit(name, **options):
+            files = {"file": (name, b"\x00\x00\x00\x1cftypmp42" + name.encode() * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+            return client.post("/api/v1/analysis/start", json={
+                "media_id": media["id"], "options": options
+            }, headers=auth_headers)
+        
+        def set_backlog(job_id, cost_s):
+            with sync_session() as session:
+                session.get(AnalysisJob, UUID(job_id)).estimated_cost_s = cost_s
+                session.commit()
+        
+        first = submit("admit0.mp4").json()
+        assert first["quality"] == "full"
+        
+        # 200 s of backlog per slot: past the degrade point, early in the band
+        set_backlog(first["job_id"], 400)
+        degraded = submit("admit1.mp4")
+        assert degraded.status_code == 201
+        assert degraded.json()["quality"] == "reduced"
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(degraded.json()["job_id"]))
+            assert job.options["fps"] == 2.0
+            set_backlog(str(job.id), 0)
+        
+        # A caller that wants full quality only is told when to come back
+        strict = submit("admit2.mp4", allow_degraded=False)
+        assert strict.status_code == 429
+        assert strict.headers["Retry-After"] == "100"
+        
+        # 1000 s per slot: past the rejection point for everyone
+        set_backlog(first["job_id"], 2000)
+        rejected = submit("admit3.mp4")
+        assert rejected.status_code == 429
+        assert rejected.headers["Retry-After"] == "100"
+        
+        # Bulk tiers are held by the scheduler and never rejected
+        assert submit("admit4.mp4", priority="batch").json()["quality"] == "full"
+
+
+class TestBatchAnalysis:
+    """Bulk submission, queue counts and multi-job status polls."""
+    
+    def test_batch_submit_queue_and_status(self, client, auth_headers, monkeypatch):
+        from uuid import uuid4
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipelines", lambda job_ids: None)
+        
+        def upload(name):
+            files = {"file": (name, b"\x00\x00\x00\x1cftypmp42" + name.encode() * 20, "video/mp4")}
+            return client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()["id"]
+        
+        media_ids = [upload(f"ingest{i}.mp4") for i in range(3)]
+        running = client.post("/api/v1/analysis/start", json={"media_id": media_ids[0]}, headers=auth_headers).json()
+        before = client.get("/api/v1/analysis/queue", headers=auth_headers).json()
+        
+        response = client.post("/api/v1/analysis/batch", json={
+            "media_ids": media_ids + [media_ids[1]]
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        batch = response.json()
+        assert batch["total"] == 3
+        # The media already being analysed keeps its job
+        assert batch["job_ids"][0] == running["job_id"]
+        assert len(set(batch["job_ids"])) == 3
+        
+        after = client.get("/api/v1/analysis/queue", headers=auth_headers).json()
+        assert after["pending"] == before["pending"] + 2
+        assert set(after) == {"pending", "processing", "completed", "failed"}
+        
+        statuses = client.post("/api/v1/analysis/status", json={
+            "job_ids": [batch["job_ids"][2], str(uuid4()), batch["job_ids"][1]]
+        }, headers=auth_headers).json()
+        assert [s["job_id"] for s in statuses] == [batch["job_ids"][2], batch["job_ids"][1]]
+        assert all(s["status"] == "PENDING" for s in statuses)
+        
+        missing = client.post("/api/v1/analysis/batch", json={
+            "media_ids": [media_ids[0], str(uuid4())]
+        }, headers=auth_headers)
+        assert missing.status_code == 404
+
+
+class TestCoalescing:
+    """Single-flight analysis of identical media across users."""
+    
+    def test_identical_media_attaches_to_in_flight_job(self, client, auth_headers, sync_session, monkeypatch):
+        from uuid import UUID
+        from app.models import AnalysisJob, Segment
+        from app.services import coalescing
+        started = []
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", started.append)
+        
+        client.post("/api/v1/auth/register", json={"email": "newsdesk@example.com", "password": "password123"})
+        token = client.post("/api/v1/auth/login", json={
+            "email": "newsdesk@example.com", "password": "password123"
+        }).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        
+        def start(headers, content, **options):
+            files = {"file": ("breaking.mp4", b"\x00\x00\x00\x1cftypmp42" + content * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=headers).json()
+            return client.post("/api/v1/analysis/start", json={
+                "media_id": media["id"], "options": options
+            }, headers=headers).json()
+        
+        leader = start(auth_headers, b"clip-one")
+        follower = start(other_headers, b"clip-one")
+        assert follower["job_id"] != leader["job_id"]
+        assert [str(job_id) for job_id in started] == [leader["job_id"]]
+        # Different options are a different analysis
+        assert coalescing.coalesce_key("abc", {"run_audio": False}) != coalescing.coalesce_key("abc", {})
+        
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(leader["job_id"]))
+            job.status = job.stage = "INFER_VIDEO"
+            job.progress = 0.4
+            session.commit()
+        status = client.get(f"/api/v1/analysis/{follower['job_id']}/status", headers=other_headers).json()
+        assert (status["status"], status["progress"]) == ("INFER_VIDEO", 0.4)
+        
+        # The leader completes: the follower gets a copy of its verdict and segments
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(leader["job_id"]))
+            job.status = job.stage = "DONE"
+            job.overall_score, job.label = 0.91, "FAKE"
+            job.results = {"video": {"score": 0.91}}
+            job.segments = [Segment(start_ms=0, end_ms=900, segment_type="video", score=0.9, reason="blending")]
+            session.commit()
+        coalescing.settle_followers(UUID(leader["job_id"]))
+        result = client.get(f"/api/v1/analysis/{follower['job_id']}/result", headers=other_headers).json()
+        assert result["status"] == "DONE"
+        assert result["label"] == "FAKE"
+        assert result["results"]["coalesced_from"] == leader["job_id"]
+        assert len(result["segments"]) == 1
+        
+        # A cancelled leader hands over to the job attached to it
+        leader = start(auth_headers, b"clip-two")
+        follower = start(other_headers, b"clip-two")
+        response = client.post(f"/api/v1/analysis/{leader['job_id']}/cancel", headers=auth_headers)
+        assert response.json()["status"] == "CANCELLED"
+        assert str(started[-1]) == follower["job_id"]
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(follower["job_id"]))
+            assert job.coalesced_with_id is None
+            assert job.dispatched_at is not None
+    
+    def test_racing_start_attaches_to_winner(self, client, auth_headers, monkeypatch):
+        from uuid import UUID
+        from app.api.routes import analysis
+        from app.db.session import SessionLocal
+        from app.models import AnalysisJob
+        started = []
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", started.append)
+        
+        client.post("/api/v1/auth/register", json={"email": "wiredesk@example.com", "password": "password123"})
+        token = client.post("/api/v1/auth/login", json={
+            "email": "wiredesk@example.com", "password": "password123"
+        }).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        
+        def start(headers):
+            files = {"file": ("race.mp4", b"\x00\x00\x00\x1cftypmp42" + b"race" * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=headers).json()
+            return client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=headers).json()
+        
+        leader = start(auth_headers)
+        # The second request looks before the first one's job is visible
+        lookups = []
+        find_leaders = analysis.in_flight_leaders
+        async def stale_lookup(db, keys):
+            lookups.append(keys)
+            return {} if len(lookups) == 1 else await find_leaders(db, keys)
+        monkeypatch.setattr(analysis, "in_flight_leaders", stale_lookup)
+        follower = start(other_headers)
+        
+        assert len(lookups) == 2
+        assert [str(job_id) for job_id in started] == [leader["job_id"]]
+        with SessionLocal() as session:
+            job = session.get(AnalysisJob, UUID(follower["job_id"]))
+            assert str(job.coalesced_with_id) == leader["job_id"]
+
+
+class TestLocalExecution:
+    """Real pipelines in a local process pool when no broker is configured."""
+    
+    def test_pipeline_runs_in_local_pool(self, client, auth_headers, tmp_path, monkeypatch):
+        import time
+        cv2 = pytest.importorskip("cv2")
+        import numpy as np
+        from app.core.config import settings
+        from app.services import executor
+        monkeypatch.setattr(settings, "CELERY_BROKER_URL", "")
+        monkeypatch.setattr(settings, "LOCAL_EXECUTOR_WORKERS", 1)
+        monkeypatch.setattr(settings, "FINGERPRINT_INDEX_PATH", str(tmp_path / "fingerprints.npz"))
+        # Pool processes read their settings from the environment
+        monkeypatch.setenv("ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        monkeypatch.setenv("SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(executor, "_executor", None)
+        assert executor.get_executor().name == "local"
+        
+        path = tmp_path / "local.mp4"
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            writer.write(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+        writer.release()
+        
+        try:
+            files = {"file": ("local.mp4", path.read_bytes(), "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+            # Video only: the audio steps need ffmpeg
+            job_id = client.post("/api/v1/analysis/start", json={
+                "media_id": media["id"], "options": {"run_audio": False, "run_lipsync": False}
+            }, headers=auth_headers).json()["job_id"]
+            
+            deadline = time.monotonic() + 120
+            while time.monotonic() < deadline:
+                status = client.get(f"/api/v1/analysis/{job_id}/status", headers=auth_headers).json()
+                if status["status"] in ("DONE", "FAILED"):
+                    break
+                time.sleep(0.5)
+        finally:
+            executor.shutdown_executor()
+        
+        assert status["status"] == "DONE"
+        result = client.get(f"/api/v1/analysis/{job_id}/result", headers=auth_headers).json()
+        # No video weights here: the modality is skipped, not scored at random
+        assert result["results"]["video"] == {
+            "job_id": job_id,
+            "skipped": True,
+            "reason": "no video model deployed",
+            "model_version": settings.VIDEO_MODEL_VERSION,
+        }
+        assert result["results"]["audio"]["skipped"]
+        assert result["label"] is None and result["overall_score"] is None
+        assert result["results"]["fusion"]["weights"] == {"video": 0.0, "audio": 0.0, "lipsync": 0.0}
+
+
+class TestStageCheckpoints:
+    """Resuming redelivered pipelines from stage checkpoints."""
+    
+    def test_resume_after_last_usable_stage(self, tmp_path, monkeypatch):
+        from app.core.config import settings
+        from app.services import checkpoints
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+        recovered = []
+        monkeypatch.setattr(checkpoints, "record_recovery", lambda job_id, stage, ms: recovered.append((stage, ms)))
+        
+        frame_store = tmp_path / "frames_job.frames"
+        frame_store.write_bytes(b"frames")
+        stages = checkpoints.StageCheckpoints("job-1")
+        stages.save("validate", {"file_path": str(tmp_path)}, 100)
+        stages.save("frames", {"frame_store": str(frame_store)}, 2000)
+        
+        # The worker died while extracting audio: frames are reused, audio runs
+        calls = []
+        assert stages.run("frames", lambda: calls.append("frames")) == {"frame_store": str(frame_store)}
+        assert stages.run("audio", lambda: calls.append("audio") or {"audio_path": str(frame_store)}) == {
+            "audio_path": str(frame_store)
+        }
+        assert calls == ["audio"]
+        assert recovered == [("frames", 2000)]
+        
+        # A checkpoint whose files are gone is not usable
+        frame_store.unlink()
+        assert stages.load("frames") is None
+        assert stages.resume_point(["validate", "frames", "audio"]) == (0, {"file_path": str(tmp_path)})
+        assert stages.resume_point(["finalize"]) == (-1, None)
+
+
+class TestRescoring:
+    """Bulk re-scoring of finished jobs."""
+    
+    def test_rescore_uses_pipeline_bands_and_skips_missing(self, client, auth_headers, monkeypatch):
+        from uuid import UUID
+        from app.db.session import AsyncSessionLocal, SessionLocal
+        from app.models import AnalysisJob
+        from app.services.ml_runtime import get_fusion_service
+        from app.services.rescoring import rescore_jobs
+        from app.workers.inference import FUSION_WEIGHTS, LABELS
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        
+        files = {"file": ("rescore.mp4", b"\x00\x00\x00\x1cftypmp42" + b"rescore" * 20, "video/mp4")}
+        media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+        job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+        
+        async def finish():
+            async with AsyncSessionLocal() as session:
+                job = await session.get(AnalysisJob, UUID(job_id))
+                job.status = job.stage = "DONE"
+                job.results = {
+                    "video": {"video_score": 0.5},
+                    "audio": {"skipped": True},
+                    "lipsync": {"lipsync_score": 0.5},
+                    "fusion": {"overall_score": 0.1, "label": "AUTHENTIC", "model_version": "v1"},
+                }
+                await session.commit()
+        client.portal.call(finish)
+        
+        rescore_jobs(get_fusion_service(weights=FUSION_WEIGHTS))
+        
+        with SessionLocal() as session:
+            job = session.get(AnalysisJob, UUID(job_id))
+            # The skipped audio is left out rather than scored 0
+            assert job.overall_score == pytest.approx(0.5)
+            assert job.label == "LIKELY_FAKE" and job.label in LABELS
+            fusion = job.results["fusion"]
+            assert (fusion["overall_score"], fusion["label"]) == (pytest.approx(0.5), "LIKELY_FAKE")
+            assert fusion["weights"]["audio"] == 0.0
+            assert fusion["model_version"] == "v1" and "rescored_at" in fusion
+
+
+class TestReanalysis:
+    """Incremental re-analysis after a model version bump."""
+
+    @pytest.fixture
+    def finished_job(self, client, auth_headers, sync_session, tmp_path, monkeypatch):
+        """A DONE job whose video result came from an older model version."""
+        from uuid import UUID
+        from app.core.config import settings
+        from app.models import AnalysisJob, Segment
+        monkeypatch.setattr("app.api.routes.analysis.submit_pipeline", lambda job_id: None)
+        monkeypatch.setattr(settings, "SCRATCH_PATH", str(tmp_path / "scratch"))
+        monkeypatch.setattr(settings, "ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+
+        def create(name, results):
+            files = {"file": (name, b"\x00\x00\x00\x1cftypmp42" + name.encode() * 20, "video/mp4")}
+            media = client.post("/api/v1/media/upload", files=files, headers=auth_headers).json()
+            job_id = client.post("/api/v1/analysis/start", json={"media_id": media["id"]}, headers=auth_headers).json()["job_id"]
+            with sync_session() as session:
+                job = session.get(AnalysisJob, UUID(job_id))
+                job.status = job.stage = "DONE"
+                job.overall_score, job.label = 0.2, "AUTHENTIC"
+                job.coalesce_key = f"reanalysis-{name}"
+                job.results = results
+                job.segments = [Segment(start_ms=0, end_ms=200, segment_type="video", score=0.75, reason="old")]
+                session.commit()
+            return job_id
+
+        frame_store = tmp_path / "frames_job.frames"
+        frame_store.write_bytes(b"frames")
+        return lambda name: create(name, {
+            "frames": {"frame_store": str(frame_store)},
+            "video": {"video_score": 0.2, "model_version": "video-old"},
+            "audio": {"audio_score": 0.1, "model_version": settings.AUDIO_MODEL_VERSION},
+            "lipsync": {"lipsync_score": 0.3, "model_version": settings.LIPSYNC_MODEL_VERSION},
+            "fusion": {"overall_score": 0.2, "label": "AUTHENTIC", "model_version": settings.FUSION_MODEL_VERSION},
+        })
+
+    def test_only_stale_modalities_recomputed(self, finished_job, sync_session, monkeypatch):
+        from uuid import UUID
+        from app.core.config import settings
+        from app.models import AnalysisJob
+        from app.services import reanalysis
+        from app.workers.report import run_reanalysis
+        job_id = finished_job("reanalyse.mp4")
+
+        # Queued from the scan with just its stale modality
+        queued = []
+        with sync_session() as session:
+            results = session.get(AnalysisJob, UUID(job_id)).results
+        monkeypatch.setattr(reanalysis, "iter_job_batches", lambda batch_size: iter([[(job_id, results)]]))
+        monkeypatch.setattr(reanalysis.run_reanalysis, "delay", lambda *args: queued.append(args))
+        summary = reanalysis.queue_stale_jobs()
+        assert (summary["queued"], summary["stale_by_modality"]) == (1, {"video": 1})
+        assert queued == [(job_id, ["video"])]
+
+        # An in-flight leader with the same key does not block the finished job
+        leader_id = UUID(finished_job("leader.mp4"))
+        with sync_session() as session:
+            leader = session.get(AnalysisJob, leader_id)
+            leader.status, leader.coalesce_key = "PENDING", session.get(AnalysisJob, UUID(job_id)).coalesce_key
+            session.commit()
+
+        recomputed = []
+        def run_modality(job_id, modality, preprocess_results):
+            recomputed.append(modality)
+            return {"video_score": 0.9, "model_version": settings.VIDEO_MODEL_VERSION}
+        monkeypatch.setattr("app.workers.inference.run_modality", run_modality)
+
+        result = run_reanalysis.apply(args=[job_id, ["video"]]).get()
+        assert result["recomputed"] == ["video"]
+        assert recomputed == ["video"]
+
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(job_id))
+            assert job.status == "DONE"
+            assert job.coalesce_key == "reanalysis-reanalyse.mp4"
+            assert job.results["audio"] == {"audio_score": 0.1, "model_version": settings.AUDIO_MODEL_VERSION}
+            assert job.results["reanalysis"]["reused"] == ["audio", "lipsync"]
+            assert job.overall_score == pytest.approx(0.5 * 0.9 + 0.3 * 0.1 + 0.2 * 0.3)
+            # The stale video segments went with the stale result
+            assert [s.reason for s in job.segments] == []
+            session.get(AnalysisJob, leader_id).status = "CANCELLED"
+            session.commit()
+
+    def test_failed_reanalysis_leaves_job_unchanged(self, finished_job, sync_session, tmp_path, monkeypatch):
+        from uuid import UUID
+        from app.models import AnalysisJob
+        from app.services import reanalysis
+        from app.workers.inference import add_segment
+        from app.workers.report import run_reanalysis
+        job_id = finished_job("unchanged.mp4")
+
+        def snapshot():
+            with sync_session() as session:
+                job = session.get(AnalysisJob, UUID(job_id))
+                results = {k: v for k, v in job.results.items() if k != "reanalysis_error"}
+                return job.status, job.label, job.overall_score, results, [s.reason for s in job.segments]
+        before = snapshot()
+
+        # A recompute that fails part-way through
+        def run_modality(job_id, modality, preprocess_results):
+            add_segment(job_id, 0, 200, "video", 0.9, "new")
+            raise RuntimeError("model crashed")
+        monkeypatch.setattr("app.workers.inference.run_modality", run_modality)
+        with pytest.raises(RuntimeError):
+            run_reanalysis.apply(args=[job_id]).get()
+        assert snapshot() == before
+        with sync_session() as session:
+            job = session.get(AnalysisJob, UUID(job_id))
+            assert job.results["reanalysis_error"]["error"] == "model crashed"
+            assert job.coalesce_key == "reanalysis-unchanged.mp4"
+
+        # Cached frames are gone: nothing is queued and the job is not touched
+        (tmp_path / "frames_job.frames").unlink()
+        with pytest.raises(ValueError, match="video"):
+            run_reanalysis.apply(args=[job_id]).get()
+        assert snapshot() == before
+
+        with sync_session() as session:
+            results = session.get(AnalysisJob, UUID(job_id)).results
+        monkeypatch.setattr(reanalysis, "iter_job_batches", lambda batch_size: iter([[(job_id, results)]]))
+        summary = reanalysis.queue_stale_jobs(dry_run=True)
+        assert (summary["queued"], summary["unrecoverable"]) == (0, 1)
+
+
 class TestReports:
     """Report endpoint tests."""
     
@@ -1,6 +1,7 @@
 """
 Unit tests for ML inference services.
 """
+import time
 import pytest
 import numpy as np
 from pathlib import Path
@@ -14,6 +15,14 @@ from inference.video_forensics import VideoForensicsService
 from inference.audio_spoof import AudioSpoofService
 from inference.lipsync import LipSyncService
 from inference.fusion import MultimodalFusionService
+from inference.audio_buffer import open_audio_buffer, get_resampler
+from inference.feature_bank import AudioFeatureBank, feature_bank_path
+from inference.weights import save_weights, load_weights
+from inference.model_server import ModelServer
+from inference.known_fakes import KnownFakeIndex
+from inference.fingerprint import FingerprintIndex, audio_fingerprint, frame_hash, hamming
+from inference.live import GrowingFileSource, RollingWindow, decode_chunk_frames, open_source
+from inference.frame_store import FrameStore, FrameStoreWriter
 
 
 class TestVideoForensicsService:
@@ -56,6 +65,21 @@ class TestVideoForensicsService:
         info = service.get_model_info()
         assert "model_version" in info
         assert "image_size" in info
+    
+    def test_predict_returns_embeddings(self, service):
+        torch = pytest.importorskip("torch")
+        service.load_model()
+        service.model = service._create_model().eval()
+        frames = [{"image": np.zeros((64, 64, 3), dtype=np.uint8), "path": None, "timestamp_ms": 0}] * 3
+        
+        result = service.postprocess(service.predict({"frames": frames}))
+        
+        assert result["frame_count"] == 3
+        assert result["embeddings"].shape == (3, 768)
+        assert result["embeddings"].dtype == np.float16
+        with torch.no_grad():
+            probs = service._forward(torch.zeros(1, 3, 224, 224))[:, 0]
+        assert probs.shape == (1,)
 
 
 class TestAudioSpoofService:
@@ -76,6 +100,112 @@ class TestAudioSpoofService:
         result = service.preprocess({"audio_path": "/nonexistent/audio.wav"})
         assert "error" in result or result.get("waveform") is None
     
+    def test_preprocess_audio_buffer(self, service, tmp_path):
+        samples = np.sin(np.linspace(0, 100, 32000)).astype(np.float32)
+        buffer_path = tmp_path / "audio_job.f32"
+        samples.tofile(buffer_path)
+
+        mapped = open_audio_buffer(buffer_path)
+        assert isinstance(mapped, np.memmap)
+
+        result = service.preprocess({"audio_path": str(buffer_path)})
+        assert result["duration_sec"] == pytest.approx(2.0)
+        assert np.allclose(result["waveform"].numpy()[0], samples)
+
+    def test_feature_bank_matches_torchaudio_mel(self, service):
+        torch = pytest.importorskip("torch")
+        samples = np.random.default_rng(0).standard_normal(16000).astype(np.float32)
+        bank = AudioFeatureBank.compute(samples)
+
+        service.load_model()
+        expected = service.mel_transform(torch.from_numpy(samples)).numpy()
+        actual = bank.mel_power()
+        assert actual.shape == expected.shape
+        assert np.allclose(10 * np.log10(actual), 10 * np.log10(expected + 1e-10), atol=0.1)
+
+    def test_feature_bank_pitch_and_cache(self, tmp_path):
+        t = np.arange(32000) / 16000
+        samples = (0.5 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+        buffer_path = tmp_path / "audio_job.f32"
+        samples.tofile(buffer_path)
+
+        bank = AudioFeatureBank.for_buffer(buffer_path)
+        voiced = bank.f0[bank.f0 > 0]
+        assert len(voiced) > 0.9 * bank.n_frames
+        assert np.median(voiced) == pytest.approx(200, rel=0.02)
+
+        assert feature_bank_path(buffer_path).exists()
+        cached = AudioFeatureBank.for_buffer(buffer_path)
+        assert isinstance(cached.features, np.memmap)
+        assert cached.summary() == bank.summary()
+
+    def test_load_safetensors_weights(self, service, tmp_path):
+        pytest.importorskip("safetensors")
+        reference = service._create_model()
+        weights_path = save_weights(reference, tmp_path / "audio_spoof.safetensors")
+
+        mapped = AudioSpoofService(device="cpu", model_path=weights_path)
+        mapped.load_model()
+
+        assert not mapped.model.training
+        for name, tensor in reference.state_dict().items():
+            assert np.array_equal(mapped.model.state_dict()[name].numpy(), tensor.numpy())
+
+        stats = mapped.get_model_info()["load_stats"]
+        assert stats["weights_format"] == "safetensors"
+        assert stats["load_time_ms"] >= 0
+        assert stats["memory"]["rss_mb"] > 0
+
+    def test_load_trained_checkpoint(self, tmp_path):
+        torch = pytest.importorskip("torch")
+        pytest.importorskip("safetensors")
+        from inference.audio_spoof import AudioSpoofNet
+        # The network train_audio.py fits, with batch-norm statistics learned
+        trained = AudioSpoofNet()
+        trained(torch.randn(4, 1, 80, 63))
+        trained.eval()
+        weights_path = save_weights(trained, tmp_path / "audio_spoof.safetensors")
+
+        service = AudioSpoofService(device="cpu", model_path=weights_path)
+        service.load_model()
+
+        mel_spec = torch.randn(1, 1, 80, 63)
+        with torch.no_grad():
+            assert torch.allclose(service.model(mel_spec), trained(mel_spec))
+
+    def test_load_pickled_module_checkpoint(self, service, tmp_path):
+        torch = pytest.importorskip("torch")
+        torch.save(service._create_model(), tmp_path / "audio_spoof.pt")
+
+        loaded = load_weights(tmp_path / "audio_spoof.pt")
+        assert isinstance(loaded, torch.nn.Module)
+
+    def test_compiled_mode_warmup(self):
+        torch = pytest.importorskip("torch")
+        service = AudioSpoofService(device="cpu", compile_model=True)
+        service.compile_backend = "eager"
+        service.WARMUP_DURATIONS_SEC = (1,)
+        stats = service.warmup()
+
+        assert stats["compiled"]
+        assert stats["batch_buckets"] == [1]
+        assert stats["warmup_ms"] > 0
+        assert stats["speedup"] > 0
+        assert service.get_model_info()["compilation"] == stats
+
+        batch = torch.randn(3, 1, 80, 63)
+        with torch.no_grad():
+            assert torch.allclose(service._forward(batch), service.model(batch), atol=1e-6)
+
+    def test_batch_buckets(self, service):
+        assert service._bucket_size(1) == 1
+        assert service._bucket_size(3) == 4
+        assert service._bucket_size(64) == 64
+        assert service._bucket_size(100) == 100
+
+    def test_resampler_cached(self):
+        assert get_resampler(44100, 16000) is get_resampler(44100, 16000)
+    
     def test_postprocess(self, service):
         result = service.postprocess({
             "spoof_probability": 0.2,
@@ -109,6 +239,38 @@ class TestLipSyncService:
         })
         assert result["label"] == "SYNCHRONIZED"
 
+    def test_predict_estimates_av_offset(self, service):
+        rng = np.random.default_rng(0)
+        openness = rng.random(200).astype(np.float32)
+        # Audio energy trails the mouth by one 200ms frame
+        envelope = np.roll(openness, 1)
+        waveform = np.repeat(envelope, 3200) * rng.standard_normal(200 * 3200).astype(np.float32)
+        mouth_features = [
+            {"timestamp_ms": i * 200, "has_mouth": True, "openness": float(o)}
+            for i, o in enumerate(openness)
+        ]
+        words = [{"word": "w", "start_ms": i * 1000, "end_ms": i * 1000 + 400} for i in range(40)]
+
+        result = service.predict({
+            "mouth_features": mouth_features,
+            "words": words,
+            "waveform": waveform,
+            "sample_rate": 16000,
+        })
+        assert result["sync_offset_ms"] == 200
+        assert result["correlation_score"] > 0.5
+        assert result["analyzed_words"] == 40
+
+    def test_word_frame_ranges(self, service):
+        timestamps = np.array([0, 200, 400, 600, 800], dtype=np.float64)
+        words = [
+            {"start_ms": 150, "end_ms": 450},
+            {"start_ms": 900, "end_ms": 1000},
+        ]
+        starts, ends = service._word_frame_ranges(words, timestamps)
+        assert starts.tolist() == [1, 5]
+        assert ends.tolist() == [3, 5]
+
 
 class TestMultimodalFusionService:
     """Test multimodal fusion."""
@@ -142,6 +304,334 @@ class TestMultimodalFusionService:
         assert result["label"] in ["LIKELY_FAKE", "FAKE"]
         assert result["overall_score"] > 0.7
 
+    def test_predict_batch_matches_single(self, service):
+        service.load_model()
+        samples = [
+            {"video": {"score": 0.1, "confidence": 0.9}, "audio": {"score": 0.2, "confidence": 0.5},
+             "lipsync": {"score": 0.3, "confidence": 1.0}},
+            {"video": {"video_score": 0.9}, "audio": {"audio_score": 0.7}, "lipsync": {"lipsync_score": 0.8}},
+        ]
+        features = np.array([service.features_from_results(s) for s in samples])
+        batch = service.predict_batch(features)
+
+        for i, sample in enumerate(samples):
+            single = service({
+                modality: {"score": features[i][j], "confidence": features[i][j + 3]}
+                for j, modality in enumerate(service.MODALITIES)
+            })
+            assert batch["fused_scores"][i] == pytest.approx(single["overall_score"], abs=1e-6)
+            assert batch["labels"][i] == single["label"]
+
+    def test_features_leave_out_skipped_modalities(self, service):
+        service.load_model()
+        features = service.features_from_results({
+            "video": {"video_score": 0.8},
+            "audio": {"skipped": True},
+        })
+        assert features == [0.8, 0.0, 0.0, 1.0, 0.0, 0.0]
+        assert service.predict_batch(np.array([features]))["fused_scores"][0] == pytest.approx(0.8)
+
+    @pytest.fixture
+    def validation_set(self):
+        rng = np.random.default_rng(0)
+        labels = (rng.random(2000) < 0.5).astype(float)
+        # Video is the most informative modality, lip-sync the least
+        scores = rng.normal(0.3 + labels[:, None] * np.array([0.4, 0.2, 0.05]), 0.15, (2000, 3))
+        return np.clip(scores, 0, 1), labels
+
+    def test_calibrate_vectorized(self, service, validation_set):
+        scores, labels = validation_set
+        weights = service.calibrate(scores, labels)
+
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert weights["video"] > weights["lipsync"]
+        assert service.calibration["method"] == "platt"
+        assert service.calibration["accuracy"] > 0.8
+
+        probs = service.calibrated_probability(np.array([0.1, 0.5, 0.9]))
+        assert np.all(np.diff(probs) > 0)
+
+    def test_calibrate_isotonic_from_samples(self, service, validation_set):
+        scores, labels = validation_set
+        samples = [
+            {"video_score": v, "audio_score": a, "lipsync_score": l, "label": int(y)}
+            for (v, a, l), y in zip(scores, labels)
+        ]
+        service.calibrate(samples, method="isotonic")
+
+        assert service.calibration["method"] == "isotonic"
+        assert np.all(np.diff(service.calibration["y"]) >= 0)
+        service.load_model()
+        result = service({"video": {"score": 0.9}, "audio": {"score": 0.9}, "lipsync": {"score": 0.9}})
+        assert 0.5 < result["calibrated_probability"] <= 1.0
+
+
+class TestPrecisionParity:
+    """Bound score drift of reduced precision and channels-last inference."""
+    
+    # Largest allowed absolute change in a model score vs fp32
+    MAX_SCORE_DRIFT = {
+        ("fp32", True): 1e-5,
+        ("bf16", False): 0.02,
+        ("bf16", True): 0.02,
+    }
+    
+    @pytest.fixture(params=list(MAX_SCORE_DRIFT), ids=lambda mode: f"{mode[0]}-cl{int(mode[1])}")
+    def mode(self, request):
+        pytest.importorskip("torch")
+        return request.param
+    
+    def test_audio_score_drift(self, mode):
+        import torch
+        torch.manual_seed(0)
+        reference = AudioSpoofService(device="cpu")
+        reference.load_model()
+        candidate = AudioSpoofService(device="cpu", precision=mode[0], channels_last=mode[1])
+        candidate.load_model()
+        candidate.model.load_state_dict(reference.model.state_dict())
+        
+        for _ in range(3):
+            preprocessed = {"waveform": torch.randn(1, 32000), "duration_sec": 2.0}
+            expected = reference.predict(preprocessed)["spoof_probability"]
+            actual = candidate.predict(preprocessed)["spoof_probability"]
+            assert abs(actual - expected) <= self.MAX_SCORE_DRIFT[mode]
+    
+    def test_video_score_drift(self, mode):
+        import torch
+        torch.manual_seed(0)
+        reference = VideoForensicsService(device="cpu")
+        reference.model = reference._create_model().eval()
+        candidate = VideoForensicsService(device="cpu", precision=mode[0], channels_last=mode[1])
+        candidate.model = candidate._create_model().eval()
+        candidate.model.load_state_dict(reference.model.state_dict())
+        
+        frames = torch.randn(4, 3, 224, 224)
+        with torch.no_grad():
+            # Column 0 is the score; the rest is the frame embedding
+            expected = reference._forward(frames)[:, 0]
+            actual = candidate._forward(frames)[:, 0]
+        
+        assert actual.dtype == torch.float32
+        assert (actual - expected).abs().max().item() <= self.MAX_SCORE_DRIFT[mode]
+    
+    def test_unknown_precision_rejected(self):
+        with pytest.raises(ValueError):
+            AudioSpoofService(device="cpu", precision="fp8")
+
+
+class TestModelServer:
+    """Test the local model server and client mode."""
+    
+    @pytest.fixture
+    def server(self, tmp_path):
+        pytest.importorskip("torch")
+        local = AudioSpoofService(device="cpu")
+        local.load_model()
+        server = ModelServer({"audio": local}, str(tmp_path / "models.sock"), max_wait_ms=50).start()
+        yield server
+        server.shutdown()
+    
+    def test_client_matches_local(self, server):
+        import torch
+        client = AudioSpoofService(device="cpu", server_socket=server.socket_path)
+        client.load_model()
+        assert client.model is None
+        
+        preprocessed = {"waveform": torch.randn(1, 16000), "duration_sec": 1.0}
+        local_result = server.services["audio"].predict(preprocessed)
+        client_result = client.predict(preprocessed)
+        assert client_result["spoof_probability"] == pytest.approx(local_result["spoof_probability"], abs=1e-6)
+        client.server_client.close()
+    
+    def test_requests_batched_across_clients(self, server):
+        import threading
+        import torch
+        client = AudioSpoofService(device="cpu", server_socket=server.socket_path)
+        client.load_model()
+        preprocessed = {"waveform": torch.randn(1, 16000), "duration_sec": 1.0}
+        
+        threads = [threading.Thread(target=client.predict, args=(preprocessed,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = client.server_client.info()["models"]["audio"]["stats"]
+        assert stats["requests"] == 6
+        assert stats["batches"] < 6
+        client.server_client.close()
+    
+    def test_unknown_model_raises(self, server):
+        client = AudioSpoofService(device="cpu", server_socket=server.socket_path)
+        with pytest.raises(RuntimeError, match="Model not served"):
+            client.server_client.forward("video", np.zeros((1, 3), dtype=np.float32))
+        client.server_client.close()
+
+
+class TestKnownFakeIndex:
+    """Test the approximate-nearest-neighbour index of known fakes."""
+    
+    @pytest.fixture
+    def clusters(self):
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(20, 64)).astype(np.float32)
+        return centers, rng
+    
+    @pytest.fixture
+    def index(self, clusters):
+        centers, rng = clusters
+        index = KnownFakeIndex.train(np.repeat(centers, 20, axis=0) + 0.1 * rng.normal(size=(400, 64)), n_lists=8, n_subspaces=8)
+        for i, center in enumerate(centers):
+            index.add(center + 0.1 * rng.normal(size=(10, 64)), f"job-{i}")
+        return index
+    
+    def test_matches_near_duplicates_only(self, index, clusters):
+        centers, rng = clusters
+        result = index.match(centers[3] + 0.1 * rng.normal(size=(5, 64)))
+        assert result["matched"]
+        assert result["matched_frames"] == 5
+        assert result["source"] == "job-3"
+        assert result["best_similarity"] > KnownFakeIndex.MATCH_THRESHOLD
+        
+        unrelated = index.match(rng.normal(size=(5, 64)))
+        assert not unrelated["matched"]
+        assert unrelated["frame_matches"] == []
+    
+    def test_save_load_round_trip(self, index, clusters, tmp_path):
+        centers, _ = clusters
+        path = tmp_path / "known_fakes.npz"
+        index.save(path)
+        loaded = KnownFakeIndex.load(path)
+        
+        assert len(loaded) == len(index)
+        assert isinstance(loaded.vectors, np.memmap)
+        expected = index.search(centers, k=3)
+        actual = loaded.search(centers, k=3)
+        assert np.array_equal(actual[1], expected[1])
+        assert np.allclose(actual[0], expected[0])
+    
+    def test_empty_index(self, clusters):
+        centers, _ = clusters
+        index = KnownFakeIndex.train(centers, n_lists=4, n_subspaces=4)
+        similarities, rows = index.search(centers[:2], k=2)
+        assert (rows == -1).all()
+        assert index.match(centers[:2])["best_similarity"] is None
+
+
+class TestFingerprintIndex:
+    """Test perceptual fingerprints and the near-duplicate index."""
+    
+    @staticmethod
+    def _track(seed, seconds=20, sample_rate=16000):
+        """Tones with a fast-changing envelope, like speech or music."""
+        rng = np.random.default_rng(seed)
+        t = np.arange(seconds * sample_rate) / sample_rate
+        track = np.zeros(len(t))
+        for freq in rng.uniform(250, 2500, 5):
+            envelope = np.repeat(rng.random(seconds * 20), sample_rate // 20 + 1)[:len(t)]
+            track += np.sin(2 * np.pi * freq * t) * envelope
+        return track.astype(np.float32)
+    
+    def test_frame_hash_survives_rescaling(self):
+        cv2 = pytest.importorskip("cv2")
+        rng = np.random.default_rng(0)
+        frame = cv2.resize(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8), (640, 480))
+        other = cv2.resize(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8), (640, 480))
+        
+        original = np.array([frame_hash(frame)], dtype=np.uint64)
+        rescaled = np.array([frame_hash(cv2.resize(frame, (200, 150)))], dtype=np.uint64)
+        unrelated = np.array([frame_hash(other)], dtype=np.uint64)
+        
+        assert hamming(original, rescaled)[0, 0] <= FingerprintIndex.MAX_HAMMING
+        assert hamming(original, unrelated)[0, 0] > FingerprintIndex.MAX_HAMMING
+        assert frame_hash(np.zeros((480, 640, 3), dtype=np.uint8)) is None
+    
+    def test_audio_excerpt_matches_at_offset(self):
+        index = FingerprintIndex()
+        index.add("original", {"audio": audio_fingerprint(self._track(0))})
+        for seed in range(1, 20):
+            index.add(f"other-{seed}", {"audio": audio_fingerprint(self._track(seed))})
+        
+        # A quieter, noisy excerpt cut at an arbitrary sample
+        rng = np.random.default_rng(1)
+        excerpt = 0.5 * self._track(0)[50000:210000] + 0.05 * rng.normal(size=160000)
+        matches = index.query({"audio": audio_fingerprint(excerpt.astype(np.float32))})
+        
+        assert [m["item_id"] for m in matches] == ["original"]
+        assert matches[0]["audio_similarity"] >= 1 - FingerprintIndex.AUDIO_MAX_BER
+        assert index.query({"audio": audio_fingerprint(self._track(99, seconds=10))}) == []
+    
+    def test_save_load_and_remove(self, tmp_path):
+        index = FingerprintIndex()
+        index.add("a", {"audio": audio_fingerprint(self._track(0, seconds=8))})
+        index.add("b", {"audio": audio_fingerprint(self._track(1, seconds=8))})
+        index.save(tmp_path / "fingerprints.npz")
+        
+        loaded = FingerprintIndex.load(tmp_path / "fingerprints.npz")
+        query = {"audio": audio_fingerprint(self._track(1, seconds=8))}
+        assert loaded.query(query)[0]["item_id"] == "b"
+        
+        assert loaded.remove(["a"]) == 1
+        assert list(loaded.items) == ["b"]
+        assert loaded.query(query)[0]["item_id"] == "b"
+
+
+class TestLiveSources:
+    """Test following live segment directories and growing files."""
+    
+    @staticmethod
+    def _write_clip(path, n_frames, fps=25):
+        cv2 = pytest.importorskip("cv2")
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (64, 48))
+        for i in range(n_frames):
+            writer.write(np.full((48, 64, 3), (i * 5) % 255, dtype=np.uint8))
+        writer.release()
+    
+    def test_hls_segments_follow_stream_clock(self, tmp_path):
+        for k in range(2):
+            self._write_clip(tmp_path / f"seg{k}.mp4", 50)
+        playlist = tmp_path / "live.m3u8"
+        playlist.write_text("#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXTINF:2.0,\nseg0.mp4\n")
+        
+        source = open_source(playlist)
+        first = source.poll()
+        assert [(c.start_ms, c.end_ms) for c in first] == [(0, 2000)]
+        assert source.poll() == [] and not source.ended
+        
+        playlist.write_text(
+            "#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXTINF:2.0,\nseg0.mp4\n"
+            "#EXTINF:2.0,\nseg1.mp4\n#EXT-X-ENDLIST\n"
+        )
+        second = source.poll()
+        assert [(c.start_ms, c.end_ms) for c in second] == [(2000, 4000)]
+        assert source.ended
+        
+        timestamps = [t for t, _ in decode_chunk_frames(second[0], fps=5)]
+        assert timestamps == list(range(2000, 4000, 200))
+    
+    def test_growing_file_handed_out_in_bounded_chunks(self, tmp_path):
+        self._write_clip(tmp_path / "feed.mp4", 50)
+        source = GrowingFileSource(tmp_path / "feed.mp4", max_chunk_ms=800)
+        
+        chunks = source.poll()
+        assert [(c.start_ms, c.end_ms) for c in chunks] == [(0, 800), (800, 1600), (1600, 2000)]
+        assert source.poll() == []
+        # Consecutive chunks sample the same 5 fps grid without overlap
+        timestamps = [t for c in chunks for t, _ in decode_chunk_frames(c, fps=5)]
+        assert timestamps == list(range(0, 2000, 200))
+    
+    def test_rolling_window(self):
+        window = RollingWindow(window_ms=1000)
+        for t in range(0, 3000, 200):
+            window.add("video", t, 0.9 if t >= 2000 else 0.1)
+        
+        recent = window.window(now_ms=2800)
+        assert recent["video"]["n"] == 5
+        assert recent["video"]["sum"] == pytest.approx(4.5)
+        assert recent["video"]["total"] is None
+        assert window.cumulative()["video"]["n"] == 15
+        assert window.mean("video") == pytest.approx((10 * 0.1 + 5 * 0.9) / 15)
+
 
 class TestEnsembleService:
     """Test ensemble of services."""
@@ -159,3 +649,131 @@ class TestEnsembleService:
         
         assert result["ensemble_score"] == 0.3  # (0.2 + 0.4) / 2
         assert len(result["individual_results"]) == 2
+
+    def test_ensemble_runs_members_concurrently(self):
+        def slow_service(score):
+            def call(_):
+                time.sleep(0.3)
+                return {"score": score}
+            return call
+
+        ensemble = EnsembleService([slow_service(0.2), slow_service(0.4), slow_service(0.6)])
+        start = time.perf_counter()
+        result = ensemble("test_input")
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.8
+        assert result["completed_count"] == 3
+        assert all(m["status"] == "ok" for m in result["members"])
+        assert result["ensemble_score"] == pytest.approx(0.4)
+        ensemble.shutdown()
+
+    def test_ensemble_partial_results_on_timeout(self):
+        fast = MagicMock(return_value={"score": 0.8})
+
+        def hanging(_):
+            time.sleep(1.0)
+            return {"score": 0.0}
+
+        failing = MagicMock(side_effect=RuntimeError("boom"))
+
+        ensemble = EnsembleService([fast, hanging, failing], timeouts=[None, 0.1, None])
+        result = ensemble("test_input")
+
+        assert result["partial"]
+        assert result["completed_count"] == 1
+        assert [m["status"] for m in result["members"]] == ["ok", "timeout", "error"]
+        # Only the finished member contributes to the score
+        assert result["ensemble_score"] == pytest.approx(0.8)
+        ensemble.shutdown()
+
+    def test_ensemble_skips_member_with_stuck_call(self):
+        import threading
+        release = threading.Event()
+        calls = []
+
+        def hanging(_):
+            calls.append(1)
+            release.wait(5)
+            return {"score": 0.0}
+
+        fast = MagicMock(return_value={"score": 0.6})
+        ensemble = EnsembleService([fast, hanging], timeouts=[None, 0.05])
+        try:
+            assert [m["status"] for m in ensemble("a")["members"]] == ["ok", "timeout"]
+            # The hung call keeps its thread; the member sits out instead of taking another
+            for _ in range(5):
+                result = ensemble("b")
+                assert [m["status"] for m in result["members"]] == ["ok", "busy"]
+                assert result["ensemble_score"] == pytest.approx(0.6)
+            assert len(calls) == 1
+
+            release.set()
+            time.sleep(0.1)
+            assert [m["status"] for m in ensemble("c")["members"]] == ["ok", "ok"]
+        finally:
+            release.set()
+            ensemble.shutdown()
+
+
+class TestFrameStore:
+    """Test the per-job frame container."""
+    
+    @staticmethod
+    def _frames(n=20):
+        cv2 = pytest.importorskip("cv2")
+        rng = np.random.default_rng(0)
+        # Smooth frames, so the JPEG codec's error stays small
+        small = rng.integers(0, 255, (n, 9, 16, 3), dtype=np.uint8)
+        return [cv2.resize(frame, (640, 360), interpolation=cv2.INTER_LINEAR) for frame in small]
+    
+    def _write(self, path, codec, frames):
+        with FrameStoreWriter(path, codec=codec, max_height=180) as writer:
+            for i, frame in enumerate(frames):
+                writer.append(frame, i * 200, i * 5)
+        return FrameStore(path)
+    
+    @pytest.mark.parametrize("codec", ["raw", "zlib", "jpeg"])
+    def test_round_trip(self, codec, tmp_path):
+        cv2 = pytest.importorskip("cv2")
+        frames = self._frames()
+        store = self._write(tmp_path / f"{codec}.frames", codec, frames)
+        
+        assert len(store) == 20
+        assert store.shape == (180, 320, 3)
+        expected = cv2.cvtColor(cv2.resize(frames[13], (320, 180), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+        error = np.abs(store[13].astype(int) - expected.astype(int)).mean()
+        assert error == 0 if codec != "jpeg" else error < 3
+        assert store.frame_info(12, 14) == [
+            {"index": 12, "timestamp_ms": 2400, "frame_number": 60},
+            {"index": 13, "timestamp_ms": 2600, "frame_number": 65},
+        ]
+        assert store.frames(5, 9).shape == (4, 180, 320, 3)
+    
+    def test_raw_frames_are_mapped_views(self, tmp_path):
+        store = self._write(tmp_path / "raw.frames", "raw", self._frames())
+        frame = store[7]
+        assert np.shares_memory(frame, store.frames(7, 8))
+        assert not frame.flags.writeable
+    
+    def test_index_at_nearest_timestamp(self, tmp_path):
+        store = self._write(tmp_path / "jpeg.frames", "jpeg", self._frames())
+        assert store.index_at(-50) == 0
+        assert store.index_at(1290) == 6
+        assert store.index_at(1310) == 7
+        assert store.index_at(99999) == 19
+    
+    def test_incomplete_store_not_left_behind(self, tmp_path):
+        path = tmp_path / "failed.frames"
+        with pytest.raises(RuntimeError):
+            with FrameStoreWriter(path) as writer:
+                writer.append(self._frames(1)[0], 0, 0)
+                raise RuntimeError("decode failed")
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_video_service_reads_store(self, tmp_path):
+        store = self._write(tmp_path / "raw.frames", "raw", self._frames())
+        service = VideoForensicsService(device="cpu")
+        preprocessed = service.preprocess({"frame_store": str(store.path), "start": 4, "stop": 8})
+        assert [f["timestamp_ms"] for f in preprocessed["frames"]] == [800, 1000, 1200, 1400]
+        assert preprocessed["frames"][0]["image"].shape == (180, 320, 3)
@@ -3,7 +3,7 @@ Evidence Generation Service.
 Creates visualizations and artifacts for analysis results.
 """
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Union
 import io
 import base64
 
@@ -22,6 +22,14 @@ try:
 except ImportError:
     PLT_AVAILABLE = False
 
+try:
+    from ..inference.audio_buffer import is_audio_buffer
+    from ..inference.feature_bank import AudioFeatureBank
+except ImportError:
+    # ml/ itself on sys.path (tests, training scripts)
+    from inference.audio_buffer import is_audio_buffer
+    from inference.feature_bank import AudioFeatureBank
+
 
 class EvidenceGenerator:
     """Generates visual evidence artifacts for deepfake analysis."""
@@ -72,7 +80,7 @@ class EvidenceGenerator:
     
     def generate_spectrogram(
         self,
-        audio_data: np.ndarray,
+        audio_data: Union[np.ndarray, str, AudioFeatureBank],
         sample_rate: int = 16000,
         output_path: Optional[str] = None,
         highlight_regions: Optional[List[Tuple[float, float]]] = None,
@@ -81,7 +89,8 @@ class EvidenceGenerator:
         Generate audio spectrogram visualization.
         
         Args:
-            audio_data: Audio waveform
+            audio_data: Audio waveform, the job's feature bank, or the path to
+                        its decoded audio buffer (rendered from the bank)
             sample_rate: Sample rate in Hz
             output_path: Optional output file path
             highlight_regions: List of (start_sec, end_sec) to highlight
@@ -92,18 +101,28 @@ class EvidenceGenerator:
         if not PLT_AVAILABLE:
             return ""
         
+        if isinstance(audio_data, (str, Path)) and is_audio_buffer(audio_data):
+            audio_data = AudioFeatureBank.for_buffer(audio_data)
+        
         fig, ax = plt.subplots(figsize=(12, 4), facecolor='#1a1a2e')
         ax.set_facecolor('#1a1a2e')
         
-        # Compute spectrogram
-        from scipy import signal
-        frequencies, times, spectrogram = signal.spectrogram(
-            audio_data, sample_rate, nperseg=1024
-        )
+        if isinstance(audio_data, AudioFeatureBank):
+            # Reuse the mel spectrogram from the shared STFT pass
+            times = audio_data.times_ms / 1000
+            frequencies = audio_data.mel_frequencies()
+            power_db = audio_data.mel_db.astype(np.float32)
+        else:
+            # Compute spectrogram
+            from scipy import signal
+            frequencies, times, spectrogram = signal.spectrogram(
+                audio_data, sample_rate, nperseg=1024
+            )
+            power_db = 10 * np.log10(spectrogram + 1e-10)
         
         # Plot
         im = ax.pcolormesh(
-            times, frequencies, 10 * np.log10(spectrogram + 1e-10),
+            times, frequencies, power_db,
             shading='gouraud', cmap='magma'
         )
         
@@ -1,5 +1,5 @@
 """ML Inference Services exports."""
-from .base import BaseInferenceService, EnsembleService
+from .base import BaseInferenceService, EnsembleService, InferenceCancelled
 from .video_forensics import VideoForensicsService
 from .audio_spoof import AudioSpoofService
 from .lipsync import LipSyncService
@@ -8,6 +8,7 @@ from .fusion import MultimodalFusionService
 __all__ = [
     "BaseInferenceService",
     "EnsembleService",
+    "InferenceCancelled",
     "VideoForensicsService",
     "AudioSpoofService",
     "LipSyncService",
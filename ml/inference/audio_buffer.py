@@ -0,0 +1,107 @@
+"""
+Shared decoded-audio buffer.
+
+Each job's audio track is decoded and resampled once into a raw mono
+float32 file. Consumers (Whisper, audio spoof detection, lip-sync,
+evidence rendering) memory-map that file instead of decoding the source
+again, so all of them share the same pages of the OS page cache.
+"""
+import os
+import subprocess
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+import numpy as np
+
+try:
+    import torch
+    import torchaudio
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+BUFFER_SUFFIX = ".f32"
+BUFFER_SAMPLE_RATE = 16000
+
+
+def is_audio_buffer(path: Union[str, Path]) -> bool:
+    """Whether a path points at a decoded audio buffer."""
+    return str(path).endswith(BUFFER_SUFFIX)
+
+
+def decode_to_buffer(
+    source_path: Union[str, Path],
+    buffer_path: Union[str, Path],
+    sample_rate: int = BUFFER_SAMPLE_RATE,
+    start_ms: int = 0,
+    duration_ms: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Decode a media file's audio track into a float32 buffer with ffmpeg.
+
+    The decode writes to a temporary file and is renamed into place, so a
+    buffer that exists is always complete and retries can reuse it.
+    `start_ms` and `duration_ms` cut a span out of the track (live chunks).
+
+    Returns:
+        Dict with 'path', 'sample_rate', 'num_samples' and 'duration_ms'
+    """
+    buffer_path = Path(buffer_path)
+
+    if not buffer_path.exists():
+        tmp_path = buffer_path.with_name(buffer_path.name + ".tmp")
+        cmd = ["ffmpeg", "-y"]
+        if start_ms > 0:
+            cmd += ["-ss", f"{start_ms / 1000:.3f}"]
+        cmd += ["-i", str(source_path)]
+        if duration_ms is not None:
+            cmd += ["-t", f"{duration_ms / 1000:.3f}"]
+        cmd += [
+            "-vn",  # No video
+            "-ac", "1",  # Mono
+            "-ar", str(sample_rate),
+            "-f", "f32le",
+            str(tmp_path),
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            tmp_path.unlink(missing_ok=True)
+            raise ValueError(f"ffmpeg error: {result.stderr}")
+        os.replace(tmp_path, buffer_path)
+
+    num_samples = buffer_path.stat().st_size // np.dtype(np.float32).itemsize
+    return {
+        "path": str(buffer_path),
+        "sample_rate": sample_rate,
+        "num_samples": int(num_samples),
+        "duration_ms": int(num_samples * 1000 / sample_rate),
+    }
+
+
+def open_audio_buffer(buffer_path: Union[str, Path]) -> np.ndarray:
+    """Memory-map a decoded audio buffer read-only (no copy)."""
+    path = Path(buffer_path)
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="r")
+
+
+def buffer_to_tensor(samples: np.ndarray) -> "torch.Tensor":
+    """
+    Wrap buffer samples as a tensor that shares the mapped memory.
+
+    The mapping is read-only; inference never writes to its input, so the
+    non-writable warning from torch is suppressed.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*not writable.*")
+        return torch.from_numpy(samples)
+
+
+@lru_cache(maxsize=16)
+def get_resampler(orig_freq: int, new_freq: int) -> "torchaudio.transforms.Resample":
+    """Resampling transform cached by (source, target) rate."""
+    return torchaudio.transforms.Resample(orig_freq, new_freq)
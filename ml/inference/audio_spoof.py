@@ -3,7 +3,7 @@ Audio Spoof Detection Service using AASIST-style architecture.
 """
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import numpy as np
 
 try:
@@ -15,6 +15,57 @@ except ImportError:
     TORCH_AVAILABLE = False
 
 from .base import BaseInferenceService
+from .audio_buffer import (
+    BUFFER_SAMPLE_RATE,
+    is_audio_buffer,
+    open_audio_buffer,
+    buffer_to_tensor,
+    get_resampler,
+)
+from .feature_bank import AudioFeatureBank
+
+
+if TORCH_AVAILABLE:
+    class AudioSpoofNet(nn.Module):
+        """
+        CNN scoring a normalised (N, 1, n_mels, time) mel spectrogram; the
+        architecture the training script fits and the service loads.
+        """
+        
+        def __init__(self):
+            super().__init__()
+            self.features = nn.Sequential(
+                nn.Conv2d(1, 32, kernel_size=3, padding=1),
+                nn.BatchNorm2d(32),
+                nn.ReLU(),
+                nn.MaxPool2d(2),
+                
+                nn.Conv2d(32, 64, kernel_size=3, padding=1),
+                nn.BatchNorm2d(64),
+                nn.ReLU(),
+                nn.MaxPool2d(2),
+                
+                nn.Conv2d(64, 128, kernel_size=3, padding=1),
+                nn.BatchNorm2d(128),
+                nn.ReLU(),
+                nn.MaxPool2d(2),
+                
+                nn.Conv2d(128, 256, kernel_size=3, padding=1),
+                nn.BatchNorm2d(256),
+                nn.ReLU(),
+                nn.AdaptiveAvgPool2d((4, 4)),
+            )
+            self.classifier = nn.Sequential(
+                nn.Flatten(),
+                nn.Linear(256 * 16, 256),
+                nn.ReLU(),
+                nn.Dropout(0.5),
+                nn.Linear(256, 1),
+                nn.Sigmoid(),
+            )
+        
+        def forward(self, mel_spec: "torch.Tensor") -> "torch.Tensor":
+            return self.classifier(self.features(mel_spec))
 
 
 class AudioSpoofService(BaseInferenceService):
@@ -24,16 +75,24 @@ class AudioSpoofService(BaseInferenceService):
     """
     
     MODEL_VERSION = "v1.0.0"
+    SERVER_MODEL_NAME = "audio"
     SAMPLE_RATE = 16000
     MAX_DURATION_SEC = 60
+    # Spectrogram length follows clip duration
+    COMPILE_DYNAMIC = True
+    WARMUP_DURATIONS_SEC = (4, MAX_DURATION_SEC)
     
     def __init__(
         self,
         model_path: Optional[str] = None,
         device: str = "cpu",
         sample_rate: int = SAMPLE_RATE,
+        server_socket: Optional[str] = None,
+        compile_model: bool = False,
+        precision: str = "fp32",
+        channels_last: bool = False,
     ):
-        super().__init__(model_path, device)
+        super().__init__(model_path, device, server_socket, compile_model, precision, channels_last)
         self.sample_rate = sample_rate
         self.mel_transform = None
     
@@ -51,61 +110,74 @@ class AudioSpoofService(BaseInferenceService):
             n_mels=80,
         )
         
-        if self.model_path and Path(self.model_path).exists():
-            self.model = torch.load(self.model_path, map_location=self.device)
-            self.model.eval()
+        if self.server_client is not None:
+            # Weights live in the model server; only the transform runs here
+            pass
+        elif self.model_path and Path(self.model_path).exists():
+            self.model = self._load_weights(self._create_model)
         else:
-            # Placeholder: simple CNN for audio classification
-            self.model = self._create_simple_model()
+            # Placeholder: the untrained network
+            self.model = self._create_model()
             self.model.to(self.device)
             self.model.eval()
         
         self.is_loaded = True
     
-    def _create_simple_model(self) -> nn.Module:
-        """Create a simple CNN model for audio classification."""
-        return nn.Sequential(
-            nn.Conv2d(1, 32, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(2),
-            nn.Conv2d(32, 64, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(2),
-            nn.AdaptiveAvgPool2d((4, 4)),
-            nn.Flatten(),
-            nn.Linear(64 * 16, 128),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(128, 1),
-            nn.Sigmoid(),
-        )
+    def _create_model(self) -> nn.Module:
+        """The spoof detection CNN, as trained by training/train_audio.py."""
+        return AudioSpoofNet()
+    
+    def _warmup_sample_shapes(self) -> List[tuple]:
+        """Mel spectrograms of a short clip and of the longest analysed clip."""
+        return [
+            (1, AudioFeatureBank.N_MELS, duration * self.sample_rate // AudioFeatureBank.HOP_LENGTH + 1)
+            for duration in self.WARMUP_DURATIONS_SEC
+        ]
+    
+    def _max_local_batch(self) -> Optional[int]:
+        # One clip per call; larger batches only arrive through the model server
+        return 1
     
     def preprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Preprocess audio for inference.
         
         Args:
-            input_data: Dict with 'audio_path' or 'waveform' (numpy array)
+            input_data: Dict with 'audio_path' (an audio file or a decoded
+                       audio buffer) or 'waveform' (numpy array). Decoded
+                       buffers also bring the job's shared feature bank.
         """
         waveform = None
+        feature_bank = None
         sample_rate = self.sample_rate
+        max_samples = self.MAX_DURATION_SEC * self.sample_rate
         
         if "audio_path" in input_data:
             audio_path = Path(input_data["audio_path"])
             if not audio_path.exists():
                 return {"waveform": None, "error": "Audio file not found"}
             
-            if TORCH_AVAILABLE:
+            if not TORCH_AVAILABLE:
+                # Fallback: return empty
+                return {"waveform": None, "duration_sec": 0}
+            
+            if is_audio_buffer(audio_path):
+                # Zero-copy view of the shared buffer, truncated before use
+                samples = open_audio_buffer(audio_path)
+                if BUFFER_SAMPLE_RATE == self.sample_rate:
+                    samples = samples[:max_samples]
+                waveform = buffer_to_tensor(samples).unsqueeze(0)
+                if BUFFER_SAMPLE_RATE != self.sample_rate:
+                    waveform = get_resampler(BUFFER_SAMPLE_RATE, self.sample_rate)(waveform)
+                else:
+                    feature_bank = AudioFeatureBank.for_buffer(audio_path)
+            else:
                 waveform, sr = torchaudio.load(str(audio_path))
                 if sr != self.sample_rate:
-                    resampler = torchaudio.transforms.Resample(sr, self.sample_rate)
-                    waveform = resampler(waveform)
+                    waveform = get_resampler(sr, self.sample_rate)(waveform)
                 # Convert to mono
                 if waveform.shape[0] > 1:
                     waveform = waveform.mean(dim=0, keepdim=True)
-            else:
-                # Fallback: return empty
-                return {"waveform": None, "duration_sec": 0}
         
         elif "waveform" in input_data:
             waveform = torch.from_numpy(input_data["waveform"]).float()
@@ -114,7 +186,6 @@ class AudioSpoofService(BaseInferenceService):
         
         if waveform is not None:
             # Truncate if too long
-            max_samples = self.MAX_DURATION_SEC * self.sample_rate
             if waveform.shape[1] > max_samples:
                 waveform = waveform[:, :max_samples]
             
@@ -124,14 +195,16 @@ class AudioSpoofService(BaseInferenceService):
         
         return {
             "waveform": waveform,
+            "feature_bank": feature_bank,
             "duration_sec": duration_sec,
         }
     
     def predict(self, preprocessed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Run inference on preprocessed audio."""
         waveform = preprocessed_data.get("waveform")
+        feature_bank = preprocessed_data.get("feature_bank")
         
-        if waveform is None or not TORCH_AVAILABLE or self.model is None:
+        if waveform is None or not TORCH_AVAILABLE or not self.has_model:
             # Fallback: simulated prediction
             return {
                 "spoof_probability": np.random.uniform(0.05, 0.2),
@@ -139,8 +212,13 @@ class AudioSpoofService(BaseInferenceService):
             }
         
         with torch.no_grad():
-            # Compute mel spectrogram
-            mel_spec = self.mel_transform(waveform)
+            if feature_bank is not None:
+                # Mel spectrogram from the shared STFT pass
+                max_frames = waveform.shape[1] // AudioFeatureBank.HOP_LENGTH + 1
+                mel_spec = torch.from_numpy(feature_bank.mel_power(max_frames)).unsqueeze(0)
+            else:
+                # Compute mel spectrogram
+                mel_spec = self.mel_transform(waveform)
             mel_spec = mel_spec.unsqueeze(0)  # Add batch dim
             mel_spec = mel_spec.to(self.device)
             
@@ -148,12 +226,13 @@ class AudioSpoofService(BaseInferenceService):
             mel_spec = (mel_spec - mel_spec.mean()) / (mel_spec.std() + 1e-8)
             
             # Predict
-            output = self.model(mel_spec)
+            output = self._forward(mel_spec)
             prob = output.squeeze().cpu().numpy()
         
         return {
             "spoof_probability": float(prob),
             "duration_sec": preprocessed_data["duration_sec"],
+            "spectral_analysis": feature_bank.summary() if feature_bank is not None else None,
         }
     
     def postprocess(self, raw_output: Dict[str, Any]) -> Dict[str, Any]:
@@ -176,7 +255,8 @@ class AudioSpoofService(BaseInferenceService):
             "analysis": {
                 "spectral_anomaly": prob > 0.4,
                 "synthetic_markers": prob > 0.6,
-            }
+            },
+            "spectral_analysis": raw_output.get("spectral_analysis"),
         }
     
     def get_model_info(self) -> Dict[str, Any]:
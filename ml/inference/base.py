@@ -1,20 +1,70 @@
 """
 Base Inference Service interface.
 """
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 import numpy as np
 
+from .weights import load_weights, materialize, process_memory, weights_format
+
+
+class InferenceCancelled(Exception):
+    """Raised by a service when its caller's `should_stop` callback asks it to stop."""
+
 
 class BaseInferenceService(ABC):
     """Abstract base class for all inference services."""
     
-    def __init__(self, model_path: Optional[str] = None, device: str = "cpu"):
+    # Name this service's model is served under by a local model server
+    SERVER_MODEL_NAME: Optional[str] = None
+    
+    # Batch sizes compiled graphs are specialised for; smaller batches are
+    # zero-padded up to the next bucket so graphs are reused, not recompiled
+    BATCH_BUCKETS: Tuple[int, ...] = (1, 2, 4, 8, 16, 32, 64)
+    # Whether compiled graphs must handle varying non-batch dimensions
+    COMPILE_DYNAMIC = False
+    WARMUP_TIMING_RUNS = 3
+    
+    PRECISIONS = ("fp32", "bf16")
+    
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        device: str = "cpu",
+        server_socket: Optional[str] = None,
+        compile_model: bool = False,
+        precision: str = "fp32",
+        channels_last: bool = False,
+    ):
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        
         self.model_path = model_path
         self.device = device
         self.model = None
         self.is_loaded = False
+        self.load_stats: Optional[Dict[str, Any]] = None
+        
+        # Numeric precision and memory layout of weights and input batches
+        self.precision = precision
+        self.channels_last = channels_last
+        self._prepared_model = None
+        
+        # Compiled execution mode (torch.compile), built on first forward
+        self.compile_model = compile_model
+        self.compile_backend = "inductor"
+        self.compiled_model = None
+        self.compile_stats: Optional[Dict[str, Any]] = None
+        
+        # Client mode: forward passes go to the node's model server
+        self.server_client = None
+        if server_socket:
+            from .model_server import ModelServerClient
+            self.server_client = ModelServerClient(server_socket)
     
     @abstractmethod
     def load_model(self) -> None:
@@ -36,6 +86,185 @@ class BaseInferenceService(ABC):
         """Postprocess model output."""
         pass
     
+    @property
+    def has_model(self) -> bool:
+        """Whether forward passes can run, locally or on the model server."""
+        return self.model is not None or self.server_client is not None
+    
+    def _forward(self, batch: Any) -> Any:
+        """
+        Run the model on one input batch.
+        
+        In client mode the batch is sent to the model server, which may
+        stack it with other workers' batches before running it.
+        """
+        if self.server_client is not None:
+            output = self.server_client.forward(self.SERVER_MODEL_NAME, batch.detach().cpu().numpy())
+            return batch.new_tensor(output)
+        
+        batch = self._prepare_batch(batch)
+        if self.compile_model:
+            output = self._compiled_forward(batch)
+        else:
+            output = self._forward_module()(batch)
+        
+        # Callers convert outputs to numpy, which has no bfloat16
+        return output.float() if self.precision == "bf16" else output
+    
+    def _forward_module(self) -> Any:
+        """Module `_forward` runs; services may wrap the model to expose more outputs."""
+        return self.model
+    
+    def _prepare_model(self) -> None:
+        """
+        Convert the model's weights to the configured precision and layout.
+        
+        Converting memory-mapped fp32 weights makes a private copy; save
+        bf16 weights to keep them shared between processes.
+        """
+        import torch
+        if self.precision == "bf16":
+            self.model.to(torch.bfloat16)
+        if self.channels_last:
+            self.model.to(memory_format=torch.channels_last)
+        self._prepared_model = self.model
+    
+    def _prepare_batch(self, batch: Any) -> Any:
+        """Bring an input batch to the model's precision and layout."""
+        import torch
+        if self._prepared_model is not self.model:
+            self._prepare_model()
+        if self.precision == "bf16":
+            batch = batch.to(torch.bfloat16)
+        if self.channels_last and batch.dim() == 4:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        return batch
+    
+    def _bucket_size(self, n: int) -> int:
+        """Smallest batch bucket that fits n rows (n itself past the largest)."""
+        for bucket in self.BATCH_BUCKETS:
+            if bucket >= n:
+                return bucket
+        return n
+    
+    def _compiled_forward(self, batch: Any) -> Any:
+        """Run the compiled model on a batch padded to its bucket size."""
+        n = batch.shape[0]
+        bucket = self._bucket_size(n)
+        padded = batch
+        if bucket != n:
+            padded = batch.new_zeros((bucket,) + tuple(batch.shape[1:]))
+            padded[:n] = batch
+        
+        try:
+            if self.compiled_model is None:
+                import torch
+                self.compiled_model = torch.compile(
+                    self._forward_module(), dynamic=self.COMPILE_DYNAMIC, backend=self.compile_backend
+                )
+            return self.compiled_model(padded)[:n]
+        except Exception as e:
+            # A backend that cannot compile here must not fail inference
+            self.compile_model = False
+            self.compiled_model = None
+            self.compile_stats = {"compiled": False, "error": f"{type(e).__name__}: {e}"}
+            return self._forward_module()(batch)
+    
+    def _warmup_sample_shapes(self) -> List[Tuple[int, ...]]:
+        """Per-sample input shapes representative of real requests."""
+        return []
+    
+    def _max_local_batch(self) -> Optional[int]:
+        """Largest batch this service builds itself (None: any bucket)."""
+        return None
+    
+    def _time_forward(self, forward: Callable[[Any], Any], batch: Any) -> float:
+        """Mean latency of `forward` on `batch` in milliseconds."""
+        start = time.perf_counter()
+        for _ in range(self.WARMUP_TIMING_RUNS):
+            forward(batch)
+        return (time.perf_counter() - start) * 1000 / self.WARMUP_TIMING_RUNS
+    
+    def warmup(self, max_batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run representative batch shapes before the first real request.
+        
+        Every batch bucket is run once per sample shape, which triggers lazy
+        initialisation and, in compiled mode, compiles each bucket's graph.
+        In compiled mode the steady-state latency of the largest bucket is
+        then compared against eager execution.
+        
+        Args:
+            max_batch_size: Largest bucket to warm up; defaults to the
+                            largest batch the service builds itself
+        
+        Returns:
+            Warmup statistics, also reported by get_model_info
+        """
+        if not self.is_loaded:
+            self.load_model()
+        if self.model is None:
+            # Nothing to warm up locally (no model, or client mode)
+            return {}
+        
+        import torch
+        max_batch_size = max_batch_size or self._max_local_batch()
+        shapes = self._warmup_sample_shapes()
+        buckets = [b for b in self.BATCH_BUCKETS if max_batch_size is None or b <= max_batch_size]
+        
+        start = time.perf_counter()
+        with torch.no_grad():
+            for shape in shapes:
+                for bucket in buckets:
+                    self._forward(torch.zeros((bucket,) + tuple(shape), device=self.device))
+        warmup_ms = (time.perf_counter() - start) * 1000
+        
+        stats = dict(self.compile_stats or {})
+        stats.update({
+            "compiled": self.compile_model,
+            "backend": self.compile_backend if self.compile_model else None,
+            "batch_buckets": buckets,
+            "warmup_ms": round(warmup_ms, 1),
+        })
+        
+        if self.compile_model and shapes and buckets:
+            sample = self._prepare_batch(
+                torch.randn((buckets[-1],) + tuple(shapes[0]), device=self.device)
+            )
+            with torch.no_grad():
+                eager_ms = self._time_forward(self._forward_module(), sample)
+                compiled_ms = self._time_forward(self._forward, sample)
+            stats.update({
+                "eager_ms": round(eager_ms, 2),
+                "compiled_ms": round(compiled_ms, 2),
+                "speedup": round(eager_ms / max(compiled_ms, 1e-6), 2),
+            })
+        
+        self.compile_stats = stats
+        return stats
+    
+    def _load_weights(self, build_fn: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Load the module at `model_path`, memory-mapped, and record startup cost.
+        
+        Args:
+            build_fn: Builds the architecture for state dict checkpoints
+                      (safetensors files always are); pickled modules
+                      don't need one
+        
+        Returns:
+            The model in eval mode on `self.device`
+        """
+        start = time.perf_counter()
+        model = materialize(load_weights(self.model_path), build_fn, self.device)
+        
+        self.load_stats = {
+            "weights_format": weights_format(self.model_path),
+            "load_time_ms": round((time.perf_counter() - start) * 1000, 1),
+            "memory": process_memory(),
+        }
+        return model
+    
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Run full inference pipeline."""
         if not self.is_loaded:
@@ -51,33 +280,154 @@ class BaseInferenceService(ABC):
             "model_path": self.model_path,
             "device": self.device,
             "is_loaded": self.is_loaded,
+            "load_stats": self.load_stats,
+            "model_server": self.server_client.socket_path if self.server_client else None,
+            "precision": self.precision,
+            "channels_last": self.channels_last,
+            "compile_model": self.compile_model,
+            "compilation": self.compile_stats,
         }
 
 
 class EnsembleService:
-    """Ensemble multiple inference services."""
+    """
+    Ensemble multiple inference services.
+    
+    Members run concurrently on a shared thread pool (PyTorch and OpenCV
+    release the GIL in their kernels), each with its own deadline. The
+    ensemble score is a weighted average over the members that finished
+    in time, with weights renormalised over those members.
     
-    def __init__(self, services: List[BaseInferenceService], weights: Optional[List[float]] = None):
+    A thread cannot be interrupted, so a member past its deadline keeps
+    its pool thread until it returns. Until then the member is skipped
+    (status "busy") rather than given another thread, so a hung member
+    holds at most one; the pool has a thread per member on top of those.
+    """
+    
+    def __init__(
+        self,
+        services: List[BaseInferenceService],
+        weights: Optional[List[float]] = None,
+        timeout_s: Optional[float] = None,
+        timeouts: Optional[List[Optional[float]]] = None,
+        executor: Optional[Executor] = None,
+    ):
         self.services = services
         self.weights = weights or [1.0 / len(services)] * len(services)
+        self.timeouts = timeouts or [timeout_s] * len(services)
+        self._executor = executor
+        # Calls abandoned at their deadline that are still running, by member
+        self._abandoned: Dict[int, Future] = {}
+        self._abandoned_lock = threading.Lock()
+    
+    @property
+    def executor(self) -> Executor:
+        """Lazily created pool, reused across calls."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, 2 * len(self.services)),
+                thread_name_prefix="ensemble",
+            )
+        return self._executor
+    
+    def _stuck_members(self) -> set:
+        """Members whose abandoned call has not returned yet."""
+        with self._abandoned_lock:
+            for i, future in list(self._abandoned.items()):
+                if future.done():
+                    del self._abandoned[i]
+            return set(self._abandoned)
+    
+    @staticmethod
+    def _timed_call(service: BaseInferenceService, input_data: Any) -> Tuple[Dict[str, Any], float]:
+        """Run one member and measure its own latency."""
+        start = time.perf_counter()
+        result = service(input_data)
+        return result, (time.perf_counter() - start) * 1000
     
     def __call__(self, input_data: Any) -> Dict[str, Any]:
         """Run ensemble inference."""
-        results = []
-        for service in self.services:
-            try:
-                result = service(input_data)
-                results.append(result)
-            except Exception as e:
-                results.append({"error": str(e), "score": 0.5})
-        
-        # Weighted average of scores
-        weighted_score = sum(
-            r.get("score", 0.5) * w 
-            for r, w in zip(results, self.weights)
-        )
+        start = time.perf_counter()
+        results: List[Dict[str, Any]] = [{} for _ in self.services]
+        members: List[Dict[str, Any]] = [{} for _ in self.services]
+        
+        stuck = self._stuck_members()
+        for i in stuck:
+            results[i] = {"error": "busy"}
+            members[i] = {"status": "busy", "latency_ms": 0.0}
+        futures = {
+            self.executor.submit(self._timed_call, service, input_data): i
+            for i, service in enumerate(self.services)
+            if i not in stuck
+        }
+        deadlines = {
+            future: start + self.timeouts[i] if self.timeouts[i] is not None else None
+            for future, i in futures.items()
+        }
+        pending = set(futures)
+        
+        while pending:
+            now = time.perf_counter()
+            
+            # Members past their own deadline are abandoned; a running
+            # thread cannot be interrupted, so its result is simply ignored
+            expired = {f for f in pending if deadlines[f] is not None and deadlines[f] <= now}
+            for future in expired:
+                i = futures[future]
+                if not future.cancel():
+                    with self._abandoned_lock:
+                        self._abandoned[i] = future
+                results[i] = {"error": "timeout"}
+                members[i] = {"status": "timeout", "latency_ms": (now - start) * 1000}
+            pending -= expired
+            if not pending:
+                break
+            
+            remaining = [deadlines[f] - now for f in pending if deadlines[f] is not None]
+            done, pending = wait(
+                pending,
+                timeout=min(remaining) if remaining else None,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                i = futures[future]
+                try:
+                    results[i], latency_ms = future.result()
+                    members[i] = {"status": "ok", "latency_ms": latency_ms}
+                except Exception as e:
+                    results[i] = {"error": str(e)}
+                    members[i] = {
+                        "status": "error",
+                        "latency_ms": (time.perf_counter() - start) * 1000,
+                    }
+        
+        # Weighted average over the members that finished
+        finished = [
+            (r.get("score", 0.5), w)
+            for r, m, w in zip(results, members, self.weights)
+            if m["status"] == "ok"
+        ]
+        total_weight = sum(w for _, w in finished)
+        if total_weight > 0:
+            weighted_score = sum(s * w for s, w in finished) / total_weight
+        else:
+            weighted_score = 0.5
+        
+        for i, member in enumerate(members):
+            member["weight"] = self.weights[i]
+            member["latency_ms"] = round(member["latency_ms"], 2)
         
         return {
             "ensemble_score": weighted_score,
             "individual_results": results,
+            "members": members,
+            "completed_count": len(finished),
+            "partial": len(finished) < len(self.services),
+            "total_latency_ms": round((time.perf_counter() - start) * 1000, 2),
         }
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Release the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
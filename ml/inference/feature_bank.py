@@ -0,0 +1,229 @@
+"""
+Audio feature bank.
+
+One STFT pass per audio track yields every spectral feature the pipeline
+needs: the mel spectrogram for the spoof model, MFCCs, a pitch track with
+harmonicity, and frame energy for the lip-sync envelope. The features are
+cached per job as a single float16 array next to the decoded audio buffer
+and memory-mapped by every consumer.
+"""
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+import numpy as np
+
+from .audio_buffer import BUFFER_SAMPLE_RATE, open_audio_buffer
+
+
+def feature_bank_path(buffer_path: Union[str, Path]) -> Path:
+    """Cache location of the feature bank for a decoded audio buffer."""
+    buffer_path = Path(buffer_path)
+    return buffer_path.with_name(buffer_path.stem + ".features.npy")
+
+
+class AudioFeatureBank:
+    """
+    Frame-level audio features from a single STFT pass.
+
+    Features are stored as one (n_rows, n_frames) float16 array whose rows
+    are: log-mel bands, MFCCs, log energy, F0 and harmonicity.
+    """
+
+    N_FFT = 1024
+    HOP_LENGTH = 256
+    N_MELS = 80
+    N_MFCC = 20
+    CHUNK_FRAMES = 4096
+
+    # Pitch search range and voicing thresholds
+    F0_MIN_HZ = 60
+    F0_MAX_HZ = 400
+    VOICING_THRESHOLD = 0.3
+    SILENCE_DB = -60.0
+
+    # Row layout of the cached array
+    MEL_ROWS = slice(0, N_MELS)
+    MFCC_ROWS = slice(N_MELS, N_MELS + N_MFCC)
+    ENERGY_ROW = N_MELS + N_MFCC
+    F0_ROW = ENERGY_ROW + 1
+    HARMONICITY_ROW = ENERGY_ROW + 2
+    N_ROWS = HARMONICITY_ROW + 1
+
+    def __init__(self, features: np.ndarray, sample_rate: int = BUFFER_SAMPLE_RATE):
+        self.features = features
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def _mel_points(cls, sample_rate: int) -> np.ndarray:
+        """Filter edge frequencies in Hz, equally spaced on the HTK mel scale."""
+        m_max = 2595.0 * np.log10(1.0 + (sample_rate / 2) / 700.0)
+        m_pts = np.linspace(0.0, m_max, cls.N_MELS + 2)
+        return 700.0 * (10 ** (m_pts / 2595.0) - 1.0)
+
+    @classmethod
+    def _mel_filterbank(cls, sample_rate: int) -> np.ndarray:
+        """HTK-scale triangular filters, (n_freqs, n_mels), as torchaudio builds them."""
+        n_freqs = cls.N_FFT // 2 + 1
+        all_freqs = np.linspace(0, sample_rate // 2, n_freqs)
+        f_pts = cls._mel_points(sample_rate)
+
+        f_diff = f_pts[1:] - f_pts[:-1]
+        slopes = f_pts[None, :] - all_freqs[:, None]
+        down = -slopes[:, :-2] / f_diff[:-1]
+        up = slopes[:, 2:] / f_diff[1:]
+        return np.maximum(0.0, np.minimum(down, up))
+
+    @classmethod
+    def _dct_matrix(cls) -> np.ndarray:
+        """Orthonormal DCT-II basis, (n_mels, n_mfcc)."""
+        n = np.arange(cls.N_MELS)
+        k = np.arange(cls.N_MFCC)
+        basis = np.cos(np.pi / cls.N_MELS * (n[:, None] + 0.5) * k[None, :])
+        basis[:, 0] *= 1.0 / np.sqrt(2.0)
+        return basis * np.sqrt(2.0 / cls.N_MELS)
+
+    @classmethod
+    def compute(cls, waveform: np.ndarray, sample_rate: int = BUFFER_SAMPLE_RATE) -> "AudioFeatureBank":
+        """
+        Run the STFT pass and derive all features.
+
+        Frames are processed in chunks so memory stays bounded on long
+        tracks; only the derived rows are kept.
+        """
+        waveform = np.asarray(waveform, dtype=np.float32).reshape(-1)
+        pad = cls.N_FFT // 2
+        if len(waveform) <= pad:
+            waveform = np.pad(waveform, (0, pad + 1 - len(waveform)))
+        padded = np.pad(waveform, (pad, pad), mode="reflect")
+
+        frames = np.lib.stride_tricks.sliding_window_view(padded, cls.N_FFT)[::cls.HOP_LENGTH]
+        n_frames = len(frames)
+
+        # Periodic Hann window, matching torch.hann_window
+        window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(cls.N_FFT) / cls.N_FFT)).astype(np.float32)
+        mel_fb = cls._mel_filterbank(sample_rate).astype(np.float32)
+        dct = cls._dct_matrix().astype(np.float32)
+        min_lag = sample_rate // cls.F0_MAX_HZ
+        max_lag = min(sample_rate // cls.F0_MIN_HZ, cls.N_FFT // 2)
+
+        features = np.empty((cls.N_ROWS, n_frames), dtype=np.float16)
+
+        for start in range(0, n_frames, cls.CHUNK_FRAMES):
+            chunk = frames[start:start + cls.CHUNK_FRAMES] * window
+            power = np.abs(np.fft.rfft(chunk, axis=1)) ** 2
+
+            mel_db = 10.0 * np.log10(np.maximum(power @ mel_fb, 1e-10))
+            mfcc = mel_db @ dct
+            energy_db = 10.0 * np.log10(np.mean(chunk ** 2, axis=1) + 1e-10)
+
+            # Autocorrelation is the inverse FFT of the power spectrum
+            autocorr = np.fft.irfft(power, axis=1)
+            lags = autocorr[:, min_lag:max_lag]
+            best = lags.argmax(axis=1)
+            peak = lags[np.arange(len(lags)), best]
+            harmonicity = np.clip(peak / np.maximum(autocorr[:, 0], 1e-10), 0.0, 1.0)
+            voiced = (harmonicity > cls.VOICING_THRESHOLD) & (energy_db > cls.SILENCE_DB)
+            f0 = np.where(voiced, sample_rate / (best + min_lag), 0.0)
+
+            rows = slice(start, start + len(chunk))
+            features[cls.MEL_ROWS, rows] = mel_db.T
+            features[cls.MFCC_ROWS, rows] = mfcc.T
+            features[cls.ENERGY_ROW, rows] = energy_db
+            features[cls.F0_ROW, rows] = f0
+            features[cls.HARMONICITY_ROW, rows] = harmonicity
+
+        return cls(features, sample_rate)
+
+    def save(self, path: Union[str, Path]) -> str:
+        """Write the feature array atomically."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp.npy")
+        np.save(tmp_path, self.features)
+        tmp_path.replace(path)
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], sample_rate: int = BUFFER_SAMPLE_RATE) -> "AudioFeatureBank":
+        """Memory-map a cached feature bank."""
+        return cls(np.load(path, mmap_mode="r"), sample_rate)
+
+    @classmethod
+    def for_buffer(cls, buffer_path: Union[str, Path]) -> "AudioFeatureBank":
+        """Load the cached bank for a decoded audio buffer, computing it once if missing."""
+        cache_path = feature_bank_path(buffer_path)
+        if cache_path.exists():
+            return cls.load(cache_path)
+
+        bank = cls.compute(open_audio_buffer(buffer_path), BUFFER_SAMPLE_RATE)
+        bank.save(cache_path)
+        return bank
+
+    @property
+    def n_frames(self) -> int:
+        return self.features.shape[1]
+
+    @property
+    def times_ms(self) -> np.ndarray:
+        """Centre time of each STFT frame."""
+        return np.arange(self.n_frames) * (self.HOP_LENGTH * 1000.0 / self.sample_rate)
+
+    @property
+    def mel_db(self) -> np.ndarray:
+        return self.features[self.MEL_ROWS]
+
+    @property
+    def mfcc(self) -> np.ndarray:
+        return self.features[self.MFCC_ROWS]
+
+    @property
+    def energy_db(self) -> np.ndarray:
+        return self.features[self.ENERGY_ROW]
+
+    @property
+    def f0(self) -> np.ndarray:
+        return self.features[self.F0_ROW]
+
+    @property
+    def harmonicity(self) -> np.ndarray:
+        return self.features[self.HARMONICITY_ROW]
+
+    def mel_frequencies(self) -> np.ndarray:
+        """Centre frequency of each mel band in Hz."""
+        return self._mel_points(self.sample_rate)[1:-1]
+
+    def mel_power(self, max_frames: Optional[int] = None) -> np.ndarray:
+        """Mel power spectrogram (n_mels, n_frames), the spoof model's input."""
+        mel_db = self.mel_db if max_frames is None else self.mel_db[:, :max_frames]
+        return np.power(10.0, mel_db.astype(np.float32) / 10.0)
+
+    def envelope_at(self, timestamps_ms: np.ndarray) -> np.ndarray:
+        """RMS energy envelope interpolated at the given timestamps."""
+        rms = np.power(10.0, self.energy_db.astype(np.float32) / 20.0)
+        return np.interp(timestamps_ms, self.times_ms, rms).astype(np.float32)
+
+    def summary(self) -> Dict[str, Any]:
+        """Track-level spectral statistics reported with the audio verdict."""
+        voiced = self.f0 > 0
+        f0 = self.f0[voiced].astype(np.float32)
+
+        if len(f0) > 1:
+            pitch_variance = float(f0.std() / max(f0.mean(), 1e-6))
+            harmonic_ratio = float(self.harmonicity[voiced].astype(np.float32).mean())
+        else:
+            pitch_variance = 0.0
+            harmonic_ratio = 0.0
+
+        # Share of frames whose MFCCs sit far from the track's own statistics
+        mfcc = self.mfcc.astype(np.float32)
+        if self.n_frames > 1:
+            z = (mfcc - mfcc.mean(axis=1, keepdims=True)) / (mfcc.std(axis=1, keepdims=True) + 1e-6)
+            mfcc_anomaly_score = float((np.sqrt((z ** 2).mean(axis=0)) > 2.0).mean())
+        else:
+            mfcc_anomaly_score = 0.0
+
+        return {
+            "pitch_variance": round(pitch_variance, 4),
+            "harmonic_ratio": round(harmonic_ratio, 3),
+            "mfcc_anomaly_score": round(mfcc_anomaly_score, 3),
+            "voiced_ratio": round(float(voiced.mean()) if self.n_frames else 0.0, 3),
+        }
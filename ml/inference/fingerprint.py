@@ -0,0 +1,388 @@
+"""
+Perceptual media fingerprints.
+
+A fingerprint is a sequence of 64-bit DCT hashes of sampled keyframes
+plus a sequence of 32-bit audio sub-fingerprints. Both survive
+re-encoding, rescaling, light cropping and re-muxing, so an upload that
+is a platform re-encode of an already analysed clip can be recognised
+even though its bytes (and SHA-256) differ.
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+from .feature_bank import AudioFeatureBank
+from .audio_buffer import BUFFER_SAMPLE_RATE
+
+
+# Keyframe sampling
+KEYFRAME_INTERVAL_MS = 1000
+MAX_KEYFRAMES = 600
+# Border trimmed before hashing, so letterboxing and light crops don't move the hash
+CROP_FRACTION = 0.1
+# Frames this flat (black, fades) hash to noise and are skipped
+MIN_FRAME_STD = 4.0
+
+# Audio sub-fingerprints: 33 mel bands between these edges give 32 bits
+AUDIO_BAND_RANGE_HZ = (300.0, 3000.0)
+AUDIO_BITS = 32
+# Mel frames summed per sub-fingerprint and the hop between them (16 ms
+# frames): heavy overlap keeps the bits stable when the clip is cut at an
+# arbitrary sample
+AUDIO_WINDOW_FRAMES = 16
+AUDIO_HOP_FRAMES = 2
+
+# Byte popcounts for Hamming distances
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between two hash arrays of the same dtype, (len(a), len(b))."""
+    xor = np.bitwise_xor(a[:, None], b[None, :])
+    return _POPCOUNT[xor.view(np.uint8)].reshape(xor.shape + (-1,)).sum(axis=-1, dtype=np.int32)
+
+
+def frame_hash(image: np.ndarray) -> Optional[int]:
+    """
+    64-bit perceptual hash of a frame: the signs of its low-frequency DCT
+    coefficients relative to their median.
+
+    Returns:
+        The hash, or None for frames too flat to hash reliably
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    dy, dx = int(h * CROP_FRACTION), int(w * CROP_FRACTION)
+    small = cv2.resize(gray[dy:h - dy, dx:w - dx], (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    if small.std() < MIN_FRAME_STD:
+        return None
+
+    low = cv2.dct(small)[:8, :8].ravel()
+    # The DC term only tracks brightness, so it is left out of the median
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def keyframe_hashes(path: Union[str, Path], interval_ms: int = KEYFRAME_INTERVAL_MS) -> np.ndarray:
+    """
+    Hash one frame per interval of a video, or the image itself.
+
+    Long videos widen the interval so at most MAX_KEYFRAMES are hashed.
+    """
+    if not CV2_AVAILABLE:
+        raise ImportError("opencv is required for keyframe hashing")
+
+    image = cv2.imread(str(path))
+    if image is not None:
+        hashes = [frame_hash(image)]
+    else:
+        cap = cv2.VideoCapture(str(path))
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        duration_ms = total_frames * 1000.0 / fps
+        interval_ms = max(interval_ms, duration_ms / MAX_KEYFRAMES)
+        step = max(1, int(round(fps * interval_ms / 1000.0)))
+
+        hashes = []
+        frame_index = 0
+        # grab() advances without converting frames that are not hashed
+        while cap.grab():
+            if frame_index % step == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    hashes.append(frame_hash(frame))
+            frame_index += 1
+        cap.release()
+
+    return np.array([h for h in hashes if h is not None], dtype=np.uint64)
+
+
+def audio_fingerprint(waveform: np.ndarray, sample_rate: int = BUFFER_SAMPLE_RATE) -> np.ndarray:
+    """
+    32-bit sub-fingerprints of an audio track, one per AUDIO_HOP_FRAMES.
+
+    Bit b of a sub-fingerprint is the sign of the change over time of the
+    energy difference between mel bands b and b + 1 (Haitsma-Kalker).
+    """
+    bank = AudioFeatureBank.compute(waveform, sample_rate)
+    freqs = bank.mel_frequencies()
+    in_range = np.flatnonzero((freqs >= AUDIO_BAND_RANGE_HZ[0]) & (freqs <= AUDIO_BAND_RANGE_HZ[1]))
+    bands = np.unique(np.linspace(in_range[0], in_range[-1], AUDIO_BITS + 1).round().astype(int))
+    if len(bands) < AUDIO_BITS + 1 or bank.n_frames < AUDIO_WINDOW_FRAMES + AUDIO_HOP_FRAMES:
+        return np.zeros(0, dtype=np.uint32)
+
+    power = bank.mel_power()[bands]
+    # Energy per overlapping window, (bands, windows)
+    cumulative = np.concatenate([np.zeros((len(bands), 1), np.float32), np.cumsum(power, axis=1)], axis=1)
+    starts = np.arange(0, bank.n_frames - AUDIO_WINDOW_FRAMES + 1, AUDIO_HOP_FRAMES)
+    energy = cumulative[:, starts + AUDIO_WINDOW_FRAMES] - cumulative[:, starts]
+
+    band_diff = energy[:-1] - energy[1:]
+    bits = (band_diff[:, 1:] - band_diff[:, :-1]) > 0
+    weights = (np.uint32(1) << np.arange(AUDIO_BITS, dtype=np.uint32))[:, None]
+    return (bits.astype(np.uint32) * weights).sum(axis=0, dtype=np.uint32)
+
+
+def compute_fingerprint(
+    path: Union[str, Path],
+    waveform: Optional[np.ndarray] = None,
+    sample_rate: int = BUFFER_SAMPLE_RATE,
+) -> Dict[str, np.ndarray]:
+    """
+    Fingerprint a media file.
+
+    Args:
+        path: Video or image file; audio-only files give no keyframes
+        waveform: Decoded mono audio track, if the media has one
+
+    Returns:
+        Dict with 'video' (uint64 keyframe hashes) and 'audio' (uint32
+        sub-fingerprints); either may be empty
+    """
+    try:
+        video = keyframe_hashes(path)
+    except ValueError:
+        video = np.zeros(0, dtype=np.uint64)
+    audio = audio_fingerprint(waveform, sample_rate) if waveform is not None else np.zeros(0, dtype=np.uint32)
+    return {"video": video, "audio": audio}
+
+
+class FingerprintIndex:
+    """
+    Near-duplicate lookup over the fingerprints of analysed media.
+
+    Lookups are sub-linear: every keyframe hash and audio sub-fingerprint
+    is split into 16-bit bands, and a candidate must share at least one
+    band exactly with the query. For keyframes this catches anything
+    within 3 bits by pigeonhole, and a re-encode has many keyframes and
+    sub-fingerprints, so larger distances are still caught. Band values
+    are kept sorted and searched by bisection; only the items that were
+    hit are compared in full.
+    """
+
+    BAND_BITS = 16
+    # Keyframes within this many bits are the same picture
+    MAX_HAMMING = 10
+    # Share of the query's keyframes that must match a candidate
+    VIDEO_MATCH_RATIO = 0.6
+    # Audio matches: bit error rate over an aligned overlap of at least ~3 s
+    AUDIO_MAX_BER = 0.35
+    MIN_AUDIO_OVERLAP = 94
+    # Candidates verified per lookup, by number of exact band hits
+    MAX_CANDIDATES = 20
+
+    def __init__(self):
+        self.items = np.zeros(0, dtype=object)
+        self.video_hashes = np.zeros(0, dtype=np.uint64)
+        self.video_owner = np.zeros(0, dtype=np.int32)
+        self.audio_codes = np.zeros(0, dtype=np.uint32)
+        self.audio_owner = np.zeros(0, dtype=np.int32)
+        self.audio_position = np.zeros(0, dtype=np.int32)
+        self._tables: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @classmethod
+    def _bands(cls, codes: np.ndarray) -> List[np.ndarray]:
+        """16-bit band values of each code, one array per band."""
+        n_bands = codes.dtype.itemsize * 8 // cls.BAND_BITS
+        mask = codes.dtype.type((1 << cls.BAND_BITS) - 1)
+        return [
+            ((codes >> codes.dtype.type(cls.BAND_BITS * band)) & mask).astype(np.uint16)
+            for band in range(n_bands)
+        ]
+
+    def add(self, item_id: str, fingerprint: Dict[str, np.ndarray]) -> None:
+        """Index one item's fingerprint."""
+        owner = len(self.items)
+        video = np.asarray(fingerprint.get("video", []), dtype=np.uint64)
+        audio = np.asarray(fingerprint.get("audio", []), dtype=np.uint32)
+
+        self.items = np.append(self.items, np.array([item_id], dtype=object))
+        self.video_hashes = np.concatenate([self.video_hashes, video])
+        self.video_owner = np.concatenate([self.video_owner, np.full(len(video), owner, np.int32)])
+        self.audio_codes = np.concatenate([self.audio_codes, audio])
+        self.audio_owner = np.concatenate([self.audio_owner, np.full(len(audio), owner, np.int32)])
+        self.audio_position = np.concatenate([self.audio_position, np.arange(len(audio), dtype=np.int32)])
+        self._tables = {}
+
+    def remove(self, item_ids: List[str]) -> int:
+        """Drop items (e.g. expired media) from the index; returns how many were removed."""
+        drop = np.isin(self.items.astype(str), [str(i) for i in item_ids])
+        if not drop.any():
+            return 0
+
+        # Renumber the remaining owners
+        remap = np.cumsum(~drop) - 1
+        keep_video = ~drop[self.video_owner]
+        keep_audio = ~drop[self.audio_owner]
+        self.items = self.items[~drop]
+        self.video_hashes = self.video_hashes[keep_video]
+        self.video_owner = remap[self.video_owner[keep_video]].astype(np.int32)
+        self.audio_codes = self.audio_codes[keep_audio]
+        self.audio_owner = remap[self.audio_owner[keep_audio]].astype(np.int32)
+        self.audio_position = self.audio_position[keep_audio]
+        self._tables = {}
+        return int(drop.sum())
+
+    def _band_hits(self, kind: str, codes: np.ndarray, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indexed codes sharing at least one band exactly with a query.
+
+        Returns:
+            (query indices, indexed rows) of every band hit
+        """
+        if kind not in self._tables:
+            # Per band: the order that sorts the band values, and the sorted values
+            self._tables[kind] = [
+                (order, values[order])
+                for values in self._bands(codes)
+                for order in [np.argsort(values, kind="stable")]
+            ]
+
+        query_indices, rows = [], []
+        for (order, sorted_values), band_queries in zip(self._tables[kind], self._bands(queries)):
+            lo = np.searchsorted(sorted_values, band_queries, side="left")
+            hi = np.searchsorted(sorted_values, band_queries, side="right")
+            counts = hi - lo
+            # Offsets within each query's run of equal values
+            run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            query_indices.append(np.repeat(np.arange(len(queries)), counts))
+            rows.append(order[np.repeat(lo, counts) + run_offsets])
+        return np.concatenate(query_indices), np.concatenate(rows)
+
+    def _video_candidates(self, video: np.ndarray) -> Dict[int, float]:
+        """Share of query keyframes matched, per verified candidate."""
+        if len(video) == 0 or len(self.video_hashes) == 0:
+            return {}
+
+        _, rows = self._band_hits("video", self.video_hashes, video)
+        if len(rows) == 0:
+            return {}
+
+        candidates, votes = np.unique(self.video_owner[rows], return_counts=True)
+        scores = {}
+        for owner in candidates[np.argsort(-votes)[:self.MAX_CANDIDATES]]:
+            distances = hamming(video, self.video_hashes[self.video_owner == owner])
+            scores[int(owner)] = float((distances.min(axis=1) <= self.MAX_HAMMING).mean())
+        return scores
+
+    def _audio_candidates(self, audio: np.ndarray) -> Dict[int, float]:
+        """Bit error rate at the best alignment, per verified candidate."""
+        if len(audio) == 0 or len(self.audio_codes) == 0:
+            return {}
+
+        query_index, rows = self._band_hits("audio", self.audio_codes, audio)
+        if len(rows) == 0:
+            return {}
+
+        # Band hits vote for an (item, time offset) alignment
+        owners = self.audio_owner[rows].astype(np.int64)
+        offsets = self.audio_position[rows].astype(np.int64) - query_index
+        pairs, votes = np.unique(np.stack([owners, offsets], axis=1), axis=0, return_counts=True)
+
+        scores: Dict[int, float] = {}
+        for owner, offset in pairs[np.argsort(-votes)[:self.MAX_CANDIDATES]]:
+            codes = self.audio_codes[self.audio_owner == owner]
+            start = max(0, -offset)
+            end = min(len(audio), len(codes) - offset)
+            if end - start < min(self.MIN_AUDIO_OVERLAP, len(audio)):
+                continue
+            xor = np.bitwise_xor(audio[start:end], codes[start + offset:end + offset])
+            ber = float(_POPCOUNT[xor.view(np.uint8)].sum()) / (AUDIO_BITS * (end - start))
+            scores[int(owner)] = min(ber, scores.get(int(owner), 1.0))
+        return scores
+
+    def query(self, fingerprint: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Indexed items that are near-duplicates of a fingerprint.
+
+        Returns:
+            Matches sorted by 'similarity' (best first), each with the
+            'item_id', 'video_similarity' (share of keyframes matched) and
+            'audio_similarity' (1 - bit error rate), where available
+        """
+        video = np.asarray(fingerprint.get("video", []), dtype=np.uint64)
+        audio = np.asarray(fingerprint.get("audio", []), dtype=np.uint32)
+        video_scores = self._video_candidates(video)
+        audio_bers = self._audio_candidates(audio)
+
+        matches = []
+        for owner in set(video_scores) | set(audio_bers):
+            video_similarity = video_scores.get(owner)
+            ber = audio_bers.get(owner)
+            video_match = video_similarity is not None and video_similarity >= self.VIDEO_MATCH_RATIO
+            audio_match = ber is not None and ber <= self.AUDIO_MAX_BER
+            if not (video_match or audio_match):
+                continue
+            audio_similarity = None if ber is None else round(1.0 - ber, 4)
+            matches.append({
+                "item_id": str(self.items[owner]),
+                "video_similarity": None if video_similarity is None else round(video_similarity, 4),
+                "audio_similarity": audio_similarity,
+                "similarity": max(v for v in (video_similarity, audio_similarity) if v is not None),
+            })
+        return sorted(matches, key=lambda m: -m["similarity"])
+
+    def save(self, path: Union[str, Path]) -> str:
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            items=self.items.astype(str),
+            video_hashes=self.video_hashes,
+            video_owner=self.video_owner,
+            audio_codes=self.audio_codes,
+            audio_owner=self.audio_owner,
+            audio_position=self.audio_position,
+        )
+        os.replace(tmp_path, path)
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FingerprintIndex":
+        index = cls()
+        with np.load(path) as data:
+            index.items = data["items"].astype(object)
+            index.video_hashes = data["video_hashes"]
+            index.video_owner = data["video_owner"]
+            index.audio_codes = data["audio_codes"]
+            index.audio_owner = data["audio_owner"]
+            index.audio_position = data["audio_position"]
+        return index
+
+
+def main():
+    """Fingerprint media files and look them up in an index."""
+    parser = argparse.ArgumentParser(description="Perceptual media fingerprints")
+    parser.add_argument("command", choices=["add", "query"])
+    parser.add_argument("index", help="index file (.npz)")
+    parser.add_argument("media", nargs="+", help="video or image files; the file stem is the item id")
+    args = parser.parse_args()
+
+    index = FingerprintIndex.load(args.index) if Path(args.index).exists() else FingerprintIndex()
+    for path in args.media:
+        fingerprint = compute_fingerprint(path)
+        if args.command == "add":
+            index.add(Path(path).stem, fingerprint)
+        else:
+            print(path, index.query(fingerprint))
+
+    if args.command == "add":
+        print(f"{index.save(args.index)}: {len(index)} items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Per-job frame container.
+
+Sampled frames are stored in one file instead of one JPEG each: a header,
+the frame data and a timestamp index. Frames are resized to one fixed
+analysis size per job and kept in RGB, so readers get model-ready arrays.
+
+Codecs:
+    raw   uncompressed; the file is memory-mapped and frames are views
+          into the page cache (no copy, no decode)
+    zlib  lossless, compressed in chunks of CHUNK_FRAMES frames
+    jpeg  high-quality JPEG per frame (the default; close in size to the
+          old per-frame files at a fraction of the inode count)
+
+Frame i is found in O(1) from the chunk offset table, and only its chunk
+is decoded.
+"""
+import argparse
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+
+FRAME_STORE_SUFFIX = ".frames"
+MAGIC = b"DFSFRM01"
+# Header page: magic, then JSON padded with spaces; frame data starts after it
+HEADER_SIZE = 4096
+CODECS = ("raw", "zlib", "jpeg")
+DEFAULT_CODEC = "jpeg"
+DEFAULT_MAX_HEIGHT = 360
+DEFAULT_QUALITY = 95
+# Frames compressed together by the zlib codec
+CHUNK_FRAMES = 16
+
+
+def analysis_size(height: int, width: int, max_height: int = DEFAULT_MAX_HEIGHT) -> Tuple[int, int]:
+    """Fixed (height, width) frames of a video are stored at: aspect kept, even sides."""
+    target_height = min(height, max_height)
+    target_width = int(round(width * target_height / height))
+    return max(2, target_height - target_height % 2), max(2, target_width - target_width % 2)
+
+
+# Rough stored size relative to raw RGB, for reserving scratch space
+CODEC_SIZE_RATIO = {"raw": 1.0, "zlib": 0.7, "jpeg": 0.25}
+
+
+def estimated_size(count: int, height: int, width: int, codec: str = DEFAULT_CODEC,
+                   max_height: int = DEFAULT_MAX_HEIGHT) -> int:
+    """Upper-end estimate of a store's size in bytes, before it is written."""
+    if height <= 0 or width <= 0:
+        return HEADER_SIZE
+    target_height, target_width = analysis_size(height, width, max_height)
+    frame_bytes = target_height * target_width * 3 * CODEC_SIZE_RATIO[codec]
+    return int(HEADER_SIZE + count * (frame_bytes + 24))
+
+
+class FrameStoreWriter:
+    """
+    Writes a frame store, appending one BGR frame (as decoded by OpenCV)
+    at a time. The file is written under a temporary name and moved into
+    place by close(), so a store that exists is always complete.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        codec: str = DEFAULT_CODEC,
+        max_height: int = DEFAULT_MAX_HEIGHT,
+        quality: int = DEFAULT_QUALITY,
+        chunk_frames: int = CHUNK_FRAMES,
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown frame store codec: {codec}")
+        if not CV2_AVAILABLE:
+            raise ImportError("opencv is required to write frame stores")
+        self.path = Path(path)
+        self.codec = codec
+        self.max_height = max_height
+        self.quality = quality
+        self.chunk_frames = chunk_frames if codec == "zlib" else 1
+        self.shape: Optional[Tuple[int, int, int]] = None
+
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+        self._timestamps = []
+        self._frame_numbers = []
+        self._chunk_offsets = [0]
+        self._pending = []
+
+    def __enter__(self) -> "FrameStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def append(self, frame: np.ndarray, timestamp_ms: int, frame_number: int) -> int:
+        """Add a BGR frame; returns its index in the store."""
+        if self.shape is None:
+            height, width = analysis_size(frame.shape[0], frame.shape[1], self.max_height)
+            self.shape = (height, width, 3)
+        height, width, _ = self.shape
+        if frame.shape[:2] != (height, width):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        if self.codec == "jpeg":
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            self._write_chunk(encoded.tobytes())
+        else:
+            self._pending.append(np.ascontiguousarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+            if len(self._pending) == self.chunk_frames:
+                self._flush()
+
+        self._timestamps.append(int(timestamp_ms))
+        self._frame_numbers.append(int(frame_number))
+        return len(self) - 1
+
+    def _write_chunk(self, data: bytes) -> None:
+        self._file.write(data)
+        self._chunk_offsets.append(self._chunk_offsets[-1] + len(data))
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        data = b"".join(frame.tobytes() for frame in self._pending)
+        self._write_chunk(zlib.compress(data, 3) if self.codec == "zlib" else data)
+        self._pending = []
+
+    def close(self) -> Dict[str, Any]:
+        """Write the index and header and move the store into place."""
+        self._flush()
+        index_offset = HEADER_SIZE + self._chunk_offsets[-1]
+        for values in (self._timestamps, self._frame_numbers, self._chunk_offsets):
+            self._file.write(np.asarray(values, dtype=np.int64).tobytes())
+
+        height, width, channels = self.shape or (0, 0, 3)
+        header = {
+            "version": 1,
+            "codec": self.codec,
+            "count": len(self),
+            "height": height,
+            "width": width,
+            "channels": channels,
+            "chunk_frames": self.chunk_frames,
+            "chunk_count": len(self._chunk_offsets) - 1,
+            "index_offset": index_offset,
+        }
+        encoded = MAGIC + json.dumps(header).encode()
+        self._file.seek(0)
+        self._file.write(encoded.ljust(HEADER_SIZE, b" "))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return {**header, "path": str(self.path), "bytes": self.path.stat().st_size}
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class FrameStore:
+    """
+    Read-only view of a frame store.
+
+    Frames are (height, width, 3) uint8 RGB arrays; with the raw codec they
+    are views into the memory-mapped file and must not be written to.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            page = f.read(HEADER_SIZE)
+        if not page.startswith(MAGIC):
+            raise ValueError(f"Not a frame store: {self.path}")
+        header = json.loads(page[len(MAGIC):].decode().strip())
+        self.codec = header["codec"]
+        self.count = header["count"]
+        self.shape = (header["height"], header["width"], header["channels"])
+        self.chunk_frames = header["chunk_frames"]
+
+        mapped = np.memmap(self.path, dtype=np.uint8, mode="r")
+        data_end = header["index_offset"]
+        self._data = mapped[HEADER_SIZE:data_end]
+        index = mapped[data_end:].view(np.int64)
+        self.timestamps_ms = index[:self.count]
+        self.frame_numbers = index[self.count:2 * self.count]
+        self._chunk_offsets = index[2 * self.count:2 * self.count + header["chunk_count"] + 1]
+
+        self._frames = None
+        if self.codec == "raw" and self.count:
+            self._frames = self._data.reshape((self.count,) + self.shape)
+        # Last decompressed zlib chunk, reused by sequential reads
+        self._cached_chunk: Tuple[int, Optional[np.ndarray]] = (-1, None)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"Frame {index} out of range ({self.count} frames)")
+        if self._frames is not None:
+            return self._frames[index]
+
+        if self.codec == "jpeg":
+            start, end = self._chunk_offsets[index], self._chunk_offsets[index + 1]
+            frame = cv2.imdecode(np.asarray(self._data[start:end]), cv2.IMREAD_COLOR)
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        chunk = index // self.chunk_frames
+        if self._cached_chunk[0] != chunk:
+            start, end = self._chunk_offsets[chunk], self._chunk_offsets[chunk + 1]
+            frames = np.frombuffer(zlib.decompress(self._data[start:end]), dtype=np.uint8)
+            self._cached_chunk = (chunk, frames.reshape((-1,) + self.shape))
+        return self._cached_chunk[1][index % self.chunk_frames]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for index in range(self.count):
+            yield self[index]
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Frames [start, stop) as one array (a view for the raw codec)."""
+        stop = self.count if stop is None else min(stop, self.count)
+        if self._frames is not None:
+            return self._frames[start:stop]
+        return np.stack([self[i] for i in range(start, stop)]) if stop > start else np.zeros((0,) + self.shape, np.uint8)
+
+    def index_at(self, timestamp_ms: int) -> int:
+        """Index of the frame nearest a timestamp."""
+        if not self.count:
+            raise IndexError("Empty frame store")
+        right = int(np.searchsorted(self.timestamps_ms, timestamp_ms))
+        if right == 0:
+            return 0
+        if right == self.count:
+            return self.count - 1
+        before, after = self.timestamps_ms[right - 1], self.timestamps_ms[right]
+        return right if after - timestamp_ms < timestamp_ms - before else right - 1
+
+    def frame_info(self, start: int = 0, stop: Optional[int] = None) -> list:
+        """Index entries [start, stop) as dicts, as the old per-frame lists had them."""
+        stop = self.count if stop is None else min(stop, self.count)
+        return [
+            {"index": i, "timestamp_ms": int(self.timestamps_ms[i]), "frame_number": int(self.frame_numbers[i])}
+            for i in range(start, stop)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a frame store")
+    parser.add_argument("path", help="Frame store file")
+    parser.add_argument("--export", type=int, metavar="INDEX", help="Write frame INDEX as PNG")
+    parser.add_argument("--output", default="frame.png")
+    args = parser.parse_args()
+
+    store = FrameStore(args.path)
+    if args.export is not None:
+        cv2.imwrite(args.output, cv2.cvtColor(store[args.export], cv2.COLOR_RGB2BGR))
+        print(f"Wrote frame {args.export} to {args.output}")
+    else:
+        print(json.dumps({
+            "codec": store.codec,
+            "count": store.count,
+            "shape": store.shape,
+            "bytes": store.path.stat().st_size,
+            "first_ms": int(store.timestamps_ms[0]) if store.count else None,
+            "last_ms": int(store.timestamps_ms[-1]) if store.count else None,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 Multimodal Fusion Service.
 Combines video, audio, and lip-sync signals for final verdict.
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence, Union
 import numpy as np
 
 try:
@@ -12,6 +12,12 @@ try:
 except ImportError:
     TORCH_AVAILABLE = False
 
+try:
+    from scipy.optimize import minimize
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 from .base import BaseInferenceService
 
 
@@ -29,23 +35,45 @@ class MultimodalFusionService(BaseInferenceService):
         "audio": 0.30,
         "lipsync": 0.25,
     }
+    MODALITIES = ("video", "audio", "lipsync")
+    
+    # Verdict bands: score < LABEL_BINS[i] maps to LABELS[i]
+    LABEL_BINS = (0.25, 0.45, 0.6, 0.8)
+    LABELS = ("AUTHENTIC", "LIKELY_AUTHENTIC", "SUSPICIOUS", "LIKELY_FAKE", "FAKE")
+    LABEL_DESCRIPTIONS = {
+        "AUTHENTIC": "No significant manipulation indicators detected.",
+        "LIKELY_AUTHENTIC": "Minor anomalies detected but likely authentic.",
+        "SUSPICIOUS": "Some manipulation indicators present. Further review recommended.",
+        "LIKELY_FAKE": "Strong manipulation indicators detected.",
+        "FAKE": "High confidence of manipulation across modalities.",
+    }
+    
+    # Batched inference
+    FEATURE_DIM = 6
+    DEFAULT_BATCH_SIZE = 8192
+    
+    # Calibration settings
+    CALIBRATION_GRID_STEP = 0.05
+    CALIBRATION_CHUNK_SIZE = 65536
+    DECISION_THRESHOLD = 0.5
     
     def __init__(
         self,
         model_path: Optional[str] = None,
         device: str = "cpu",
         weights: Optional[Dict[str, float]] = None,
+        calibration: Optional[Dict[str, Any]] = None,
     ):
         super().__init__(model_path, device)
         self.weights = weights or self.DEFAULT_WEIGHTS
+        self.calibration = calibration
     
     def load_model(self) -> None:
         """Load fusion model (if using learned fusion)."""
         if TORCH_AVAILABLE and self.model_path:
             from pathlib import Path
             if Path(self.model_path).exists():
-                self.model = torch.load(self.model_path, map_location=self.device)
-                self.model.eval()
+                self.model = self._load_weights()
         
         self.is_loaded = True
     
@@ -115,6 +143,7 @@ class MultimodalFusionService(BaseInferenceService):
         
         return {
             "fused_score": float(fused_score),
+            "calibrated_probability": self.calibrated_probability(fused_score),
             "agreement": float(agreement),
             "modality_scores": {
                 "video": video_score,
@@ -131,21 +160,8 @@ class MultimodalFusionService(BaseInferenceService):
         modality_scores = raw_output["modality_scores"]
         
         # Determine label
-        if score < 0.25:
-            label = "AUTHENTIC"
-            description = "No significant manipulation indicators detected."
-        elif score < 0.45:
-            label = "LIKELY_AUTHENTIC"
-            description = "Minor anomalies detected but likely authentic."
-        elif score < 0.6:
-            label = "SUSPICIOUS"
-            description = "Some manipulation indicators present. Further review recommended."
-        elif score < 0.8:
-            label = "LIKELY_FAKE"
-            description = "Strong manipulation indicators detected."
-        else:
-            label = "FAKE"
-            description = "High confidence of manipulation across modalities."
+        label = self.LABELS[int(np.digitize(score, self.LABEL_BINS))]
+        description = self.LABEL_DESCRIPTIONS[label]
         
         # Calculate confidence based on agreement
         confidence = agreement * (1 - abs(score - 0.5) * 0.5)
@@ -164,52 +180,281 @@ class MultimodalFusionService(BaseInferenceService):
             "label": label,
             "description": description,
             "confidence": float(confidence),
+            "calibrated_probability": raw_output.get("calibrated_probability"),
             "agreement": float(agreement),
             "modality_breakdown": modality_scores,
             "concerns": concerns,
             "weights_used": raw_output["used_weights"],
         }
     
-    def calibrate(self, validation_data: List[Dict[str, Any]]) -> Dict[str, float]:
+    @classmethod
+    def features_from_results(cls, results: Dict[str, Any]) -> List[float]:
+        """
+        Build the 6-feature fusion vector from stored modality results.
+        
+        Accepts both the inference-service shape (``score``) and the worker
+        shape (``video_score``, ``audio_score``, ``lipsync_score``).
+        Modalities that did not run (missing, or marked ``skipped``) get
+        zero confidence, which leaves them out of the weighted fusion.
+        """
+        scores = []
+        confidences = []
+        for modality in cls.MODALITIES:
+            result = results.get(modality) or {}
+            if not result or result.get("skipped"):
+                scores.append(0.0)
+                confidences.append(0.0)
+                continue
+            scores.append(float(result.get("score", result.get(f"{modality}_score", 0.0)) or 0.0))
+            confidences.append(float(result.get("confidence", 1.0) or 0.0))
+        return scores + confidences
+    
+    def predict_batch(
+        self,
+        features: np.ndarray,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        label_bins: Optional[Sequence[float]] = None,
+        labels: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fuse many samples at once.
+        
+        Args:
+            features: (n, 6) array of video/audio/lipsync scores followed by
+                      their confidences, the same layout ``predict`` feeds
+                      the learned fusion head
+            batch_size: Rows per forward pass of the learned model
+            label_bins: Verdict band edges to label with instead of LABEL_BINS
+            labels: Labels of those bands instead of LABELS
+        
+        Returns:
+            Dict with 'fused_scores', 'labels' and 'calibrated_probabilities'
+        """
+        if not self.is_loaded:
+            self.load_model()
+        
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.FEATURE_DIM)
+        
+        if self.model is not None and TORCH_AVAILABLE:
+            fused = np.empty(len(features), dtype=np.float32)
+            with torch.no_grad():
+                for start in range(0, len(features), batch_size):
+                    chunk = torch.from_numpy(features[start:start + batch_size]).to(self.device)
+                    fused[start:start + len(chunk)] = self.model(chunk).reshape(-1).cpu().numpy()
+        else:
+            scores = features[:, :3]
+            weights = np.array([self.weights[m] for m in self.MODALITIES], dtype=np.float32)
+            adjusted = weights * features[:, 3:]
+            total = adjusted.sum(axis=1, keepdims=True)
+            adjusted = np.divide(adjusted, total, out=adjusted.copy(), where=total > 0)
+            fused = (adjusted * scores).sum(axis=1)
+        
+        if label_bins is None:
+            label_bins, labels = self.LABEL_BINS, self.LABELS
+        return {
+            "fused_scores": fused,
+            "labels": np.asarray(labels)[np.digitize(fused, label_bins)],
+            "calibrated_probabilities": self.calibrated_probability(fused),
+        }
+    
+    def _validation_matrix(
+        self,
+        validation_data: Union[List[Dict[str, Any]], np.ndarray],
+        labels: Optional[np.ndarray] = None,
+    ) -> tuple:
+        """Stack validation samples into an (n, 3) score matrix and label vector."""
+        if isinstance(validation_data, np.ndarray):
+            if labels is None:
+                raise ValueError("labels are required when validation_data is an array")
+            return (
+                np.asarray(validation_data, dtype=np.float64),
+                np.asarray(labels, dtype=np.float64).reshape(-1),
+            )
+        
+        scores = np.array(
+            [[sample[f"{m}_score"] for m in self.MODALITIES] for sample in validation_data],
+            dtype=np.float64,
+        ).reshape(-1, len(self.MODALITIES))
+        labels = np.array([sample["label"] for sample in validation_data], dtype=np.float64)
+        return scores, labels
+    
+    def _weight_candidates(self) -> np.ndarray:
+        """Weight vectors on the simplex, within the historical search bounds."""
+        step = self.CALIBRATION_GRID_STEP
+        grid = np.arange(0.0, 1.0 + step / 2, step)
+        v_w, a_w = np.meshgrid(grid, grid, indexing="ij")
+        candidates = np.stack([v_w.ravel(), a_w.ravel(), 1.0 - v_w.ravel() - a_w.ravel()], axis=1)
+        
+        mask = (
+            (candidates[:, 0] >= 0.2 - 1e-9) & (candidates[:, 0] <= 0.7 + 1e-9)
+            & (candidates[:, 1] >= 0.1 - 1e-9) & (candidates[:, 1] <= 0.5 + 1e-9)
+            & (candidates[:, 2] >= 0.05 - 1e-9)
+        )
+        return np.round(candidates[mask], 6)
+    
+    def _candidate_accuracy(self, scores: np.ndarray, labels: np.ndarray,
+                            candidates: np.ndarray) -> np.ndarray:
+        """Accuracy of every weight candidate, evaluated in sample chunks."""
+        correct = np.zeros(len(candidates), dtype=np.int64)
+        positive = labels[:, None] > 0.5
+        
+        for start in range(0, len(scores), self.CALIBRATION_CHUNK_SIZE):
+            chunk = slice(start, start + self.CALIBRATION_CHUNK_SIZE)
+            predicted = (scores[chunk] @ candidates.T) > self.DECISION_THRESHOLD
+            correct += (predicted == positive[chunk]).sum(axis=0)
+        
+        return correct / max(len(scores), 1)
+    
+    def _refine_weights(self, scores: np.ndarray, labels: np.ndarray,
+                        initial: np.ndarray) -> np.ndarray:
+        """
+        Refine weights with a continuous optimiser.
+        
+        Maximises a sigmoid-smoothed accuracy over softmax-parameterised
+        weights, which keeps them on the simplex without constraints.
+        """
+        if not SCIPY_AVAILABLE:
+            return initial
+        
+        signs = 2.0 * labels - 1.0
+        temperature = 0.05
+        
+        def objective(theta: np.ndarray) -> float:
+            w = np.exp(theta - theta.max())
+            w /= w.sum()
+            margin = signs * (scores @ w - self.DECISION_THRESHOLD) / temperature
+            return -float(np.mean(0.5 * (1.0 + np.tanh(0.5 * margin))))
+        
+        theta0 = np.log(np.clip(initial, 1e-6, None))
+        result = minimize(objective, theta0, method="Nelder-Mead",
+                          options={"xatol": 1e-4, "fatol": 1e-7, "maxiter": 400})
+        w = np.exp(result.x - result.x.max())
+        return w / w.sum()
+    
+    @staticmethod
+    def _fit_platt(fused: np.ndarray, labels: np.ndarray, iterations: int = 50) -> Dict[str, Any]:
+        """Fit p = sigmoid(a * score + b) by Newton's method on the log-loss."""
+        # Platt's smoothed targets avoid overconfident fits on separable data
+        n_pos = labels.sum()
+        n_neg = len(labels) - n_pos
+        targets = np.where(labels > 0.5, (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2))
+        
+        X = np.stack([fused, np.ones_like(fused)], axis=1)
+        params = np.zeros(2)
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(X @ params)))
+            gradient = X.T @ (p - targets)
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + 1e-9 * np.eye(2)
+            step = np.linalg.solve(hessian, gradient)
+            params -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        
+        return {"method": "platt", "a": float(params[0]), "b": float(params[1])}
+    
+    @staticmethod
+    def _fit_isotonic(fused: np.ndarray, labels: np.ndarray) -> Dict[str, Any]:
+        """Fit a monotone step map with pool-adjacent-violators."""
+        order = np.argsort(fused, kind="mergesort")
+        x_sorted = fused[order]
+        y_sorted = labels[order]
+        
+        # Collapse tied scores first so the PAV loop runs over unique values
+        x_unique, first = np.unique(x_sorted, return_index=True)
+        counts = np.diff(np.append(first, len(x_sorted)))
+        sums = np.add.reduceat(y_sorted, first)
+        
+        block_sum: List[float] = []
+        block_count: List[float] = []
+        block_end: List[int] = []
+        for i in range(len(x_unique)):
+            block_sum.append(float(sums[i]))
+            block_count.append(float(counts[i]))
+            block_end.append(i)
+            while len(block_sum) > 1 and (
+                block_sum[-2] / block_count[-2] >= block_sum[-1] / block_count[-1]
+            ):
+                merged_sum, merged_count = block_sum.pop(), block_count.pop()
+                block_sum[-1] += merged_sum
+                block_count[-1] += merged_count
+                block_end[-1] = block_end.pop()
+        
+        # Keep only the first and last score of each block; np.interp
+        # reproduces the step map from these knots
+        ends = np.array(block_end)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        block_values = np.array(block_sum) / np.array(block_count)
+        knots_x = np.stack([x_unique[starts], x_unique[ends]], axis=1).ravel()
+        knots_y = np.repeat(block_values, 2)
+        
+        return {"method": "isotonic", "x": knots_x.tolist(), "y": knots_y.tolist()}
+    
+    def calibrated_probability(self, score: Union[float, np.ndarray]) -> Optional[Union[float, np.ndarray]]:
+        """Map fused scores to probabilities with the fitted calibration map."""
+        if not self.calibration:
+            return None
+        
+        scores = np.asarray(score, dtype=np.float64)
+        if self.calibration["method"] == "platt":
+            probs = 1.0 / (1.0 + np.exp(-(self.calibration["a"] * scores + self.calibration["b"])))
+        else:
+            probs = np.interp(scores, self.calibration["x"], self.calibration["y"])
+        
+        return float(probs) if probs.ndim == 0 else probs
+    
+    def calibrate(
+        self,
+        validation_data: Union[List[Dict[str, Any]], np.ndarray],
+        labels: Optional[np.ndarray] = None,
+        method: str = "platt",
+    ) -> Dict[str, float]:
         """
         Calibrate fusion weights using validation data.
         
+        All simplex weight candidates are scored against the full validation
+        matrix at once, the best one is refined with a continuous optimiser,
+        and a score-to-probability map is fitted on the resulting fused
+        scores and stored in ``self.calibration``.
+        
         Args:
-            validation_data: List of dicts with modality scores and ground truth
+            validation_data: List of dicts with modality scores and ground truth,
+                             or an (n, 3) array of video/audio/lipsync scores
+            labels: Ground-truth labels when validation_data is an array
+            method: Probability calibration method, "platt" or "isotonic"
         
         Returns:
             Optimized weights
         """
-        # Simple grid search for optimal weights
-        best_weights = self.DEFAULT_WEIGHTS.copy()
-        best_accuracy = 0.0
-        
-        for v_w in np.arange(0.2, 0.7, 0.1):
-            for a_w in np.arange(0.1, 0.5, 0.1):
-                l_w = 1.0 - v_w - a_w
-                if l_w < 0.05:
-                    continue
-                
-                weights = {"video": v_w, "audio": a_w, "lipsync": l_w}
-                correct = 0
-                
-                for sample in validation_data:
-                    fused = (
-                        weights["video"] * sample["video_score"] +
-                        weights["audio"] * sample["audio_score"] +
-                        weights["lipsync"] * sample["lipsync_score"]
-                    )
-                    predicted = 1 if fused > 0.5 else 0
-                    if predicted == sample["label"]:
-                        correct += 1
-                
-                accuracy = correct / len(validation_data) if validation_data else 0
-                if accuracy > best_accuracy:
-                    best_accuracy = accuracy
-                    best_weights = weights
+        if method not in ("platt", "isotonic"):
+            raise ValueError(f"Unknown calibration method: {method}")
+        
+        scores, labels = self._validation_matrix(validation_data, labels)
+        if len(scores) == 0:
+            self.weights = self.DEFAULT_WEIGHTS.copy()
+            return self.weights
+        
+        # Vectorized grid search
+        candidates = self._weight_candidates()
+        accuracy = self._candidate_accuracy(scores, labels, candidates)
+        best = candidates[int(accuracy.argmax())]
+        best_accuracy = float(accuracy.max())
+        
+        # Continuous refinement, kept only if it does not lose accuracy
+        refined = self._refine_weights(scores, labels, best)
+        refined_accuracy = float(self._candidate_accuracy(scores, labels, refined[None, :])[0])
+        if refined_accuracy >= best_accuracy:
+            best, best_accuracy = refined, refined_accuracy
+        
+        fused = scores @ best
+        if method == "platt":
+            self.calibration = self._fit_platt(fused, labels)
+        else:
+            self.calibration = self._fit_isotonic(fused, labels)
+        self.calibration["accuracy"] = best_accuracy
+        self.calibration["n_samples"] = int(len(scores))
         
-        self.weights = best_weights
-        return best_weights
+        self.weights = {m: float(w) for m, w in zip(self.MODALITIES, best)}
+        return self.weights
     
     def get_model_info(self) -> Dict[str, Any]:
         info = super().get_model_info()
@@ -217,5 +462,6 @@ class MultimodalFusionService(BaseInferenceService):
             "model_version": self.MODEL_VERSION,
             "fusion_type": "learned" if self.model else "weighted",
             "weights": self.weights,
+            "calibration": self.calibration,
         })
         return info
@@ -0,0 +1,338 @@
+"""
+Known-fake lookup.
+
+Per-frame CLS embeddings are stored per job as a float16 array file.
+Embeddings of confirmed fakes are indexed with an IVF-PQ index built in
+NumPy: a coarse k-means quantiser partitions the vectors into inverted
+lists, and product quantisation compresses each vector's residual to a
+few bytes. A lookup probes only the nearest lists and scores candidates
+from per-subspace distance tables, so re-circulated fakes are matched in
+milliseconds without keeping the raw vectors.
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def save_embeddings(path: Union[str, Path], embeddings: np.ndarray) -> str:
+    """Write a job's (n_frames, D) embeddings as float16, atomically."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp.npy")
+    np.save(tmp_path, np.asarray(embeddings, dtype=np.float16))
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def load_embeddings(path: Union[str, Path]) -> np.ndarray:
+    """Memory-map a job's stored embeddings."""
+    return np.load(path, mmap_mode="r")
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-12)
+
+
+def _sq_distances(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Squared L2 distances, (len(x), len(centroids))."""
+    return (
+        (x ** 2).sum(axis=1, keepdims=True)
+        - 2.0 * x @ centroids.T
+        + (centroids ** 2).sum(axis=1)[None, :]
+    )
+
+
+def _kmeans(x: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means from a random sample of the data."""
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _sq_distances(x, centroids).argmin(axis=1)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        occupied = counts > 0
+        # Empty clusters keep their previous centroid
+        centroids[occupied] = sums[occupied] / counts[occupied, None]
+    return centroids
+
+
+class KnownFakeIndex:
+    """
+    IVF-PQ index over L2-normalised embeddings of confirmed fakes.
+
+    Each indexed vector is stored as its inverted-list number, an 8-bit
+    code per subspace, and the source it came from (e.g. a job id). The
+    PQ distances shortlist candidates; the full vectors, kept as float16
+    in a memory-mapped sidecar file, re-rank the shortlist exactly so
+    similarities can be compared against a fixed threshold.
+    """
+
+    DEFAULT_N_LISTS = 64
+    DEFAULT_N_SUBSPACES = 16
+    DEFAULT_N_PROBE = 8
+    CODEBOOK_SIZE = 256
+    KMEANS_ITERATIONS = 20
+    # PQ candidates per query re-ranked with exact similarities
+    REFINE_CANDIDATES = 64
+    # Cosine similarity at which a frame counts as a known-fake match
+    MATCH_THRESHOLD = 0.92
+
+    def __init__(self, coarse_centroids: np.ndarray, codebooks: np.ndarray):
+        self.coarse_centroids = coarse_centroids.astype(np.float32)
+        # (n_subspaces, codebook size, subspace dim)
+        self.codebooks = codebooks.astype(np.float32)
+        self.codes = np.zeros((0, len(codebooks)), dtype=np.uint8)
+        self.lists = np.zeros(0, dtype=np.int32)
+        self.sources = np.zeros(0, dtype=object)
+        self.vectors = np.zeros((0, self.dim), dtype=np.float16)
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @property
+    def dim(self) -> int:
+        return self.coarse_centroids.shape[1]
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.coarse_centroids)
+
+    @property
+    def n_subspaces(self) -> int:
+        return len(self.codebooks)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def train(
+        cls,
+        embeddings: np.ndarray,
+        n_lists: int = DEFAULT_N_LISTS,
+        n_subspaces: int = DEFAULT_N_SUBSPACES,
+        seed: int = 0,
+    ) -> "KnownFakeIndex":
+        """
+        Learn the coarse quantiser and PQ codebooks from sample embeddings.
+
+        List and codebook sizes shrink to fit small training sets.
+        """
+        x = _normalize(embeddings)
+        if x.shape[1] % n_subspaces:
+            raise ValueError(f"Embedding dim {x.shape[1]} is not divisible by {n_subspaces} subspaces")
+
+        rng = np.random.default_rng(seed)
+        coarse = _kmeans(x, min(n_lists, len(x)), cls.KMEANS_ITERATIONS, rng)
+        residuals = x - coarse[_sq_distances(x, coarse).argmin(axis=1)]
+
+        sub_dim = x.shape[1] // n_subspaces
+        k = min(cls.CODEBOOK_SIZE, len(x))
+        codebooks = np.stack([
+            _kmeans(residuals[:, m * sub_dim:(m + 1) * sub_dim], k, cls.KMEANS_ITERATIONS, rng)
+            for m in range(n_subspaces)
+        ])
+        return cls(coarse, codebooks)
+
+    def _encode(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Inverted list and PQ codes of normalised vectors."""
+        lists = _sq_distances(x, self.coarse_centroids).argmin(axis=1).astype(np.int32)
+        residuals = (x - self.coarse_centroids[lists]).reshape(len(x), self.n_subspaces, -1)
+        codes = np.stack([
+            _sq_distances(residuals[:, m], self.codebooks[m]).argmin(axis=1)
+            for m in range(self.n_subspaces)
+        ], axis=1).astype(np.uint8)
+        return lists, codes
+
+    def add(self, embeddings: np.ndarray, source: Union[str, Sequence[str]]) -> None:
+        """Index embeddings, tagged with one source or one source per vector."""
+        x = _normalize(embeddings)
+        lists, codes = self._encode(x)
+        sources = np.empty(len(x), dtype=object)
+        sources[:] = [source] * len(x) if isinstance(source, str) else list(source)
+
+        self.lists = np.concatenate([self.lists, lists])
+        self.codes = np.concatenate([self.codes, codes])
+        self.sources = np.concatenate([self.sources, sources])
+        self.vectors = np.concatenate([self.vectors, x.astype(np.float16)])
+        self._order = None
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row order grouped by list, and each list's start offset."""
+        if self._order is None:
+            self._order = np.argsort(self.lists, kind="stable")
+            self._offsets = np.searchsorted(self.lists[self._order], np.arange(self.n_lists + 1))
+        return self._order, self._offsets
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 1,
+        n_probe: int = DEFAULT_N_PROBE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate nearest indexed vectors by cosine similarity.
+
+        Candidates come from the probed inverted lists ranked by PQ
+        distance; the best `REFINE_CANDIDATES` are re-scored exactly.
+
+        Returns:
+            (similarities, rows), each (n_queries, k); rows index
+            `sources` and are -1 where fewer than k candidates were found
+        """
+        q = _normalize(queries)
+        if len(self) == 0 or len(q) == 0:
+            return np.full((len(q), k), -np.inf, dtype=np.float32), np.full((len(q), k), -1, dtype=np.int64)
+
+        shortlist = max(k, self.REFINE_CANDIDATES)
+        rows = np.full((len(q), shortlist), -1, dtype=np.int64)
+
+        order, offsets = self._inverted_lists()
+        n_probe = min(n_probe, self.n_lists)
+        probes = np.argsort(_sq_distances(q, self.coarse_centroids), axis=1)[:, :n_probe]
+        codebook_norms = (self.codebooks ** 2).sum(axis=2)
+        distances = np.full((len(q), shortlist), np.inf, dtype=np.float32)
+
+        # Work list by list: every query probing a list is scored against
+        # all of its codes at once, and merged into the running top-k
+        for l in np.unique(probes):
+            candidates = order[offsets[l]:offsets[l + 1]]
+            if len(candidates) == 0:
+                continue
+            queries_l = np.flatnonzero((probes == l).any(axis=1))
+
+            # Distance tables, (subspace, codeword, query): each query's
+            # residual sub-vectors to every codeword, as batched matmuls
+            residuals = (q[queries_l] - self.coarse_centroids[l]).reshape(len(queries_l), self.n_subspaces, -1)
+            residuals = residuals.transpose(1, 2, 0)
+            tables = (
+                (residuals ** 2).sum(axis=1)[:, None, :]
+                - 2.0 * (self.codebooks @ residuals)
+                + codebook_norms[:, :, None]
+            )
+
+            # Sum table rows selected by each candidate's codes; gathering
+            # whole rows keeps the lookups contiguous
+            codes = self.codes[candidates]
+            list_distances = np.zeros((len(candidates), len(queries_l)), dtype=np.float32)
+            for m in range(self.n_subspaces):
+                list_distances += tables[m][codes[:, m]]
+            list_distances = list_distances.T
+
+            # Merge this list's best into each query's running shortlist
+            kk = min(shortlist, len(candidates))
+            top = np.argpartition(list_distances, kk - 1, axis=1)[:, :kk]
+            merged_d = np.concatenate([distances[queries_l], np.take_along_axis(list_distances, top, axis=1)], axis=1)
+            merged_r = np.concatenate([rows[queries_l], candidates[top]], axis=1)
+            keep = np.argsort(merged_d, axis=1)[:, :shortlist]
+            distances[queries_l] = np.take_along_axis(merged_d, keep, axis=1)
+            rows[queries_l] = np.take_along_axis(merged_r, keep, axis=1)
+
+        # Exact cosine similarity over the shortlist
+        found = rows >= 0
+        vectors = self.vectors[np.where(found, rows, 0).ravel()].astype(np.float32)
+        similarities = np.einsum("qd,qsd->qs", q, vectors.reshape(len(q), shortlist, -1))
+        similarities[~found] = -np.inf
+
+        keep = np.argsort(-similarities, axis=1)[:, :k]
+        return np.take_along_axis(similarities, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+
+    def match(
+        self,
+        embeddings: np.ndarray,
+        threshold: float = MATCH_THRESHOLD,
+        n_probe: int = DEFAULT_N_PROBE,
+    ) -> Dict[str, Any]:
+        """
+        Match a job's frame embeddings against the known fakes.
+
+        Returns:
+            Dict with per-frame 'frame_matches' (index, similarity, source)
+            above the threshold, 'matched_frames', 'match_ratio', and the
+            best-matching 'source' with its 'best_similarity'
+        """
+        similarities, rows = self.search(embeddings, k=1, n_probe=n_probe)
+        best = similarities[:, 0]
+        matched = np.flatnonzero(best >= threshold)
+
+        frame_matches = [
+            {"frame_index": int(i), "similarity": round(float(best[i]), 4), "source": self.sources[rows[i, 0]]}
+            for i in matched
+        ]
+
+        source = None
+        if len(matched):
+            # Source matched by the most frames
+            values, counts = np.unique([m["source"] for m in frame_matches], return_counts=True)
+            source = str(values[counts.argmax()])
+
+        return {
+            "matched": bool(len(matched)),
+            "matched_frames": int(len(matched)),
+            "match_ratio": round(len(matched) / len(best), 4) if len(best) else 0.0,
+            "best_similarity": round(float(best.max()), 4) if len(best) and np.isfinite(best.max()) else None,
+            "source": source,
+            "frame_matches": frame_matches,
+        }
+
+    @staticmethod
+    def vectors_path(path: Union[str, Path]) -> Path:
+        """Sidecar file holding the full vectors of an index file."""
+        path = Path(path)
+        return path.with_name(path.stem + ".vectors.npy")
+
+    def save(self, path: Union[str, Path]) -> str:
+        """Write the index and its vector sidecar, each atomically."""
+        path = Path(path)
+        save_embeddings(self.vectors_path(path), self.vectors)
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            coarse_centroids=self.coarse_centroids,
+            codebooks=self.codebooks,
+            codes=self.codes,
+            lists=self.lists,
+            sources=self.sources.astype(str),
+        )
+        os.replace(tmp_path, path)
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "KnownFakeIndex":
+        """Load an index; its full vectors are memory-mapped."""
+        with np.load(path) as data:
+            index = cls(data["coarse_centroids"], data["codebooks"])
+            index.codes = data["codes"]
+            index.lists = data["lists"]
+            index.sources = data["sources"].astype(object)
+        index.vectors = load_embeddings(cls.vectors_path(path))
+        return index
+
+
+def main():
+    """Build or extend the known-fake index from stored job embeddings."""
+    parser = argparse.ArgumentParser(description="Known-fake embedding index")
+    parser.add_argument("command", choices=["build", "add"])
+    parser.add_argument("index", help="index file (.npz)")
+    parser.add_argument("embeddings", nargs="+", help="per-job embedding files; the file stem is the source")
+    parser.add_argument("--n-lists", type=int, default=KnownFakeIndex.DEFAULT_N_LISTS)
+    parser.add_argument("--n-subspaces", type=int, default=KnownFakeIndex.DEFAULT_N_SUBSPACES)
+    args = parser.parse_args()
+
+    arrays: List[Tuple[str, np.ndarray]] = [(Path(p).stem, load_embeddings(p)) for p in args.embeddings]
+
+    if args.command == "build":
+        index = KnownFakeIndex.train(
+            np.concatenate([a for _, a in arrays]), n_lists=args.n_lists, n_subspaces=args.n_subspaces
+        )
+    else:
+        index = KnownFakeIndex.load(args.index)
+
+    for source, array in arrays:
+        index.add(array, source)
+    print(f"{index.save(args.index)}: {len(index)} vectors")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,14 @@
 Lip-Sync Verification Service.
 Detects audio-visual synchronization mismatches.
 """
+import importlib.util
+import wave
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import numpy as np
 
-try:
-    import torch
-    import torch.nn as nn
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+# Weights are loaded by the base class; only torch's presence matters here
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
 
 try:
     import cv2
@@ -20,6 +18,9 @@ except ImportError:
     CV2_AVAILABLE = False
 
 from .base import BaseInferenceService
+from .audio_buffer import BUFFER_SAMPLE_RATE, is_audio_buffer, open_audio_buffer
+from .feature_bank import AudioFeatureBank
+from .frame_store import FrameStore
 
 
 class LipSyncService(BaseInferenceService):
@@ -29,15 +30,19 @@ class LipSyncService(BaseInferenceService):
     """
     
     MODEL_VERSION = "v1.0.0"
+    DEFAULT_FRAME_INTERVAL_MS = 200
+    MAX_OFFSET_MS = 400
     
     def __init__(
         self,
         model_path: Optional[str] = None,
         device: str = "cpu",
         window_size_ms: int = 500,
+        max_offset_ms: int = MAX_OFFSET_MS,
     ):
         super().__init__(model_path, device)
         self.window_size_ms = window_size_ms
+        self.max_offset_ms = max_offset_ms
         self.face_cascade = None
     
     def load_model(self) -> None:
@@ -48,8 +53,7 @@ class LipSyncService(BaseInferenceService):
             self.face_cascade = cv2.CascadeClassifier(cascade_path)
         
         if TORCH_AVAILABLE and self.model_path and Path(self.model_path).exists():
-            self.model = torch.load(self.model_path, map_location=self.device)
-            self.model.eval()
+            self.model = self._load_weights()
         else:
             self.model = None
         
@@ -78,22 +82,174 @@ class LipSyncService(BaseInferenceService):
         mouth_roi = frame[mouth_y:mouth_y+mouth_h, mouth_x:mouth_x+mouth_w]
         return mouth_roi
     
+    @staticmethod
+    def _mouth_openness(mouth_roi: Optional[np.ndarray]) -> float:
+        """
+        Estimate mouth openness from a mouth ROI.
+        
+        An open mouth exposes a dark oral cavity, so the fraction of pixels
+        well below the ROI's mean intensity tracks the opening.
+        """
+        if mouth_roi is None or mouth_roi.size == 0:
+            return 0.0
+        
+        gray = mouth_roi.mean(axis=2) if mouth_roi.ndim == 3 else mouth_roi
+        gray = gray.astype(np.float32)
+        threshold = gray.mean() - 0.5 * gray.std()
+        return float((gray < threshold).mean())
+    
+    @staticmethod
+    def _load_waveform(audio_path: str) -> Tuple[Optional[np.ndarray], int]:
+        """Load a decoded audio buffer or PCM WAV file as a mono float32 waveform."""
+        path = Path(audio_path)
+        if not path.exists():
+            return None, 0
+        
+        if is_audio_buffer(path):
+            return open_audio_buffer(path), BUFFER_SAMPLE_RATE
+        
+        with wave.open(str(path), "rb") as wav:
+            sample_rate = wav.getframerate()
+            n_channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            raw = wav.readframes(wav.getnframes())
+        
+        if sample_width != 2:
+            return None, 0
+        
+        waveform = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        if n_channels > 1:
+            waveform = waveform.reshape(-1, n_channels).mean(axis=1)
+        return waveform, sample_rate
+    
+    @staticmethod
+    def _audio_envelope(
+        waveform: np.ndarray,
+        sample_rate: int,
+        timestamps_ms: np.ndarray,
+        frame_interval_ms: float,
+    ) -> np.ndarray:
+        """
+        RMS energy envelope sampled at the video frame timestamps.
+        
+        Uses a prefix sum of squared samples so every frame window costs O(1).
+        """
+        if waveform is None or len(waveform) == 0 or sample_rate <= 0:
+            return np.zeros(len(timestamps_ms), dtype=np.float32)
+        
+        energy = np.concatenate(([0.0], np.cumsum(waveform.astype(np.float64) ** 2)))
+        half = frame_interval_ms / 2.0
+        starts = ((timestamps_ms - half) * sample_rate / 1000.0).astype(np.int64)
+        ends = ((timestamps_ms + half) * sample_rate / 1000.0).astype(np.int64)
+        starts = np.clip(starts, 0, len(waveform))
+        ends = np.clip(ends, 0, len(waveform))
+        counts = np.maximum(ends - starts, 1)
+        
+        return np.sqrt((energy[ends] - energy[starts]) / counts).astype(np.float32)
+    
+    @staticmethod
+    def _speech_activity(
+        words: List[Dict[str, Any]],
+        timestamps_ms: np.ndarray,
+    ) -> np.ndarray:
+        """Binary speech-activity envelope from transcript word timings."""
+        activity = np.zeros(len(timestamps_ms), dtype=np.float32)
+        if not words:
+            return activity
+        
+        starts, ends = LipSyncService._word_frame_ranges(words, timestamps_ms)
+        # Difference array marks every word range in a single pass
+        marks = np.zeros(len(timestamps_ms) + 1, dtype=np.int32)
+        np.add.at(marks, starts, 1)
+        np.add.at(marks, ends, -1)
+        activity[np.cumsum(marks[:-1]) > 0] = 1.0
+        return activity
+    
+    @staticmethod
+    def _word_frame_ranges(
+        words: List[Dict[str, Any]],
+        timestamps_ms: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Map word timings to half-open [start, end) frame index ranges."""
+        word_starts = np.array([w.get("start_ms", 0) for w in words], dtype=np.float64)
+        word_ends = np.array([w.get("end_ms", 0) for w in words], dtype=np.float64)
+        
+        starts = np.searchsorted(timestamps_ms, word_starts, side="left")
+        ends = np.searchsorted(timestamps_ms, word_ends, side="right")
+        return starts, np.maximum(ends, starts)
+    
+    @staticmethod
+    def _normalize(signal: np.ndarray) -> np.ndarray:
+        """Zero-mean, unit-variance normalisation (zeros for flat signals)."""
+        centered = signal - signal.mean(axis=-1, keepdims=True)
+        std = centered.std(axis=-1, keepdims=True)
+        return np.divide(centered, std, out=np.zeros_like(centered), where=std > 1e-8)
+    
+    @staticmethod
+    def _cross_correlate(
+        video: np.ndarray,
+        audio: np.ndarray,
+        max_lag: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Normalised FFT cross-correlation along the last axis.
+        
+        Accepts 1-D signals or 2-D stacks of windows and returns the lag (in
+        frames) and peak correlation for each row. A positive lag means the
+        audio trails the mouth movement.
+        """
+        n = video.shape[-1]
+        max_lag = max(0, min(max_lag, n - 1))
+        video = LipSyncService._normalize(video)
+        audio = LipSyncService._normalize(audio)
+        
+        n_fft = 1 << int(np.ceil(np.log2(2 * n - 1)))
+        spectrum = np.conj(np.fft.rfft(video, n_fft)) * np.fft.rfft(audio, n_fft)
+        xcorr = np.fft.irfft(spectrum, n_fft) / n
+        
+        # Gather lags -max_lag..max_lag (negative lags wrap to the end)
+        lags = np.arange(-max_lag, max_lag + 1)
+        candidates = xcorr[..., lags % n_fft]
+        best = candidates.argmax(axis=-1)
+        return lags[best], np.take_along_axis(
+            candidates, np.expand_dims(best, -1), axis=-1
+        ).squeeze(-1)
+    
     def preprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Preprocess frames and audio for lip-sync analysis.
         
         Args:
-            input_data: Dict with 'frames' and 'transcript'
+            input_data: Dict with 'frames' (a frame list, or a 'frame_store')
+                       and 'transcript', and optionally 'audio_path' or
+                       'waveform' + 'sample_rate'
         """
-        frames = input_data.get("frames", {}).get("frames", [])
+        frames_data = input_data.get("frames", {})
+        frames = frames_data.get("frames", [])
         transcript = input_data.get("transcript", {})
         
         mouth_features = []
         
+        if frames_data.get("frame_store") and CV2_AVAILABLE:
+            # RGB frames from the job's frame store
+            store = FrameStore(frames_data["frame_store"])
+            for index, frame in enumerate(store):
+                mouth_roi = self._extract_mouth_roi(frame)
+                mouth_features.append({
+                    "timestamp_ms": int(store.timestamps_ms[index]),
+                    "has_mouth": mouth_roi is not None,
+                    "mouth_roi": mouth_roi,
+                    "openness": self._mouth_openness(mouth_roi),
+                })
+            frames = []
+        
         for frame_info in frames:
-            if isinstance(frame_info, dict) and "path" in frame_info:
+            if isinstance(frame_info, dict) and ("path" in frame_info or "image" in frame_info):
                 if CV2_AVAILABLE:
-                    frame = cv2.imread(frame_info["path"])
+                    # Live analysis passes decoded BGR frames instead of paths
+                    frame = frame_info.get("image")
+                    if frame is None:
+                        frame = cv2.imread(frame_info["path"])
                     if frame is not None:
                         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                         mouth_roi = self._extract_mouth_roi(frame)
@@ -101,19 +257,40 @@ class LipSyncService(BaseInferenceService):
                             "timestamp_ms": frame_info.get("timestamp_ms", 0),
                             "has_mouth": mouth_roi is not None,
                             "mouth_roi": mouth_roi,
+                            "openness": self._mouth_openness(mouth_roi),
                         })
         
         # Extract word timings from transcript
         words = transcript.get("words", [])
         
+        waveform = input_data.get("waveform")
+        sample_rate = input_data.get("sample_rate", 16000)
+        feature_bank = None
+        audio_path = input_data.get("audio_path")
+        if waveform is None and audio_path:
+            if is_audio_buffer(audio_path) and Path(audio_path).exists():
+                # Energy envelope comes from the job's shared feature bank
+                feature_bank = AudioFeatureBank.for_buffer(audio_path)
+            else:
+                waveform, sample_rate = self._load_waveform(audio_path)
+        
         return {
             "mouth_features": mouth_features,
             "words": words,
+            "waveform": waveform,
+            "sample_rate": sample_rate,
+            "feature_bank": feature_bank,
             "total_frames": len(mouth_features),
         }
     
     def predict(self, preprocessed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze lip-sync alignment."""
+        """
+        Analyze lip-sync alignment.
+        
+        Correlates mouth openness with the audio energy envelope (or the
+        transcript's speech activity when no audio is available), globally
+        for the A/V offset and over sliding windows for local agreement.
+        """
         mouth_features = preprocessed_data["mouth_features"]
         words = preprocessed_data["words"]
         
@@ -123,43 +300,93 @@ class LipSyncService(BaseInferenceService):
                 "segments": [],
             }
         
-        # Placeholder: analyze synchronization
-        # Real implementation would compare mouth openness with phoneme timing
-        segments = []
-        mismatch_scores = []
-        
-        for word in words:
-            start_ms = word.get("start_ms", 0)
-            end_ms = word.get("end_ms", 0)
-            
-            # Find frames in this time window
-            window_frames = [
-                f for f in mouth_features
-                if start_ms <= f["timestamp_ms"] <= end_ms
-            ]
-            
-            # Check if mouth was detected during speech
-            if window_frames:
-                mouth_detected_ratio = sum(1 for f in window_frames if f["has_mouth"]) / len(window_frames)
-                
-                # Simulate mismatch detection
-                mismatch = np.random.uniform(0.0, 0.3) if mouth_detected_ratio > 0.5 else 0.5
-                mismatch_scores.append(mismatch)
-                
-                if mismatch > 0.4:
-                    segments.append({
-                        "start_ms": start_ms,
-                        "end_ms": end_ms,
-                        "word": word.get("word", ""),
-                        "mismatch_score": float(mismatch),
-                    })
-        
-        overall_mismatch = float(np.mean(mismatch_scores)) if mismatch_scores else 0.0
+        mouth_features = sorted(mouth_features, key=lambda f: f["timestamp_ms"])
+        timestamps = np.array([f["timestamp_ms"] for f in mouth_features], dtype=np.float64)
+        openness = np.array([f.get("openness", 0.0) for f in mouth_features], dtype=np.float32)
+        has_mouth = np.array([f["has_mouth"] for f in mouth_features], dtype=np.float32)
+        
+        n_frames = len(timestamps)
+        frame_interval_ms = (
+            float(np.median(np.diff(timestamps))) if n_frames > 1 else 0.0
+        ) or self.DEFAULT_FRAME_INTERVAL_MS
+        
+        waveform = preprocessed_data.get("waveform")
+        feature_bank = preprocessed_data.get("feature_bank")
+        if feature_bank is not None:
+            envelope = feature_bank.envelope_at(timestamps)
+        elif waveform is not None and len(waveform) > 0:
+            envelope = self._audio_envelope(
+                np.asarray(waveform, dtype=np.float32).reshape(-1),
+                preprocessed_data.get("sample_rate", 16000),
+                timestamps,
+                frame_interval_ms,
+            )
+        else:
+            envelope = self._speech_activity(words, timestamps)
+        
+        max_lag = int(round(self.max_offset_ms / frame_interval_ms))
+        
+        # Global A/V offset over the whole track
+        lag, correlation = self._cross_correlate(openness, envelope, max_lag)
+        sync_offset_ms = int(lag * frame_interval_ms)
+        correlation = float(correlation)
+        
+        # Local correlation over half-overlapping sliding windows, batched
+        window = max(2, int(round(self.window_size_ms / frame_interval_ms)))
+        local_corr = np.full(n_frames, correlation, dtype=np.float32)
+        if n_frames >= window:
+            hop = max(1, window // 2)
+            starts = np.arange(0, n_frames - window + 1, hop)
+            index = starts[:, None] + np.arange(window)[None, :]
+            _, window_corr = self._cross_correlate(
+                openness[index], envelope[index], min(max_lag, window // 2)
+            )
+            # Each frame takes the correlation of the window centred nearest it:
+            # the closer of the centres either side of the frame
+            centres = starts + (window - 1) / 2.0
+            frame_index = np.arange(n_frames)
+            after = np.clip(np.searchsorted(centres, frame_index), 0, len(starts) - 1)
+            before = np.maximum(after - 1, 0)
+            nearest = np.where(
+                np.abs(centres[before] - frame_index) <= np.abs(centres[after] - frame_index),
+                before,
+                after,
+            )
+            local_corr = window_corr[nearest].astype(np.float32)
+        
+        # Per-frame mismatch; prefix sums give O(1) averages per word range
+        offset_penalty = min(1.0, abs(sync_offset_ms) / max(self.max_offset_ms, 1))
+        frame_mismatch = np.clip(0.5 * (1.0 - local_corr), 0.0, 1.0) * 0.7 + 0.3 * offset_penalty
+        mismatch_sum = np.concatenate(([0.0], np.cumsum(frame_mismatch)))
+        mouth_sum = np.concatenate(([0.0], np.cumsum(has_mouth)))
+        
+        word_starts, word_ends = self._word_frame_ranges(words, timestamps)
+        counts = word_ends - word_starts
+        covered = counts > 0
+        safe_counts = np.maximum(counts, 1)
+        word_mismatch = (mismatch_sum[word_ends] - mismatch_sum[word_starts]) / safe_counts
+        mouth_ratio = (mouth_sum[word_ends] - mouth_sum[word_starts]) / safe_counts
+        # Speech without a visible mouth cannot be verified
+        word_mismatch = np.where(mouth_ratio > 0.5, word_mismatch, 0.5)
+        
+        segments = [
+            {
+                "start_ms": words[i].get("start_ms", 0),
+                "end_ms": words[i].get("end_ms", 0),
+                "word": words[i].get("word", ""),
+                "mismatch_score": float(word_mismatch[i]),
+            }
+            for i in np.flatnonzero(covered & (word_mismatch > 0.4))
+        ]
+        
+        overall_mismatch = float(word_mismatch[covered].mean()) if covered.any() else 0.0
         
         return {
             "mismatch_score": overall_mismatch,
             "segments": segments,
             "analyzed_words": len(words),
+            "sync_offset_ms": sync_offset_ms,
+            "correlation_score": correlation,
         }
     
     def postprocess(self, raw_output: Dict[str, Any]) -> Dict[str, Any]:
@@ -180,6 +407,8 @@ class LipSyncService(BaseInferenceService):
             "confidence": float(1 - score * 0.5),
             "flagged_segments": segments[:5],
             "analyzed_words": raw_output.get("analyzed_words", 0),
+            "sync_offset_ms": raw_output.get("sync_offset_ms"),
+            "correlation_score": raw_output.get("correlation_score"),
         }
     
     def get_model_info(self) -> Dict[str, Any]:
@@ -187,6 +416,7 @@ class LipSyncService(BaseInferenceService):
         info.update({
             "model_version": self.MODEL_VERSION,
             "window_size_ms": self.window_size_ms,
+            "max_offset_ms": self.max_offset_ms,
             "model_type": "LipSync-Verifier",
         })
         return info
@@ -0,0 +1,419 @@
+"""
+Live stream sources.
+
+A live analysis follows media that is still being written by an ingest
+process: either one growing file (MPEG-TS, Matroska, fragmented MP4) or a
+directory of HLS/DASH segments next to their playlist. Sources hand out
+chunks of newly available media as they land; the caller decodes them
+with `decode_frames` / `decode_chunk_audio` and scores them while the
+stream carries on.
+"""
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+from .audio_buffer import BUFFER_SUFFIX, decode_to_buffer, open_audio_buffer
+
+
+# Media segment files written by HLS/DASH packagers
+SEGMENT_SUFFIXES = (".ts", ".m4s", ".mp4", ".aac")
+# A segment without a playlist entry counts as complete once its size has
+# not changed for this long, or a later segment exists
+SETTLE_S = 1.0
+# Growing files are handed out at most this much media at a time, so a
+# long backlog still produces regular verdicts
+MAX_CHUNK_MS = 4000
+
+
+@dataclass
+class LiveChunk:
+    """Newly available media: stream time `start_ms` to `end_ms` of `path`."""
+    path: str
+    start_ms: int
+    end_ms: int
+    # Wall-clock time the data was seen on disk
+    arrived_at: float
+    # Stream time at which the file's own timestamps start
+    offset_ms: int = 0
+    # DASH / fMP4 initialisation segment the fragment has to be prefixed with
+    init_path: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> int:
+        return max(0, self.end_ms - self.start_ms)
+
+    @property
+    def file_span_ms(self) -> Tuple[int, Optional[int]]:
+        """The chunk's span in file time; open-ended when the duration is unknown."""
+        start = self.start_ms - self.offset_ms
+        return start, (start + self.duration_ms if self.duration_ms else None)
+
+
+def _natural_key(name: str) -> List[Any]:
+    """Sort key putting segment_9 before segment_10."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+@contextmanager
+def _readable(path: Union[str, Path], init_path: Optional[str] = None) -> Iterator[str]:
+    """A path decoders can open: fragments are prefixed with their init segment."""
+    if not init_path:
+        yield str(path)
+        return
+    fd, joined = tempfile.mkstemp(suffix=Path(path).suffix or ".mp4")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for part in (init_path, path):
+                with open(part, "rb") as f:
+                    out.write(f.read())
+        yield joined
+    finally:
+        os.unlink(joined)
+
+
+def probe_duration_ms(path: Union[str, Path], init_path: Optional[str] = None) -> int:
+    """Container duration of a media file from its frame count, 0 when unknown."""
+    if not CV2_AVAILABLE:
+        return 0
+    with _readable(path, init_path) as readable:
+        cap = cv2.VideoCapture(readable)
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        finally:
+            cap.release()
+    if not fps or fps <= 0 or not frames or frames <= 0:
+        return 0
+    return int(frames * 1000 / fps)
+
+
+def parse_hls_playlist(text: str) -> Dict[str, Any]:
+    """
+    Segments of an HLS media playlist.
+
+    Returns:
+        Dict with 'segments' (list of (uri, duration_ms)), 'init' (the
+        EXT-X-MAP URI of fMP4 playlists, or None) and 'ended'
+        (EXT-X-ENDLIST seen)
+    """
+    segments = []
+    init = None
+    ended = False
+    duration_ms = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXTINF:"):
+            duration_ms = int(float(line[len("#EXTINF:"):].split(",")[0]) * 1000)
+        elif line.startswith("#EXT-X-MAP:"):
+            match = re.search(r'URI="([^"]+)"', line)
+            init = match.group(1) if match else None
+        elif line.startswith("#EXT-X-ENDLIST"):
+            ended = True
+        elif not line.startswith("#"):
+            segments.append((line, duration_ms))
+            duration_ms = None
+    return {"segments": segments, "init": init, "ended": ended}
+
+
+class SegmentDirectorySource:
+    """
+    Follows a directory of HLS or DASH segments.
+
+    With an HLS media playlist, segments are taken in playlist order as
+    soon as they are listed (packagers only list finished segments) and
+    the stream ends at EXT-X-ENDLIST. Without one (DASH, or bare segment
+    files) segments are taken in name order once they have settled, and a
+    static MPD marks the end. Segment times are stream-relative: each
+    chunk starts where the previous one ended.
+    """
+
+    def __init__(self, directory: Union[str, Path], settle_s: float = SETTLE_S):
+        self.directory = Path(directory)
+        self.settle_s = settle_s
+        self.ended = False
+        self.mode = "segments"
+        self._seen = set()
+        self._sizes: Dict[str, Tuple[int, float]] = {}
+        self._clock_ms = 0
+
+    def _media_playlist(self) -> Optional[Path]:
+        for path in sorted(self.directory.glob("*.m3u8"), key=lambda p: _natural_key(p.name)):
+            try:
+                text = path.read_text()
+            except OSError:
+                continue
+            # Master playlists list variants, not segments
+            if "#EXTINF" in text or "#EXT-X-TARGETDURATION" in text:
+                return path
+        return None
+
+    def _init_segment(self) -> Optional[str]:
+        for path in sorted(self.directory.iterdir()):
+            if "init" in path.name and path.suffix in (".mp4", ".m4s"):
+                return str(path)
+        return None
+
+    def _segment_files(self) -> List[Path]:
+        return sorted(
+            (p for p in self.directory.iterdir()
+             if p.suffix in SEGMENT_SUFFIXES and "init" not in p.name and not p.name.startswith(".")),
+            key=lambda p: _natural_key(p.name),
+        )
+
+    def _settled_segments(self) -> List[Tuple[Path, Optional[int]]]:
+        """Segment files that are finished, in stream order."""
+        files = self._segment_files()
+        now = time.time()
+        settled = []
+        for i, path in enumerate(files):
+            if path.name in self._seen:
+                continue
+            size = path.stat().st_size
+            previous = self._sizes.get(path.name)
+            if previous is None or previous[0] != size:
+                self._sizes[path.name] = (size, now)
+            is_last = i == len(files) - 1
+            if not is_last or (previous is not None and previous[0] == size and now - previous[1] >= self.settle_s):
+                settled.append((path, None))
+            else:
+                # Later segments wait for this one, so chunks stay in order
+                break
+        return settled
+
+    def poll(self) -> List[LiveChunk]:
+        """Chunks for segments that have become available since the last poll."""
+        playlist = self._media_playlist()
+        init_path = None
+        if playlist is not None:
+            self.mode = "hls"
+            parsed = parse_hls_playlist(playlist.read_text())
+            ready = [(self.directory / uri, duration) for uri, duration in parsed["segments"]]
+            if parsed["init"]:
+                init_path = str(self.directory / parsed["init"])
+            ended = parsed["ended"]
+            listed = [path for path, _ in ready]
+        else:
+            ready = self._settled_segments()
+            init_path = self._init_segment()
+            if init_path:
+                self.mode = "dash"
+            ended = any(
+                'type="static"' in mpd.read_text(errors="ignore")
+                for mpd in self.directory.glob("*.mpd")
+            )
+            listed = None
+
+        chunks = []
+        for path, duration_ms in ready:
+            if path.name in self._seen or not path.exists():
+                continue
+            self._seen.add(path.name)
+            if duration_ms is None:
+                duration_ms = probe_duration_ms(path, init_path)
+            chunks.append(LiveChunk(
+                path=str(path),
+                start_ms=self._clock_ms,
+                end_ms=self._clock_ms + duration_ms,
+                arrived_at=path.stat().st_mtime,
+                offset_ms=self._clock_ms,
+                init_path=init_path,
+            ))
+            self._clock_ms += duration_ms
+
+        # Only end once every segment has been handed out
+        if listed is None:
+            listed = self._segment_files()
+        self.ended = ended and all(path.name in self._seen for path in listed)
+        return chunks
+
+
+class GrowingFileSource:
+    """
+    Follows a single file that an ingest process keeps appending to.
+
+    Each poll hands out the media between what was already handed out and
+    the file's current duration (as far as the container can tell while
+    it is being written), capped at MAX_CHUNK_MS. Stream time is the
+    file's own time.
+    """
+
+    def __init__(self, path: Union[str, Path], max_chunk_ms: int = MAX_CHUNK_MS):
+        self.path = Path(path)
+        self.max_chunk_ms = max_chunk_ms
+        self.ended = False
+        self.mode = "file"
+        self._handed_out_ms = 0
+
+    def available_ms(self) -> int:
+        """Duration of the media written so far."""
+        if not self.path.exists():
+            return 0
+        return probe_duration_ms(self.path)
+
+    def poll(self) -> List[LiveChunk]:
+        available = self.available_ms()
+        if available <= self._handed_out_ms:
+            return []
+        chunks = []
+        while self._handed_out_ms < available:
+            end_ms = min(available, self._handed_out_ms + self.max_chunk_ms)
+            chunks.append(LiveChunk(
+                path=str(self.path),
+                start_ms=self._handed_out_ms,
+                end_ms=end_ms,
+                arrived_at=time.time(),
+            ))
+            self._handed_out_ms = end_ms
+        return chunks
+
+
+def open_source(path: Union[str, Path]):
+    """A segment directory source for directories, a growing file source otherwise."""
+    path = Path(path)
+    if path.is_dir():
+        return SegmentDirectorySource(path)
+    if path.suffix == ".m3u8":
+        return SegmentDirectorySource(path.parent)
+    return GrowingFileSource(path)
+
+
+def decode_frames(
+    path: Union[str, Path],
+    fps: float,
+    start_ms: int = 0,
+    end_ms: Optional[int] = None,
+    init_path: Optional[str] = None,
+) -> List[Tuple[int, np.ndarray]]:
+    """
+    Frames of a file between two file-relative times, sampled at `fps`.
+
+    Sampling follows the frames' timestamps rather than their index, so
+    consecutive chunks of one file are sampled on the same grid.
+
+    Returns:
+        List of (timestamp_ms, BGR frame)
+    """
+    if not CV2_AVAILABLE:
+        raise ImportError("opencv is required for live decoding")
+
+    interval_ms = 1000.0 / fps
+    # First grid point at or after start_ms
+    next_sample_ms = np.ceil(start_ms / interval_ms) * interval_ms
+    frames = []
+    with _readable(path, init_path) as readable:
+        cap = cv2.VideoCapture(readable)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {path}")
+        try:
+            if start_ms > 0:
+                cap.set(cv2.CAP_PROP_POS_MSEC, start_ms)
+            # grab() advances without converting frames that are not sampled
+            while cap.grab():
+                timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                if end_ms is not None and timestamp_ms >= end_ms:
+                    break
+                if timestamp_ms + 1e-3 < next_sample_ms:
+                    continue
+                ok, frame = cap.retrieve()
+                if ok:
+                    frames.append((int(timestamp_ms), frame))
+                next_sample_ms = (np.floor(timestamp_ms / interval_ms) + 1) * interval_ms
+        finally:
+            cap.release()
+    return frames
+
+
+def decode_chunk_frames(chunk: LiveChunk, fps: float) -> List[Tuple[int, np.ndarray]]:
+    """Frames of a chunk sampled at `fps`, as (stream timestamp_ms, BGR frame)."""
+    start_ms, end_ms = chunk.file_span_ms
+    frames = decode_frames(chunk.path, fps, start_ms, end_ms, init_path=chunk.init_path)
+    return [(timestamp_ms + chunk.offset_ms, frame) for timestamp_ms, frame in frames]
+
+
+def decode_chunk_audio(chunk: LiveChunk, work_dir: Union[str, Path]) -> np.ndarray:
+    """Decode a chunk's audio through a scratch buffer in `work_dir`."""
+    start_ms, end_ms = chunk.file_span_ms
+    buffer_path = Path(work_dir) / f"live_{uuid.uuid4().hex}{BUFFER_SUFFIX}"
+    with _readable(chunk.path, chunk.init_path) as readable:
+        decode_to_buffer(
+            readable,
+            buffer_path,
+            start_ms=start_ms,
+            duration_ms=end_ms - start_ms if end_ms is not None else None,
+        )
+    samples = np.array(open_audio_buffer(buffer_path))
+    buffer_path.unlink(missing_ok=True)
+    return samples
+
+
+class RollingWindow:
+    """
+    Per-modality unit scores over the most recent `window_ms` of a stream,
+    plus running totals over the whole stream.
+
+    Aggregates have the same fields as a pipeline stage's partial scores
+    ('n', 'sum', 'sum_sq', 'max'); 'total' is None because a live stream
+    has no known length.
+    """
+
+    def __init__(self, window_ms: int):
+        self.window_ms = window_ms
+        self._recent: Dict[str, Deque[Tuple[int, float]]] = defaultdict(deque)
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def add(self, modality: str, timestamp_ms: int, score: float) -> None:
+        score = float(score)
+        self._recent[modality].append((int(timestamp_ms), score))
+        totals = self._totals.setdefault(modality, {"n": 0, "sum": 0.0, "sum_sq": 0.0, "max": 0.0})
+        totals["n"] += 1
+        totals["sum"] += score
+        totals["sum_sq"] += score * score
+        totals["max"] = max(totals["max"], score)
+
+    @staticmethod
+    def _aggregate(scores: np.ndarray) -> Dict[str, Any]:
+        return {
+            "n": int(len(scores)),
+            "total": None,
+            "sum": float(scores.sum()),
+            "sum_sq": float((scores ** 2).sum()),
+            "max": float(scores.max()) if len(scores) else 0.0,
+        }
+
+    def window(self, now_ms: int) -> Dict[str, Dict[str, Any]]:
+        """Aggregates of the scores timestamped in (now_ms - window_ms, now_ms]."""
+        aggregates = {}
+        for modality, recent in self._recent.items():
+            while recent and recent[0][0] <= now_ms - self.window_ms:
+                recent.popleft()
+            if recent:
+                aggregates[modality] = self._aggregate(np.array([s for _, s in recent]))
+        return aggregates
+
+    def cumulative(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregates over everything scored so far."""
+        return {
+            modality: {**totals, "n": int(totals["n"]), "total": None}
+            for modality, totals in self._totals.items()
+        }
+
+    def mean(self, modality: str) -> float:
+        totals = self._totals.get(modality)
+        return totals["sum"] / totals["n"] if totals and totals["n"] else 0.0
@@ -0,0 +1,538 @@
+"""
+Local model server.
+
+One long-running process per node owns the models and serves forward
+passes to every worker process over a Unix-domain socket. Input and
+output tensors travel through shared memory; only a small JSON header
+crosses the socket. Requests for the same model that arrive within a
+short window are stacked into one batch, so concurrent workers share
+both the weights and the forward passes.
+
+Run with:
+    python -m inference.model_server --socket /run/deepfakeshield/models.sock \\
+        --model video=models/video_forensics.safetensors --model audio --whisper base
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+from .audio_buffer import buffer_to_tensor, is_audio_buffer, open_audio_buffer
+
+
+DEFAULT_SOCKET_PATH = "/tmp/deepfakeshield-models.sock"
+
+# (header length, payload length) prefix of every message
+_PREFIX = struct.Struct(">II")
+
+# Smallest shared-memory segment a client allocates
+_MIN_SEGMENT_BYTES = 1 << 20
+
+# Segments created by clients in this process
+_owned_segments = set()
+
+
+def _recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    """Read exactly n bytes, or None if the peer closed the connection."""
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> None:
+    data = json.dumps(header).encode()
+    sock.sendall(_PREFIX.pack(len(data), len(payload)) + data + payload)
+
+
+def _recv_message(sock: socket.socket) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    prefix = _recv_exact(sock, _PREFIX.size)
+    if prefix is None:
+        return None
+    header_len, payload_len = _PREFIX.unpack(prefix)
+    header = json.loads(_recv_exact(sock, header_len))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a segment owned by another process.
+
+    Before Python 3.13 attaching also registers the segment with this
+    process's resource tracker, which would unlink it on exit; the owner
+    is responsible for that.
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    if name not in _owned_segments:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class _ForwardRequest:
+    """One client's input waiting to be batched."""
+
+    __slots__ = ("array", "future")
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self.future: Future = Future()
+
+
+class _Batcher(threading.Thread):
+    """
+    Collects requests for one model and runs them as stacked batches.
+
+    A batch closes when it reaches `max_batch_size` rows or `max_wait_ms`
+    after its first request. Requests are stacked along the first axis
+    and grouped by trailing shape, so inputs of different sizes (e.g.
+    spectrograms of different durations) are run separately.
+    """
+
+    def __init__(self, name: str, service: Any, max_batch_size: int, max_wait_ms: float):
+        super().__init__(name=f"batcher-{name}", daemon=True)
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.requests: "queue.Queue[Optional[_ForwardRequest]]" = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+
+    def submit(self, array: np.ndarray) -> Future:
+        request = _ForwardRequest(array)
+        self.requests.put(request)
+        return request.future
+
+    def stop(self) -> None:
+        self.requests.put(None)
+
+    def run(self) -> None:
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+
+            pending = [first]
+            rows = len(first.array)
+            deadline = time.monotonic() + self.max_wait_s
+            stopping = False
+
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+                rows += len(request.array)
+
+            self._run_batches(pending)
+            if stopping:
+                return
+
+    def _run_batches(self, pending: List[_ForwardRequest]) -> None:
+        groups: Dict[Tuple, List[_ForwardRequest]] = {}
+        for request in pending:
+            key = (request.array.shape[1:], request.array.dtype.str)
+            groups.setdefault(key, []).append(request)
+
+        for group in groups.values():
+            try:
+                batch = np.concatenate([r.array for r in group])
+                with torch.no_grad():
+                    inputs = torch.from_numpy(batch).to(self.service.device)
+                    outputs = self.service._forward(inputs).detach().cpu().numpy()
+            except Exception as e:
+                for request in group:
+                    request.future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(group)
+            self.stats["batches"] += 1
+            self.stats["rows"] += len(batch)
+
+            start = 0
+            for request in group:
+                end = start + len(request.array)
+                request.future.set_result(outputs[start:end])
+                start = end
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serves one client connection until it closes."""
+
+    def handle(self) -> None:
+        server: "ModelServer" = self.server.model_server
+        segment: Optional[shared_memory.SharedMemory] = None
+
+        try:
+            while True:
+                message = _recv_message(self.request)
+                if message is None:
+                    return
+                header, _ = message
+
+                try:
+                    op = header.get("op")
+                    if op == "forward":
+                        if segment is None or segment.name != header["shm"]:
+                            if segment is not None:
+                                segment.close()
+                            segment = _attach_segment(header["shm"])
+                        response, payload = server.forward(header, segment)
+                    elif op == "transcribe":
+                        response, payload = server.transcribe(header), b""
+                    elif op == "info":
+                        response, payload = server.info(), b""
+                    else:
+                        raise ValueError(f"Unknown op: {op}")
+                    response["ok"] = True
+                except Exception as e:
+                    response, payload = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+
+                _send_message(self.request, response, payload)
+        finally:
+            if segment is not None:
+                segment.close()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ModelServer:
+    """
+    Owns loaded inference services and serves their forward passes.
+
+    Args:
+        services: Loaded services by model name (e.g. 'video', 'audio')
+        socket_path: Unix-domain socket to listen on
+        max_batch_size: Row count at which a batch is closed early
+        max_wait_ms: How long the first request of a batch waits for others
+        whisper_model: Whisper model size to serve transcription with
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, Any],
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        whisper_model: Optional[str] = None,
+    ):
+        self.services = services
+        self.socket_path = socket_path
+        self.batchers = {
+            name: _Batcher(name, service, max_batch_size, max_wait_ms)
+            for name, service in services.items()
+        }
+        self.whisper_model = whisper_model
+        self._whisper = None
+        self._whisper_lock = threading.Lock()
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def forward(self, header: Dict[str, Any], segment: shared_memory.SharedMemory) -> Tuple[Dict[str, Any], bytes]:
+        """Run one client's input through its model's batcher."""
+        batcher = self.batchers.get(header["model"])
+        if batcher is None:
+            raise KeyError(f"Model not served: {header['model']}")
+
+        view = np.ndarray(header["shape"], dtype=np.dtype(header["dtype"]), buffer=segment.buf)
+        array = view.copy()
+        del view
+
+        output = np.ascontiguousarray(batcher.submit(array).result())
+        response = {"shape": list(output.shape), "dtype": output.dtype.str}
+
+        # Outputs go back through the client's segment when they fit
+        if output.nbytes <= segment.size:
+            out_view = np.ndarray(output.shape, dtype=output.dtype, buffer=segment.buf)
+            out_view[...] = output
+            del out_view
+            response["inline"] = False
+            return response, b""
+
+        response["inline"] = True
+        return response, output.tobytes()
+
+    def transcribe(self, header: Dict[str, Any]) -> Dict[str, Any]:
+        """Transcribe an audio file or decoded buffer with the shared Whisper model."""
+        if self.whisper_model is None:
+            raise RuntimeError("Transcription is not enabled on this server")
+
+        audio = header["audio_path"]
+        if is_audio_buffer(audio):
+            audio = buffer_to_tensor(open_audio_buffer(audio))
+
+        with self._whisper_lock:
+            if self._whisper is None:
+                import whisper
+                self._whisper = whisper.load_model(self.whisper_model)
+            result = self._whisper.transcribe(audio, **header.get("options", {}))
+
+        # Only the fields the pipeline reads, as plain JSON types
+        return {
+            "text": result.get("text", ""),
+            "segments": [
+                {
+                    "words": [
+                        {
+                            "word": w["word"],
+                            "start": float(w["start"]),
+                            "end": float(w["end"]),
+                            "probability": float(w.get("probability", 0.0)),
+                        }
+                        for w in segment.get("words", [])
+                    ]
+                }
+                for segment in result.get("segments", [])
+            ],
+        }
+
+    def info(self) -> Dict[str, Any]:
+        """Served models and batching statistics."""
+        models = {}
+        for name, batcher in self.batchers.items():
+            stats = dict(batcher.stats)
+            stats["mean_batch_rows"] = round(stats["rows"] / stats["batches"], 2) if stats["batches"] else 0.0
+            models[name] = {"stats": stats, "model_info": self.services[name].get_model_info()}
+        return {"pid": os.getpid(), "models": models, "whisper_model": self.whisper_model}
+
+    def start(self) -> "ModelServer":
+        """Start serving on a background thread."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+
+        for batcher in self.batchers.values():
+            batcher.start()
+
+        self._server = _UnixServer(self.socket_path, _RequestHandler)
+        self._server.model_server = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="model-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve until interrupted."""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for batcher in self.batchers.values():
+            batcher.stop()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class ModelServerClient:
+    """
+    Client for a local model server.
+
+    Each thread keeps its own connection and shared-memory segment; the
+    segment is reused across requests and grown when an input does not
+    fit. Segments are owned (and unlinked) by the client.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout_s: Optional[float] = 300.0):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+        self._segments: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _state(self) -> threading.local:
+        state = self._local
+        # A forked child must not share its parent's connection
+        if getattr(state, "pid", None) != os.getpid():
+            state.pid = os.getpid()
+            state.sock = None
+            state.segment = None
+        return state
+
+    def _connection(self) -> socket.socket:
+        state = self._state()
+        if state.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_s)
+            sock.connect(self.socket_path)
+            state.sock = sock
+        return state.sock
+
+    def _segment(self, nbytes: int) -> shared_memory.SharedMemory:
+        state = self._state()
+        if state.segment is None or state.segment.size < nbytes:
+            size = max(_MIN_SEGMENT_BYTES, 1 << (max(nbytes, 1) - 1).bit_length())
+            segment = shared_memory.SharedMemory(create=True, size=size)
+            _owned_segments.add(segment.name)
+            with self._lock:
+                if state.segment is not None:
+                    self._release(state.segment)
+                self._segments.append(segment)
+            state.segment = segment
+        return state.segment
+
+    def _release(self, segment: shared_memory.SharedMemory) -> None:
+        self._segments.remove(segment)
+        _owned_segments.discard(segment.name)
+        segment.close()
+        segment.unlink()
+
+    def _request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        sock = self._connection()
+        try:
+            _send_message(sock, header)
+            message = _recv_message(sock)
+        except OSError:
+            self._state().sock = None
+            sock.close()
+            raise
+        if message is None:
+            self._state().sock = None
+            raise ConnectionError("Model server closed the connection")
+
+        response, payload = message
+        if not response.get("ok"):
+            raise RuntimeError(f"Model server error: {response.get('error')}")
+        return response, payload
+
+    def forward(self, model: str, array: np.ndarray) -> np.ndarray:
+        """Run a batch through a served model."""
+        array = np.ascontiguousarray(array)
+        segment = self._segment(array.nbytes)
+
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+        view[...] = array
+        del view
+
+        response, payload = self._request({
+            "op": "forward",
+            "model": model,
+            "shm": segment.name,
+            "shape": list(array.shape),
+            "dtype": array.dtype.str,
+        })
+
+        dtype = np.dtype(response["dtype"])
+        if response["inline"]:
+            return np.frombuffer(payload, dtype=dtype).reshape(response["shape"]).copy()
+
+        view = np.ndarray(response["shape"], dtype=dtype, buffer=segment.buf)
+        output = view.copy()
+        del view
+        return output
+
+    def transcribe(self, audio_path: str, **options) -> Dict[str, Any]:
+        """Transcribe with the server's Whisper model (options go to whisper)."""
+        response, _ = self._request({"op": "transcribe", "audio_path": str(audio_path), "options": options})
+        response.pop("ok", None)
+        return response
+
+    def info(self) -> Dict[str, Any]:
+        response, _ = self._request({"op": "info"})
+        response.pop("ok", None)
+        return response
+
+    def close(self) -> None:
+        """Close this thread's connection and unlink every segment this client created."""
+        state = self._state()
+        if state.sock is not None:
+            state.sock.close()
+            state.sock = None
+        state.segment = None
+        with self._lock:
+            for segment in list(self._segments):
+                try:
+                    self._release(segment)
+                except (BufferError, FileNotFoundError):
+                    pass
+
+
+def main():
+    """Load the requested models and serve them."""
+    from .video_forensics import VideoForensicsService
+    from .audio_spoof import AudioSpoofService
+
+    service_classes = {"video": VideoForensicsService, "audio": AudioSpoofService}
+
+    parser = argparse.ArgumentParser(description="Local model server")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument(
+        "--model", action="append", default=[],
+        help="name[=weights path], name one of: " + ", ".join(service_classes),
+    )
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--whisper", default=None, help="Whisper model size to serve")
+    parser.add_argument("--compile", action="store_true", help="Run models with torch.compile")
+    parser.add_argument("--precision", default="fp32", choices=["fp32", "bf16"])
+    parser.add_argument("--channels-last", action="store_true", help="Use channels-last memory layout")
+    args = parser.parse_args()
+
+    services = {}
+    for spec in args.model:
+        name, _, path = spec.partition("=")
+        service = service_classes[name](
+            model_path=path or None,
+            device=args.device,
+            compile_model=args.compile,
+            precision=args.precision,
+            channels_last=args.channels_last,
+        )
+        service.load_model()
+        print(f"Loaded {name}: {service.load_stats}")
+        # Client batches are stacked up to the server's batch size
+        print(f"Warmed up {name}: {service.warmup(args.max_batch_size)}")
+        services[name] = service
+
+    server = ModelServer(
+        services,
+        socket_path=args.socket,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        whisper_model=args.whisper,
+    )
+    print(f"Serving {', '.join(services) or 'no models'} on {args.socket}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
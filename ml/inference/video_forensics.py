@@ -20,7 +20,27 @@ try:
 except ImportError:
     CV2_AVAILABLE = False
 
-from .base import BaseInferenceService
+from .base import BaseInferenceService, InferenceCancelled
+from .frame_store import FrameStore
+
+
+if TORCH_AVAILABLE:
+    class _EmbeddingViT(nn.Module):
+        """
+        Runs a torchvision ViT and returns the head's probability followed
+        by the CLS embedding it was computed from, as one (N, 1 + D) tensor.
+        """
+        
+        def __init__(self, vit: nn.Module):
+            super().__init__()
+            self.vit = vit
+        
+        def forward(self, x: "torch.Tensor") -> "torch.Tensor":
+            x = self.vit._process_input(x)
+            cls_token = self.vit.class_token.expand(x.shape[0], -1, -1)
+            x = self.vit.encoder(torch.cat([cls_token, x], dim=1))
+            embedding = x[:, 0]
+            return torch.cat([self.vit.heads(embedding), embedding], dim=1)
 
 
 class VideoForensicsService(BaseInferenceService):
@@ -30,6 +50,8 @@ class VideoForensicsService(BaseInferenceService):
     """
     
     MODEL_VERSION = "v1.0.0"
+    SERVER_MODEL_NAME = "video"
+    BATCH_BUCKETS = (1, 2, 4, 8, 16)
     DEFAULT_IMAGE_SIZE = 224
     DEFAULT_BATCH_SIZE = 16
     
@@ -39,11 +61,16 @@ class VideoForensicsService(BaseInferenceService):
         device: str = "cpu",
         image_size: int = DEFAULT_IMAGE_SIZE,
         batch_size: int = DEFAULT_BATCH_SIZE,
+        server_socket: Optional[str] = None,
+        compile_model: bool = False,
+        precision: str = "fp32",
+        channels_last: bool = False,
     ):
-        super().__init__(model_path, device)
+        super().__init__(model_path, device, server_socket, compile_model, precision, channels_last)
         self.image_size = image_size
         self.batch_size = batch_size
         self.transform = None
+        self._embedding_module = None
         
     def load_model(self) -> None:
         """Load the ViT model for deepfake detection."""
@@ -62,24 +89,18 @@ class VideoForensicsService(BaseInferenceService):
             ),
         ])
         
-        if self.model_path and Path(self.model_path).exists():
-            # Load custom trained model
-            self.model = torch.load(self.model_path, map_location=self.device)
-            self.model.eval()
+        if self.server_client is not None:
+            # Weights live in the model server; only the transforms run here
+            pass
+        elif self.model_path and Path(self.model_path).exists():
+            # Load custom trained model, mapped from disk
+            self.model = self._load_weights(self._create_model)
         else:
             # Use pretrained ViT as placeholder
             # In production, replace with fine-tuned deepfake detector
             try:
-                from torchvision.models import vit_b_16, ViT_B_16_Weights
-                self.model = vit_b_16(weights=ViT_B_16_Weights.DEFAULT)
-                # Modify head for binary classification
-                self.model.heads = nn.Sequential(
-                    nn.Linear(768, 256),
-                    nn.ReLU(),
-                    nn.Dropout(0.3),
-                    nn.Linear(256, 1),
-                    nn.Sigmoid()
-                )
+                from torchvision.models import ViT_B_16_Weights
+                self.model = self._create_model(ViT_B_16_Weights.DEFAULT)
                 self.model.to(self.device)
                 self.model.eval()
             except Exception:
@@ -87,17 +108,64 @@ class VideoForensicsService(BaseInferenceService):
         
         self.is_loaded = True
     
+    def _create_model(self, backbone_weights: Any = None) -> nn.Module:
+        """ViT-B/16 with a binary classification head."""
+        from torchvision.models import vit_b_16
+        model = vit_b_16(weights=backbone_weights)
+        # Modify head for binary classification
+        model.heads = nn.Sequential(
+            nn.Linear(768, 256),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(256, 1),
+            nn.Sigmoid()
+        )
+        return model
+    
+    def _forward_module(self) -> Any:
+        """The ViT wrapped to also return CLS embeddings (other models as is)."""
+        from torchvision.models import VisionTransformer
+        if not isinstance(self.model, VisionTransformer):
+            return self.model
+        if self._embedding_module is None or self._embedding_module.vit is not self.model:
+            self._embedding_module = _EmbeddingViT(self.model)
+        return self._embedding_module
+    
+    def _warmup_sample_shapes(self) -> List[tuple]:
+        """One normalised RGB frame."""
+        return [(3, self.image_size, self.image_size)]
+    
+    def _max_local_batch(self) -> Optional[int]:
+        return self.batch_size
+    
     def preprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Preprocess video frames for inference.
         
         Args:
-            input_data: Dict with 'frames' (list of frame paths or numpy arrays)
-                       or 'frames_dir' (path to directory with frames)
+            input_data: Dict with 'frame_store' (a job's frame store, with
+                       optional 'start'/'stop' indices), 'frames' (list of
+                       frame paths or numpy arrays) or 'frames_dir' (path
+                       to directory with frames), and optionally
+                       'should_stop', a callback polled between batches
+                       that cancels inference when it returns True, and
+                       'batch_size', overriding the service's batch size
         """
         frames = []
         
-        if "frames_dir" in input_data:
+        if "frame_store" in input_data:
+            # RGB frames straight from the mapped store, no per-file reads
+            store = FrameStore(input_data["frame_store"])
+            start = input_data.get("start", 0)
+            stop = min(input_data.get("stop", len(store)), len(store))
+            for index in range(start, stop):
+                frames.append({
+                    "image": store[index],
+                    "path": None,
+                    "timestamp_ms": int(store.timestamps_ms[index]),
+                })
+        
+        elif "frames_dir" in input_data:
             frames_dir = Path(input_data["frames_dir"])
             frame_paths = sorted(frames_dir.glob("*.jpg")) + sorted(frames_dir.glob("*.png"))
             for path in frame_paths:
@@ -120,14 +188,22 @@ class VideoForensicsService(BaseInferenceService):
                 elif isinstance(frame_info, np.ndarray):
                     frames.append({"image": frame_info, "path": None, "timestamp_ms": 0})
         
-        return {"frames": frames, "total_frames": len(frames)}
+        return {
+            "frames": frames,
+            "total_frames": len(frames),
+            "should_stop": input_data.get("should_stop"),
+            "batch_size": input_data.get("batch_size"),
+        }
     
     def predict(self, preprocessed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Run inference on preprocessed frames."""
         frames = preprocessed_data["frames"]
+        should_stop = preprocessed_data.get("should_stop")
+        batch_size = preprocessed_data.get("batch_size") or self.batch_size
         predictions = []
+        embeddings = []
         
-        if not TORCH_AVAILABLE or self.model is None:
+        if not TORCH_AVAILABLE or not self.has_model:
             # Fallback: return simulated predictions
             for i, frame_info in enumerate(frames):
                 predictions.append({
@@ -136,12 +212,14 @@ class VideoForensicsService(BaseInferenceService):
                     "fake_probability": np.random.uniform(0.05, 0.25),
                     "path": frame_info.get("path"),
                 })
-            return {"predictions": predictions}
+            return {"predictions": predictions, "embeddings": None}
         
         # Process in batches
         with torch.no_grad():
-            for i in range(0, len(frames), self.batch_size):
-                batch_frames = frames[i:i + self.batch_size]
+            for i in range(0, len(frames), batch_size):
+                if should_stop is not None and should_stop():
+                    raise InferenceCancelled(f"Stopped after {i} of {len(frames)} frames")
+                batch_frames = frames[i:i + batch_size]
                 batch_tensors = []
                 
                 for frame_info in batch_frames:
@@ -151,11 +229,12 @@ class VideoForensicsService(BaseInferenceService):
                 
                 if batch_tensors:
                     batch = torch.stack(batch_tensors).to(self.device)
-                    outputs = self.model(batch)
-                    probs = outputs.squeeze().cpu().numpy()
-                    
-                    if probs.ndim == 0:
-                        probs = [float(probs)]
+                    # Column 0 is the probability; any further columns
+                    # are the frame's CLS embedding
+                    outputs = self._forward(batch).reshape(len(batch_tensors), -1).cpu()
+                    probs = outputs[:, 0].numpy()
+                    if outputs.shape[1] > 1:
+                        embeddings.append(outputs[:, 1:].numpy().astype(np.float16))
                     
                     for j, prob in enumerate(probs):
                         frame_info = batch_frames[j]
@@ -166,7 +245,10 @@ class VideoForensicsService(BaseInferenceService):
                             "path": frame_info.get("path"),
                         })
         
-        return {"predictions": predictions}
+        return {
+            "predictions": predictions,
+            "embeddings": np.concatenate(embeddings) if embeddings else None,
+        }
     
     def postprocess(self, raw_output: Dict[str, Any]) -> Dict[str, Any]:
         """Aggregate frame-level predictions."""
@@ -216,6 +298,8 @@ class VideoForensicsService(BaseInferenceService):
             "flagged_frame_count": len(flagged_frames),
             "flagged_frames": flagged_frames[:10],  # Limit for response size
             "predictions": predictions,
+            # (frame_count, D) float16 CLS embeddings, when the model exposes them
+            "embeddings": raw_output.get("embeddings"),
         }
     
     def get_model_info(self) -> Dict[str, Any]:
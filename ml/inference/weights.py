@@ -0,0 +1,159 @@
+"""
+Memory-mapped model weights.
+
+Weights are stored as safetensors files and loaded by mapping the file
+instead of reading it into process memory. Every worker process that
+loads the same file shares its pages through the OS page cache, so a
+node running N inference workers does not hold N private copies of the
+weights, and a freshly forked child starts without a full read.
+"""
+import argparse
+import os
+import resource
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+try:
+    import torch
+    import torch.nn as nn
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    from safetensors.torch import load_file, save_file
+    SAFETENSORS_AVAILABLE = True
+except ImportError:
+    SAFETENSORS_AVAILABLE = False
+
+
+SAFETENSORS_SUFFIX = ".safetensors"
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Resident memory of this process in MB.
+
+    'private_mb' counts anonymous pages owned by this process alone;
+    'shared_mb' counts file-backed and shared pages, which is where
+    memory-mapped weights show up.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile", "RssShmem"):
+                    fields[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+
+    if "VmRSS" not in fields:
+        # No procfs: fall back to peak RSS (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return {"rss_mb": round(peak / divisor, 1)}
+
+    return {
+        "rss_mb": round(fields["VmRSS"], 1),
+        "private_mb": round(fields.get("RssAnon", 0.0), 1),
+        "shared_mb": round(fields.get("RssFile", 0.0) + fields.get("RssShmem", 0.0), 1),
+    }
+
+
+def weights_format(path: Union[str, Path]) -> str:
+    """Storage format of a weights file, from its suffix."""
+    return "safetensors" if str(path).endswith(SAFETENSORS_SUFFIX) else "torch"
+
+
+def save_weights(model: Union["nn.Module", Dict[str, "torch.Tensor"]], path: Union[str, Path]) -> str:
+    """
+    Save a model's state dict as safetensors.
+
+    The file is written to a temporary name and renamed into place, so a
+    worker never maps a partially written file.
+    """
+    if not SAFETENSORS_AVAILABLE:
+        raise ImportError("safetensors is required to save memory-mappable weights")
+
+    state = model.state_dict() if isinstance(model, nn.Module) else model
+    # safetensors rejects tensors that share storage (tied weights), so
+    # each one is written from its own contiguous copy
+    tensors = {name: t.detach().to("cpu").contiguous().clone() for name, t in state.items()}
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    save_file(tensors, str(tmp_path), metadata={"format": "pt"})
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def load_weights(path: Union[str, Path]) -> Union["nn.Module", Dict[str, "torch.Tensor"]]:
+    """
+    Load weights mapped from disk onto the CPU.
+
+    safetensors files return a state dict whose tensors view the mapped
+    file. Other checkpoints go through torch.load with mmap, which maps
+    zip-format files (state dicts or pickled modules); legacy checkpoints
+    that cannot be mapped are read normally.
+    """
+    path = Path(path)
+
+    if weights_format(path) == "safetensors":
+        if not SAFETENSORS_AVAILABLE:
+            raise ImportError(f"safetensors is required to load {path}")
+        return load_file(str(path), device="cpu")
+
+    try:
+        return torch.load(str(path), map_location="cpu", mmap=True, weights_only=False)
+    except RuntimeError:
+        return torch.load(str(path), map_location="cpu", weights_only=False)
+
+
+def materialize(
+    weights: Union["nn.Module", Dict[str, "torch.Tensor"]],
+    build_fn: Optional[Callable[[], "nn.Module"]] = None,
+    device: str = "cpu",
+) -> "nn.Module":
+    """
+    Turn loaded weights into an eval-mode module on the target device.
+
+    A state dict needs `build_fn` for the architecture. The module is
+    built on the meta device and the mapped tensors are assigned as its
+    parameters, so no memory is spent on an initialisation that would
+    be overwritten and CPU parameters stay backed by the file.
+    """
+    if isinstance(weights, nn.Module):
+        model = weights
+    else:
+        if build_fn is None:
+            raise ValueError("A state dict checkpoint needs an architecture to load into")
+        with torch.device("meta"):
+            model = build_fn()
+        model.load_state_dict(weights, assign=True)
+
+    if device != "cpu":
+        model.to(device)
+    model.eval()
+    return model
+
+
+def main():
+    """Convert a torch checkpoint to safetensors."""
+    parser = argparse.ArgumentParser(description="Convert model weights to safetensors")
+    parser.add_argument("source", help="torch checkpoint (state dict or pickled module)")
+    parser.add_argument("output", nargs="?", help="output path (default: source with .safetensors)")
+    args = parser.parse_args()
+
+    weights = load_weights(args.source)
+    if isinstance(weights, dict) and "model_state_dict" in weights:
+        # Training checkpoints wrap the state dict with optimizer state
+        weights = weights["model_state_dict"]
+
+    output = args.output or str(Path(args.source).with_suffix(SAFETENSORS_SUFFIX))
+    print(save_weights(weights, output))
+
+
+if __name__ == "__main__":
+    main()
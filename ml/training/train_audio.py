@@ -21,10 +21,14 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from datasets import DeepfakeAudioDataset, create_data_loaders
+from inference.weights import save_weights
+
+if TORCH_AVAILABLE:
+    from inference.audio_spoof import AudioSpoofNet
 
 
 class AudioSpoofModel(nn.Module):
-    """Simple CNN for audio spoof detection."""
+    """Mel spectrogram front end over the network the inference service loads."""
     
     def __init__(self, sample_rate: int = 16000):
         super().__init__()
@@ -35,46 +39,14 @@ class AudioSpoofModel(nn.Module):
             hop_length=256,
             n_mels=80,
         )
-        
-        self.features = nn.Sequential(
-            nn.Conv2d(1, 32, kernel_size=3, padding=1),
-            nn.BatchNorm2d(32),
-            nn.ReLU(),
-            nn.MaxPool2d(2),
-            
-            nn.Conv2d(32, 64, kernel_size=3, padding=1),
-            nn.BatchNorm2d(64),
-            nn.ReLU(),
-            nn.MaxPool2d(2),
-            
-            nn.Conv2d(64, 128, kernel_size=3, padding=1),
-            nn.BatchNorm2d(128),
-            nn.ReLU(),
-            nn.MaxPool2d(2),
-            
-            nn.Conv2d(128, 256, kernel_size=3, padding=1),
-            nn.BatchNorm2d(256),
-            nn.ReLU(),
-            nn.AdaptiveAvgPool2d((4, 4)),
-        )
-        
-        self.classifier = nn.Sequential(
-            nn.Flatten(),
-            nn.Linear(256 * 16, 256),
-            nn.ReLU(),
-            nn.Dropout(0.5),
-            nn.Linear(256, 1),
-            nn.Sigmoid(),
-        )
+        self.net = AudioSpoofNet()
     
     def forward(self, x):
         # x: (batch, samples)
         mel_spec = self.mel_transform(x)  # (batch, n_mels, time)
         mel_spec = mel_spec.unsqueeze(1)  # (batch, 1, n_mels, time)
         mel_spec = (mel_spec - mel_spec.mean()) / (mel_spec.std() + 1e-8)
-        
-        features = self.features(mel_spec)
-        return self.classifier(features)
+        return self.net(mel_spec)
 
 
 def train_epoch(model, loader, criterion, optimizer, device):
@@ -173,7 +145,9 @@ def main():
     test_loss, test_acc = validate(model, test_loader, criterion, device)
     print(f"\nTest Accuracy: {test_acc:.4f}")
     
-    torch.save(model.state_dict(), output_dir / "audio_spoof_final.pt")
+    # Memory-mappable weights for the inference workers, under the name they
+    # look up in ML_MODELS_PATH; the mel front end is fixed and not saved
+    save_weights(model.net, output_dir / "audio_spoof.safetensors")
     writer.close()
 
 
@@ -23,6 +23,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from datasets import DeepfakeVideoDataset, create_data_loaders
+from inference.weights import save_weights
 
 
 def create_model(num_classes: int = 1, pretrained: bool = True):
@@ -204,8 +205,9 @@ def main():
     test_loss, test_acc, preds, labels = validate(model, test_loader, criterion, device)
     print(f"Test Accuracy: {test_acc:.4f}")
     
-    # Save final
-    torch.save(model.state_dict(), output_dir / "video_forensics_final.pt")
+    # Memory-mappable weights for the inference workers, under the name they
+    # look up in ML_MODELS_PATH
+    save_weights(model, output_dir / "video_forensics.safetensors")
     
     # Save metrics
     with open(output_dir / "metrics.json", "w") as f:
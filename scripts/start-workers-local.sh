@@ -15,7 +15,10 @@ celery -A app.core.celery_app worker -Q preprocess --loglevel=info --detach --pi
 echo "🧠 Starting Inference Worker..."
 celery -A app.core.celery_app worker -Q inference --loglevel=info --detach --pidfile="/tmp/celery-inference.pid" --logfile="celery-inference.log"
 
+echo "📡 Starting Live Worker..."
+celery -A app.core.celery_app worker -Q live --loglevel=info --detach --pidfile="/tmp/celery-live.pid" --logfile="celery-live.log"
+
 echo "🔔 Starting Default Worker..."
-celery -A app.core.celery_app worker -Q default --loglevel=info --detach --pidfile="/tmp/celery-default.pid" --logfile="celery-default.log"
+celery -A app.core.celery_app worker -Q default -B --loglevel=info --detach --pidfile="/tmp/celery-default.pid" --logfile="celery-default.log"
 
 echo "✅ Workers started in background."